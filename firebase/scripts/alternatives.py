@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alternative Investment Comparison
+Projects each property's equity and cash flow over 1-30 years and compares
+them with putting the same cash into a HYSA or an index fund, under one or
+more rate scenarios read from a CSV file.
+
+Rate CSV format (rates in percent; missing later years repeat the last one):
+    scenario,year,hysaRate,indexFundTotalRate,indexDividendRate
+    base,1,4.5,10,2
+    base,2,4.0,10,2
+    bear,1,4.5,-15,2.5
+
+Usage:
+    python alternatives.py exports/ --rates rates.csv --horizons 5,10,20,30
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from project_files import load_projects
+from result_cache import ResultCache, add_cache_argument, cached_per_project, engine_version
+from vector_calculations import monthly_payments, property_columns, remaining_balance
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Longest projection, in years
+MAX_YEARS = 30
+
+# Default report horizons, in years
+DEFAULT_HORIZONS = (5, 10, 15, 20, 25, 30)
+
+RATE_FIELDS = ('hysaRate', 'indexFundTotalRate', 'indexDividendRate')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def load_rate_scenarios(path: str, years: int = MAX_YEARS) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Read yearly rate series from a CSV file.
+
+    Args:
+        path: CSV with scenario, year and RATE_FIELDS columns
+        years: Number of years to fill per scenario
+
+    Returns:
+        (scenario names, {rate field: array of shape (scenarios, years)})
+    """
+    series: Dict[str, Dict[int, Dict[str, float]]] = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        missing = {'scenario', 'year', *RATE_FIELDS} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+        for line_number, row in enumerate(reader, 2):
+            try:
+                year = int(row['year'])
+                rates = {field: float(row[field]) for field in RATE_FIELDS}
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{path}:{line_number}: {e}") from e
+            if year < 1:
+                raise ValueError(f"{path}:{line_number}: year must be 1 or later")
+            series.setdefault(row['scenario'], {})[year] = rates
+
+    if not series:
+        raise ValueError(f"{path}: no rate rows found")
+
+    names = list(series)
+    rates = {field: np.zeros((len(names), years)) for field in RATE_FIELDS}
+    for s, name in enumerate(names):
+        by_year = series[name]
+        last = by_year[min(by_year)]
+        for year in range(1, years + 1):
+            last = by_year.get(year, last)
+            for field in RATE_FIELDS:
+                rates[field][s, year - 1] = last[field]
+    return names, rates
+
+
+def static_rate_scenarios(projects: List[Dict[str, Any]], years: int = MAX_YEARS) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    A single constant-rate scenario built from each project's own ComparisonRates.
+
+    Returns:
+        (['project'], {rate field: array of shape (properties, 1, years)})
+    """
+    rates = {
+        field: np.repeat(
+            np.array([[[float(project['comparison'][field])]] for project in projects]), years, axis=2
+        )
+        for field in RATE_FIELDS
+    }
+    return ['project'], rates
+
+
+def property_paths(projects: List[Dict[str, Any]], appreciation_rate: float = 0.0, years: int = MAX_YEARS) -> Dict[str, np.ndarray]:
+    """
+    Year-end wealth and cumulative cash flow for each property.
+
+    Wealth is the cash invested plus cumulative cash flow, principal paid down
+    and appreciation, which is the ComparisonDashboard projection with a real
+    amortization schedule. Mortgage payments stop once the loan is paid off.
+
+    Returns:
+        Arrays of shape (properties, years) plus totalInvestment (properties,)
+    """
+    columns = property_columns(projects)
+    price = columns['purchasePrice']
+    loan_amount = price - price * (columns['downPaymentPercent'] / 100)
+    payment = monthly_payments(loan_amount, columns['interestRate'], columns['loanTerm'])
+    overridden = ~np.isnan(columns['mortgageOverride'])
+    mortgage = np.where(overridden, columns['mortgageOverride'], payment)
+
+    operating = (
+        columns['monthlyRevenue'] - columns['unitExpenses'] -
+        (price * (columns['propertyTaxRate'] / 100) / 12 + columns['baseInsurance'] + columns['hoaFees'])
+    )
+
+    year = np.arange(1, years + 1)
+    months = 12 * year[None, :]
+    term_months = (columns['loanTerm'] * 12)[:, None]
+    paying_months = np.minimum(months, term_months)
+
+    cumulative_cash_flow = operating[:, None] * months - mortgage[:, None] * paying_months
+    balance = remaining_balance(
+        loan_amount[:, None], payment[:, None], columns['interestRate'][:, None], paying_months
+    )
+    principal_paid = loan_amount[:, None] - np.maximum(balance, 0.0)
+    appreciation = price[:, None] * ((1 + appreciation_rate / 100) ** year[None, :] - 1)
+
+    total_investment = columns['totalInvestment']
+    return {
+        'totalInvestment': total_investment,
+        'cumulativeCashFlow': cumulative_cash_flow,
+        'wealth': total_investment[:, None] + cumulative_cash_flow + principal_paid + appreciation,
+    }
+
+
+def first_crossover(leads: np.ndarray) -> np.ndarray:
+    """
+    Year (1-based) from which `leads` stays true to the end of the last axis.
+
+    A property that pulls ahead and falls behind again has not beaten the
+    alternative, so this is the year after the last one behind, or 0 if it
+    ends the horizon behind.
+    """
+    years = leads.shape[-1]
+    behind = ~leads
+    last_behind = np.where(behind.any(axis=-1), years - behind[..., ::-1].argmax(axis=-1), 0)
+    return np.where(leads[..., -1], last_behind + 1, 0)
+
+
+def compare_alternatives(
+    projects: List[Dict[str, Any]],
+    rates: Dict[str, np.ndarray],
+    appreciation_rate: float = 0.0,
+    years: int = MAX_YEARS
+) -> Dict[str, np.ndarray]:
+    """
+    Compare properties with HYSA and index-fund paths across rate scenarios.
+
+    Args:
+        projects: Project dicts
+        rates: {rate field: array of annual percentages}, shaped
+               (scenarios, years) or per property (properties, scenarios, years)
+        appreciation_rate: Annual property appreciation in percent
+        years: Projection length
+
+    Returns:
+        Arrays of shape (properties, scenarios, years) for each wealth path,
+        and (properties, scenarios) crossover years (0 = still behind at `years`)
+    """
+    paths = property_paths(projects, appreciation_rate, years)
+    invested = paths['totalInvestment'][:, None, None]
+
+    def per_scenario(field: str) -> np.ndarray:
+        values = rates[field][..., :years] / 100
+        return values[None, :, :] if values.ndim == 2 else values
+
+    hysa = invested * np.cumprod(1 + per_scenario('hysaRate'), axis=-1)
+    index = invested * np.cumprod(1 + per_scenario('indexFundTotalRate'), axis=-1)
+
+    # Dividends are paid on the position held at the start of each year
+    index_start = np.concatenate([np.broadcast_to(invested, index[..., :1].shape), index[..., :-1]], axis=-1)
+    cumulative_dividends = np.cumsum(index_start * per_scenario('indexDividendRate'), axis=-1)
+
+    wealth = np.broadcast_to(paths['wealth'][:, None, :], hysa.shape)
+    cash_flow = np.broadcast_to(paths['cumulativeCashFlow'][:, None, :], hysa.shape)
+
+    return {
+        'propertyWealth': wealth,
+        'propertyCashFlow': cash_flow,
+        'hysaWealth': hysa,
+        'indexWealth': index,
+        'indexDividends': cumulative_dividends,
+        'hysaCrossoverYear': first_crossover(wealth >= hysa),
+        'indexCrossoverYear': first_crossover(wealth >= index),
+        'dividendCrossoverYear': first_crossover(cash_flow >= cumulative_dividends),
+    }
+
+
+def compare_alternatives_cached(
+    cache: Optional[ResultCache],
+    projects: List[Dict[str, Any]],
+    rates: Dict[str, np.ndarray],
+    appreciation_rate: float = 0.0,
+    years: int = MAX_YEARS
+) -> Dict[str, np.ndarray]:
+    """compare_alternatives, reusing each property's arrays from earlier runs with the same inputs."""
+    per_property = rates[RATE_FIELDS[0]].ndim == 3
+    params = {
+        # Per-property rates come from each project's own comparison rates,
+        # which are part of its inputs
+        'rates': None if per_property else {field: rates[field] for field in RATE_FIELDS},
+        'appreciationRate': appreciation_rate,
+        'years': years,
+    }
+
+    def compute(indices: List[int]) -> List[Dict[str, np.ndarray]]:
+        subset = {field: rates[field][indices] for field in RATE_FIELDS} if per_property else rates
+        results = compare_alternatives([projects[i] for i in indices], subset, appreciation_rate, years)
+        return [{name: values[row] for name, values in results.items()} for row in range(len(indices))]
+
+    results = cached_per_project(cache, 'alternatives', projects, params, engine_version('alternatives'), compute)
+    return {name: np.stack([result[name] for result in results]) for name in results[0]}
+
+
+def report_rows(
+    projects: List[Dict[str, Any]],
+    scenarios: Sequence[str],
+    results: Dict[str, np.ndarray],
+    horizons: Sequence[int]
+) -> List[Dict[str, Any]]:
+    """Flatten comparison arrays into one row per property x scenario."""
+    rows = []
+    for p, project in enumerate(projects):
+        for s, scenario in enumerate(scenarios):
+            row: Dict[str, Any] = {
+                'projectId': project.get('id', ''),
+                'projectName': project.get('name', ''),
+                'scenario': scenario,
+                'hysaCrossoverYear': int(results['hysaCrossoverYear'][p, s]) or None,
+                'indexCrossoverYear': int(results['indexCrossoverYear'][p, s]) or None,
+                'dividendCrossoverYear': int(results['dividendCrossoverYear'][p, s]) or None,
+            }
+            for horizon in horizons:
+                for name in ('propertyWealth', 'hysaWealth', 'indexWealth'):
+                    row[f"{name}Y{horizon}"] = float(results[name][p, s, horizon - 1])
+            rows.append(row)
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]], horizons: Sequence[int]) -> str:
+    """Render comparison rows as a fixed-width text table."""
+    def year(value: Optional[int]) -> str:
+        return str(value) if value else f">{MAX_YEARS}"
+
+    headers = ['Project', 'Scenario', 'Beats HYSA', 'Beats Index']
+    headers += [f"Prop/Index Y{horizon}" for horizon in horizons]
+    body = [
+        [row['projectName'] or row['projectId'], row['scenario'],
+         year(row['hysaCrossoverYear']), year(row['indexCrossoverYear'])] +
+        [
+            f"{row[f'propertyWealthY{horizon}'] / 1000:,.0f}k/{row[f'indexWealthY{horizon}'] / 1000:,.0f}k"
+            for horizon in horizons
+        ]
+        for row in rows
+    ]
+    widths = [max(len(cell) for cell in column) for column in zip(headers, *body)]
+
+    lines = [
+        '  '.join(cell.ljust(width) if i < 2 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in [headers] + body
+    ]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Compare properties with HYSA and index-fund alternatives over time')
+    parser.add_argument('paths', nargs='+', help='Project JSON/JSONL files or folders')
+    parser.add_argument(
+        '--rates',
+        default=None,
+        help="Rate scenario CSV (default: each project's own comparison rates)"
+    )
+    parser.add_argument(
+        '--horizons',
+        default=','.join(str(h) for h in DEFAULT_HORIZONS),
+        help='Comma-separated report years (1-30)'
+    )
+    parser.add_argument('--appreciation', type=float, default=0.0, help='Annual property appreciation in percent')
+    parser.add_argument('--format', choices=('table', 'csv', 'json'), default='table', help='Output format')
+    add_cache_argument(parser)
+    args = parser.parse_args()
+
+    try:
+        horizons = [int(value) for value in args.horizons.split(',') if value.strip()]
+        if not horizons or any(not 1 <= h <= MAX_YEARS for h in horizons):
+            raise ValueError(f"Horizons must be between 1 and {MAX_YEARS}")
+        projects = load_projects(args.paths)
+        if args.rates:
+            scenarios, rates = load_rate_scenarios(args.rates)
+        else:
+            scenarios, rates = static_rate_scenarios(projects)
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    if not projects:
+        print_error("No projects found")
+        sys.exit(1)
+
+    print_info(f"Comparing {len(projects)} project(s) x {len(scenarios)} scenario(s) x {MAX_YEARS} years")
+    cache = ResultCache(Path(args.cache)) if args.cache else None
+    results = compare_alternatives_cached(cache, projects, rates, appreciation_rate=args.appreciation)
+    if cache:
+        print_info(f"Cache: {cache.hits} project(s) reused, {cache.misses} computed")
+        cache.close()
+    rows = report_rows(projects, scenarios, results, horizons)
+
+    if args.format == 'json':
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    elif args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        print(format_table(rows, horizons))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
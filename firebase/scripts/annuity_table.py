@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Annuity Table
+Precomputed annuity factors S(r, n) = ((1 + r)^n - 1) / r (n when r = 0) for
+every interest rate in basis points (0-30%) and every term in months
+(0-600), built once, saved as .npy and memory-mapped by every process that
+uses it.
+
+Everything the fixed-rate mortgage math needs follows from two lookups:
+    payment per $1 borrowed         r + 1 / S(n)
+    balance per $1 after k payments 1 - S(k) / S(n)
+
+S changes slowly with the rate (it is n at 0%), so interpolating it keeps
+the same relative accuracy at every rate, unlike (1 + r)^n, which is close
+to 1 at low rates.
+
+Rates between basis points and fractional terms are interpolated
+(bilinearly); `check` measures the error against the exact formula.
+
+Usage:
+    python annuity_table.py build
+    python annuity_table.py check --samples 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+CONFIG_DIR = Path(__file__).parent.parent / 'config'
+DEFAULT_TABLE = CONFIG_DIR / '.annuity_table.npy'
+
+# Table axes: rows are rates 0..MAX_RATE_BP basis points, columns terms 0..MAX_TERM_MONTHS
+MAX_RATE_BP = 3000
+MAX_TERM_MONTHS = 600
+TABLE_SHAPE = (MAX_RATE_BP + 1, MAX_TERM_MONTHS + 1)
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def exact_factor(interest_rate, months) -> np.ndarray:
+    """((1 + r)^months - 1) / r for the monthly rate r of an annual rate in percent."""
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 1200
+    months = np.asarray(months, dtype=float)
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    return np.where(zero_rate, months, np.expm1(months * np.log1p(safe_rate)) / safe_rate)
+
+
+def build_table(path: Path = DEFAULT_TABLE) -> Path:
+    """Compute the factor table and save it atomically as .npy."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rates = np.arange(TABLE_SHAPE[0]) / 100
+    table = exact_factor(rates[:, None], np.arange(TABLE_SHAPE[1])[None, :])
+    temp = path.with_name(path.name + '.tmp')
+    with open(temp, 'wb') as f:
+        np.save(f, table)
+    os.replace(temp, path)
+    return path
+
+
+class AnnuityTable:
+    """Annuity-factor lookups backed by a memory-mapped table."""
+
+    def __init__(self, factors: np.ndarray):
+        if factors.shape != TABLE_SHAPE:
+            raise ValueError(f"Annuity table has shape {factors.shape}, expected {TABLE_SHAPE}")
+        self._flat = factors.reshape(-1)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_TABLE, build: bool = True) -> 'AnnuityTable':
+        """
+        Memory-map the table, building it first if missing or stale.
+
+        Raises:
+            ValueError: If the table is missing or stale and build is False
+        """
+        path = Path(path)
+        if path.exists():
+            factors = np.load(path, mmap_mode='r')
+            if factors.shape == TABLE_SHAPE:
+                return cls(factors)
+        if not build:
+            raise ValueError(f"No usable annuity table at {path}; run: python annuity_table.py build")
+        return cls(np.load(build_table(path), mmap_mode='r'))
+
+    def factor(self, interest_rate, months) -> np.ndarray:
+        """
+        ((1 + r)^months - 1) / r by table lookup.
+
+        Exact (up to rounding) for whole basis points and whole months;
+        interpolated in between. Values outside the table fall back to the
+        exact formula.
+        """
+        interest_rate, months = np.broadcast_arrays(
+            np.asarray(interest_rate, dtype=float), np.asarray(months, dtype=float)
+        )
+        basis_points = interest_rate * 100
+        inside = (basis_points >= 0) & (basis_points <= MAX_RATE_BP) & (months >= 0) & (months <= MAX_TERM_MONTHS)
+        bp = np.where(inside, basis_points, 0.0)
+        n = np.where(inside, months, 0.0)
+
+        row = np.minimum(np.floor(bp), MAX_RATE_BP - 1).astype(np.intp)
+        column = np.minimum(np.floor(n), MAX_TERM_MONTHS - 1).astype(np.intp)
+        rate_weight = bp - row
+        term_weight = n - column
+        index = row * TABLE_SHAPE[1] + column
+
+        low = self._flat[index]
+        high = self._flat[index + TABLE_SHAPE[1]]
+        result = low + (high - low) * rate_weight
+        fractional = term_weight != 0
+        if fractional.any():
+            low_next = self._flat[index + 1]
+            high_next = self._flat[index + TABLE_SHAPE[1] + 1]
+            result_next = low_next + (high_next - low_next) * rate_weight
+            result = result + (result_next - result) * term_weight
+
+        if not inside.all():
+            result = np.where(inside, result, exact_factor(interest_rate, months))
+        return result
+
+
+def annuity_factors(
+    interest_rate,
+    term_months,
+    elapsed_months,
+    table: Optional[AnnuityTable] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-dollar payment and remaining balance of a fixed-rate loan.
+
+    Args:
+        interest_rate: Annual rate (%)
+        term_months: Loan term
+        elapsed_months: Payments made
+        table: Look factors up here instead of computing them
+
+    Returns:
+        (monthly payment per $1 borrowed, balance per $1 after elapsed_months)
+    """
+    factor = table.factor if table is not None else exact_factor
+    total = factor(interest_rate, term_months)
+    paid = factor(interest_rate, elapsed_months)
+    payment = np.asarray(interest_rate, dtype=float) / 1200 + 1 / total
+    balance = 1 - paid / total
+    return payment, balance
+
+
+def accuracy(table: AnnuityTable, samples: int = 1_000_000, seed: int = 0) -> Dict[str, float]:
+    """
+    Worst errors of table lookups against the exact formula.
+
+    Returns:
+        Relative payment error for whole basis points and months
+        ('onGrid'), any rate in 0-30% ('offGridRate') and fractional terms
+        ('offGridTerm'), plus the absolute balance error per $1 borrowed
+        after a random number of payments at any rate ('balance')
+    """
+    rng = np.random.default_rng(seed)
+    terms = rng.integers(12, MAX_TERM_MONTHS + 1, samples).astype(float)
+    any_rate = rng.uniform(0.01, MAX_RATE_BP / 100, samples)
+
+    def worst(rate: np.ndarray, months: np.ndarray) -> float:
+        exact, _ = annuity_factors(rate, months, 0)
+        looked_up, _ = annuity_factors(rate, months, 0, table)
+        return float(np.max(np.abs(looked_up / exact - 1)))
+
+    elapsed = np.floor(rng.uniform(0, 1, samples) * terms)
+    _, exact_balance = annuity_factors(any_rate, terms, elapsed)
+    _, looked_up_balance = annuity_factors(any_rate, terms, elapsed, table)
+
+    return {
+        'onGrid': worst(rng.integers(1, MAX_RATE_BP + 1, samples) / 100, terms),
+        'offGridRate': worst(any_rate, terms),
+        'offGridTerm': worst(any_rate, terms - rng.uniform(0, 1, samples)),
+        'balance': float(np.max(np.abs(looked_up_balance - exact_balance))),
+    }
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Precomputed annuity-factor table')
+    parser.add_argument('command', choices=('build', 'check'), help='Build the table, or measure its accuracy')
+    parser.add_argument('--path', default=str(DEFAULT_TABLE), help=f'Table file (default: {DEFAULT_TABLE})')
+    parser.add_argument('--samples', type=int, default=1_000_000, help='Random loans to check')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            started = time.perf_counter()
+            path = build_table(Path(args.path))
+            size = path.stat().st_size / 1024 / 1024
+            print_success(f"Built {path} ({size:.1f} MB) in {time.perf_counter() - started:.2f}s")
+            return
+
+        table = AnnuityTable.load(Path(args.path))
+        errors = accuracy(table, args.samples)
+        print_info(f"Worst relative payment error over {args.samples:,} random loans:")
+        print(f"  whole basis points, whole months: {errors['onGrid']:.1e}")
+        print(f"  any rate, whole months:           {errors['offGridRate']:.1e}")
+        print(f"  any rate, fractional months:      {errors['offGridTerm']:.1e}")
+        print_info(f"Worst balance error per $1 borrowed: {errors['balance']:.1e}")
+    except (OSError, ValueError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
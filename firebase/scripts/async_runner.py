@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Command Runner
+Runs Firebase CLI commands on an asyncio event loop, streaming their output
+line by line with a per-target prefix.
+
+Usage:
+    python async_runner.py "rules=firebase deploy --only firestore:rules --project my-app" \\
+                           "indexes=firebase deploy --only firestore:indexes --project my-app"
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKCYAN = '\033[96m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+# Prefix colors cycled across concurrently running targets
+PREFIX_COLORS = [Colors.OKCYAN, Colors.HEADER, Colors.OKBLUE, Colors.OKGREEN, Colors.WARNING]
+
+# Seconds to wait after SIGTERM before killing a command outright
+TERMINATE_GRACE_PERIOD = 5.0
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a single command run."""
+    target: str
+    command: str
+    returncode: Optional[int]
+    duration: float
+    timed_out: bool = False
+    cancelled: bool = False
+    stdout: List[str] = field(default_factory=list)
+    stderr: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+async def _pump(stream: asyncio.StreamReader, prefix: str, sink, lines: Optional[List[str]]):
+    """Copy a subprocess stream to a sink one line at a time."""
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            break
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        if lines is not None:
+            lines.append(line)
+        if sink is not None:
+            sink.write(f"{prefix}{line}\n")
+            sink.flush()
+
+
+async def _stop(process: asyncio.subprocess.Process):
+    """Terminate a command (and its children), escalating to kill."""
+    if process.returncode is not None:
+        return
+
+    try:
+        if sys.platform != 'win32':
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+    except ProcessLookupError:
+        return
+
+    try:
+        await asyncio.wait_for(process.wait(), TERMINATE_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        try:
+            if sys.platform != 'win32':
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def run_streaming(
+    command: str,
+    target: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    echo: bool = True,
+    capture: bool = False,
+    color: str = Colors.OKCYAN
+) -> CommandResult:
+    """
+    Run a shell command, streaming stdout/stderr as lines arrive.
+
+    Args:
+        command: Command to execute (run through the shell, like run_command)
+        target: Label used to prefix each output line
+        timeout: Seconds before the command is terminated (None = no limit)
+        cwd: Working directory for the command
+        echo: Write output lines to this process's stdout/stderr
+        capture: Keep output lines on the returned result
+        color: Terminal color for the prefix
+
+    Returns:
+        CommandResult. Cancelling the awaiting task terminates the command
+        before the CancelledError propagates.
+    """
+    target = target or command.split()[0]
+    prefix = f"{color}[{target}]{Colors.ENDC} " if echo else ""
+    result = CommandResult(target=target, command=command, returncode=None, duration=0.0)
+    started = time.monotonic()
+
+    # A new session lets us signal the shell and everything it spawned
+    kwargs = {'start_new_session': True} if sys.platform != 'win32' else {}
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        **kwargs
+    )
+
+    pumps = asyncio.gather(
+        _pump(process.stdout, prefix, sys.stdout if echo else None,
+              result.stdout if capture else None),
+        _pump(process.stderr, prefix, sys.stderr if echo else None,
+              result.stderr if capture else None),
+    )
+
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout)
+        # A command can close its output and keep running, so the exit wait
+        # gets whatever is left of the timeout too
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        result.returncode = await asyncio.wait_for(process.wait(), remaining)
+    except asyncio.TimeoutError:
+        result.timed_out = True
+        await _stop(process)
+        await pumps
+        result.returncode = process.returncode
+    except asyncio.CancelledError:
+        result.cancelled = True
+        await _stop(process)
+        pumps.cancel()
+        raise
+    finally:
+        result.duration = time.monotonic() - started
+
+    return result
+
+
+async def run_many(
+    commands: Iterable[Tuple[str, str]],
+    timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    cwd: Optional[str] = None,
+    echo: bool = True,
+    capture: bool = False
+) -> List[CommandResult]:
+    """
+    Run several (target, command) pairs concurrently on the current loop.
+
+    Args:
+        commands: Iterable of (target, command) pairs
+        timeout: Per-command timeout in seconds
+        max_concurrency: Upper bound on simultaneously running commands
+        cwd: Working directory for every command
+        echo: Stream output lines as they arrive
+        capture: Keep output lines on each result
+
+    Returns:
+        Results in the same order as the input commands
+    """
+    commands = list(commands)
+    semaphore = asyncio.Semaphore(max_concurrency or len(commands) or 1)
+
+    async def run_one(index: int, target: str, command: str) -> CommandResult:
+        async with semaphore:
+            return await run_streaming(
+                command,
+                target=target,
+                timeout=timeout,
+                cwd=cwd,
+                echo=echo,
+                capture=capture,
+                color=PREFIX_COLORS[index % len(PREFIX_COLORS)]
+            )
+
+    return await asyncio.gather(*(
+        run_one(i, target, command) for i, (target, command) in enumerate(commands)
+    ))
+
+
+def run_sync(
+    command: str,
+    target: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cwd: Optional[str] = None,
+    capture: bool = False
+) -> CommandResult:
+    """Blocking wrapper around run_streaming for the synchronous scripts."""
+    return asyncio.run(run_streaming(command, target=target, timeout=timeout, cwd=cwd, capture=capture))
+
+
+def parse_command_arg(value: str) -> Tuple[str, str]:
+    """Parse a TARGET=COMMAND argument; bare commands use their program name."""
+    target, sep, command = value.partition('=')
+    if sep and target and ' ' not in target:
+        return target, command
+    return value.split()[0], value
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Run Firebase CLI commands concurrently with streamed output')
+    parser.add_argument(
+        'commands',
+        nargs='+',
+        help='Commands to run, optionally labelled as TARGET=COMMAND'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        help='Per-command timeout in seconds'
+    )
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=None,
+        help='Maximum number of commands running at once'
+    )
+    args = parser.parse_args()
+
+    commands = [parse_command_arg(value) for value in args.commands]
+    results = asyncio.run(run_many(commands, timeout=args.timeout, max_concurrency=args.max_concurrency))
+
+    print()
+    for result in results:
+        if result.ok:
+            print_success(f"{result.target}: exit 0 in {result.duration:.1f}s")
+        elif result.timed_out:
+            print_error(f"{result.target}: timed out after {result.duration:.1f}s")
+        else:
+            print_error(f"{result.target}: exit {result.returncode} in {result.duration:.1f}s")
+
+    sys.exit(0 if all(result.ok for result in results) else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
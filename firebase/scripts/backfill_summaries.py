@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backfill Project Summaries
+Builds the lightweight `propertySummaries` records that the app's project
+list reads, for projects saved before summaries existed or whose summary
+is out of date.
+
+Usage:
+    python backfill_summaries.py --env staging --dry-run
+    python backfill_summaries.py --env production --prune
+    python backfill_summaries.py --emulator --user <uid> --force
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from firestore_client import (
+    DEFAULT_WRITE_WORKERS,
+    MAX_BATCH_WRITES,
+    Write,
+    add_connection_arguments,
+    commit_batches,
+    connect_from_args,
+)
+from vector_calculations import summarize_valid
+from write_governor import WriteGovernor
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+USERS_COLLECTION = 'users'
+PROPERTIES_COLLECTION = 'properties'
+PROPERTY_SUMMARIES_COLLECTION = 'propertySummaries'
+
+# Set on users/{uid} once all of a user's projects have summaries; the app
+# lists from the full documents until then (SUMMARIES_COMPLETE_FIELD in firestore.ts)
+SUMMARIES_COMPLETE_FIELD = 'summariesComplete'
+
+# Must match SUMMARY_VERSION in src/firebase/firestore.ts
+SUMMARY_VERSION = 1
+
+# Projects summarized and written per batch (below the 500-write limit)
+CHUNK_SIZE = 400
+
+# summary_metrics key for each summary field (see ProjectSummaryMetrics)
+SUMMARY_METRIC_FIELDS = {
+    'monthlyRevenue': 'totalMonthlyRevenue',
+    'monthlyCashFlow': 'monthlyCashFlow',
+    'annualCashFlow': 'annualCashFlow',
+    'totalInvestment': 'totalInvestment',
+    'cashOnCashReturn': 'cashOnCashReturn',
+    'totalReturn': 'totalReturn',
+}
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def _user_filter(query: Any, user: Optional[str]) -> Any:
+    if not user:
+        return query
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    return query.where(filter=FieldFilter('userId', '==', user))
+
+
+def load_summary_state(client: Any, user: Optional[str] = None) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Read the version and updatedAt of every existing summary.
+
+    Only those two fields are fetched, so this stays cheap for large collections.
+
+    Returns:
+        {project id: (summaryVersion, updatedAt)}
+    """
+    query = _user_filter(client.collection(PROPERTY_SUMMARIES_COLLECTION), user)
+    return {
+        snapshot.id: (snapshot.get('summaryVersion'), snapshot.get('updatedAt'))
+        for snapshot in query.select(['summaryVersion', 'updatedAt']).stream()
+    }
+
+
+def is_current(state: Optional[Tuple[Any, Any]], project: Dict[str, Any]) -> bool:
+    """True if a summary is at SUMMARY_VERSION and not older than its project."""
+    if state is None:
+        return False
+    version, summary_updated = state
+    project_updated = project.get('updatedAt')
+    if version != SUMMARY_VERSION or summary_updated is None or project_updated is None:
+        return False
+    return summary_updated >= project_updated
+
+
+def build_summary(
+    project_id: str,
+    project: Dict[str, Any],
+    metrics: Dict[str, Any],
+    i: int,
+    server_timestamp: Any
+) -> Dict[str, Any]:
+    """
+    Summary document for one project, mirroring buildProjectSummary in firestore.ts.
+
+    updatedAt is copied from the project so the summary counts as current
+    until the project changes again. isShared/sharedWith are copied too, as
+    updateSharing in firestore.ts mirrors them into the summary.
+    """
+    summary = {field: float(metrics[key][i]) for field, key in SUMMARY_METRIC_FIELDS.items()}
+    summary.update({
+        'unitCount': len(project['units']),
+        'id': project_id,
+        'userId': project['userId'],
+        'name': project.get('name', ''),
+        'description': project.get('description') or '',
+        'summaryVersion': SUMMARY_VERSION,
+        'createdAt': project.get('createdAt') or server_timestamp,
+        'updatedAt': project.get('updatedAt') or server_timestamp,
+    })
+    for field in ('isShared', 'sharedWith'):
+        if field in project:
+            summary[field] = project[field]
+    return summary
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def backfill(
+    client: Any,
+    user: Optional[str] = None,
+    force: bool = False,
+    prune: bool = False,
+    dry_run: bool = False,
+    workers: int = DEFAULT_WRITE_WORKERS,
+    governor: Optional[WriteGovernor] = None
+) -> Dict[str, int]:
+    """
+    Create or refresh summaries for every project (or one user's projects).
+
+    Once every summary is written, each owner whose projects all have one
+    is marked complete, so the app lists them from the summaries alone.
+
+    Args:
+        client: google.cloud.firestore Client
+        user: Only backfill this user's projects
+        force: Rewrite summaries even if they look current
+        prune: Delete summaries whose project no longer exists
+        dry_run: Count what would change without writing
+        workers: Batch commits in flight at once
+        governor: Write governor to pace commits with (default: a new one)
+
+    Returns:
+        Counts: scanned, written, current, invalid, pruned, users
+    """
+    from google.cloud import firestore
+
+    counts = {'scanned': 0, 'written': 0, 'current': 0, 'invalid': 0, 'pruned': 0, 'users': 0}
+    existing = load_summary_state(client, user)
+    summaries = client.collection(PROPERTY_SUMMARIES_COLLECTION)
+    seen = set()
+    owners = set()
+    incomplete = set()
+
+    def batches() -> Iterator[List[Write]]:
+        projects = _user_filter(client.collection(PROPERTIES_COLLECTION), user).stream()
+        for chunk in _chunks(projects, CHUNK_SIZE):
+            counts['scanned'] += len(chunk)
+            stale = []
+            document_ids = {}
+            for snapshot in chunk:
+                seen.add(snapshot.id)
+                project = snapshot.to_dict()
+                if project.get('userId'):
+                    owners.add(project['userId'])
+                if not force and is_current(existing.get(snapshot.id), project):
+                    counts['current'] += 1
+                elif project.get('userId'):
+                    document_ids[id(project)] = snapshot.id
+                    stale.append(project)
+                else:
+                    counts['invalid'] += 1
+
+            valid, metrics, invalid = summarize_valid(stale)
+            counts['invalid'] += invalid
+            if invalid:
+                summarized = {id(project) for project in valid}
+                incomplete.update(project['userId'] for project in stale if id(project) not in summarized)
+            counts['written'] += len(valid)
+            yield [
+                (
+                    # Merge, like the app's writers, so fields added to summaries later survive
+                    'merge',
+                    summaries.document(document_ids[id(project)]),
+                    build_summary(document_ids[id(project)], project, metrics, i, firestore.SERVER_TIMESTAMP)
+                )
+                for i, project in enumerate(valid)
+            ]
+
+        if prune:
+            orphans = [project_id for project_id in existing if project_id not in seen]
+            counts['pruned'] = len(orphans)
+            for chunk in _chunks(orphans, MAX_BATCH_WRITES):
+                yield [('delete', summaries.document(project_id), None) for project_id in chunk]
+
+    def markers() -> Iterator[List[Write]]:
+        users = client.collection(USERS_COLLECTION)
+        for chunk in _chunks(sorted(owners - incomplete), MAX_BATCH_WRITES):
+            yield [('merge', users.document(owner), {SUMMARIES_COMPLETE_FIELD: True}) for owner in chunk]
+
+    if dry_run:
+        for _ in batches():
+            pass
+    else:
+        # Markers only after every summary batch committed (commit_batches raises otherwise)
+        commit_batches(client, batches(), workers, governor)
+        commit_batches(client, markers(), workers, governor)
+
+    counts['users'] = len(owners - incomplete)
+    return counts
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Create or refresh project summary records in Firestore')
+    add_connection_arguments(parser)
+    parser.add_argument('--user', help='Only backfill projects owned by this user ID')
+    parser.add_argument('--force', action='store_true', help='Rewrite summaries even if they are current')
+    parser.add_argument('--prune', action='store_true', help='Delete summaries whose project no longer exists')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WRITE_WORKERS, help='Batch commits in flight at once')
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        print_error("--workers must be at least 1")
+        sys.exit(1)
+
+    try:
+        client = connect_from_args(args)
+    except (ImportError, ValueError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"Project: {client.project}")
+    # The emulator has no write limits to ramp up to
+    governor = WriteGovernor(max_concurrency=args.workers, ramp=not args.emulator)
+    started = time.perf_counter()
+
+    try:
+        counts = backfill(
+            client,
+            user=args.user,
+            force=args.force,
+            prune=args.prune,
+            dry_run=args.dry_run,
+            workers=args.workers,
+            governor=governor
+        )
+    except Exception as e:
+        print_error(f"Backfill failed: {e}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    verb = "Would write" if args.dry_run else "Wrote"
+    print_info(f"Scanned {counts['scanned']:,} project(s) in {elapsed:.1f}s")
+    print_info(f"{counts['current']:,} summary(ies) already current")
+    if counts['invalid']:
+        print_warning(f"Skipped {counts['invalid']:,} malformed project(s)")
+    if args.prune:
+        print_info(f"{'Would prune' if args.dry_run else 'Pruned'} {counts['pruned']:,} orphaned summary(ies)")
+    print_success(f"{verb} {counts['written']:,} summary(ies)")
+    print_info(f"{'Would mark' if args.dry_run else 'Marked'} {counts['users']:,} user(s) as fully summarized")
+    for line in governor.summary_lines():
+        print_info(line)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
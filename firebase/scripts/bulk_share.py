@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk Collaborator Sharing
+Adds or removes a collaborator (by email) on many projects at once, using
+atomic batched writes of up to 250 projects (each with its listing summary)
+instead of one read and one rewrite per project.
+
+Usage:
+    python bulk_share.py add analyst@example.com --owner <uid> --env production
+    python bulk_share.py add analyst@example.com --ids-file portfolio.txt --emulator
+    python bulk_share.py remove former@example.com --everywhere --env production --dry-run
+"""
+
+import argparse
+import itertools
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from firestore_client import (
+    DEFAULT_WRITE_WORKERS,
+    MAX_BATCH_WRITES,
+    Write,
+    add_connection_arguments,
+    commit_batches,
+    connect_from_args,
+)
+from write_governor import WriteGovernor
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+PROPERTIES_COLLECTION = 'properties'
+PROPERTY_SUMMARIES_COLLECTION = 'propertySummaries'
+
+# Same check as the collaborator form in CalculatorView
+EMAIL_PATTERN = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_ids_file(path: str) -> List[str]:
+    """Project IDs from a file, one per line; blank lines and # comments are ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
+
+
+def select_projects(
+    client: Any,
+    email: str,
+    owner: Optional[str] = None,
+    ids: Sequence[str] = (),
+    everywhere: bool = False
+) -> Iterator[Any]:
+    """
+    Yield snapshots (sharedWith only) of the projects to change.
+
+    Args:
+        client: google.cloud.firestore Client
+        email: Collaborator email (used by everywhere)
+        owner: Every project owned by this user ID
+        ids: These project IDs; missing ones come back with exists == False
+        everywhere: Every project already shared with email
+    """
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    collection = client.collection(PROPERTIES_COLLECTION)
+
+    if owner:
+        query = collection.where(filter=FieldFilter('userId', '==', owner))
+        yield from query.select(['sharedWith']).stream()
+    elif everywhere:
+        query = collection.where(filter=FieldFilter('sharedWith', 'array_contains', email))
+        yield from query.select(['sharedWith']).stream()
+    else:
+        for chunk in _chunks(dict.fromkeys(ids), MAX_BATCH_WRITES):
+            yield from client.get_all(
+                [collection.document(project_id) for project_id in chunk],
+                field_paths=['sharedWith']
+            )
+
+
+def bulk_share(
+    client: Any,
+    action: str,
+    email: str,
+    owner: Optional[str] = None,
+    ids: Sequence[str] = (),
+    everywhere: bool = False,
+    dry_run: bool = False,
+    workers: int = DEFAULT_WRITE_WORKERS,
+    governor: Optional[WriteGovernor] = None
+) -> Dict[str, Any]:
+    """
+    Add or remove a collaborator across projects.
+
+    Projects already in the requested state are not written. Each project
+    is written together with its propertySummaries record (when it has one),
+    so listings see the new updatedAt and sharedWith; a batch of up to 250
+    projects commits atomically. ArrayUnion/ArrayRemove apply the change
+    server-side, so concurrent edits to sharedWith are not lost.
+
+    Args:
+        client: google.cloud.firestore Client
+        action: 'add' or 'remove'
+        email: Collaborator email (lower-cased like the app does)
+        owner / ids / everywhere: Project selection (see select_projects)
+        dry_run: Count what would change without writing
+        workers: Batch commits in flight at once
+        governor: Write governor to pace commits with (default: a new one)
+
+    Returns:
+        {'matched': n, 'updated': n, 'unchanged': n, 'missing': [ids]}
+    """
+    from google.cloud import firestore
+
+    transform = firestore.ArrayUnion([email]) if action == 'add' else firestore.ArrayRemove([email])
+    collection = client.collection(PROPERTIES_COLLECTION)
+    summaries = client.collection(PROPERTY_SUMMARIES_COLLECTION)
+    report: Dict[str, Any] = {'matched': 0, 'updated': 0, 'unchanged': 0, 'missing': []}
+
+    def changed() -> Iterator[str]:
+        for snapshot in select_projects(client, email, owner, ids, everywhere):
+            if not snapshot.exists:
+                report['missing'].append(snapshot.id)
+                continue
+            report['matched'] += 1
+            shared_with = (snapshot.to_dict() or {}).get('sharedWith') or []
+            if (email in shared_with) == (action == 'add'):
+                report['unchanged'] += 1
+                continue
+            report['updated'] += 1
+            yield snapshot.id
+
+    def batches() -> Iterator[List[Write]]:
+        change = {'sharedWith': transform, 'updatedAt': firestore.SERVER_TIMESTAMP}
+        # Two writes per project, so a batch holds half as many projects
+        for chunk in _chunks(changed(), MAX_BATCH_WRITES // 2):
+            # Projects without a summary yet are left to backfill_summaries
+            # rather than given a partial one
+            summary_refs = [summaries.document(project_id) for project_id in chunk]
+            existing = {
+                snapshot.id for snapshot in client.get_all(summary_refs, field_paths=['userId']) if snapshot.exists
+            }
+            batch: List[Write] = []
+            for project_id in chunk:
+                batch.append(('update', collection.document(project_id), change))
+                if project_id in existing:
+                    batch.append(('merge', summaries.document(project_id), change))
+            yield batch
+
+    if dry_run:
+        for _ in _chunks(changed(), MAX_BATCH_WRITES):
+            pass
+    else:
+        commit_batches(client, batches(), workers, governor)
+
+    return report
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Add or remove a collaborator on many projects at once')
+    parser.add_argument('action', choices=('add', 'remove'), help='Add or remove the collaborator')
+    parser.add_argument('email', help='Collaborator email')
+    add_connection_arguments(parser)
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument('--owner', help='Every project owned by this user ID')
+    selection.add_argument('--ids', nargs='+', help='These project IDs')
+    selection.add_argument('--ids-file', help='File with one project ID per line')
+    selection.add_argument(
+        '--everywhere',
+        action='store_true',
+        help='Every project already shared with the email (remove only)'
+    )
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WRITE_WORKERS,
+        help='Batch commits in flight at once'
+    )
+    args = parser.parse_args()
+
+    email = args.email.strip().lower()
+    if not EMAIL_PATTERN.match(email):
+        print_error(f"Invalid email address: {args.email}")
+        sys.exit(1)
+    if args.everywhere and args.action != 'remove':
+        print_error("--everywhere can only be used with remove")
+        sys.exit(1)
+    if args.workers < 1:
+        print_error("--workers must be at least 1")
+        sys.exit(1)
+
+    try:
+        ids = read_ids_file(args.ids_file) if args.ids_file else (args.ids or [])
+        client = connect_from_args(args)
+    except (ImportError, ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"Project: {client.project}")
+    # The emulator has no write limits to ramp up to
+    governor = WriteGovernor(max_concurrency=args.workers, ramp=not args.emulator)
+
+    try:
+        report = bulk_share(
+            client,
+            args.action,
+            email,
+            owner=args.owner,
+            ids=ids,
+            everywhere=args.everywhere,
+            dry_run=args.dry_run,
+            workers=args.workers,
+            governor=governor
+        )
+    except Exception as e:
+        print_error(f"Sharing failed: {e}")
+        print_info("Batches committed before the failure were applied; re-running is safe")
+        sys.exit(1)
+
+    for project_id in report['missing']:
+        print_warning(f"Project not found: {project_id}")
+
+    verb = 'Would update' if args.dry_run else 'Updated'
+    change = 'add' if args.action == 'add' else 'remove'
+    print_info(f"{report['matched']:,} project(s) matched, {report['unchanged']:,} already up to date")
+    print_success(f"{verb} {report['updated']:,} project(s) to {change} {email}")
+    for line in governor.summary_lines():
+        print_info(line)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
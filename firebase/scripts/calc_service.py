@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculation Service
+Local HTTP service answering the calculations.ts / mortgageCalculator.ts
+model for other systems, without the React app.
+
+Endpoints (JSON in, JSON out):
+    POST /summary       {property, units}  -> PropertySummary metrics
+    POST /sensitivity   {property, units}  -> SensitivityAnalysis rows
+    POST /appreciation  {property, units}  -> AppreciationScenarios columns
+    POST /amortization  {purchasePrice, downPaymentPercent, interestRate, loanTerm}
+                                           -> payment and month-by-month schedule
+    GET  /metrics                          -> latency, throughput, batching, cache
+    GET  /health
+
+How it works:
+- Requests to the same endpoint that arrive together are coalesced into one
+  micro-batch and computed with the numpy model in vector_calculations.py,
+  so a burst costs about as much as a few single requests
+- While a batch computes, new requests queue up and form the next batch, so
+  batches grow with load instead of requests waiting in line one by one
+- Identical requests (after numeric strings are converted) are answered
+  from a bounded LRU cache, or share the computation already in flight
+
+Usage:
+    python calc_service.py serve --port 8765
+    python calc_service.py serve --max-batch 1          # no batching, for comparison
+    python calc_service.py bench ../../exports --endpoint summary --concurrency 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from calculations import (
+    APPRECIATION_RATES,
+    APPRECIATION_YEARS,
+    SENSITIVITY_OCCUPANCY_DELTAS,
+    SENSITIVITY_RATE_DELTAS,
+)
+from project_files import json_safe, load_projects
+from project_schema import PROPERTY, UNIT, Arr, Num, Obj, compile_check
+from vector_calculations import monthly_payments, remaining_balance, summary_metrics
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Most requests computed in one batch
+DEFAULT_MAX_BATCH = 256
+
+# Seconds a batch waits for company once its first request arrives
+DEFAULT_MAX_DELAY = 0.001
+
+# Responses kept in the result cache
+DEFAULT_CACHE_SIZE = 10_000
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADERS = 100
+
+# Latencies kept per endpoint for percentiles
+LATENCY_SAMPLES = 5000
+
+# Validation errors returned in a 400 response
+MAX_REPORTED_ERRORS = 20
+
+# Longest loan term (years) /amortization accepts
+MAX_LOAN_TERM_YEARS = 50
+
+# Errors the calculations raise for inputs the schema cannot rule out
+CALCULATION_ERRORS = (KeyError, TypeError, ValueError, ZeroDivisionError, FloatingPointError, OverflowError)
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+# ---------------------------------------------------------------------------
+# Batched calculations
+# ---------------------------------------------------------------------------
+
+# What the project endpoints need of a Project; other fields are ignored
+PROJECT_INPUT = Obj((
+    ('property', PROPERTY, True),
+    ('units', Arr(UNIT), True),
+))
+
+LOAN_INPUT = Obj((
+    ('purchasePrice', Num(), True),
+    ('downPaymentPercent', Num(), True),
+    ('interestRate', Num(), True),
+    ('loanTerm', Num(), True),
+))
+
+
+def _rows(columns: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    """Turn a dict of equal-length arrays into one dict per index."""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name].tolist() for name in names))]
+
+
+def batch_summary(projects: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+    """calculate_property_summary for each project, plus breakEvenOccupancy."""
+    return _rows(summary_metrics(projects))
+
+
+def _shifted(project: Dict[str, Any], occupancy_delta: float, rate_delta: float) -> Dict[str, Any]:
+    """The project with every STR unit shifted as calculate_sensitivity_cash_flow does."""
+    units = []
+    for unit in project['units']:
+        if unit['type'] == 'STR':
+            revenue = unit['revenue']
+            unit = {
+                **unit,
+                'revenue': {
+                    **revenue,
+                    'nightlyRate': revenue['nightlyRate'] + rate_delta,
+                    'occupancyPercent': max(0, min(100, revenue['occupancyPercent'] + occupancy_delta)),
+                },
+            }
+        units.append(unit)
+    return {'property': project['property'], 'units': units}
+
+
+def batch_sensitivity(projects: List[Dict[str, Any]]) -> List[Dict[str, List[Dict[str, float]]]]:
+    """
+    calculate_sensitivity_analysis for each project.
+
+    Every scenario of every project becomes one row of a single
+    summary_metrics call.
+    """
+    scenarios: List[Dict[str, Any]] = []
+    layout: List[Tuple[int, List[Tuple[str, float, int]]]] = []
+    for project in projects:
+        baseline = len(scenarios)
+        scenarios.append(project)
+        rows = []
+        groups = [('occupancy', SENSITIVITY_OCCUPANCY_DELTAS, 0)]
+        if any(unit['type'] == 'STR' for unit in project['units']):
+            groups.append(('nightlyRate', SENSITIVITY_RATE_DELTAS, 1))
+        for key, deltas, axis in groups:
+            for delta in deltas:
+                if delta == 0:
+                    rows.append((key, delta, baseline))
+                else:
+                    rows.append((key, delta, len(scenarios)))
+                    scenarios.append(_shifted(project, delta if axis == 0 else 0, delta if axis == 1 else 0))
+        layout.append((baseline, rows))
+
+    cash_flow = summary_metrics(scenarios)['monthlyCashFlow'].tolist()
+    results = []
+    for baseline, rows in layout:
+        result: Dict[str, List[Dict[str, float]]] = {'occupancy': [], 'nightlyRate': []}
+        for key, delta, index in rows:
+            result[key].append({
+                'delta': delta,
+                'monthlyCashFlow': cash_flow[index],
+                'change': cash_flow[index] - cash_flow[baseline],
+            })
+        results.append(result)
+    return results
+
+
+def batch_appreciation(projects: List[Dict[str, Any]]) -> List[Dict[str, List[Dict[str, float]]]]:
+    """calculate_appreciation_scenarios for each project, as (projects, rates, years) arrays."""
+    summary = summary_metrics(projects)
+    price = np.array([float(project['property']['purchasePrice']) for project in projects])
+    down = np.array([float(project['property']['downPaymentPercent']) for project in projects])
+    loan_amount = price - price * (down / 100)
+
+    rates = np.array(APPRECIATION_RATES, dtype=float)[None, :, None]
+    years = np.array(APPRECIATION_YEARS, dtype=float)[None, None, :]
+    future_value = price[:, None, None] * (1 + rates / 100) ** years
+    appreciation = future_value - price[:, None, None]
+    total_cash_flow = summary['annualCashFlow'][:, None, None] * years
+    total_return = total_cash_flow + appreciation - loan_amount[:, None, None]
+    investment = summary['totalInvestment'][:, None, None]
+    roi = np.where(investment > 0, total_return / np.where(investment > 0, investment, 1.0) * 100, 0.0)
+
+    shape = future_value.shape
+    columns = {
+        'futureValue': future_value.tolist(),
+        'appreciation': appreciation.tolist(),
+        'totalCashFlow': np.broadcast_to(total_cash_flow, shape).tolist(),
+        'totalReturn': total_return.tolist(),
+        'roi': roi.tolist(),
+    }
+    return [
+        {
+            str(year): [
+                {'rate': rate, **{name: values[p][r][y] for name, values in columns.items()}}
+                for r, rate in enumerate(APPRECIATION_RATES)
+            ]
+            for y, year in enumerate(APPRECIATION_YEARS)
+        }
+        for p in range(len(projects))
+    ]
+
+
+def batch_amortization(loans: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """
+    generate_amortization_schedule for each loan.
+
+    Loans with the same number of payments share one (loans, months) array of
+    closed-form balances.
+    """
+    price = np.array([float(loan['purchasePrice']) for loan in loans])
+    down = np.array([float(loan['downPaymentPercent']) for loan in loans])
+    rate = np.array([float(loan['interestRate']) for loan in loans])
+    term = np.array([float(loan['loanTerm']) for loan in loans])
+    loan_amount = price - price * (down / 100)
+    payment = monthly_payments(loan_amount, rate, term)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(loans)
+    months = (term * 12).astype(int)
+    for count in np.unique(months):
+        group = np.flatnonzero(months == count)
+        steps = np.arange(count + 1, dtype=float)
+        balance = remaining_balance(
+            loan_amount[group, None], payment[group, None], rate[group, None], steps[None, :]
+        )
+        interest = balance[:, :-1] * (rate[group, None] / 100 / 12)
+        principal = payment[group, None] - interest
+        shown = np.maximum(balance[:, 1:], 0.0)
+        for row, index in enumerate(group.tolist()):
+            monthly = payment[index].item()
+            results[index] = {
+                'monthlyPayment': monthly,
+                'totalLoanAmount': loan_amount[index].item(),
+                'schedule': [
+                    {'month': month, 'payment': monthly, 'principal': p, 'interest': i, 'balance': b}
+                    for month, p, i, b in zip(
+                        range(1, count + 1), principal[row].tolist(), interest[row].tolist(), shown[row].tolist()
+                    )
+                ],
+            }
+    return results
+
+
+def check_loan(loan: Dict[str, Any]) -> Optional[str]:
+    """Range checks /amortization needs beyond the schema."""
+    if not 0 < loan['loanTerm'] <= MAX_LOAN_TERM_YEARS:
+        return f"$.loanTerm: expected 0-{MAX_LOAN_TERM_YEARS} years"
+    if loan['interestRate'] < 0:
+        return "$.interestRate: expected a rate of at least 0"
+    if int(loan['loanTerm'] * 12) < 1:
+        return "$.loanTerm: expected at least one monthly payment"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Batching, caching, metrics
+# ---------------------------------------------------------------------------
+
+def encode_json(value: Any) -> bytes:
+    """Compact JSON, with non-finite numbers as null."""
+    try:
+        text = json.dumps(value, separators=(',', ':'), allow_nan=False)
+    except ValueError:
+        text = json.dumps(json_safe(value), separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+class EndpointMetrics:
+    """Request counters and recent latencies for one endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched = 0
+        self.max_batch = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self._latencies.append(seconds)
+
+    def record_batch(self, size: int):
+        self.batches += 1
+        self.batched += size
+        self.max_batch = max(self.max_batch, size)
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 3)
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'cacheHits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'requestsPerSecond': round(self.requests / max(elapsed, 1e-9), 1),
+            'latencyMs': {
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+            'batches': self.batches,
+            'meanBatchSize': round(self.batched / self.batches, 2) if self.batches else None,
+            'maxBatchSize': self.max_batch,
+        }
+
+
+class ResultCache:
+    """LRU map from request hash to encoded response body."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: str, body: bytes):
+        if self.capacity <= 0:
+            return
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Outcome of one request in a batch: (ok, encoded body or error message)
+Outcome = Tuple[bool, Any]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests to one endpoint into batch calls.
+
+    One batch runs at a time, in a worker thread; requests that arrive
+    meanwhile form the next batch.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[List[Any]], List[Any]],
+        metrics: EndpointMetrics,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY
+    ):
+        self.compute = compute
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: 'asyncio.Queue[Tuple[Any, asyncio.Future]]' = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, payload: Any) -> Outcome:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((payload, future))
+        return await future
+
+    def _compute_batch(self, payloads: List[Any]) -> List[Outcome]:
+        """Run a batch; if it fails, run its requests one by one to find the bad ones."""
+        try:
+            return [(True, encode_json(result)) for result in self.compute(payloads)]
+        except CALCULATION_ERRORS as e:
+            if len(payloads) == 1:
+                return [(False, f"Calculation failed: {type(e).__name__}: {e}")]
+        return [self._compute_batch([payload])[0] for payload in payloads]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            if self.max_delay > 0 and self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.max_delay)
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            self.metrics.record_batch(len(items))
+            try:
+                outcomes = await loop.run_in_executor(None, self._compute_batch, [payload for payload, _ in items])
+            except Exception as e:  # Keep serving; the requests get a 500
+                outcomes = [(False, e)] * len(items)
+            for (_, future), outcome in zip(items, outcomes):
+                if not future.done():
+                    future.set_result(outcome)
+
+
+class Endpoint:
+    """A POST endpoint: input check plus batched computation."""
+
+    def __init__(self, schema: Any, compute: Callable[[List[Any]], List[Any]], extra_check=None):
+        self.check = compile_check(schema, True, 'check_input')
+        self.compute = compute
+        self.extra_check = extra_check
+
+
+ENDPOINTS = {
+    'summary': Endpoint(PROJECT_INPUT, batch_summary),
+    'sensitivity': Endpoint(PROJECT_INPUT, batch_sensitivity),
+    'appreciation': Endpoint(PROJECT_INPUT, batch_appreciation),
+    'amortization': Endpoint(LOAN_INPUT, batch_amortization, check_loan),
+}
+
+
+class CalculationService:
+    """The HTTP server, its batchers, cache and metrics."""
+
+    def __init__(
+        self,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = ResultCache(cache_size)
+        self.metrics = {name: EndpointMetrics() for name in ENDPOINTS}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._started = time.monotonic()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        for name, endpoint in ENDPOINTS.items():
+            batcher = MicroBatcher(endpoint.compute, self.metrics[name], self.max_batch, self.max_delay)
+            batcher.start()
+            self._batchers[name] = batcher
+        self._started = time.monotonic()
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def stop(self):
+        for batcher in self._batchers.values():
+            await batcher.stop()
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        return {
+            'uptimeSeconds': round(elapsed, 1),
+            'maxBatch': self.max_batch,
+            'maxDelayMs': self.max_delay * 1000,
+            'cache': self.cache.snapshot(),
+            'endpoints': {name: metrics.snapshot(elapsed) for name, metrics in self.metrics.items()},
+        }
+
+    async def _compute(self, name: str, key: str, payload: Any) -> Outcome:
+        """Answer from the cache, join an identical request in flight, or batch it."""
+        body = self.cache.get(key)
+        if body is not None:
+            self.metrics[name].cache_hits += 1
+            return True, body
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.metrics[name].coalesced += 1
+            return await asyncio.shield(shared)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            outcome = await self._batchers[name].submit(payload)
+            if outcome[0]:
+                self.cache.put(key, outcome[1])
+            future.set_result(outcome)
+            return outcome
+        except BaseException:
+            # Only on shutdown: submit() answers every request it accepts
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        """Route one request; returns (status, JSON body)."""
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        if path in ('/metrics', '/health'):
+            if method != 'GET':
+                return 405, encode_json({'error': 'Use GET'})
+            return 200, encode_json(self.metrics_snapshot() if path == '/metrics' else {'status': 'ok'})
+
+        name = path[1:]
+        endpoint = ENDPOINTS.get(name)
+        if endpoint is None:
+            return 404, encode_json({'error': f"Unknown endpoint {path}", 'endpoints': sorted(ENDPOINTS)})
+        if method != 'POST':
+            return 405, encode_json({'error': 'Use POST with a JSON body'})
+
+        try:
+            payload = json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            return 400, encode_json({'error': f"Invalid JSON: {e}"})
+
+        errors: List[Tuple[str, str]] = []
+        endpoint.check(payload, errors, [])
+        if errors:
+            return 400, encode_json({
+                'error': 'Invalid input',
+                'details': [f"{path}: {message}" for path, message in errors[:MAX_REPORTED_ERRORS]],
+            })
+        problem = endpoint.extra_check(payload) if endpoint.extra_check else None
+        if problem:
+            return 400, encode_json({'error': 'Invalid input', 'details': [problem]})
+
+        # Hash after coercion, so "350000" and 350000 share an entry
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        key = hashlib.sha256(name.encode('ascii') + b'\0' + canonical).hexdigest()
+        ok, result = await self._compute(name, key, payload)
+        if ok:
+            return 200, result
+        if isinstance(result, str):
+            return 400, encode_json({'error': result})
+        return 500, encode_json({'error': f"{type(result).__name__}: {result}"})
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                started = time.monotonic()
+                method, path, headers, body, keep_alive = request
+                if body is None:
+                    status, response = 413, encode_json({'error': f"Body larger than {MAX_BODY_BYTES} bytes"})
+                    keep_alive = False
+                else:
+                    status, response = await self.handle(method, path, body)
+                write_response(writer, status, response, keep_alive)
+                await writer.drain()
+
+                name = path.split('?', 1)[0].strip('/')
+                if name in self.metrics:
+                    self.metrics[name].record(time.monotonic() - started, status == 200)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1
+# ---------------------------------------------------------------------------
+
+async def read_request(
+    reader: asyncio.StreamReader
+) -> Optional[Tuple[str, str, Dict[str, str], Optional[bytes], bool]]:
+    """
+    Read one request.
+
+    Returns:
+        (method, path, headers, body or None if too large, keep-alive), or
+        None at end of stream
+
+    Raises:
+        ValueError: For a malformed request
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError('Malformed request line')
+    method, path, version = parts
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise ValueError('Too many headers')
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_BYTES:
+        return method, path, headers, None, False
+    body = await reader.readexactly(length) if length > 0 else b''
+    return method, path, headers, body, keep_alive
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool):
+    """Write a JSON response."""
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host: str, port: int, max_batch: int, max_delay: float, cache_size: int):
+    """Run the service until cancelled."""
+    service = CalculationService(max_batch, max_delay, cache_size)
+    server = await service.start(host, port)
+    batching = f"batches of up to {max_batch}, {max_delay * 1000:g} ms gather" if max_batch > 1 else 'no batching'
+    print_success(f"Calculation service on http://{host}:{port} ({batching}, cache {cache_size:,})")
+    print_info(f"Endpoints: {', '.join('/' + name for name in ENDPOINTS)}, /metrics, /health")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+# ---------------------------------------------------------------------------
+# Load test
+# ---------------------------------------------------------------------------
+
+def bench_payload(endpoint: str, project: Dict[str, Any], index: int) -> bytes:
+    """Request body for a load test; the price varies so the cache cannot answer."""
+    property = dict(project['property'])
+    property['purchasePrice'] = property['purchasePrice'] + index * 0.01
+    if endpoint == 'amortization':
+        fields = ('purchasePrice', 'downPaymentPercent', 'interestRate', 'loanTerm')
+        return json.dumps({field: property[field] for field in fields}).encode('utf-8')
+    return json.dumps({'property': property, 'units': project['units']}).encode('utf-8')
+
+
+async def bench(
+    url_host: str,
+    port: int,
+    endpoint: str,
+    projects: List[Dict[str, Any]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Send requests over `concurrency` keep-alive connections.
+
+    Returns:
+        {'requests', 'errors', 'seconds', 'latencies' (sorted seconds)}
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(url_host, port)
+        try:
+            while True:
+                index = next(counter)
+                if index >= requests:
+                    return
+                body = bench_payload(endpoint, projects[index % len(projects)], index)
+                started = time.monotonic()
+                writer.write(
+                    f"POST /{endpoint} HTTP/1.1\r\nHost: {url_host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                status_line = await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    if name.lower() == 'content-length':
+                        length = int(value)
+                await reader.readexactly(length)
+                latencies.append(time.monotonic() - started)
+                if b' 200 ' not in status_line:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': time.monotonic() - started,
+        'latencies': sorted(latencies),
+    }
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Local HTTP service for the calculation model')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the service')
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help=f'Interface to bind (default: {DEFAULT_HOST})')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    serve_parser.add_argument(
+        '--max-batch',
+        type=int,
+        default=DEFAULT_MAX_BATCH,
+        help='Most requests computed together (1 disables batching)'
+    )
+    serve_parser.add_argument(
+        '--max-delay-ms',
+        type=float,
+        default=DEFAULT_MAX_DELAY * 1000,
+        help='How long a batch waits for more requests once the first arrives'
+    )
+    serve_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help='Responses cached (0 disables)')
+
+    bench_parser = subparsers.add_parser('bench', help='Load-test a running service')
+    bench_parser.add_argument('paths', nargs='+', help='Project JSON/JSONL files or folders to send')
+    bench_parser.add_argument('--host', default=DEFAULT_HOST, help='Service host')
+    bench_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Service port')
+    bench_parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='summary', help='Endpoint to call')
+    bench_parser.add_argument('--requests', type=int, default=5000, help='Requests to send')
+    bench_parser.add_argument('--concurrency', type=int, default=64, help='Connections sending at once')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        if args.max_batch < 1 or args.max_delay_ms < 0:
+            print_error("--max-batch must be at least 1 and --max-delay-ms at least 0")
+            sys.exit(1)
+        try:
+            asyncio.run(serve(args.host, args.port, args.max_batch, args.max_delay_ms / 1000, args.cache_size))
+        except OSError as e:
+            print_error(f"Could not start the service: {e}")
+            sys.exit(1)
+        return
+
+    if args.requests < 1 or args.concurrency < 1:
+        print_error("--requests and --concurrency must be at least 1")
+        sys.exit(1)
+    try:
+        projects = load_projects(args.paths)
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+    if not projects:
+        print_error("No projects found")
+        sys.exit(1)
+
+    try:
+        result = asyncio.run(bench(args.host, args.port, args.endpoint, projects, args.requests, args.concurrency))
+    except OSError as e:
+        print_error(f"Could not reach the service: {e}")
+        sys.exit(1)
+
+    latencies = result['latencies']
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    print_success(
+        f"{result['requests']:,} /{args.endpoint} requests in {result['seconds']:.2f}s "
+        f"({result['requests'] / result['seconds']:,.0f}/s, {args.concurrency} connections)"
+    )
+    print_info(
+        f"Latency p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, "
+        f"p99 {percentile(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+    )
+    if result['errors']:
+        print_error(f"{result['errors']:,} request(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+Property Calculations
+Python port of src/utils/calculations.ts and src/utils/mortgageCalculator.ts,
+plus the metrics computed inline by the Summary and Advanced components.
+
+Projects are the plain dicts stored in localStorage / Firestore, so field names
+keep their camelCase spelling. Results must match the web app to the cent;
+keep this module in step with the TypeScript sources.
+"""
+
+from typing import Any, Dict, List, Optional
+
+Project = Dict[str, Any]
+Property = Dict[str, Any]
+Unit = Dict[str, Any]
+Expense = Dict[str, Any]
+
+
+# ---------------------------------------------------------------------------
+# calculations.ts
+# ---------------------------------------------------------------------------
+
+def calculate_unit_monthly_revenue(unit: Unit) -> float:
+    """Monthly revenue for a unit based on its rental strategy."""
+    revenue = unit['revenue']
+    unit_type = unit['type']
+
+    if unit_type == 'STR':
+        return revenue['nightlyRate'] * 30 * (revenue['occupancyPercent'] / 100)
+
+    if unit_type == 'MTR':
+        occupancy = revenue['occupancyPercent'] / 100
+        if revenue.get('rateType') == 'monthly' and revenue.get('monthlyRate'):
+            return revenue['monthlyRate'] * occupancy
+        if revenue.get('dailyRate'):
+            return revenue['dailyRate'] * 30 * occupancy
+        return 0.0
+
+    if unit_type == 'LTR':
+        effective_occupancy = 1 - revenue['annualVacancyPercent'] / 100
+        return revenue['monthlyRent'] * effective_occupancy
+
+    if unit_type == 'Generic':
+        return revenue['monthlyRevenue']
+
+    return 0.0
+
+
+def calculate_str_monthly_turnovers(revenue: Dict[str, Any]) -> float:
+    """Average number of STR guest turnovers per month."""
+    days_occupied = 30 * (revenue['occupancyPercent'] / 100)
+    if not revenue['avgStayLength']:
+        return 0.0
+    return days_occupied / revenue['avgStayLength']
+
+
+# Monthly occurrences per unit of ExpenseFrequency.count
+FREQUENCY_MONTHLY_MULTIPLIERS = {
+    'daily': 30,
+    'weekly': 4.33,
+    'monthly': 1,
+    'quarterly': 1 / 3,
+    'annual': 1 / 12,
+}
+
+
+def calculate_expense_amount(
+    expense: Expense,
+    monthly_revenue: float,
+    property_value: float,
+    unit: Unit
+) -> float:
+    """Monthly cost of a single expense line."""
+    calculation_type = expense['calculationType']
+
+    if calculation_type == 'fixed-monthly':
+        return expense['value']
+
+    if calculation_type == 'percent-revenue':
+        return monthly_revenue * (expense['value'] / 100)
+
+    if calculation_type == 'per-occurrence':
+        frequency = expense.get('frequency')
+        if not frequency:
+            return 0.0
+
+        frequency_type = frequency['type']
+        count = frequency['count']
+        monthly_occurrences = count
+
+        if frequency_type in FREQUENCY_MONTHLY_MULTIPLIERS:
+            monthly_occurrences = count * FREQUENCY_MONTHLY_MULTIPLIERS[frequency_type]
+        elif frequency_type == 'per-booking' and unit['type'] == 'STR':
+            monthly_occurrences = calculate_str_monthly_turnovers(unit['revenue']) * count
+
+        return expense['value'] * monthly_occurrences
+
+    if calculation_type == 'percent-property':
+        return (property_value * (expense['value'] / 100)) / 12
+
+    if calculation_type == 'annual-fixed':
+        return expense['value'] / 12
+
+    return 0.0
+
+
+def calculate_unit_monthly_expenses(unit: Unit, property_value: float) -> float:
+    """Total monthly operating expenses for a unit."""
+    monthly_revenue = calculate_unit_monthly_revenue(unit)
+    return sum(
+        calculate_expense_amount(expense, monthly_revenue, property_value, unit)
+        for expense in unit['expenses']
+    )
+
+
+def calculate_unit_noi(unit: Unit, property_value: float) -> float:
+    """Monthly net operating income for a unit."""
+    return calculate_unit_monthly_revenue(unit) - calculate_unit_monthly_expenses(unit, property_value)
+
+
+def calculate_property_monthly_expenses(property: Property) -> float:
+    """Property-wide monthly costs: tax, base insurance and HOA."""
+    monthly_tax = (property['purchasePrice'] * (property['propertyTaxRate'] / 100)) / 12
+    return monthly_tax + property['baseInsurance'] + property['hoaFees']
+
+
+def calculate_total_investment(property: Property) -> float:
+    """Cash needed to close and get the property rent-ready."""
+    down_payment = property['purchasePrice'] * (property['downPaymentPercent'] / 100)
+    closing_costs = property['purchasePrice'] * (property['closingCostsPercent'] / 100)
+
+    return (
+        down_payment +
+        closing_costs +
+        property['renovationBudget'] +
+        property['furnishingBudget'] +
+        property['otherUpfrontCosts']
+    )
+
+
+# ---------------------------------------------------------------------------
+# mortgageCalculator.ts
+# ---------------------------------------------------------------------------
+
+def calculate_monthly_payment(
+    purchase_price: float,
+    down_payment_percent: float,
+    interest_rate: float,
+    loan_term_years: float
+) -> Dict[str, float]:
+    """
+    Fixed-rate, fully amortizing monthly payment.
+
+    Returns:
+        Dict shaped like MortgagePayment (monthlyPayment, principalAndInterest,
+        totalLoanAmount)
+    """
+    down_payment = purchase_price * (down_payment_percent / 100)
+    loan_amount = purchase_price - down_payment
+    monthly_rate = interest_rate / 100 / 12
+    num_payments = loan_term_years * 12
+
+    if monthly_rate == 0:
+        return {
+            'monthlyPayment': loan_amount / num_payments,
+            'principalAndInterest': loan_amount / num_payments,
+            'totalLoanAmount': loan_amount,
+        }
+
+    growth = (1 + monthly_rate) ** num_payments
+    monthly_payment = (loan_amount * monthly_rate * growth) / (growth - 1)
+
+    return {
+        'monthlyPayment': monthly_payment,
+        'principalAndInterest': monthly_payment,
+        'totalLoanAmount': loan_amount,
+    }
+
+
+def generate_amortization_schedule(
+    purchase_price: float,
+    down_payment_percent: float,
+    interest_rate: float,
+    loan_term_years: float
+) -> List[Dict[str, float]]:
+    """Month-by-month schedule shaped like AmortizationEntry."""
+    mortgage = calculate_monthly_payment(
+        purchase_price, down_payment_percent, interest_rate, loan_term_years
+    )
+    monthly_payment = mortgage['monthlyPayment']
+    monthly_rate = interest_rate / 100 / 12
+    num_payments = int(loan_term_years * 12)
+
+    schedule = []
+    balance = mortgage['totalLoanAmount']
+
+    for month in range(1, num_payments + 1):
+        interest = balance * monthly_rate
+        principal = monthly_payment - interest
+        balance -= principal
+
+        schedule.append({
+            'month': month,
+            'payment': monthly_payment,
+            'principal': principal,
+            'interest': interest,
+            'balance': max(0.0, balance),
+        })
+
+    return schedule
+
+
+def calculate_first_year_principal(
+    purchase_price: float,
+    down_payment_percent: float,
+    interest_rate: float,
+    loan_term_years: float
+) -> float:
+    """Principal paid down over the first 12 payments."""
+    schedule = generate_amortization_schedule(
+        purchase_price, down_payment_percent, interest_rate, loan_term_years
+    )
+    return sum(entry['principal'] for entry in schedule[:12])
+
+
+def get_property_mortgage_payment(property: Property) -> Dict[str, Any]:
+    """Mortgage payment for a property, honouring monthlyMortgageOverride."""
+    override = property.get('monthlyMortgageOverride')
+    if override is not None and override > 0:
+        down_payment = property['purchasePrice'] * (property['downPaymentPercent'] / 100)
+        loan_amount = property['purchasePrice'] - down_payment
+
+        return {
+            'monthlyPayment': override,
+            'principalAndInterest': override,
+            'totalLoanAmount': loan_amount,
+            'isOverridden': True,
+        }
+
+    return calculate_monthly_payment(
+        property['purchasePrice'],
+        property['downPaymentPercent'],
+        property['interestRate'],
+        property['loanTerm']
+    )
+
+
+# ---------------------------------------------------------------------------
+# Summary/PropertySummary.tsx
+# ---------------------------------------------------------------------------
+
+def calculate_property_summary(project: Project) -> Dict[str, float]:
+    """
+    Headline metrics shown by the PropertySummary card.
+
+    Args:
+        project: Project dict (property, units, ...)
+
+    Returns:
+        Dict of monthly/annual cash flow components and return percentages
+    """
+    property = project['property']
+    units = project['units']
+
+    total_monthly_revenue = sum(calculate_unit_monthly_revenue(unit) for unit in units)
+    total_unit_expenses = sum(
+        calculate_unit_monthly_expenses(unit, property['purchasePrice']) for unit in units
+    )
+    property_expenses = calculate_property_monthly_expenses(property)
+    total_monthly_expenses = total_unit_expenses + property_expenses
+
+    mortgage = get_property_mortgage_payment(property)
+
+    monthly_cash_flow = total_monthly_revenue - total_monthly_expenses - mortgage['monthlyPayment']
+    annual_cash_flow = monthly_cash_flow * 12
+
+    total_investment = calculate_total_investment(property)
+    cash_on_cash_return = (annual_cash_flow / total_investment) * 100 if total_investment > 0 else 0.0
+
+    first_year_principal = calculate_first_year_principal(
+        property['purchasePrice'],
+        property['downPaymentPercent'],
+        property['interestRate'],
+        property['loanTerm']
+    )
+
+    total_return = (
+        ((annual_cash_flow + first_year_principal) / total_investment) * 100
+        if total_investment > 0 else 0.0
+    )
+
+    return {
+        'totalMonthlyRevenue': total_monthly_revenue,
+        'totalUnitExpenses': total_unit_expenses,
+        'propertyExpenses': property_expenses,
+        'totalMonthlyExpenses': total_monthly_expenses,
+        'monthlyMortgagePayment': mortgage['monthlyPayment'],
+        'monthlyCashFlow': monthly_cash_flow,
+        'annualCashFlow': annual_cash_flow,
+        'totalInvestment': total_investment,
+        'cashOnCashReturn': cash_on_cash_return,
+        'firstYearPrincipal': first_year_principal,
+        'totalReturn': total_return,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparison/ComparisonDashboard.tsx
+# ---------------------------------------------------------------------------
+
+# Horizon of the dashboard's "Year 5 Wealth" row
+COMPARISON_YEARS = 5
+
+
+def calculate_investment_comparison(
+    project: Project,
+    summary: Optional[Dict[str, float]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Columns of the Investment Comparison table: this property, HYSA and index funds.
+
+    The property's "total return" is cash flow plus first-year principal,
+    and its 5-year wealth is that return times five plus the investment
+    (no compounding), exactly as the dashboard computes it.
+
+    Args:
+        summary: calculate_property_summary(project), if already computed
+
+    Returns:
+        {'property' | 'hysa' | 'indexFund': {initialInvestment,
+        annualCashReturn, annualTotalReturn, returnRate, yearFiveWealth}}
+    """
+    summary = summary or calculate_property_summary(project)
+    comparison = project['comparison']
+    investment = summary['totalInvestment']
+    total_return = summary['annualCashFlow'] + summary['firstYearPrincipal']
+
+    hysa_return = investment * (comparison['hysaRate'] / 100)
+    index_return = investment * (comparison['indexFundTotalRate'] / 100)
+
+    return {
+        'property': {
+            'initialInvestment': investment,
+            'annualCashReturn': summary['annualCashFlow'],
+            'annualTotalReturn': total_return,
+            'returnRate': (total_return / investment) * 100 if investment > 0 else 0.0,
+            'yearFiveWealth': total_return * COMPARISON_YEARS + investment,
+        },
+        'hysa': {
+            'initialInvestment': investment,
+            'annualCashReturn': hysa_return,
+            'annualTotalReturn': hysa_return,
+            'returnRate': comparison['hysaRate'],
+            'yearFiveWealth': investment * (1 + comparison['hysaRate'] / 100) ** COMPARISON_YEARS,
+        },
+        'indexFund': {
+            'initialInvestment': investment,
+            'annualCashReturn': investment * (comparison['indexDividendRate'] / 100),
+            'annualTotalReturn': index_return,
+            'returnRate': comparison['indexFundTotalRate'],
+            'yearFiveWealth': investment * (1 + comparison['indexFundTotalRate'] / 100) ** COMPARISON_YEARS,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Advanced/SensitivityAnalysis.tsx
+# ---------------------------------------------------------------------------
+
+# Occupancy points (percentage points) and nightly rate changes ($) shown by the card
+SENSITIVITY_OCCUPANCY_DELTAS = (-20, -10, 0, 10, 20)
+SENSITIVITY_RATE_DELTAS = (-20, -10, 0, 10, 20)
+
+
+def calculate_sensitivity_cash_flow(project: Project, occupancy_delta: float = 0, rate_delta: float = 0) -> float:
+    """
+    Monthly cash flow with every STR unit's occupancy and nightly rate shifted.
+
+    Occupancy is clamped to 0-100 as in SensitivityAnalysis; other unit
+    types are unchanged.
+    """
+    property = project['property']
+    units = []
+    for unit in project['units']:
+        if unit['type'] == 'STR':
+            revenue = unit['revenue']
+            unit = {
+                **unit,
+                'revenue': {
+                    **revenue,
+                    'nightlyRate': revenue['nightlyRate'] + rate_delta,
+                    'occupancyPercent': max(0, min(100, revenue['occupancyPercent'] + occupancy_delta)),
+                },
+            }
+        units.append(unit)
+
+    total_revenue = sum(calculate_unit_monthly_revenue(unit) for unit in units)
+    total_expenses = sum(
+        calculate_unit_monthly_expenses(unit, property['purchasePrice']) for unit in units
+    ) + calculate_property_monthly_expenses(property)
+
+    return total_revenue - total_expenses - get_property_mortgage_payment(property)['monthlyPayment']
+
+
+def calculate_sensitivity_analysis(project: Project) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Rows of the SensitivityAnalysis card.
+
+    Returns:
+        {'occupancy': [...], 'nightlyRate': [...]}, each row holding delta,
+        monthlyCashFlow and change (vs. the baseline). nightlyRate is empty
+        when the project has no STR unit.
+    """
+    baseline = calculate_sensitivity_cash_flow(project)
+
+    def rows(deltas, scenario) -> List[Dict[str, float]]:
+        result = []
+        for delta in deltas:
+            cash_flow = baseline if delta == 0 else scenario(delta)
+            result.append({'delta': delta, 'monthlyCashFlow': cash_flow, 'change': cash_flow - baseline})
+        return result
+
+    has_str = any(unit['type'] == 'STR' for unit in project['units'])
+    return {
+        'occupancy': rows(SENSITIVITY_OCCUPANCY_DELTAS, lambda d: calculate_sensitivity_cash_flow(project, d, 0)),
+        'nightlyRate': rows(SENSITIVITY_RATE_DELTAS, lambda d: calculate_sensitivity_cash_flow(project, 0, d))
+        if has_str else [],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Advanced/AppreciationScenarios.tsx
+# ---------------------------------------------------------------------------
+
+# Annual appreciation rates (%) and projection periods (years) shown by the card
+APPRECIATION_RATES = (0, 2, 3, 5)
+APPRECIATION_YEARS = (5, 10, 15, 20)
+
+
+def calculate_appreciation_scenario(
+    project: Project,
+    appreciation_rate: float,
+    years: int,
+    summary: Optional[Dict[str, float]] = None
+) -> Dict[str, float]:
+    """
+    One column of the AppreciationScenarios card.
+
+    totalReturn subtracts the full loan amount, exactly as the card does.
+
+    Args:
+        summary: calculate_property_summary(project), if already computed
+    """
+    summary = summary or calculate_property_summary(project)
+    property = project['property']
+    mortgage = get_property_mortgage_payment(property)
+
+    future_value = property['purchasePrice'] * (1 + appreciation_rate / 100) ** years
+    total_cash_flow = summary['annualCashFlow'] * years
+    appreciation = future_value - property['purchasePrice']
+    total_return = total_cash_flow + appreciation - mortgage['totalLoanAmount']
+    total_investment = summary['totalInvestment']
+
+    return {
+        'rate': appreciation_rate,
+        'futureValue': future_value,
+        'appreciation': appreciation,
+        'totalCashFlow': total_cash_flow,
+        'totalReturn': total_return,
+        'roi': (total_return / total_investment) * 100 if total_investment > 0 else 0.0,
+    }
+
+
+def calculate_appreciation_scenarios(
+    project: Project,
+    summary: Optional[Dict[str, float]] = None
+) -> Dict[str, List[Dict[str, float]]]:
+    """Every AppreciationScenarios column for every projection period, keyed by years."""
+    summary = summary or calculate_property_summary(project)
+    return {
+        str(years): [calculate_appreciation_scenario(project, rate, years, summary) for rate in APPRECIATION_RATES]
+        for years in APPRECIATION_YEARS
+    }
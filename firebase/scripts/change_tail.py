@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Change Tail
+Keeps a local project store (project_store.py) in step with the
+`properties` collection by listening for changes, instead of re-exporting
+every project to refresh analytics.
+
+How it works:
+- Listens (on_snapshot) to projects whose updatedAt is at or after the
+  store's watermark, so a restart only receives what changed while it was
+  down; the first snapshot after subscribing is that gap
+- Applies upserts (metrics recomputed in one batch per snapshot) and
+  deletes, and prints one JSON line per change with the new metrics
+- Saves the store, with the newest applied updatedAt as its watermark, at
+  most every --checkpoint-seconds and on exit
+
+Deletes that happened while the tailer was not running cannot be seen
+through a watermark; --reconcile lists project ids once at startup
+(an ids-only read of the collection) and drops rows that no longer exist.
+
+Usage:
+    python change_tail.py --emulator
+    python change_tail.py --env production --store /data/projects.npz
+    python change_tail.py --env production --once --reconcile
+"""
+
+import argparse
+import json
+import queue
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from firestore_client import add_connection_arguments, connect_from_args
+from project_store import ProjectStore, timestamp_text
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+PROPERTIES_COLLECTION = 'properties'
+DEFAULT_STORE = Path(__file__).parent.parent / 'config' / 'project_store.npz'
+
+# Seconds between store saves while changes keep arriving
+DEFAULT_CHECKPOINT_SECONDS = 5.0
+
+# One change: ('upsert', project id, Project dict) or ('delete', project id, None)
+Change = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def changes_query(client: Any, watermark: Optional[str]) -> Any:
+    """Projects changed at or after the watermark (every project without one)."""
+    collection = client.collection(PROPERTIES_COLLECTION)
+    if watermark is None:
+        return collection
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    return collection.where(filter=FieldFilter('updatedAt', '>=', datetime.fromisoformat(watermark)))
+
+
+def snapshot_changes(changes: Iterable[Any]) -> List[Change]:
+    """Convert on_snapshot DocumentChanges to store changes."""
+    converted = []
+    for change in changes:
+        document = change.document
+        if change.type.name == 'REMOVED':
+            converted.append(('delete', document.id, None))
+        else:
+            converted.append(('upsert', document.id, document.to_dict()))
+    return converted
+
+
+def apply_changes(store: ProjectStore, changes: List[Change]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Apply a batch of changes to the store.
+
+    Upserts whose updatedAt matches the stored row are skipped: the
+    watermark query is inclusive, so the newest projects are seen again
+    after a restart.
+
+    Returns:
+        (one event per applied change, counts: upserted, deleted, unchanged, invalid)
+    """
+    counts = {'upserted': 0, 'deleted': 0, 'unchanged': 0, 'invalid': 0}
+    # The last change to a project in a batch wins
+    latest: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+    for operation, project_id, project in changes:
+        latest.pop(project_id, None)
+        latest[project_id] = (operation, project)
+
+    upserts: List[Tuple[str, Dict[str, Any]]] = []
+    deletes: List[str] = []
+    for project_id, (operation, project) in latest.items():
+        if operation == 'delete':
+            deletes.append(project_id)
+            continue
+        updated_at = timestamp_text(project.get('updatedAt'))
+        if updated_at and updated_at == store.updated_at(project_id):
+            counts['unchanged'] += 1
+            continue
+        upserts.append((project_id, project))
+
+    stored, invalid = store.upsert(upserts)
+    present = [project_id for project_id in deletes if project_id in store]
+    store.delete(present)
+
+    events: List[Dict[str, Any]] = []
+    for project_id, project in upserts:
+        updated_at = timestamp_text(project.get('updatedAt'))
+        store.advance_watermark(updated_at)
+        if project_id in stored:
+            events.append({'op': 'upsert', 'id': project_id, 'updatedAt': updated_at, 'metrics': stored[project_id]})
+    events.extend({'op': 'delete', 'id': project_id} for project_id in present)
+    events.extend({'op': 'invalid', 'id': project_id} for project_id in invalid)
+
+    counts['upserted'] = len(stored)
+    counts['deleted'] = len(present)
+    counts['invalid'] = len(invalid)
+    return events, counts
+
+
+def reconcile(client: Any, store: ProjectStore) -> List[str]:
+    """Drop store rows whose project no longer exists; returns their ids."""
+    projects = client.collection(PROPERTIES_COLLECTION).select(['updatedAt']).stream()
+    existing = {snapshot.id for snapshot in projects}
+    missing = [project_id for project_id in store.ids() if project_id not in existing]
+    store.delete(missing)
+    return missing
+
+
+def emit(events: List[Dict[str, Any]]):
+    """Write events to stdout as JSON lines."""
+    for event in events:
+        sys.stdout.write(json.dumps(event, separators=(',', ':')) + '\n')
+    sys.stdout.flush()
+
+
+def catch_up(client: Any, store: ProjectStore) -> Dict[str, int]:
+    """Apply every change since the watermark with one query (no listener)."""
+    changes = [('upsert', snapshot.id, snapshot.to_dict()) for snapshot in changes_query(client, store.watermark).stream()]
+    events, counts = apply_changes(store, changes)
+    emit(events)
+    return counts
+
+
+def tail(
+    client: Any,
+    store: ProjectStore,
+    checkpoint_seconds: float = DEFAULT_CHECKPOINT_SECONDS,
+    idle_timeout: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Listen for changes and apply them until interrupted.
+
+    Listener callbacks run on Firestore's thread and only enqueue; changes
+    are applied, emitted and checkpointed on the calling thread.
+
+    Args:
+        client: google.cloud.firestore Client
+        store: Store to update
+        checkpoint_seconds: Minimum seconds between saves
+        idle_timeout: Stop after this many seconds without changes (for tests)
+
+    Returns:
+        Total counts: upserted, deleted, unchanged, invalid, snapshots
+    """
+    inbox: 'queue.Queue[Any]' = queue.Queue()
+
+    def on_snapshot(_documents, changes, _read_time):
+        inbox.put(snapshot_changes(changes))
+
+    watch = changes_query(client, store.watermark).on_snapshot(on_snapshot)
+    totals = {'upserted': 0, 'deleted': 0, 'unchanged': 0, 'invalid': 0, 'snapshots': 0}
+    dirty = False
+    last_save = last_change = time.monotonic()
+    try:
+        while True:
+            try:
+                changes = inbox.get(timeout=min(checkpoint_seconds, 1.0))
+            except queue.Empty:
+                changes = None
+
+            if changes:
+                events, counts = apply_changes(store, changes)
+                emit(events)
+                for name, value in counts.items():
+                    totals[name] += value
+                totals['snapshots'] += 1
+                dirty = dirty or bool(events)
+                last_change = time.monotonic()
+
+            now = time.monotonic()
+            if dirty and now - last_save >= checkpoint_seconds:
+                store.save()
+                dirty, last_save = False, now
+            if idle_timeout is not None and now - last_change >= idle_timeout:
+                break
+    finally:
+        watch.unsubscribe()
+        store.save()
+    return totals
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Tail `properties` changes into a local project store')
+    add_connection_arguments(parser)
+    parser.add_argument('--store', default=str(DEFAULT_STORE), help=f'Store file (default: {DEFAULT_STORE})')
+    parser.add_argument('--once', action='store_true', help='Apply changes since the watermark and exit')
+    parser.add_argument('--reconcile', action='store_true', help='Drop rows for projects deleted while not tailing')
+    parser.add_argument(
+        '--checkpoint-seconds',
+        type=float,
+        default=DEFAULT_CHECKPOINT_SECONDS,
+        help='Minimum seconds between store saves'
+    )
+    parser.add_argument('--idle-timeout', type=float, help='Exit after this many seconds without changes')
+    args = parser.parse_args()
+
+    try:
+        store = ProjectStore(Path(args.store))
+        client = connect_from_args(args)
+    except (ImportError, ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"Project: {client.project}")
+    print_info(f"Store: {args.store} ({len(store):,} project(s), watermark {store.watermark or 'none'})")
+
+    try:
+        if args.reconcile:
+            removed = reconcile(client, store)
+            emit([{'op': 'delete', 'id': project_id} for project_id in removed])
+            print_info(f"Reconciled: dropped {len(removed):,} deleted project(s)")
+
+        if args.once:
+            counts = catch_up(client, store)
+            store.save()
+        else:
+            print_info("Listening for changes (Ctrl+C to stop)")
+            try:
+                counts = tail(client, store, args.checkpoint_seconds, args.idle_timeout)
+            except KeyboardInterrupt:
+                counts = None
+    except Exception as e:
+        print_error(f"Tail failed: {e}")
+        sys.exit(1)
+
+    if counts is None:
+        print_success(f"Stopped; store saved at watermark {store.watermark or 'none'}")
+        return
+    print_success(
+        f"Applied {counts['upserted']:,} upsert(s), {counts['deleted']:,} delete(s) "
+        f"({counts['unchanged']:,} unchanged); watermark {store.watermark or 'none'}"
+    )
+    if counts['invalid']:
+        print_warning(f"{counts['invalid']:,} malformed project(s) left out of the store")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
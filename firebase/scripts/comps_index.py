@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comps Index
+Loads comparable-rental CSVs (one row per listing with coordinates,
+bedrooms, nightly rate, occupancy and/or monthly rent) into a compact,
+memory-mapped store indexed by a latitude/longitude grid, and fills unit
+revenue assumptions from the nearest comps.
+
+Store layout (a directory, default config/comps):
+    meta.json        row count, grid cell size, sources
+    <column>.npy     one array per column, rows sorted by grid cell
+    cells.npy        sorted grid cell keys that contain rows
+    offsets.npy      first row of each cell (plus the row count)
+
+Nearest-comps queries search rings of grid cells outward from the query
+point until no unseen cell can hold a closer match, so a query touches a
+few hundred rows instead of the whole dataset. Near the poles, where cells
+are only metres wide, a query scans its latitude band instead.
+
+CSV columns (header names are case-insensitive; aliases in CSV_COLUMNS):
+    latitude, longitude, bedrooms     required
+    type                              STR/MTR/LTR (default: LTR when only a
+                                      monthly rent is given, otherwise STR)
+    nightly_rate, occupancy, monthly_rent
+Occupancy is a percent; values of 1 or less are read as fractions.
+
+Usage:
+    python comps_index.py ingest airdna.csv rentals.csv
+    python comps_index.py query --lat 30.2672 --lon -97.7431 --type STR --bedrooms 2
+    python comps_index.py fill ../../exports/batch.jsonl --locations locations.csv -o filled.jsonl
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+CONFIG_DIR = Path(__file__).parent.parent / 'config'
+DEFAULT_STORE = CONFIG_DIR / 'comps'
+STORE_VERSION = 1
+
+# Grid cell size in degrees (about 1.1 km of latitude)
+CELL_DEGREES = 0.01
+KM_PER_DEGREE = 111.195
+
+# Near the poles a cell is too narrow for ring search to finish quickly, so
+# queries whose search reaches this latitude scan their latitude band instead
+POLAR_LATITUDE = 80.0
+EARTH_RADIUS_KM = 6371.0
+
+UNIT_TYPES = ('STR', 'MTR', 'LTR', 'Generic')
+
+# Stored column -> accepted CSV header names
+CSV_COLUMNS = {
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lon', 'lng'),
+    'bedrooms': ('bedrooms', 'beds', 'bedroom_count'),
+    'type': ('type', 'unit_type', 'unittype', 'rental_type'),
+    'nightlyRate': ('nightly_rate', 'nightlyrate', 'adr', 'average_daily_rate'),
+    'occupancyPercent': ('occupancy', 'occupancy_percent', 'occupancypercent', 'occupancy_rate'),
+    'monthlyRent': ('monthly_rent', 'monthlyrent', 'rent'),
+}
+REQUIRED_COLUMNS = ('latitude', 'longitude', 'bedrooms')
+
+# Stored arrays and their dtypes
+STORE_COLUMNS = {
+    'latitude': np.float32,
+    'longitude': np.float32,
+    'bedrooms': np.int8,
+    'type': np.uint8,
+    'nightlyRate': np.float32,
+    'occupancyPercent': np.float32,
+    'monthlyRent': np.float32,
+}
+
+# CSV rows parsed per chunk while ingesting
+INGEST_CHUNK_ROWS = 500_000
+
+# Revenue fields filled per unit type, and how they are rounded
+FILL_FIELDS = {
+    'STR': (('nightlyRate', 0), ('occupancyPercent', 0)),
+    'LTR': (('monthlyRent', 0),),
+}
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def cell_keys(latitude, longitude, cell_degrees: float = CELL_DEGREES) -> np.ndarray:
+    """Grid cell key of each coordinate (row-major over latitude, longitude)."""
+    rows, columns = _cell_indexes(latitude, longitude, cell_degrees)
+    return _key(rows, columns, cell_degrees)
+
+
+def _cell_indexes(latitude, longitude, cell_degrees: float) -> Tuple[np.ndarray, np.ndarray]:
+    rows = np.floor((np.asarray(latitude, dtype=float) + 90) / cell_degrees).astype(np.int64)
+    columns = np.floor((np.asarray(longitude, dtype=float) + 180) / cell_degrees).astype(np.int64)
+    return rows, columns
+
+
+def _key(rows: np.ndarray, columns: np.ndarray, cell_degrees: float) -> np.ndarray:
+    # Longitude wraps around the antimeridian
+    columns_per_row = int(round(360 / cell_degrees))
+    return rows * columns_per_row + np.mod(columns, columns_per_row)
+
+
+def _header_map(header: Sequence[str], source: str) -> Dict[str, int]:
+    """Map stored column names to CSV column positions."""
+    positions = {name.strip().lower(): index for index, name in enumerate(header)}
+    found = {}
+    for column, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in positions:
+                found[column] = positions[alias]
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in found]
+    if missing:
+        raise ValueError(f"{source}: missing column(s) {', '.join(missing)}")
+    if not {'nightlyRate', 'monthlyRent'} & set(found):
+        raise ValueError(f"{source}: needs a nightly rate or monthly rent column")
+    return found
+
+
+def _numbers(values: List[str]) -> np.ndarray:
+    """Parse CSV strings to float64, with blanks (and junk) as NaN."""
+    text = np.array(values, dtype=object)
+    text[text == ''] = 'nan'
+    try:
+        return text.astype(np.float64)
+    except ValueError:
+        return np.array([_number(value) for value in values], dtype=np.float64)
+
+
+def _number(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _parse_chunk(rows: List[List[str]], columns: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """Convert a chunk of CSV rows to typed columns, dropping unusable rows."""
+    width = max(columns.values()) + 1
+    rows = [row for row in rows if len(row) >= width]
+    raw = {name: [row[index].strip() for row in rows] for name, index in columns.items()}
+
+    parsed = {
+        name: _numbers(raw[name]) if name in raw else np.full(len(rows), np.nan)
+        for name in ('latitude', 'longitude', 'bedrooms', 'nightlyRate', 'occupancyPercent', 'monthlyRent')
+    }
+    occupancy = parsed['occupancyPercent']
+    parsed['occupancyPercent'] = np.where(occupancy <= 1, occupancy * 100, occupancy)
+
+    codes = {unit_type.lower(): code for code, unit_type in enumerate(UNIT_TYPES)}
+    default_type = np.where(
+        np.isnan(parsed['nightlyRate']) & ~np.isnan(parsed['monthlyRent']),
+        UNIT_TYPES.index('LTR'), UNIT_TYPES.index('STR')
+    )
+    if 'type' in raw:
+        given = np.array([codes.get(value.lower(), -1) for value in raw['type']], dtype=np.int64)
+        parsed['type'] = np.where(given >= 0, given, default_type)
+    else:
+        parsed['type'] = default_type
+
+    usable = (
+        (np.abs(parsed['latitude']) <= 90) & (np.abs(parsed['longitude']) <= 180) &
+        (parsed['bedrooms'] >= 0) & (parsed['bedrooms'] < 128) &
+        ~(np.isnan(parsed['nightlyRate']) & np.isnan(parsed['monthlyRent']))
+    )
+    return {name: parsed[name][usable].astype(dtype) for name, dtype in STORE_COLUMNS.items()}
+
+
+def read_comps_csv(path: Path, chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterable[Tuple[Dict[str, np.ndarray], int]]:
+    """
+    Stream a comps CSV as typed column chunks.
+
+    Yields:
+        (columns, rows read in this chunk including dropped ones)
+
+    Raises:
+        ValueError: If required columns are missing
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _header_map(header, str(path))
+        chunk: List[List[str]] = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield _parse_chunk(chunk, columns), len(chunk)
+                chunk = []
+        if chunk:
+            yield _parse_chunk(chunk, columns), len(chunk)
+
+
+def build_store(
+    sources: Sequence[str],
+    store: Path = DEFAULT_STORE,
+    cell_degrees: float = CELL_DEGREES
+) -> Dict[str, Any]:
+    """
+    Ingest comps CSVs into a fresh store, replacing any existing one.
+
+    Returns:
+        The store's meta.json contents, plus 'rowsRead'
+
+    Raises:
+        ValueError: If a CSV is missing required columns or holds no usable rows
+    """
+    chunks: List[Dict[str, np.ndarray]] = []
+    rows_read = 0
+    for source in sources:
+        for chunk, count in read_comps_csv(Path(source)):
+            chunks.append(chunk)
+            rows_read += count
+
+    columns = {
+        name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0, dtype=dtype)
+        for name, dtype in STORE_COLUMNS.items()
+    }
+    if not columns['latitude'].size:
+        raise ValueError("No usable comps rows found")
+
+    keys = cell_keys(columns['latitude'], columns['longitude'], cell_degrees)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    cells, starts = np.unique(keys, return_index=True)
+
+    meta = {
+        'version': STORE_VERSION,
+        'rows': int(keys.size),
+        'cells': int(cells.size),
+        'cellDegrees': cell_degrees,
+        'sources': [str(Path(source).name) for source in sources],
+        'builtAt': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+    }
+
+    # Write beside the store and swap it in, so readers never see a mix
+    store = Path(store)
+    staging = store.with_name(store.name + '.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(staging / f"{name}.npy", values[order])
+    np.save(staging / 'cells.npy', cells)
+    np.save(staging / 'offsets.npy', np.append(starts, keys.size).astype(np.int64))
+    (staging / 'meta.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+
+    previous = store.with_name(store.name + '.old')
+    if store.exists():
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(store, previous)
+    os.replace(staging, store)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    return {**meta, 'rowsRead': rows_read}
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def haversine_km(latitude, longitude, latitudes, longitudes) -> np.ndarray:
+    """Great-circle distance from one point to many, in km."""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    lon2 = np.radians(np.asarray(longitudes, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CompsIndex:
+    """Nearest-comps queries over a memory-mapped comps store."""
+
+    def __init__(self, store: Path = DEFAULT_STORE):
+        """
+        Open a store built by build_store.
+
+        Raises:
+            ValueError: If the store is missing or from another version
+        """
+        store = Path(store)
+        meta_path = store / 'meta.json'
+        if not meta_path.exists():
+            raise ValueError(f"No comps store at {store}; run: python comps_index.py ingest <csv>")
+        self.meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Comps store {store} has version {self.meta.get('version')}, expected {STORE_VERSION}")
+
+        self.cell_degrees = float(self.meta['cellDegrees'])
+        self.columns = {name: np.load(store / f"{name}.npy", mmap_mode='r') for name in STORE_COLUMNS}
+        self.cells = np.load(store / 'cells.npy')
+        self.offsets = np.load(store / 'offsets.npy')
+
+    def __len__(self) -> int:
+        return int(self.meta['rows'])
+
+    def _ring_rows(self, row: int, column: int, radius: int) -> np.ndarray:
+        """Store rows in the square ring of cells `radius` away from a cell."""
+        span = np.arange(-radius, radius + 1)
+        if radius == 0:
+            rows, columns = np.array([row]), np.array([column])
+        else:
+            edge = np.full(span.size, radius)
+            rows = np.concatenate([row - edge, row + edge, row + span[1:-1], row + span[1:-1]])
+            columns = np.concatenate([column + span, column + span, column - edge[1:-1], column + edge[1:-1]])
+        inside = (rows >= 0) & (rows < int(round(180 / self.cell_degrees)))
+        keys = _key(rows[inside], columns[inside], self.cell_degrees)
+
+        positions = np.searchsorted(self.cells, keys)
+        present = positions < self.cells.size
+        positions, keys = positions[present], keys[present]
+        positions = positions[self.cells[positions] == keys]
+        if not positions.size:
+            return np.empty(0, dtype=np.int64)
+        starts, stops = self.offsets[positions], self.offsets[positions + 1]
+        lengths = stops - starts
+        # Concatenated aranges for every [start, stop) range
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+    def _band_rows(self, south: float, north: float) -> np.ndarray:
+        """Store rows in every cell between two latitudes, all the way around."""
+        grid_rows = int(round(180 / self.cell_degrees))
+        columns_per_row = int(round(360 / self.cell_degrees))
+        first, last = (int(value) for value in _cell_indexes([south, north], [0, 0], self.cell_degrees)[0])
+        first, last = max(first, 0), min(last, grid_rows)
+        # Keys are row-major, so a band of grid rows is one run of store rows
+        start, stop = np.searchsorted(self.cells, [first * columns_per_row, (last + 1) * columns_per_row])
+        return np.arange(self.offsets[start], self.offsets[stop], dtype=np.int64)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 10,
+        unit_type: Optional[str] = None,
+        bedrooms: Optional[int] = None,
+        max_km: float = 25.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        The k nearest comps to a point that pass the filters.
+
+        Args:
+            latitude, longitude: Query point
+            k: Comps to return
+            unit_type: Only comps of this UnitType
+            bedrooms: Only comps with exactly this many bedrooms
+            max_km: Ignore comps further away than this
+
+        Returns:
+            Stored columns of the matches plus 'distanceKm' and 'row',
+            nearest first (fewer than k if not enough comps match)
+        """
+        type_code = UNIT_TYPES.index(unit_type) if unit_type is not None else None
+        center_row, center_column = (int(value) for value in _cell_indexes(latitude, longitude, self.cell_degrees))
+
+        def matching(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            keep = np.ones(rows.size, dtype=bool)
+            if type_code is not None:
+                keep &= self.columns['type'][rows] == type_code
+            if bedrooms is not None:
+                keep &= self.columns['bedrooms'][rows] == bedrooms
+            rows = rows[keep]
+            return rows, haversine_km(latitude, longitude, self.columns['latitude'][rows], self.columns['longitude'][rows])
+
+        # No match can be further than max_km in latitude
+        band_degrees = max_km / KM_PER_DEGREE
+        if abs(latitude) + band_degrees >= POLAR_LATITUDE:
+            found_rows, found_distances = matching(self._band_rows(latitude - band_degrees, latitude + band_degrees))
+        else:
+            band_cells = math.ceil(band_degrees / self.cell_degrees)
+            found_rows = np.empty(0, dtype=np.int64)
+            found_distances = np.empty(0)
+            radius = 0
+            while True:
+                rows = self._ring_rows(center_row, center_column, radius)
+                if rows.size:
+                    rows, distances = matching(rows)
+                    found_rows = np.concatenate([found_rows, rows])
+                    found_distances = np.concatenate([found_distances, distances])
+
+                # Any cell outside this ring is at least `radius` cells away; cells are
+                # narrowest in km at the poleward edge of the ring or of the band
+                edge_latitude = abs(latitude) + (min(radius, band_cells) + 1) * self.cell_degrees
+                reach_km = radius * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_latitude))
+                if found_distances.size >= k and np.partition(found_distances, k - 1)[k - 1] <= reach_km:
+                    break
+                if reach_km >= max_km:
+                    break
+                radius += 1
+
+        within = found_distances <= max_km
+        found_rows, found_distances = found_rows[within], found_distances[within]
+        order = np.argsort(found_distances, kind='stable')[:k]
+        rows = found_rows[order]
+        result = {name: np.asarray(values[rows]) for name, values in self.columns.items()}
+        result['distanceKm'] = found_distances[order]
+        result['row'] = rows
+        return result
+
+    def estimate(
+        self,
+        latitude: float,
+        longitude: float,
+        unit_type: str,
+        bedrooms: Optional[int] = None,
+        k: int = 10,
+        max_km: float = 25.0
+    ) -> Dict[str, float]:
+        """
+        Revenue assumptions from the median of the k nearest matching comps.
+
+        Returns:
+            nightlyRate, occupancyPercent and monthlyRent medians (NaN when
+            no comp has the value), plus comps (count) and medianKm
+        """
+        comps = self.nearest(latitude, longitude, k, unit_type, bedrooms, max_km)
+        estimate = {'comps': int(comps['row'].size)}
+        for name in ('nightlyRate', 'occupancyPercent', 'monthlyRent'):
+            values = comps[name][~np.isnan(comps[name])]
+            estimate[name] = float(np.median(values)) if values.size else math.nan
+        estimate['medianKm'] = float(np.median(comps['distanceKm'])) if comps['row'].size else math.nan
+        return estimate
+
+
+# ---------------------------------------------------------------------------
+# Bulk fill
+# ---------------------------------------------------------------------------
+
+def read_locations(path: Path) -> Dict[Tuple[str, Optional[str]], Tuple[float, float, Optional[int]]]:
+    """
+    Read a locations CSV: projectId, unitId (blank = every unit), latitude,
+    longitude, bedrooms (blank = any).
+
+    Raises:
+        ValueError: On missing columns or unparseable coordinates
+    """
+    locations = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        lookup = {
+            column: next((fields[alias] for alias in aliases if alias in fields), None)
+            for column, aliases in (
+                ('projectId', ('projectid', 'project_id', 'id')),
+                ('unitId', ('unitid', 'unit_id')),
+                ('latitude', CSV_COLUMNS['latitude']),
+                ('longitude', CSV_COLUMNS['longitude']),
+                ('bedrooms', CSV_COLUMNS['bedrooms']),
+            )
+        }
+        missing = [column for column in ('projectId', 'latitude', 'longitude') if lookup[column] is None]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+
+        for line_number, row in enumerate(reader, 2):
+            try:
+                latitude = float(row[lookup['latitude']])
+                longitude = float(row[lookup['longitude']])
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}:{line_number}: invalid coordinates")
+            bedrooms = (row.get(lookup['bedrooms']) or '').strip() if lookup['bedrooms'] else ''
+            unit_id = (row.get(lookup['unitId']) or '').strip() if lookup['unitId'] else ''
+            key = (row[lookup['projectId']].strip(), unit_id or None)
+            locations[key] = (latitude, longitude, int(float(bedrooms)) if bedrooms else None)
+    return locations
+
+
+def _needs_fill(value: Any) -> bool:
+    return value is None or value == 0
+
+
+def fill_project(
+    index: CompsIndex,
+    project: Dict[str, Any],
+    locations: Dict[Tuple[str, Optional[str]], Tuple[float, float, Optional[int]]],
+    k: int = 10,
+    min_comps: int = 3,
+    overwrite: bool = False,
+    max_km: float = 25.0,
+    cache: Optional[Dict[Tuple, Dict[str, float]]] = None
+) -> Dict[str, int]:
+    """
+    Fill STR/LTR revenue fields of a project's units in place.
+
+    Only empty (missing or zero) fields are filled unless overwrite is set.
+    Pass the same `cache` dict across a batch so units sharing a location,
+    type and bedroom count are estimated once.
+
+    Returns:
+        Counts: 'filled' units, 'sparse' units with fewer than min_comps
+        comps, 'unlocated' STR/LTR units without a location
+    """
+    counts = {'filled': 0, 'sparse': 0, 'unlocated': 0}
+    for unit in project.get('units', []):
+        fields = FILL_FIELDS.get(unit.get('type'))
+        if not fields:
+            continue
+        location = locations.get((project.get('id'), unit.get('id'))) or locations.get((project.get('id'), None))
+        if location is None:
+            counts['unlocated'] += 1
+            continue
+
+        revenue = unit.setdefault('revenue', {})
+        wanted = [(field, digits) for field, digits in fields if overwrite or _needs_fill(revenue.get(field))]
+        if not wanted:
+            continue
+
+        key = (location, unit['type'])
+        estimate = cache.get(key) if cache is not None else None
+        if estimate is None:
+            latitude, longitude, bedrooms = location
+            estimate = index.estimate(latitude, longitude, unit['type'], bedrooms, k, max_km)
+            if cache is not None:
+                cache[key] = estimate
+        if estimate['comps'] < min_comps:
+            counts['sparse'] += 1
+            continue
+
+        changed = False
+        for field, digits in wanted:
+            if not math.isnan(estimate[field]):
+                revenue[field] = round(estimate[field], digits) if digits else int(round(estimate[field]))
+                changed = True
+        counts['filled'] += changed
+    return counts
+
+
+def format_comps(comps: Dict[str, np.ndarray]) -> str:
+    """Render nearest comps as a fixed-width text table."""
+    headers = ['#', 'km', 'Type', 'Beds', 'Nightly', 'Occ %', 'Rent/mo']
+
+    def cell(value: float, pattern: str) -> str:
+        return '' if math.isnan(value) else format(value, pattern)
+
+    body = [
+        [
+            str(rank), f"{comps['distanceKm'][i]:.2f}", UNIT_TYPES[comps['type'][i]], str(comps['bedrooms'][i]),
+            cell(comps['nightlyRate'][i], ',.0f'), cell(comps['occupancyPercent'][i], '.0f'),
+            cell(comps['monthlyRent'][i], ',.0f'),
+        ]
+        for rank, i in enumerate(range(comps['row'].size), 1)
+    ]
+    widths = [max(len(value) for value in column) for column in zip(headers, *body)]
+    lines = ['  '.join(value.rjust(width) for value, width in zip(line, widths)) for line in [headers] + body]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Indexed comparable-rental store for filling unit revenue')
+    parser.add_argument('--store', default=str(DEFAULT_STORE), help=f'Store directory (default: {DEFAULT_STORE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Build the store from comps CSVs (replaces it)')
+    ingest_parser.add_argument('csv', nargs='+', help='Comps CSV files')
+    ingest_parser.add_argument('--cell-degrees', type=float, default=CELL_DEGREES, help='Grid cell size')
+
+    query_parser = commands.add_parser('query', help='Nearest comps to a point')
+    query_parser.add_argument('--lat', type=float, required=True, help='Latitude')
+    query_parser.add_argument('--lon', type=float, required=True, help='Longitude')
+    query_parser.add_argument('--type', choices=UNIT_TYPES, help='Only comps of this unit type')
+    query_parser.add_argument('--bedrooms', type=int, help='Only comps with this many bedrooms')
+    query_parser.add_argument('-k', type=int, default=10, help='Comps to return')
+    query_parser.add_argument('--max-km', type=float, default=25.0, help='Search radius')
+    query_parser.add_argument('--format', choices=('table', 'json'), default='table', help='Output format')
+
+    fill_parser = commands.add_parser('fill', help='Fill STR/LTR revenue for a batch of projects')
+    fill_parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for stdin")
+    fill_parser.add_argument('--locations', required=True, help='CSV: projectId, unitId, latitude, longitude, bedrooms')
+    fill_parser.add_argument('-o', '--output', help='Output JSONL (default: stdout)')
+    fill_parser.add_argument('-k', type=int, default=10, help='Comps per estimate')
+    fill_parser.add_argument('--min-comps', type=int, default=3, help='Leave a unit alone with fewer comps')
+    fill_parser.add_argument('--max-km', type=float, default=25.0, help='Search radius')
+    fill_parser.add_argument('--overwrite', action='store_true', help='Replace values that are already set')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'ingest':
+            started = time.perf_counter()
+            meta = build_store(args.csv, Path(args.store), args.cell_degrees)
+            dropped = meta['rowsRead'] - meta['rows']
+            print_success(
+                f"Indexed {meta['rows']:,} comps in {meta['cells']:,} cells "
+                f"({time.perf_counter() - started:.1f}s) -> {args.store}"
+            )
+            if dropped:
+                print_warning(f"Skipped {dropped:,} row(s) without usable coordinates, bedrooms or rates")
+            return
+
+        index = CompsIndex(Path(args.store))
+
+        if args.command == 'query':
+            started = time.perf_counter()
+            comps = index.nearest(args.lat, args.lon, args.k, args.type, args.bedrooms, args.max_km)
+            elapsed = (time.perf_counter() - started) * 1000
+            if args.format == 'json':
+                rows = [
+                    {
+                        'distanceKm': float(comps['distanceKm'][i]),
+                        'latitude': float(comps['latitude'][i]),
+                        'longitude': float(comps['longitude'][i]),
+                        'type': UNIT_TYPES[comps['type'][i]],
+                        'bedrooms': int(comps['bedrooms'][i]),
+                        **{
+                            name: None if math.isnan(comps[name][i]) else float(comps[name][i])
+                            for name in ('nightlyRate', 'occupancyPercent', 'monthlyRent')
+                        },
+                    }
+                    for i in range(comps['row'].size)
+                ]
+                json.dump(rows, sys.stdout, indent=2)
+                print()
+            else:
+                print_info(f"{comps['row'].size} of {len(index):,} comps in {elapsed:.1f} ms")
+                print(format_comps(comps))
+            return
+
+        locations = read_locations(Path(args.locations))
+        totals = {'projects': 0, 'filled': 0, 'sparse': 0, 'unlocated': 0}
+        cache: Dict[Tuple, Dict[str, float]] = {}
+        started = time.perf_counter()
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for project in iter_projects(args.paths):
+                counts = fill_project(
+                    index, project, locations, args.k, args.min_comps, args.overwrite, args.max_km, cache
+                )
+                output.write(json.dumps(project, separators=(',', ':'), ensure_ascii=False) + '\n')
+                totals['projects'] += 1
+                for name, value in counts.items():
+                    totals[name] += value
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        print_success(
+            f"Filled {totals['filled']:,} unit(s) across {totals['projects']:,} project(s) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        if totals['sparse']:
+            print_warning(f"{totals['sparse']:,} unit(s) had fewer than {args.min_comps} comps nearby")
+        if totals['unlocated']:
+            print_warning(f"{totals['unlocated']:,} STR/LTR unit(s) had no location")
+
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
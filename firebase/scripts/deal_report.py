@@ -0,0 +1,654 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deal Reports
+Renders a printable investor packet per project, as HTML and/or PDF, with
+the numbers of the PropertySummary, ComparisonDashboard,
+SensitivityAnalysis and AppreciationScenarios cards.
+
+How it works:
+- Projects are streamed from files and sent to a process pool in batches;
+  only a bounded number of batches is in flight
+- Each worker computes the sections, renders them through templates that
+  are parsed once per process, and writes each report as soon as it is
+  rendered (atomically, so a partial file is never left behind)
+- PDFs are written directly (Helvetica text and tables), without a browser
+  or extra dependency
+- An index.html linking every report is written at the end
+
+Usage:
+    python deal_report.py ../../exports --out reports
+    python deal_report.py leads.jsonl --out reports --format pdf --workers 8
+    cat batch.jsonl | python deal_report.py - --out reports --format html
+"""
+
+import argparse
+import html
+import itertools
+import os
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from calculations import (
+    APPRECIATION_YEARS,
+    COMPARISON_YEARS,
+    calculate_appreciation_scenarios,
+    calculate_investment_comparison,
+    calculate_property_summary,
+    calculate_sensitivity_analysis,
+    calculate_unit_monthly_expenses,
+    calculate_unit_monthly_revenue,
+    get_property_mortgage_payment,
+)
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+REPORT_FORMATS = ('html', 'pdf')
+INDEX_NAME = 'index.html'
+
+# Projects rendered per worker task
+BATCH_SIZE = 50
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+SAFE_ID = re.compile(r'[A-Za-z0-9_-]+')
+
+# One table cell: (text, '' | 'pos' | 'neg')
+Cell = Tuple[str, str]
+
+# One report section: (title, column headers, rows)
+Section = Tuple[str, Sequence[str], List[List[Cell]]]
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+
+def _money(value: float) -> Cell:
+    sign = '-' if value < 0 else ''
+    return f"{sign}${abs(value):,.0f}", ''
+
+
+def _signed(value: float) -> Cell:
+    text, _ = _money(value)
+    return text, 'pos' if value > 0 else 'neg' if value < 0 else ''
+
+
+def _percent(value: float, digits: int = 2) -> Cell:
+    return f"{value:.{digits}f}%", ''
+
+
+def _text(value: Any) -> Cell:
+    return str(value), ''
+
+
+def report_sections(project: Dict[str, Any], summary: Optional[Dict[str, float]] = None) -> List[Section]:
+    """
+    Compute every section of a deal report.
+
+    Args:
+        summary: calculate_property_summary(project), if already computed
+
+    Raises:
+        KeyError, TypeError, ValueError, ZeroDivisionError: For malformed projects
+    """
+    property = project['property']
+    summary = summary or calculate_property_summary(project)
+    mortgage = get_property_mortgage_payment(property)
+    sections: List[Section] = []
+
+    sections.append(('Purchase', ['Input', 'Value'], [
+        [_text('Purchase price'), _money(property['purchasePrice'])],
+        [_text('Down payment'), _percent(property['downPaymentPercent'], 1)],
+        [_text('Loan amount'), _money(mortgage['totalLoanAmount'])],
+        [_text('Interest rate'), _percent(property['interestRate'], 3)],
+        [_text('Loan term'), _text(f"{property['loanTerm']:g} years")],
+        [_text('Mortgage payment' + (' (override)' if mortgage.get('isOverridden') else '')),
+         _money(mortgage['monthlyPayment'])],
+    ]))
+
+    sections.append(('Property Summary', ['Metric', 'Value'], [
+        [_text('Monthly revenue'), _money(summary['totalMonthlyRevenue'])],
+        [_text('Unit expenses'), _money(summary['totalUnitExpenses'])],
+        [_text('Property expenses'), _money(summary['propertyExpenses'])],
+        [_text('Mortgage payment'), _money(summary['monthlyMortgagePayment'])],
+        [_text('Monthly cash flow'), _signed(summary['monthlyCashFlow'])],
+        [_text('Annual cash flow'), _signed(summary['annualCashFlow'])],
+        [_text('Total investment'), _money(summary['totalInvestment'])],
+        [_text('Cash-on-cash return'), _percent(summary['cashOnCashReturn'])],
+        [_text('Total return (incl. principal)'), _percent(summary['totalReturn'])],
+    ]))
+
+    units = []
+    for unit in project['units']:
+        revenue = calculate_unit_monthly_revenue(unit)
+        expenses = calculate_unit_monthly_expenses(unit, property['purchasePrice'])
+        units.append([_text(unit.get('label') or '-'), _text(unit['type']), _money(revenue), _money(expenses),
+                      _signed(revenue - expenses)])
+    sections.append(('Units', ['Unit', 'Type', 'Revenue/mo', 'Expenses/mo', 'NOI/mo'], units))
+
+    comparison = calculate_investment_comparison(project, summary)
+    columns = ('property', 'hysa', 'indexFund')
+    sections.append(('Investment Comparison', ['Metric', 'This Property', 'HYSA', 'Index Funds'], [
+        [_text('Initial investment')] + [_money(comparison[c]['initialInvestment']) for c in columns],
+        [_text('Annual cash return')] + [_signed(comparison[c]['annualCashReturn']) for c in columns],
+        [_text('Annual total return')] + [_signed(comparison[c]['annualTotalReturn']) for c in columns],
+        [_text('Return rate')] + [_percent(comparison[c]['returnRate']) for c in columns],
+        [_text(f'Year {COMPARISON_YEARS} wealth')] + [_money(comparison[c]['yearFiveWealth']) for c in columns],
+    ]))
+
+    sensitivity = calculate_sensitivity_analysis(project)
+    for key, title, label in (
+        ('occupancy', 'Occupancy Rate Impact', lambda d: f"{d:+d}%"),
+        ('nightlyRate', 'Nightly Rate Impact (STR)', lambda d: f"{'-' if d < 0 else '+'}${abs(d)}"),
+    ):
+        if sensitivity[key]:
+            sections.append((title, ['Scenario', 'Monthly Cash Flow', 'Change'], [
+                [_text('Base' if row['delta'] == 0 else label(row['delta'])), _signed(row['monthlyCashFlow']),
+                 _signed(row['change'])]
+                for row in sensitivity[key]
+            ]))
+
+    appreciation = calculate_appreciation_scenarios(project, summary)
+    for years in APPRECIATION_YEARS:
+        scenarios = appreciation[str(years)]
+        rows = [
+            [_text(label)] + [_money(scenario[key]) for scenario in scenarios]
+            for label, key in (
+                ('Future value', 'futureValue'),
+                ('Appreciation gain', 'appreciation'),
+                (f'Total cash flow ({years} yrs)', 'totalCashFlow'),
+                ('Total return', 'totalReturn'),
+            )
+        ]
+        rows.append([_text('ROI')] + [_percent(scenario['roi'], 1) for scenario in scenarios])
+        headers = ['Metric'] + [f"{scenario['rate']}% Annual" for scenario in scenarios]
+        sections.append((f'Appreciation over {years} years', headers, rows))
+
+    return sections
+
+
+def index_row(project: Dict[str, Any], summary: Dict[str, float]) -> Dict[str, Any]:
+    """What the index page lists for a report."""
+    return {
+        'id': project['id'],
+        'name': project.get('name') or project['id'],
+        'address': project['property'].get('propertyAddress') or '',
+        'purchasePrice': project['property']['purchasePrice'],
+        'monthlyCashFlow': summary['monthlyCashFlow'],
+        'cashOnCashReturn': summary['cashOnCashReturn'],
+    }
+
+
+# ---------------------------------------------------------------------------
+# HTML
+# ---------------------------------------------------------------------------
+
+class CompiledTemplate:
+    """A $name template split once into literal text and slots, so rendering is a join."""
+
+    SLOT = re.compile(r'\$(\w+)')
+
+    def __init__(self, text: str):
+        parts = self.SLOT.split(text)
+        self._literals = parts[0::2]
+        self._names = parts[1::2]
+
+    def render(self, **values: str) -> str:
+        """Fill every slot (values are inserted as given, so escape them first)."""
+        out = [self._literals[0]]
+        for name, literal in zip(self._names, self._literals[1:]):
+            out.append(values[name])
+            out.append(literal)
+        return ''.join(out)
+
+
+STYLE = """
+body { font-family: system-ui, sans-serif; max-width: 960px; margin: 2rem auto; padding: 0 1rem; color: #111827; }
+h1 { margin-bottom: 0.25rem; }
+h2 { margin-top: 1.5rem; font-size: 1.05rem; }
+.muted { color: #6b7280; }
+table { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+th, td { padding: 0.35rem 0.5rem; border-bottom: 1px solid #e5e7eb; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.pos { color: #16a34a; } .neg { color: #dc2626; }
+section { break-inside: avoid; }
+@media print { body { margin: 0; max-width: none; } a { color: inherit; text-decoration: none; } }
+"""
+
+PAGE_TEMPLATE = CompiledTemplate("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$title</title>
+<style>$style</style>
+</head>
+<body>
+<h1>$title</h1>
+<p class="muted">$subtitle</p>
+$body
+<p class="muted">$footer</p>
+</body>
+</html>
+""")
+
+SECTION_TEMPLATE = CompiledTemplate(
+    "<section><h2>$title</h2><table><thead><tr>$head</tr></thead><tbody>$rows</tbody></table></section>\n"
+)
+
+
+def _html_cell(cell: Cell) -> str:
+    text, css = cell
+    return f'<td class="{css}">{html.escape(text)}</td>' if css else f"<td>{html.escape(text)}</td>"
+
+
+def render_html(title: str, subtitle: str, sections: List[Section], footer: str) -> str:
+    """Render sections as a self-contained, printable HTML page."""
+    body = ''.join(
+        SECTION_TEMPLATE.render(
+            title=html.escape(section_title),
+            head=''.join(f"<th>{html.escape(header)}</th>" for header in headers),
+            rows=''.join('<tr>' + ''.join(map(_html_cell, row)) + '</tr>' for row in rows),
+        )
+        for section_title, headers, rows in sections
+    )
+    return PAGE_TEMPLATE.render(
+        title=html.escape(title),
+        style=STYLE,
+        subtitle=html.escape(subtitle),
+        body=body,
+        footer=html.escape(footer),
+    )
+
+
+def render_index(rows: List[Dict[str, Any]], formats: Sequence[str], footer: str) -> str:
+    """Index page linking every report, best cash-on-cash first."""
+    rows = sorted(rows, key=lambda row: row['cashOnCashReturn'], reverse=True)
+    table_rows = []
+    for row in rows:
+        links = ' '.join(
+            f'<a href="{html.escape(row["id"])}.{extension}">{extension.upper()}</a>' for extension in formats
+        )
+        cash_flow, css = _signed(row['monthlyCashFlow'])
+        table_rows.append(
+            f"<tr><td>{html.escape(row['name'])}</td><td>{html.escape(row['address'])}</td>"
+            f"<td>{html.escape(_money(row['purchasePrice'])[0])}</td>"
+            f'<td class="{css}">{html.escape(cash_flow)}</td>'
+            f"<td>{row['cashOnCashReturn']:.1f}%</td><td>{links}</td></tr>"
+        )
+    body = SECTION_TEMPLATE.render(
+        title='Deals',
+        head=''.join(f"<th>{header}</th>" for header in ('Project', 'Address', 'Price', 'Cash Flow/mo', 'CoC', 'Report')),
+        rows=''.join(table_rows),
+    )
+    return PAGE_TEMPLATE.render(
+        title='Deal Reports',
+        style=STYLE,
+        subtitle=f"{len(rows):,} project(s)",
+        body=body,
+        footer=html.escape(footer),
+    )
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, points
+MARGIN = 54
+FIRST_COLUMN_WIDTH = 170
+ROW_HEIGHT = 14
+TEXT_SIZE = 9
+
+# Helvetica advance widths (1/1000 em) for the characters reports mostly use
+_NARROW = dict.fromkeys(' ,.:;!|()[]/\'ijlft', 278)
+_CHAR_WIDTHS = {**dict.fromkeys('0123456789$', 556), **_NARROW, '-': 333, '%': 889, '+': 584, 'm': 833, 'w': 722}
+
+_COLORS = {'pos': b'0.09 0.64 0.29 rg', 'neg': b'0.86 0.15 0.15 rg'}
+
+
+def _text_width(text: str, size: float, bold: bool = False) -> float:
+    default = 611 if bold else 556
+    return sum(_CHAR_WIDTHS.get(char, 667 if char.isupper() else default) for char in text) * size / 1000
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1252', 'replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class PdfDocument:
+    """Just enough PDF for text and tables: Helvetica, multiple pages, compressed content."""
+
+    def __init__(self):
+        self._pages: List[List[bytes]] = []
+        self._new_page()
+
+    def _new_page(self):
+        self._ops: List[bytes] = []
+        self._pages.append(self._ops)
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def ensure(self, height: float):
+        """Start a new page unless `height` points still fit."""
+        if self.y - height < MARGIN:
+            self._new_page()
+
+    def text(self, x: float, text: str, size: float = TEXT_SIZE, bold: bool = False, css: str = '',
+             right: Optional[float] = None):
+        """Draw text on the current line, left-aligned at x or right-aligned at `right`."""
+        if right is not None:
+            x = right - _text_width(text, size, bold)
+        color = _COLORS.get(css)
+        if color:
+            self._ops.append(color)
+        self._ops.append(b'BT /%s %g Tf %.2f %.2f Td %s Tj ET' % (
+            b'F2' if bold else b'F1', size, x, self.y, _pdf_string(text)
+        ))
+        if color:
+            self._ops.append(b'0 g')
+
+    def rule(self):
+        """Thin line under the current line."""
+        y = self.y - 4
+        self._ops.append(b'0.85 G 0.5 w %d %.2f m %d %.2f l S' % (MARGIN, y, PAGE_WIDTH - MARGIN, y))
+
+    def heading(self, text: str, size: float):
+        self.ensure(size + ROW_HEIGHT * 3)
+        self.y -= size
+        self.text(MARGIN, text, size, bold=True)
+        self.y -= size * 0.6
+
+    def paragraph(self, text: str, size: float = TEXT_SIZE):
+        self.ensure(ROW_HEIGHT)
+        self.y -= ROW_HEIGHT
+        self.text(MARGIN, text, size)
+
+    def table(self, headers: Sequence[str], rows: List[List[Cell]]):
+        """Draw a table; the first column is left-aligned, the rest right-aligned."""
+        width = PAGE_WIDTH - 2 * MARGIN - FIRST_COLUMN_WIDTH
+        column = width / max(len(headers) - 1, 1)
+        rights = [MARGIN + FIRST_COLUMN_WIDTH + column * (i + 1) for i in range(len(headers) - 1)]
+
+        def line(cells: Sequence[Cell], bold: bool):
+            first, css = cells[0]
+            # Clip long labels to the first column
+            while first and _text_width(first, TEXT_SIZE, bold) > FIRST_COLUMN_WIDTH - 6:
+                first = first[:-2] + '…' if len(first) > 2 else ''
+            self.text(MARGIN, first, bold=bold, css=css)
+            for (text, css), right in zip(cells[1:], rights):
+                self.text(0, text, bold=bold, css=css, right=right)
+
+        self.y -= ROW_HEIGHT
+        line([(header, '') for header in headers], bold=True)
+        self.rule()
+        for row in rows:
+            self.ensure(ROW_HEIGHT)
+            self.y -= ROW_HEIGHT
+            line(row, bold=False)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the document."""
+        objects: List[bytes] = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'',  # Pages, filled in once the page objects are numbered
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        ]
+        kids = []
+        for ops in self._pages:
+            stream = zlib.compress(b'\n'.join(ops))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+            objects.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+            )
+            kids.append(len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)
+        )
+
+        out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(out)
+
+
+def render_pdf(title: str, subtitle: str, sections: List[Section], footer: str) -> bytes:
+    """Render sections as a PDF document."""
+    document = PdfDocument()
+    document.heading(title, 18)
+    if subtitle:
+        document.paragraph(subtitle)
+    for section_title, headers, rows in sections:
+        # Keep a section's title with its first rows
+        document.ensure(ROW_HEIGHT * (min(len(rows), 4) + 4))
+        document.y -= ROW_HEIGHT / 2
+        document.heading(section_title, 12)
+        document.table(headers, rows)
+    document.y -= ROW_HEIGHT / 2
+    document.paragraph(footer, 8)
+    return document.to_bytes()
+
+
+# ---------------------------------------------------------------------------
+# Batch rendering
+# ---------------------------------------------------------------------------
+
+def _write_atomic(path: Path, content: bytes):
+    """Write a file so readers never see a partial report."""
+    # Per-process name, so two runs writing the same report never share a temp file
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        temporary.write_bytes(content)
+        os.replace(temporary, path)
+    except OSError:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+def render_batch(
+    projects: List[Dict[str, Any]],
+    out_dir: str,
+    formats: Sequence[str],
+    footer: str
+) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Render and write the reports for one batch (runs in a worker process).
+
+    Returns:
+        ([index rows of written reports], [(project id, error) failed])
+    """
+    written, failed = [], []
+    for project in projects:
+        project_id = project.get('id') if isinstance(project, dict) else None
+        if not isinstance(project_id, str) or not SAFE_ID.fullmatch(project_id):
+            failed.append((str(project_id), 'missing or unsafe project id'))
+            continue
+        try:
+            summary = calculate_property_summary(project)
+            sections = report_sections(project, summary)
+            title = project.get('name') or project_id
+            address = project['property'].get('propertyAddress') or ''
+            subtitle = ' · '.join(filter(None, [address, project.get('description') or '']))
+            for extension in formats:
+                if extension == 'html':
+                    content = render_html(title, subtitle, sections, footer).encode('utf-8')
+                else:
+                    content = render_pdf(title, subtitle, sections, footer)
+                _write_atomic(Path(out_dir) / f"{project_id}.{extension}", content)
+            written.append(index_row(project, summary))
+        except (KeyError, TypeError, ValueError, ZeroDivisionError, AttributeError, OSError) as e:
+            # A write error (disk full, permissions) fails this project, not the whole batch
+            failed.append((project_id, f"{type(e).__name__}: {e}"))
+    return written, failed
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def render_reports(
+    projects: Iterable[Dict[str, Any]],
+    out_dir: Path,
+    formats: Sequence[str] = REPORT_FORMATS,
+    workers: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Render a report per project into out_dir, plus an index page.
+
+    Args:
+        projects: Project dicts (consumed once, as batches are needed)
+        out_dir: Output directory
+        formats: REPORT_FORMATS to write
+        workers: Worker processes (default: CPU count)
+        batch_size: Projects per worker task
+        progress: Called with (reports written, elapsed seconds) every PROGRESS_INTERVAL
+
+    Returns:
+        {'written': n, 'failed': [(id, error)], 'seconds': elapsed}
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    footer = f"Generated {date.today().isoformat()}. Figures are estimates, not financial advice."
+    workers = workers or os.cpu_count() or 1
+    rows: List[Dict[str, Any]] = []
+    failed: List[Tuple[str, str]] = []
+    started = last_progress = time.monotonic()
+
+    def collect(done: Set[Future]):
+        for future in done:
+            written, errors = future.result()
+            rows.extend(written)
+            failed.extend(errors)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future] = set()
+        for batch in _chunks(projects, batch_size):
+            # Bound the batches held in memory
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(render_batch, batch, str(out_dir), tuple(formats), footer))
+            if progress is not None and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                progress(len(rows), last_progress - started)
+        collect(wait(pending).done)
+
+    _write_atomic(out_dir / INDEX_NAME, render_index(rows, formats, footer).encode('utf-8'))
+    return {'written': len(rows), 'failed': failed, 'seconds': time.monotonic() - started}
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Render investor reports (HTML/PDF) for a batch of projects')
+    parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for JSONL on stdin")
+    parser.add_argument('--out', required=True, help='Output directory')
+    parser.add_argument(
+        '--format',
+        action='append',
+        choices=REPORT_FORMATS,
+        help='Report format (repeatable; default: html and pdf)'
+    )
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Projects per worker task')
+    args = parser.parse_args()
+
+    if (args.workers is not None and args.workers < 1) or args.batch_size < 1:
+        print_error("--workers and --batch-size must be at least 1")
+        sys.exit(1)
+    formats = tuple(dict.fromkeys(args.format or REPORT_FORMATS))
+
+    def progress(written: int, elapsed: float):
+        print_info(f"{written:,} report(s) written ({written / elapsed:,.0f}/s)")
+
+    try:
+        result = render_reports(
+            iter_projects(args.paths),
+            Path(args.out),
+            formats,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            progress=progress
+        )
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    for project_id, error in result['failed'][:20]:
+        print_warning(f"{project_id}: {error}")
+    if len(result['failed']) > 20:
+        print_warning(f"... and {len(result['failed']) - 20:,} more")
+    if result['failed']:
+        print_warning(f"Skipped {len(result['failed']):,} project(s)")
+
+    rate = result['written'] / max(result['seconds'], 1e-9)
+    print_success(
+        f"Wrote {result['written']:,} report(s) ({', '.join(formats)}) to {args.out} "
+        f"in {result['seconds']:.1f}s ({rate:,.0f}/s)"
+    )
+    print_info(f"Index: {Path(args.out) / INDEX_NAME}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -7,16 +7,19 @@ Standalone script to deploy Firestore indexes to staging or production.
 
 import json
 import os
-import subprocess
 import sys
 from pathlib import Path
 from typing import Optional
 
+from async_runner import run_sync
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Deploys that run longer than this are terminated
+DEPLOY_TIMEOUT = 600.0
 
 
 # Color codes for terminal output
@@ -57,26 +60,21 @@ def print_info(message: str):
     print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
 
 
-def run_command(command: str, check: bool = True) -> bool:
-    """Run a shell command."""
-    try:
-        subprocess.run(
-            command,
-            shell=True,
-            check=check,
-            encoding='utf-8',
-            errors='replace'
-        )
-        return True
-    except subprocess.CalledProcessError as e:
-        print_error(f"Command failed: {command}")
-        print_error(f"Error: {e}")
+def run_command(command: str, check: bool = True, timeout: Optional[float] = DEPLOY_TIMEOUT) -> bool:
+    """Run a shell command, streaming its output as it arrives."""
+    result = run_sync(command, target="firebase", timeout=timeout)
+
+    if result.timed_out:
+        print_error(f"Command timed out after {timeout:.0f}s: {command}")
         return False
-    except UnicodeDecodeError as e:
-        print_error(f"Encoding error running command: {command}")
-        print_error(f"Error: {e}")
+
+    if result.returncode != 0 and check:
+        print_error(f"Command failed: {command}")
+        print_error(f"Error: exit status {result.returncode}")
         return False
 
+    return True
+
 
 def get_project_root() -> Path:
     """Get the project root directory."""
@@ -5,18 +5,23 @@ Deploy Firestore Security Rules
 Standalone script to deploy security rules to staging or production.
 """
 
+import argparse
 import json
 import os
-import subprocess
 import sys
 from pathlib import Path
 from typing import Optional
 
+from async_runner import run_sync
+from rules_check import gate_deploy
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Deploys that run longer than this are terminated
+DEPLOY_TIMEOUT = 600.0
 
 
 # Color codes for terminal output
@@ -47,31 +52,31 @@ def print_error(message: str):
     print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
 
 
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
 def print_info(message: str):
     """Print an info message."""
     print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
 
 
-def run_command(command: str, check: bool = True) -> bool:
-    """Run a shell command."""
-    try:
-        subprocess.run(
-            command,
-            shell=True,
-            check=check,
-            encoding='utf-8',
-            errors='replace'
-        )
-        return True
-    except subprocess.CalledProcessError as e:
-        print_error(f"Command failed: {command}")
-        print_error(f"Error: {e}")
+def run_command(command: str, check: bool = True, timeout: Optional[float] = DEPLOY_TIMEOUT) -> bool:
+    """Run a shell command, streaming its output as it arrives."""
+    result = run_sync(command, target="firebase", timeout=timeout)
+
+    if result.timed_out:
+        print_error(f"Command timed out after {timeout:.0f}s: {command}")
         return False
-    except UnicodeDecodeError as e:
-        print_error(f"Encoding error running command: {command}")
-        print_error(f"Error: {e}")
+
+    if result.returncode != 0 and check:
+        print_error(f"Command failed: {command}")
+        print_error(f"Error: exit status {result.returncode}")
         return False
 
+    return True
+
 
 def get_project_root() -> Path:
     """Get the project root directory."""
@@ -131,12 +136,13 @@ def select_environment() -> Optional[str]:
             return None
 
 
-def deploy_rules(environment: str) -> bool:
+def deploy_rules(environment: str, skip_rules_check: bool = False) -> bool:
     """
     Deploy Firestore security rules to specified environment.
 
     Args:
         environment: Environment alias (e.g., 'staging', 'production')
+        skip_rules_check: Deploy without running rules_check.py first
 
     Returns:
         True if deployment succeeded
@@ -162,6 +168,16 @@ def deploy_rules(environment: str) -> bool:
     print_info(f"Project: {project_id}")
     print_info(f"Rules file: {rules_file}")
 
+    # Catch broken rules locally before they reach a project
+    if skip_rules_check:
+        print_warning("Skipping the rules check")
+    else:
+        print_info("Checking rules against the emulator...")
+        if not gate_deploy(rules_file):
+            print_error("Rules check failed; fix the rules (or the cases) before deploying")
+            print_info("Run `python rules_check.py --start-emulator` for details, or pass --skip-rules-check")
+            return False
+
     # Confirm deployment
     print(f"\n{Colors.WARNING}This will deploy security rules to {environment} ({project_id}){Colors.ENDC}")
     confirm = input("Continue? (yes/no): ").strip().lower()
@@ -192,6 +208,14 @@ def deploy_rules(environment: str) -> bool:
 
 def main():
     """Main script execution."""
+    parser = argparse.ArgumentParser(description='Deploy Firestore security rules')
+    parser.add_argument(
+        '--skip-rules-check',
+        action='store_true',
+        help='Deploy without checking the rules against the emulator first'
+    )
+    args = parser.parse_args()
+
     print_header("Deploy Firestore Security Rules")
 
     # Select environment
@@ -200,7 +224,7 @@ def main():
         sys.exit(1)
 
     # Deploy rules
-    success = deploy_rules(environment)
+    success = deploy_rules(environment, skip_rules_check=args.skip_rules_check)
 
     sys.exit(0 if success else 1)
 
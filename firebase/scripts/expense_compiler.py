@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Expense Compiler
+Reduces a unit's expense list to four coefficients so that its monthly
+expenses become a dot product instead of a switch per expense:
+
+    expenses = fixedMonthly
+             + revenueShare       * monthly revenue
+             + propertyValueShare * property value
+             + perTurnover        * monthly STR turnovers
+
+Compiled results match calculations.calculate_unit_monthly_expenses.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from calculations import (
+    FREQUENCY_MONTHLY_MULTIPLIERS,
+    calculate_str_monthly_turnovers,
+    calculate_unit_monthly_revenue,
+)
+
+# Column order of coefficient/feature matrices
+COEFFICIENT_NAMES = ('fixedMonthly', 'revenueShare', 'propertyValueShare', 'perTurnover')
+
+
+class ExpenseCoefficients(NamedTuple):
+    """Linear form of a unit's monthly expenses."""
+    fixed_monthly: float = 0.0
+    revenue_share: float = 0.0
+    property_value_share: float = 0.0
+    per_turnover: float = 0.0
+
+    def monthly_expenses(self, monthly_revenue: float, property_value: float, monthly_turnovers: float) -> float:
+        return (
+            self.fixed_monthly +
+            self.revenue_share * monthly_revenue +
+            self.property_value_share * property_value +
+            self.per_turnover * monthly_turnovers
+        )
+
+
+def _expense_key(expense: Dict[str, Any]) -> Tuple:
+    frequency = expense.get('frequency') or {}
+    return (
+        expense['calculationType'],
+        float(expense['value']),
+        frequency.get('type'),
+        float(frequency['count']) if 'count' in frequency else None,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _compile(keys: Tuple[Tuple, ...], is_str: bool) -> ExpenseCoefficients:
+    fixed = revenue_share = property_share = per_turnover = 0.0
+
+    for calculation_type, value, frequency_type, count in keys:
+        if calculation_type == 'fixed-monthly':
+            fixed += value
+        elif calculation_type == 'percent-revenue':
+            revenue_share += value / 100
+        elif calculation_type == 'per-occurrence':
+            if frequency_type is None:
+                continue
+            if frequency_type in FREQUENCY_MONTHLY_MULTIPLIERS:
+                fixed += value * count * FREQUENCY_MONTHLY_MULTIPLIERS[frequency_type]
+            elif frequency_type == 'per-booking' and is_str:
+                per_turnover += value * count
+            else:
+                # Unknown frequencies, and per-booking on non-STR units, fall
+                # back to `count` occurrences a month in calculateExpenseAmount
+                fixed += value * count
+        elif calculation_type == 'percent-property':
+            property_share += value / 100 / 12
+        elif calculation_type == 'annual-fixed':
+            fixed += value / 12
+
+    return ExpenseCoefficients(fixed, revenue_share, property_share, per_turnover)
+
+
+def compile_expenses(expenses: Iterable[Dict[str, Any]], unit_type: str) -> ExpenseCoefficients:
+    """
+    Compile an expense list (a unit's or a template's) for a unit type.
+
+    Identical lists - e.g. every unit created from the same template - share
+    one cached compilation.
+    """
+    return _compile(tuple(_expense_key(expense) for expense in expenses), unit_type == 'STR')
+
+
+def compile_unit(unit: Dict[str, Any]) -> ExpenseCoefficients:
+    """Compile a unit's own expense list."""
+    return compile_expenses(unit['expenses'], unit['type'])
+
+
+def unit_features(unit: Dict[str, Any], property_value: float) -> Tuple[float, float, float, float]:
+    """Feature vector matching COEFFICIENT_NAMES for a unit."""
+    turnovers = calculate_str_monthly_turnovers(unit['revenue']) if unit['type'] == 'STR' else 0.0
+    return (1.0, calculate_unit_monthly_revenue(unit), float(property_value), turnovers)
+
+
+def unit_occupancy_profile(unit: Dict[str, Any]) -> Tuple[float, float, float]:
+    """
+    How a unit's revenue depends on occupancy.
+
+    Returns:
+        (current occupancy as a fraction, revenue at 100% occupancy,
+        STR turnovers at 100% occupancy). Occupancy is NaN for Generic
+        units, whose revenue does not depend on it.
+    """
+    revenue = unit['revenue']
+    unit_type = unit['type']
+
+    if unit_type == 'STR':
+        stay = revenue['avgStayLength']
+        return revenue['occupancyPercent'] / 100, revenue['nightlyRate'] * 30, (30 / stay if stay else 0.0)
+    if unit_type == 'MTR':
+        full = calculate_unit_monthly_revenue({**unit, 'revenue': {**revenue, 'occupancyPercent': 100}})
+        return revenue['occupancyPercent'] / 100, full, 0.0
+    if unit_type == 'LTR':
+        return 1 - revenue['annualVacancyPercent'] / 100, revenue['monthlyRent'], 0.0
+    return float('nan'), 0.0, 0.0
+
+
+def compile_portfolio(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Compile every unit of every project into dense arrays.
+
+    Returns:
+        - coefficients: (units, 4) in COEFFICIENT_NAMES order
+        - features: (units, 4) evaluated at each project's purchase price
+        - projectIndex: (units,) index of the owning project
+        - occupancy: (units, 3) from unit_occupancy_profile
+    """
+    coefficients: List[ExpenseCoefficients] = []
+    features: List[Tuple[float, float, float, float]] = []
+    project_index: List[int] = []
+    occupancy: List[Tuple[float, float, float]] = []
+
+    for index, project in enumerate(projects):
+        property_value = project['property']['purchasePrice']
+        for unit in project['units']:
+            coefficients.append(compile_unit(unit))
+            features.append(unit_features(unit, property_value))
+            project_index.append(index)
+            occupancy.append(unit_occupancy_profile(unit))
+
+    return {
+        'coefficients': np.array(coefficients, dtype=float).reshape(-1, 4),
+        'features': np.array(features, dtype=float).reshape(-1, 4),
+        'projectIndex': np.array(project_index, dtype=np.intp),
+        'occupancy': np.array(occupancy, dtype=float).reshape(-1, 3),
+    }
+
+
+def project_unit_expenses(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Total unit expenses per project, split into a price-independent part and
+    a per-dollar-of-property-value part.
+
+    Returns:
+        - base: (projects,) expenses excluding percent-property lines
+        - perPropertyValue: (projects,) monthly cost per dollar of property value
+        - monthlyRevenue: (projects,) total unit revenue
+        - occupancySlope: (projects,) change in unit net income (revenue
+          minus expenses) per unit of occupancy fraction, with every
+          occupancy-driven unit at the same occupancy
+        - occupancyIndependent: (projects,) unit net income that does not
+          depend on occupancy, excluding percent-property lines
+        Unit expenses at price p are base + perPropertyValue * p.
+    """
+    compiled = compile_portfolio(projects)
+    coefficients, features = compiled['coefficients'], compiled['features']
+    owner, count = compiled['projectIndex'], len(projects)
+
+    variable = coefficients[:, 2]
+    base = np.einsum('ij,ij->i', np.delete(coefficients, 2, axis=1), np.delete(features, 2, axis=1))
+
+    occupancy = compiled['occupancy']
+    driven = ~np.isnan(occupancy[:, 0])
+    kept_share = 1 - coefficients[:, 1]
+    slope = np.where(driven, occupancy[:, 1] * kept_share - coefficients[:, 3] * occupancy[:, 2], 0.0)
+    independent = np.where(driven, 0.0, features[:, 1] * kept_share) - coefficients[:, 0]
+
+    return {
+        'base': np.bincount(owner, weights=base, minlength=count),
+        'perPropertyValue': np.bincount(owner, weights=variable, minlength=count),
+        'monthlyRevenue': np.bincount(owner, weights=features[:, 1], minlength=count),
+        'occupancySlope': np.bincount(owner, weights=slope, minlength=count),
+        'occupancyIndependent': np.bincount(owner, weights=independent, minlength=count),
+    }
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Expense Templates
+Python port of the system default expenses in src/utils/expenseTemplates.ts
+(custom templates saved in the browser are not available here).
+"""
+
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+Expense = Dict[str, Any]
+
+STR_DEFAULT_EXPENSES: List[Expense] = [
+    {'name': 'Platform Fees (Airbnb)', 'calculationType': 'percent-revenue', 'value': 3},
+    {
+        'name': 'Cleaning',
+        'calculationType': 'per-occurrence',
+        'value': 70,
+        'frequency': {'type': 'per-booking', 'count': 1},
+    },
+    {'name': 'Utilities - Electric', 'calculationType': 'fixed-monthly', 'value': 90},
+    {'name': 'Utilities - Water', 'calculationType': 'fixed-monthly', 'value': 45},
+    {'name': 'Utilities - Gas', 'calculationType': 'fixed-monthly', 'value': 25},
+    {'name': 'Supplies (toiletries, etc)', 'calculationType': 'fixed-monthly', 'value': 100},
+    {
+        'name': 'Laundry Service',
+        'calculationType': 'per-occurrence',
+        'value': 15,
+        'frequency': {'type': 'per-booking', 'count': 1},
+    },
+    {'name': 'Maintenance Reserve', 'calculationType': 'percent-revenue', 'value': 5},
+    {'name': 'STR Insurance Add-on', 'calculationType': 'fixed-monthly', 'value': 50},
+    {'name': 'Internet/Cable', 'calculationType': 'fixed-monthly', 'value': 100},
+    {'name': 'Smart Lock Maintenance', 'calculationType': 'fixed-monthly', 'value': 10},
+    {'name': 'Pricing Software', 'calculationType': 'fixed-monthly', 'value': 20},
+]
+
+MTR_DEFAULT_EXPENSES: List[Expense] = [
+    {'name': 'Utilities (if owner-paid)', 'calculationType': 'fixed-monthly', 'value': 150},
+    {'name': 'Maintenance Reserve', 'calculationType': 'percent-revenue', 'value': 8},
+    {
+        'name': 'Cleaning (turnover)',
+        'calculationType': 'per-occurrence',
+        'value': 150,
+        'frequency': {'type': 'quarterly', 'count': 4},
+    },
+]
+
+LTR_DEFAULT_EXPENSES: List[Expense] = [
+    {'name': 'Maintenance Reserve', 'calculationType': 'percent-revenue', 'value': 10},
+    {
+        'name': 'Property Management',
+        'calculationType': 'percent-revenue',
+        'value': 10,
+        'notes': '0% if self-managed',
+    },
+    {
+        'name': 'Leasing Fee',
+        'calculationType': 'per-occurrence',
+        'value': 500,
+        'frequency': {'type': 'annual', 'count': 1},
+    },
+]
+
+GENERIC_DEFAULT_EXPENSES: List[Expense] = [
+    {'name': 'Maintenance Reserve', 'calculationType': 'percent-revenue', 'value': 5},
+]
+
+DEFAULT_EXPENSES = {
+    'STR': STR_DEFAULT_EXPENSES,
+    'MTR': MTR_DEFAULT_EXPENSES,
+    'LTR': LTR_DEFAULT_EXPENSES,
+    'Generic': GENERIC_DEFAULT_EXPENSES,
+}
+
+_BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def get_default_expenses(unit_type: str) -> List[Expense]:
+    """System default expenses for a unit type (without ids)."""
+    return DEFAULT_EXPENSES.get(unit_type, [])
+
+
+def generate_id(prefix: str, rng: Optional[random.Random] = None, now_ms: Optional[int] = None) -> str:
+    """
+    Id in the app's `${prefix}-${Date.now()}-${random base36}` format.
+
+    Args:
+        prefix: 'project', 'unit', 'expense', ...
+        rng: Random source (for reproducible ids)
+        now_ms: Timestamp to embed (default: now)
+    """
+    rng = rng or random
+    stamp = int(time.time() * 1000) if now_ms is None else now_ms
+    suffix = ''.join(rng.choice(_BASE36) for _ in range(9))
+    return f"{prefix}-{stamp}-{suffix}"
+
+
+def generate_expense_id(rng: Optional[random.Random] = None, now_ms: Optional[int] = None) -> str:
+    """generateExpenseId."""
+    return generate_id('expense', rng, now_ms)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Firestore Client
+Shared connection setup for scripts that read or write Firestore directly
+through google-cloud-firestore, instead of going through the Firebase CLI.
+
+Credentials come from Application Default Credentials
+(`gcloud auth application-default login` or GOOGLE_APPLICATION_CREDENTIALS).
+With --emulator no credentials are needed.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from write_governor import WriteGovernor
+
+# Host used by --emulator when no host is given
+DEFAULT_EMULATOR_HOST = 'localhost:8080'
+
+# Largest number of writes Firestore accepts in one batch
+MAX_BATCH_WRITES = 500
+
+# Batch commits in flight at once
+DEFAULT_WRITE_WORKERS = 8
+
+# One write in a batch: ('set' | 'merge' | 'update' | 'delete', document reference, data)
+Write = Tuple[str, Any, Optional[Dict[str, Any]]]
+
+
+def get_project_root() -> Path:
+    """Get the project root directory."""
+    return Path(__file__).parent.parent.parent
+
+
+def resolve_project_id(project: Optional[str] = None, environment: Optional[str] = None) -> str:
+    """
+    Work out which Firebase project to talk to.
+
+    Args:
+        project: Explicit project ID (wins over everything else)
+        environment: .firebaserc alias, e.g. 'staging' (default: 'default')
+
+    Returns:
+        The project ID
+
+    Raises:
+        ValueError: If no project can be determined
+    """
+    if project:
+        return project
+
+    firebaserc_path = get_project_root() / "firebase" / ".firebaserc"
+    if firebaserc_path.exists():
+        with open(firebaserc_path, 'r') as f:
+            projects = json.load(f).get('projects', {})
+        alias = environment or 'default'
+        if alias in projects:
+            return projects[alias]
+        if environment:
+            raise ValueError(f"Environment '{environment}' not found in .firebaserc")
+
+    project = os.environ.get('GOOGLE_CLOUD_PROJECT') or os.environ.get('GCLOUD_PROJECT')
+    if project:
+        return project
+
+    raise ValueError("No Firebase project found: pass --project or --env, or run setup_firebase_env.py first")
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser):
+    """Add the --project/--env/--emulator options shared by Firestore scripts."""
+    group = parser.add_argument_group('connection')
+    group.add_argument('--project', help='Firebase project ID (overrides --env)')
+    group.add_argument('--env', dest='environment', help=".firebaserc alias to use (default: 'default')")
+    group.add_argument(
+        '--emulator',
+        nargs='?',
+        const=DEFAULT_EMULATOR_HOST,
+        default=None,
+        metavar='HOST:PORT',
+        help=f'Use the Firestore emulator (default host: {DEFAULT_EMULATOR_HOST})'
+    )
+
+
+def connect(
+    project: Optional[str] = None,
+    environment: Optional[str] = None,
+    emulator: Optional[str] = None
+) -> Any:
+    """
+    Create a google.cloud.firestore Client.
+
+    Args:
+        project: Explicit project ID
+        environment: .firebaserc alias
+        emulator: Emulator host; also honours an existing FIRESTORE_EMULATOR_HOST
+
+    Raises:
+        ImportError: If google-cloud-firestore is not installed
+        ValueError: If no project can be determined
+    """
+    try:
+        from google.cloud import firestore
+    except ImportError as e:
+        raise ImportError(
+            "google-cloud-firestore is not installed. Run: pip install -r requirements.txt"
+        ) from e
+
+    if emulator:
+        os.environ['FIRESTORE_EMULATOR_HOST'] = emulator
+
+    return firestore.Client(project=resolve_project_id(project, environment))
+
+
+def connect_from_args(args: argparse.Namespace) -> Any:
+    """connect() using the options added by add_connection_arguments."""
+    return connect(args.project, args.environment, args.emulator)
+
+
+def commit_batches(
+    client: Any,
+    batches: Iterable[List[Write]],
+    workers: int = DEFAULT_WRITE_WORKERS,
+    governor: Optional[WriteGovernor] = None
+) -> int:
+    """
+    Commit each list of writes as one atomic WriteBatch, several at a time.
+
+    Batches are pulled from the iterable as commit slots free up, so a
+    generator that computes writes lazily never runs far ahead of Firestore.
+    Every commit is paced by a WriteGovernor, which also retries contention
+    and other transient errors.
+
+    Args:
+        client: google.cloud.firestore Client
+        batches: Lists of at most MAX_BATCH_WRITES writes
+        workers: Batch commits in flight at once
+        governor: Governor to share budgets and metrics with (default: a new one)
+
+    Returns:
+        Number of writes committed
+
+    Raises:
+        The first commit error, after in-flight commits finish
+    """
+    if governor is None:
+        governor = WriteGovernor(max_concurrency=workers)
+
+    def send(writes: List[Write]):
+        batch = client.batch()
+        for operation, reference, data in writes:
+            if operation == 'set':
+                batch.set(reference, data)
+            elif operation == 'merge':
+                batch.set(reference, data, merge=True)
+            elif operation == 'update':
+                batch.update(reference, data)
+            elif operation == 'delete':
+                batch.delete(reference)
+            else:
+                raise ValueError(f"Unknown write operation: {operation}")
+        batch.commit()
+
+    def commit(writes: List[Write]) -> int:
+        targets = [(reference.parent.id, reference.path) for _, reference, _ in writes]
+        governor.call(targets, lambda: send(writes))
+        return len(writes)
+
+    committed = 0
+    pending: List[Future] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for writes in batches:
+            if not writes:
+                continue
+            if len(writes) > MAX_BATCH_WRITES:
+                raise ValueError(f"A batch holds at most {MAX_BATCH_WRITES} writes, got {len(writes)}")
+            # Bound the number of batches held in memory
+            while len(pending) >= workers * 2:
+                committed += pending.pop(0).result()
+            pending.append(executor.submit(commit, writes))
+
+        for future in pending:
+            committed += future.result()
+
+    return committed
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Loan Engine
+Batched loan schedules beyond the fixed-rate loan of mortgageCalculator.ts:
+interest-only periods, adjustable rates (ARM) with caps, extra principal
+payments and a refinance part way through.
+
+A schedule is split into segments at the months where the rate or the
+payment rule changes (end of interest-only, ARM resets, refinance). Within a
+segment the balance follows the closed-form annuity recurrence, so the
+opening balance of every segment takes one vectorized step per segment, and
+any month's balance is one formula away from it. Only extra payments that
+vary month to month need the month-by-month loop.
+
+Every argument broadcasts, so loans x scenarios is a matter of shapes:
+
+    schedule = simulate_loans(
+        principal=amounts[:, None],             # (loans, 1)
+        rate=6.5,
+        term_months=360,
+        extra_payment=np.array([0, 100, 500]),  # (3,) scenarios
+    )
+    schedule.balance.shape                      # (loans, 3, months)
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Balances below this (in dollars) count as paid off
+PAID_OFF = 1e-6
+
+
+@dataclass
+class LoanSchedule:
+    """Monthly series for a batch of loans; arrays have shape (*batch, months)."""
+    payment: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray
+    rate: np.ndarray
+
+    @property
+    def months(self) -> int:
+        return self.payment.shape[-1]
+
+    @property
+    def total_interest(self) -> np.ndarray:
+        """Interest paid over the horizon."""
+        return self.interest.sum(axis=-1)
+
+    @property
+    def total_paid(self) -> np.ndarray:
+        """Everything paid over the horizon, extra principal included."""
+        return self.payment.sum(axis=-1)
+
+    @property
+    def payoff_month(self) -> np.ndarray:
+        """1-based month of the final payment, or 0 if not paid off within the horizon."""
+        paid_off = self.balance <= PAID_OFF
+        return np.where(paid_off.any(axis=-1), paid_off.argmax(axis=-1) + 1, 0)
+
+
+@dataclass
+class _Loans:
+    """Loan terms flattened to one row per loan, plus the derived segments."""
+    batch_shape: Tuple[int, ...]
+    horizon: int
+    principal: np.ndarray
+    rate: np.ndarray
+    term: np.ndarray
+    io_months: np.ndarray
+    extra: np.ndarray
+    extra_by_month: Optional[np.ndarray]
+    fixed_months: np.ndarray
+    reset_every: np.ndarray
+    arm_rates: np.ndarray
+    refinances: np.ndarray
+    refi_month: np.ndarray
+    refi_rate: np.ndarray
+    refi_term: np.ndarray
+    refi_costs: np.ndarray
+    starts: np.ndarray
+
+    def rate_at(self, months: np.ndarray) -> np.ndarray:
+        """Annual rate (%) in force at each month; months broadcasts against (loans, n)."""
+        months = np.broadcast_to(months, (self.principal.shape[0],) + np.shape(months)[-1:])
+        since_first = months - self.fixed_months[:, None]
+        which = np.where(
+            (self.fixed_months[:, None] > 0) & (since_first >= 0),
+            since_first // self.reset_every[:, None] + 1,
+            0
+        )
+        rates = np.take_along_axis(self.arm_rates, np.minimum(which, self.arm_rates.shape[1] - 1), axis=1)
+        refinanced = self.refinances[:, None] & (months >= self.refi_month[:, None])
+        return np.where(refinanced, self.refi_rate[:, None], rates)
+
+
+def amortizing_payment(balance, rate, months) -> np.ndarray:
+    """Level monthly payment that pays off balance at annual rate (%) over months."""
+    balance = np.asarray(balance, dtype=float)
+    monthly_rate = np.asarray(rate, dtype=float) / 1200
+    months = np.asarray(months, dtype=float)
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + safe_rate) ** months
+        amortizing = balance * safe_rate * growth / (growth - 1)
+        level = np.where(zero_rate, balance / months, amortizing)
+    return np.where(months > 0, level, balance * (1 + np.where(zero_rate, 0.0, monthly_rate)))
+
+
+def _prepare(
+    horizon: Optional[int],
+    principal,
+    rate,
+    term_months,
+    interest_only_months=0,
+    extra_payment=0.0,
+    extra_schedule=None,
+    arm_fixed_months=0,
+    arm_reset_every=12,
+    arm_index=None,
+    arm_margin=0.0,
+    arm_initial_cap=np.inf,
+    arm_periodic_cap=np.inf,
+    arm_lifetime_cap=np.inf,
+    arm_floor=0.0,
+    refinance_month=0,
+    refinance_rate=None,
+    refinance_term_months=None,
+    refinance_costs=0.0,
+) -> _Loans:
+    scalars = [np.asarray(value, dtype=float) for value in (
+        principal, rate, term_months, interest_only_months, extra_payment, arm_fixed_months,
+        arm_reset_every, arm_margin, arm_initial_cap, arm_periodic_cap, arm_lifetime_cap, arm_floor,
+        refinance_month, rate if refinance_rate is None else refinance_rate,
+        term_months if refinance_term_months is None else refinance_term_months, refinance_costs,
+    )]
+    # Series by month carry a trailing months axis; the rest of their shape is batch
+    series = {
+        name: np.atleast_1d(np.asarray(value, dtype=float))
+        for name, value in (('extra', extra_schedule), ('index', arm_index)) if value is not None
+    }
+    batch_shape = np.broadcast_shapes(*[value.shape for value in scalars],
+                                      *[value.shape[:-1] for value in series.values()])
+    (principal, rate, term, io_months, extra, fixed_months, reset_every, margin, initial_cap,
+     periodic_cap, lifetime_cap, floor, refi_month, refi_rate, refi_term, refi_costs) = [
+        np.broadcast_to(value, batch_shape).reshape(-1) for value in scalars
+    ]
+    count = principal.shape[0]
+
+    term = np.rint(term).astype(int)
+    io_months = np.clip(np.rint(io_months).astype(int), 0, term)
+    fixed_months = np.rint(fixed_months).astype(int)
+    fixed_months = np.where(fixed_months < term, fixed_months, 0)
+    reset_every = np.maximum(np.rint(reset_every).astype(int), 1)
+    refi_month = np.rint(refi_month).astype(int)
+    refi_term = np.rint(refi_term).astype(int)
+    refinances = (refi_month > 0) & (refi_month < term)
+    if horizon is None:
+        term_end = np.where(refinances, refi_month + refi_term, term)
+        horizon = int(term_end.max()) if term_end.size else 0
+
+    def by_month(values: np.ndarray, months: int) -> np.ndarray:
+        """(loans, months), padding short series with their last value."""
+        flat = np.broadcast_to(values, batch_shape + values.shape[-1:]).reshape(count, -1)
+        if flat.shape[1] < months:
+            flat = np.concatenate([flat, np.repeat(flat[:, -1:], months - flat.shape[1], axis=1)], axis=1)
+        return flat[:, :months]
+
+    # ARM: the rate set at each reset, column 0 being the initial rate
+    is_arm = fixed_months > 0
+    last_fixed_month = np.where(refinances, refi_month, term)
+    resets = int(np.max(np.where(is_arm, (last_fixed_month - 1 - fixed_months) // reset_every + 1, 0), initial=0))
+    reset_months = fixed_months[:, None] + reset_every[:, None] * np.arange(resets)[None, :]
+    if 'index' in series and resets:
+        index = by_month(series['index'], int(reset_months.max()) + 1)
+        index = np.take_along_axis(index, reset_months, axis=1)
+    else:
+        index = np.repeat((rate - margin)[:, None], resets, axis=1)
+    arm_rates = [rate]
+    current = rate
+    for reset in range(resets):
+        cap = initial_cap if reset == 0 else periodic_cap
+        new = np.clip(index[:, reset] + margin, current - cap, current + cap)
+        current = np.maximum(np.minimum(new, rate + lifetime_cap), floor)
+        arm_rates.append(current)
+
+    # Segment starts: 0, end of interest-only, ARM resets, refinance
+    starts = np.concatenate([
+        np.zeros((count, 1), dtype=int),
+        np.where(io_months > 0, io_months, horizon)[:, None],
+        np.where(is_arm[:, None] & (reset_months < last_fixed_month[:, None]), reset_months, horizon),
+        np.where(refinances, refi_month, horizon)[:, None],
+    ], axis=1)
+
+    return _Loans(
+        batch_shape=tuple(batch_shape),
+        horizon=horizon,
+        principal=principal.astype(float),
+        rate=rate,
+        term=term,
+        io_months=io_months,
+        extra=extra,
+        extra_by_month=extra[:, None] + by_month(series['extra'], horizon) if 'extra' in series else None,
+        fixed_months=fixed_months,
+        reset_every=reset_every,
+        arm_rates=np.stack(arm_rates, axis=1),
+        refinances=refinances,
+        refi_month=refi_month,
+        refi_rate=refi_rate,
+        refi_term=refi_term,
+        refi_costs=refi_costs,
+        starts=np.sort(np.minimum(starts, horizon), axis=1),
+    )
+
+
+def _scheduled_payment(loans: _Loans, balance: np.ndarray, annual_rate: np.ndarray, start) -> Tuple[np.ndarray, np.ndarray]:
+    """Payment rule in force from month `start`: interest only, or amortize over what is left."""
+    refinanced = loans.refinances & (start >= loans.refi_month)
+    in_io = (start < loans.io_months) & ~refinanced
+    term_end = np.where(refinanced, loans.refi_month + loans.refi_term, loans.term)
+    payment = amortizing_payment(balance, annual_rate, np.maximum(term_end - start, 0))
+    return in_io, np.where(in_io, balance * annual_rate / 1200, payment)
+
+
+def _closed_form(balance, monthly_rate, payment, extra, interest_only, months):
+    """
+    Balance after `months` level payments, before clamping at zero.
+
+    Interest-only segments pay the interest each month, so only the extra
+    principal reduces the balance.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + monthly_rate) ** months
+        safe_rate = np.where(monthly_rate > 0, monthly_rate, 1.0)
+        amortizing = np.where(
+            monthly_rate > 0,
+            balance * growth - payment * (growth - 1) / safe_rate,
+            balance - payment * months
+        )
+    return np.where(interest_only, balance - extra * months, amortizing)
+
+
+def _segments(loans: _Loans):
+    """
+    Opening balance, monthly rate, payment (extra included) and
+    interest-only flag of every segment, one vectorized step per segment.
+    """
+    count, segments = loans.starts.shape
+    ends = np.concatenate([loans.starts[:, 1:], np.full((count, 1), loans.horizon)], axis=1)
+    rates = loans.rate_at(loans.starts) / 1200
+
+    opening = np.zeros((count, segments))
+    payment = np.zeros((count, segments))
+    interest_only = np.zeros((count, segments), dtype=bool)
+    balance = loans.principal.copy()
+    for k in range(segments):
+        start, length = loans.starts[:, k], ends[:, k] - loans.starts[:, k]
+        refinancing = loans.refinances & (start == loans.refi_month) & (length > 0)
+        balance = balance + np.where(refinancing, loans.refi_costs, 0.0)
+        in_io, scheduled = _scheduled_payment(loans, balance, rates[:, k] * 1200, start)
+        opening[:, k], interest_only[:, k], payment[:, k] = balance, in_io, scheduled + loans.extra
+        balance = np.maximum(_closed_form(balance, rates[:, k], payment[:, k], loans.extra, in_io, length), 0.0)
+
+    return opening, rates, payment, interest_only
+
+
+def _segment_of(loans: _Loans, months: np.ndarray) -> np.ndarray:
+    """Index into the flattened (loans x segments) tables of the segment holding each month."""
+    count, segments = loans.starts.shape
+    months = np.broadcast_to(months, (count,) + np.shape(months)[-1:])
+    which = (loans.starts[:, None, :] <= months[:, :, None]).sum(axis=2) - 1
+    return which + (np.arange(count) * segments)[:, None]
+
+
+def simulate_loans(principal, rate, term_months, horizon: Optional[int] = None, **options) -> LoanSchedule:
+    """
+    Month-by-month schedules for a batch of loans.
+
+    Payments are made at the end of each month: interest is the opening
+    balance times the monthly rate, and the final payment is trimmed to what
+    is owed.
+
+    Args:
+        principal: Amount borrowed
+        rate: Initial annual rate (%)
+        term_months: Original term
+        horizon: Months to simulate (default: until the last loan's term ends)
+        interest_only_months: Leading months paying interest only; the
+            balance then amortizes over the rest of the term
+        extra_payment: Extra principal paid every month
+        extra_schedule: Extra principal by month, broadcast against
+            (*batch, months) (lump sums, extras that stop, ...); shorter
+            series repeat their last value. Needs the month-by-month loop
+        arm_fixed_months: Months at the initial rate before the first reset
+            (0 = fixed-rate loan)
+        arm_reset_every: Months between resets
+        arm_index: Index rate (%) by month, broadcast against (*batch, months);
+            shorter series repeat their last value (default: the initial
+            rate less the margin, i.e. no change)
+        arm_margin: Added to the index at each reset
+        arm_initial_cap / arm_periodic_cap: Largest move at the first / later resets
+        arm_lifetime_cap: Largest rise over the initial rate
+        arm_floor: Lowest rate after a reset
+        refinance_month: Payments made before refinancing (0 = no refinance).
+            The balance plus refinance_costs becomes a new fixed-rate loan
+        refinance_rate: Rate of the new loan (default: unchanged)
+        refinance_term_months: Term of the new loan (default: the original term)
+        refinance_costs: Costs rolled into the new loan
+
+    Returns:
+        LoanSchedule with arrays of shape (*batch, horizon)
+    """
+    loans = _prepare(horizon, principal, rate, term_months, **options)
+    count, horizon = loans.principal.shape[0], loans.horizon
+    months = np.arange(horizon)[None, :]
+    rate = loans.rate_at(months)
+
+    if loans.extra_by_month is not None:
+        payment, interest, balance = _month_loop(loans, rate)
+    else:
+        opening, rates, payments, interest_only = _segments(loans)
+        segments = loans.starts.shape[1]
+        marker = np.zeros((count, horizon + 1), dtype=int)
+        np.add.at(marker, (np.repeat(np.arange(count), segments), loans.starts.reshape(-1)), 1)
+        segment = np.cumsum(marker[:, :horizon], axis=1) - 1 + (np.arange(count) * segments)[:, None]
+
+        def per_month(values: np.ndarray) -> np.ndarray:
+            return np.take(values.reshape(-1), segment)
+
+        r = per_month(rates)
+        in_io = per_month(interest_only)
+        extra = loans.extra[:, None]
+        elapsed = months - per_month(loans.starts)
+        opening_balance = np.maximum(
+            _closed_form(per_month(opening), r, per_month(payments), extra, in_io, elapsed), 0.0
+        )
+
+        active = opening_balance > PAID_OFF
+        interest = np.where(active, opening_balance * r, 0.0)
+        scheduled = np.where(in_io, interest + extra, per_month(payments))
+        payment = np.where(active, np.minimum(scheduled, opening_balance + interest), 0.0)
+        balance = opening_balance + interest - payment
+        balance = np.where(balance > PAID_OFF, balance, 0.0)
+
+    shape = loans.batch_shape + (horizon,)
+    return LoanSchedule(
+        payment=payment.reshape(shape),
+        principal=(payment - interest).reshape(shape),
+        interest=interest.reshape(shape),
+        balance=balance.reshape(shape),
+        rate=rate.reshape(shape),
+    )
+
+
+def loan_balances(months, principal, rate, term_months, **options) -> np.ndarray:
+    """
+    Balances after the given numbers of payments, without building the
+    month-by-month series: one step per segment plus one formula per month
+    asked for. Takes the same loan terms as simulate_loans.
+
+    Args:
+        months: Payments made, e.g. [60, 120] for years 5 and 10
+
+    Returns:
+        Array of shape (*batch, len(months))
+    """
+    months = np.atleast_1d(np.asarray(months, dtype=int))
+    if options.get('extra_schedule') is not None:
+        schedule = simulate_loans(principal, rate, term_months, horizon=int(months.max()), **options)
+        opening = schedule.balance[..., :1] + schedule.principal[..., :1]
+        padded = np.concatenate([opening, schedule.balance], axis=-1)
+        return padded[..., months]
+
+    loans = _prepare(int(months.max()) + 1, principal, rate, term_months, **options)
+    opening, rates, payments, interest_only = _segments(loans)
+    # Balance after m payments is the opening balance of month m
+    segment = _segment_of(loans, months[None, :])
+
+    def pick(values: np.ndarray) -> np.ndarray:
+        return np.take(values.reshape(-1), segment)
+
+    elapsed = months[None, :] - pick(loans.starts)
+    balance = _closed_form(
+        pick(opening), pick(rates), pick(payments), loans.extra[:, None], pick(interest_only), elapsed
+    )
+    balance = np.where(balance > PAID_OFF, balance, 0.0)
+    return balance.reshape(loans.batch_shape + (len(months),))
+
+
+def _month_loop(loans: _Loans, rate: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count, horizon = rate.shape
+    payments = np.zeros((count, horizon))
+    interests = np.zeros((count, horizon))
+    balances = np.zeros((count, horizon))
+    balance = loans.principal.copy()
+    scheduled = np.zeros(count)
+    in_io = np.zeros(count, dtype=bool)
+
+    for month in range(horizon):
+        starting = (loans.starts == month).any(axis=1)
+        if starting.any():
+            refinancing = starting & loans.refinances & (loans.refi_month == month)
+            balance = balance + np.where(refinancing, loans.refi_costs, 0.0)
+            new_io, new_payment = _scheduled_payment(loans, balance, rate[:, month], month)
+            scheduled = np.where(starting, new_payment, scheduled)
+            in_io = np.where(starting, new_io, in_io)
+
+        interest = balance * rate[:, month] / 1200
+        total = np.where(in_io, interest, scheduled) + loans.extra_by_month[:, month]
+        active = balance > PAID_OFF
+        payment = np.where(active, np.minimum(total, balance + interest), 0.0)
+        balance = balance + interest - payment
+        balance = np.where(balance > PAID_OFF, balance, 0.0)
+
+        payments[:, month] = payment
+        interests[:, month] = np.where(active, interest, 0.0)
+        balances[:, month] = balance
+
+    return payments, interests, balances
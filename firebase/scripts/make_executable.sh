@@ -4,6 +4,29 @@
 chmod +x setup_firebase_env.py
 chmod +x deploy_rules.py
 chmod +x deploy_indexes.py
+chmod +x async_runner.py
+chmod +x what_if.py
+chmod +x alternatives.py
+chmod +x screening.py
+chmod +x backfill_summaries.py
+chmod +x publish_snapshots.py
+chmod +x bulk_share.py
+chmod +x rules_check.py
+chmod +x project_codec.py
+chmod +x project_history.py
+chmod +x annuity_table.py
+chmod +x seasonality.py
+chmod +x comps_index.py
+chmod +x change_tail.py
+chmod +x migrate.py
+chmod +x project_schema.py
+chmod +x deal_report.py
+chmod +x calc_service.py
+chmod +x result_cache.py
+chmod +x tensor_store.py
+chmod +x scenario_sweep.py
+chmod +x project_diff.py
+chmod +x preflight.py
 
 echo "Scripts are now executable. You can run them with:"
 echo "./setup_firebase_env.py"
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrate Project Documents
+Brings documents in `properties` up to the current Project shape with
+versioned, idempotent migrations.
+
+How it works:
+- Each migration has a version and edits a project dict in place; running
+  it on an already migrated project changes nothing
+- Documents record the version they were migrated to in `schemaVersion`
+  (missing means 0), and only migrations above it run
+- The collection is split into partitions (Firestore partition queries)
+  that are scanned in parallel, a page at a time
+- Only documents the migrations actually change are written: the changed
+  top-level fields plus `schemaVersion`, in batched commits paced by the
+  write governor, each guarded by the document's update time so a
+  concurrent edit from the app is re-read instead of overwritten
+- Each write also bumps `updatedAt` on the project and its listing summary
+  (plus the summary's `sharedWith` when that changed), so the app pulls
+  the migrated version instead of merge-saving its stale copy over it
+- Progress is checkpointed per partition after every page; an interrupted
+  run resumes where it stopped
+
+Usage:
+    python migrate.py --list
+    python migrate.py --emulator
+    python migrate.py --env staging --dry-run
+    python migrate.py --env production --partitions 16
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from firestore_client import DEFAULT_WRITE_WORKERS, MAX_BATCH_WRITES, add_connection_arguments, connect_from_args
+from write_governor import WriteGovernor
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+PROPERTIES_COLLECTION = 'properties'
+PROPERTY_SUMMARIES_COLLECTION = 'propertySummaries'
+VERSION_FIELD = 'schemaVersion'
+DEFAULT_CHECKPOINT = Path(__file__).parent.parent / 'config' / '.migration_checkpoint.json'
+CHECKPOINT_FORMAT = 1
+
+DEFAULT_PARTITIONS = 8
+DEFAULT_PAGE_SIZE = 500
+
+# Times a document whose update-time precondition failed is re-read and retried
+MAX_CONFLICT_RETRIES = 3
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema step: edits a project dict in place and must be idempotent."""
+    version: int
+    description: str
+    apply: Callable[[Dict[str, Any]], None]
+
+
+def _property(project: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    property = project.get('property')
+    return property if isinstance(property, dict) else None
+
+
+def add_reference_lists(project: Dict[str, Any]):
+    """Projects created before reference links/notes get empty lists, like new ones."""
+    property = _property(project)
+    if property is None:
+        return
+    for field in ('referenceUrls', 'referenceNotes'):
+        if not isinstance(property.get(field), list):
+            property[field] = []
+
+
+def drop_unset_mortgage_override(project: Dict[str, Any]):
+    """The app treats a missing, null or non-positive override as unset; keep only real ones."""
+    property = _property(project)
+    if property is None or 'monthlyMortgageOverride' not in property:
+        return
+    override = property['monthlyMortgageOverride']
+    if isinstance(override, bool) or not isinstance(override, (int, float)) or not override > 0:
+        del property['monthlyMortgageOverride']
+
+
+def normalize_shared_with(project: Dict[str, Any]):
+    """
+    Lower-case and de-duplicate collaborator emails.
+
+    The "shared with me" query matches the lower-cased email, so entries
+    added with other casing were invisible to their collaborator.
+    """
+    if 'sharedWith' not in project:
+        return
+    emails = project['sharedWith'] if isinstance(project['sharedWith'], list) else []
+    normalized: List[str] = []
+    for email in emails:
+        if isinstance(email, str) and email.strip():
+            email = email.strip().lower()
+            if email not in normalized:
+                normalized.append(email)
+    project['sharedWith'] = normalized
+
+
+# Append only; versions must increase
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, 'Add empty referenceUrls/referenceNotes lists', add_reference_lists),
+    Migration(2, 'Remove null and non-positive monthlyMortgageOverride', drop_unset_mortgage_override),
+    Migration(3, 'Lower-case and de-duplicate sharedWith', normalize_shared_with),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def migrate_document(
+    data: Dict[str, Any],
+    target: int = LATEST_VERSION,
+    migrations: Sequence[Migration] = MIGRATIONS
+) -> Optional[Dict[str, Any]]:
+    """
+    Run the pending migrations on a document.
+
+    Args:
+        data: Document data (not modified)
+        target: Version to migrate to
+        migrations: Migrations in version order
+
+    Returns:
+        Top-level fields to update (with the new schemaVersion), or None if
+        the document is at the target version or no migration changes it
+    """
+    current = data.get(VERSION_FIELD) or 0
+    pending = [migration for migration in migrations if current < migration.version <= target]
+    if not pending:
+        return None
+
+    migrated = copy.deepcopy(data)
+    for migration in pending:
+        migration.apply(migrated)
+
+    changes = {key: value for key, value in migrated.items() if key not in data or data[key] != value}
+    removed = [key for key in data if key not in migrated]
+    if not changes and not removed:
+        return None
+    if removed:
+        from google.cloud import firestore
+        changes.update({key: firestore.DELETE_FIELD for key in removed})
+    changes[VERSION_FIELD] = target
+    return changes
+
+
+class Checkpoint:
+    """Per-partition resume points, saved atomically after every page."""
+
+    def __init__(self, path: Optional[Path], target: int, bounds: List[str]):
+        self.path = path
+        self.target = target
+        self.bounds = bounds
+        self.after: List[Optional[str]] = [None] * (len(bounds) + 1)
+        self.done: List[bool] = [False] * (len(bounds) + 1)
+        self.counts: Dict[str, int] = {'scanned': 0, 'migrated': 0, 'current': 0, 'conflicts': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, target: int) -> Optional['Checkpoint']:
+        """The saved checkpoint for this target version, if there is one."""
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('format') != CHECKPOINT_FORMAT or saved.get('target') != target:
+            return None
+        checkpoint = cls(path, target, saved['bounds'])
+        checkpoint.after = saved['after']
+        checkpoint.done = saved['done']
+        checkpoint.counts.update(saved['counts'])
+        return checkpoint
+
+    def ranges(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """(first document id, id the partition ends before) per partition."""
+        starts: List[Optional[str]] = [None] + list(self.bounds)
+        ends: List[Optional[str]] = list(self.bounds) + [None]
+        return list(zip(starts, ends))
+
+    def record(self, partition: int, after: Optional[str], counts: Dict[str, int], done: bool = False):
+        """Add a page's counts and move the partition's resume point past it."""
+        with self._lock:
+            self.after[partition] = after
+            self.done[partition] = done
+            for name, value in counts.items():
+                self.counts[name] += value
+            self._save()
+
+    def save(self):
+        """Write the checkpoint file (a no-op without a path)."""
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'format': CHECKPOINT_FORMAT,
+            'target': self.target,
+            'bounds': self.bounds,
+            'after': self.after,
+            'done': self.done,
+            'counts': self.counts,
+        }
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        """Delete the file once every partition is done."""
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+def partition_bounds(client: Any, count: int) -> List[str]:
+    """
+    Document ids that split `properties` into about `count` partitions.
+
+    Falls back to a single partition where partition queries are not
+    supported (older emulators).
+    """
+    if count <= 1:
+        return []
+    from google.api_core.exceptions import GoogleAPICallError
+
+    try:
+        partitions = list(client.collection_group(PROPERTIES_COLLECTION).get_partitions(count))
+    except GoogleAPICallError as e:
+        print_warning(f"Partition query failed, scanning as one partition: {e}")
+        return []
+    return [partition.end_at.id for partition in partitions if partition.end_at is not None]
+
+
+def _page_query(client: Any, start: Optional[str], end: Optional[str], after: Optional[str], page_size: int) -> Any:
+    collection = client.collection(PROPERTIES_COLLECTION)
+    query = collection.order_by('__name__')
+    if after is not None:
+        query = query.start_after({'__name__': collection.document(after)})
+    elif start is not None:
+        query = query.start_at({'__name__': collection.document(start)})
+    if end is not None:
+        query = query.end_before({'__name__': collection.document(end)})
+    return query.limit(page_size)
+
+
+def commit_updates(
+    client: Any,
+    governor: WriteGovernor,
+    updates: List[Tuple[Any, Dict[str, Any]]],
+    target: int = LATEST_VERSION
+) -> int:
+    """
+    Write one batch of updates, each guarded by its snapshot's update time.
+
+    Every update also sets updatedAt, and the project's propertySummaries
+    record (when it has one) gets the same updatedAt, and the new sharedWith
+    if it changed, in the same batch. If any document changed since it was
+    read, the batch fails as a whole; its documents are then re-read,
+    re-migrated and written one at a time.
+
+    Args:
+        updates: (snapshot the changes were computed from, fields to update),
+            at most MAX_BATCH_WRITES // 2 of them
+        target: Version the updates migrate to
+
+    Returns:
+        Documents left unmigrated because they kept changing underneath
+    """
+    from google.api_core.exceptions import FailedPrecondition
+    from google.cloud import firestore
+
+    summaries = client.collection(PROPERTY_SUMMARIES_COLLECTION)
+    # Projects without a summary yet are left to backfill_summaries rather
+    # than given a partial one
+    summarized = {
+        snapshot.id
+        for snapshot in client.get_all(
+            [summaries.document(snapshot.id) for snapshot, _ in updates], field_paths=['userId']
+        )
+        if snapshot.exists
+    }
+
+    def send(pairs: List[Tuple[Any, Dict[str, Any]]]):
+        batch = client.batch()
+        for snapshot, fields in pairs:
+            fields = {**fields, 'updatedAt': firestore.SERVER_TIMESTAMP}
+            batch.update(snapshot.reference, fields, option=client.write_option(last_update_time=snapshot.update_time))
+            if snapshot.id in summarized:
+                summary = {key: fields[key] for key in ('updatedAt', 'sharedWith') if key in fields}
+                batch.set(summaries.document(snapshot.id), summary, merge=True)
+        batch.commit()
+
+    def targets(pairs: List[Tuple[Any, Dict[str, Any]]]) -> List[Tuple[str, str]]:
+        return [(PROPERTIES_COLLECTION, snapshot.reference.path) for snapshot, _ in pairs] + [
+            (PROPERTY_SUMMARIES_COLLECTION, summaries.document(snapshot.id).path)
+            for snapshot, _ in pairs if snapshot.id in summarized
+        ]
+
+    try:
+        governor.call(targets(updates), lambda: send(updates))
+        return 0
+    except FailedPrecondition:
+        pass
+
+    conflicts = 0
+    for snapshot, fields in updates:
+        for _ in range(MAX_CONFLICT_RETRIES):
+            snapshot = snapshot.reference.get()
+            fields = migrate_document(snapshot.to_dict(), target) if snapshot.exists else None
+            if fields is None:
+                break
+            pair = [(snapshot, fields)]
+            try:
+                governor.call(targets(pair), lambda: send(pair))
+                break
+            except FailedPrecondition:
+                continue
+        else:
+            conflicts += 1
+    return conflicts
+
+
+def migrate_partition(
+    client: Any,
+    checkpoint: Checkpoint,
+    partition: int,
+    governor: WriteGovernor,
+    target: int,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    dry_run: bool = False,
+    stop: Optional[threading.Event] = None
+):
+    """Scan one partition page by page, migrating and checkpointing as it goes."""
+    start, end = checkpoint.ranges()[partition]
+    after = checkpoint.after[partition]
+    while stop is None or not stop.is_set():
+        snapshots = list(_page_query(client, start, end, after, page_size).stream())
+        if not snapshots:
+            checkpoint.record(partition, after, {}, done=True)
+            return
+
+        counts = {'scanned': len(snapshots), 'migrated': 0, 'current': 0, 'conflicts': 0}
+        updates = []
+        for snapshot in snapshots:
+            fields = migrate_document(snapshot.to_dict(), target)
+            if fields is None:
+                counts['current'] += 1
+            else:
+                updates.append((snapshot, fields))
+
+        if not dry_run:
+            # Two writes per document: the project and its summary
+            size = MAX_BATCH_WRITES // 2
+            for i in range(0, len(updates), size):
+                counts['conflicts'] += commit_updates(client, governor, updates[i:i + size], target)
+        counts['migrated'] = len(updates) - counts['conflicts']
+
+        after = snapshots[-1].id
+        done = len(snapshots) < page_size
+        checkpoint.record(partition, after, counts, done=done)
+        if done:
+            return
+
+
+def run_migrations(
+    client: Any,
+    target: int = LATEST_VERSION,
+    partitions: int = DEFAULT_PARTITIONS,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    checkpoint_path: Optional[Path] = DEFAULT_CHECKPOINT,
+    restart: bool = False,
+    dry_run: bool = False,
+    governor: Optional[WriteGovernor] = None,
+    progress: Optional[Callable[[Dict[str, int], float], None]] = None
+) -> Dict[str, int]:
+    """
+    Migrate every project document to `target`.
+
+    Args:
+        client: google.cloud.firestore Client
+        target: Schema version to migrate to
+        partitions: Partitions scanned in parallel
+        page_size: Documents read per query page
+        checkpoint_path: Resume file (None to disable); deleted when the run completes
+        restart: Ignore an existing checkpoint
+        dry_run: Count what would change without writing or checkpointing
+        governor: Write governor shared with other jobs
+        progress: Called with the running counts and elapsed seconds every PROGRESS_INTERVAL
+
+    Returns:
+        Counts: scanned, migrated, current, conflicts, partitions, resumed (1 if resumed)
+    """
+    if dry_run:
+        checkpoint_path = None
+    checkpoint = None if restart or checkpoint_path is None else Checkpoint.load(checkpoint_path, target)
+    resumed = checkpoint is not None
+    if checkpoint is None:
+        checkpoint = Checkpoint(checkpoint_path, target, partition_bounds(client, partitions))
+        # Keep the partition bounds even if no page completes
+        checkpoint.save()
+    if governor is None:
+        governor = WriteGovernor()
+
+    pending = [partition for partition, done in enumerate(checkpoint.done) if not done]
+    # Set on failure or Ctrl+C so other partitions stop after their current page
+    stop = threading.Event()
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        futures = {
+            executor.submit(
+                migrate_partition, client, checkpoint, partition, governor, target, page_size, dry_run, stop
+            )
+            for partition in pending
+        }
+        try:
+            while futures:
+                finished, futures = wait(futures, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                for future in finished:
+                    future.result()
+                if progress is not None and futures:
+                    progress(dict(checkpoint.counts), time.monotonic() - started)
+        except BaseException:
+            stop.set()
+            raise
+
+    checkpoint.remove()
+    return dict(checkpoint.counts, partitions=len(checkpoint.done), resumed=int(resumed))
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Migrate project documents to the current schema version')
+    add_connection_arguments(parser)
+    parser.add_argument('--list', action='store_true', help='List migrations and exit')
+    parser.add_argument('--to', type=int, default=LATEST_VERSION, help=f'Target version (default: {LATEST_VERSION})')
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        default=DEFAULT_PARTITIONS,
+        help=f'Partitions scanned in parallel (default: {DEFAULT_PARTITIONS})'
+    )
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='Documents read per page')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WRITE_WORKERS,
+        help='Batch commits in flight at once'
+    )
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT), help='Resume file')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and scan everything')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    if args.list:
+        for migration in MIGRATIONS:
+            print(f"{migration.version:>4}  {migration.description}")
+        return
+
+    if not 0 <= args.to <= LATEST_VERSION:
+        print_error(f"--to must be between 0 and {LATEST_VERSION}")
+        sys.exit(1)
+    if args.partitions < 1 or args.page_size < 1 or args.workers < 1:
+        print_error("--partitions, --page-size and --workers must be at least 1")
+        sys.exit(1)
+
+    try:
+        client = connect_from_args(args)
+    except (ImportError, ValueError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"Project: {client.project}")
+    print_info(f"Migrating `{PROPERTIES_COLLECTION}` to schema version {args.to}")
+    # The emulator has no write limits to ramp up to
+    governor = WriteGovernor(max_concurrency=args.workers, ramp=not args.emulator)
+
+    def progress(counts: Dict[str, int], elapsed: float):
+        print_info(
+            f"{counts['scanned']:,} scanned ({counts['scanned'] / elapsed:,.0f}/s), "
+            f"{counts['migrated']:,} migrated ({counts['migrated'] / elapsed:,.0f}/s)"
+        )
+
+    started = time.perf_counter()
+    try:
+        counts = run_migrations(
+            client,
+            target=args.to,
+            partitions=args.partitions,
+            page_size=args.page_size,
+            checkpoint_path=Path(args.checkpoint),
+            restart=args.restart,
+            dry_run=args.dry_run,
+            governor=governor,
+            progress=progress
+        )
+    except Exception as e:
+        print_error(f"Migration failed: {e}")
+        if not args.dry_run:
+            print_info("Progress was checkpointed; re-run to resume")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    if counts['resumed']:
+        print_info("Resumed from checkpoint; counts include the earlier run")
+    print_info(
+        f"Scanned {counts['scanned']:,} document(s) in {counts['partitions']} partition(s) "
+        f"in {elapsed:.1f}s; {counts['current']:,} already current"
+    )
+    if counts['conflicts']:
+        print_warning(f"{counts['conflicts']:,} document(s) kept changing during the run; re-run to migrate them")
+    verb = "Would migrate" if args.dry_run else "Migrated"
+    print_success(f"{verb} {counts['migrated']:,} document(s)")
+    for line in governor.summary_lines():
+        print_info(line)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Preflight
+Checks that this machine can run the setup and deploy scripts: Python,
+optional packages, the setup script itself, the Firebase CLI, the CLI login
+and the deployed Firestore indexes.
+
+- Checks run concurrently, so a full preflight takes as long as its slowest
+  check instead of one Firebase CLI (Node) startup per check
+- Each check has its own timeout; a check that hangs is stopped and
+  reported as failed without holding up the others
+- Slow CLI results that passed are cached for a while in
+  config/.preflight_cache.json (the CLI version for a day, the login for an
+  hour, the indexes for ten minutes). The cache key includes the CLI binary,
+  the CLI login file and the local index definitions, so reinstalling,
+  logging out or editing firestore.indexes.json re-runs the check
+- --json prints one machine-readable report for CI
+
+Usage:
+    python preflight.py
+    python preflight.py --json
+    python preflight.py --check firebase-cli --check firebase-auth --no-cache
+    python preflight.py --project my-app --timeout 30
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import shlex
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from async_runner import run_streaming
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+SCRIPTS_DIR = Path(__file__).parent
+CONFIG_DIR = SCRIPTS_DIR.parent / "config"
+CACHE_FILE = CONFIG_DIR / ".preflight_cache.json"
+INDEXES_FILE = CONFIG_DIR / "firestore.indexes.json"
+
+# Where the Firebase CLI keeps its login (rewritten by login and logout)
+FIREBASE_LOGIN_FILE = Path(os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config') / 'configstore' / 'firebase-tools.json'
+
+MINIMUM_PYTHON = (3, 8)
+
+# (module, pip package) used by the analysis and Firestore scripts
+OPTIONAL_PACKAGES = (
+    ('numpy', 'numpy'),
+    ('google.cloud.firestore', 'google-cloud-firestore'),
+    ('msgpack', 'msgpack'),
+)
+
+# Functions setup_firebase_env.py must provide
+SETUP_FUNCTIONS = ('check_prerequisites', 'configure_web_app', 'deploy_firestore_indexes', 'main')
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+STATUSES = ('ok', 'warn', 'skip', 'fail')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one check."""
+    name: str
+    title: str
+    status: str
+    detail: str
+    duration: float = 0.0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Passed, possibly with a warning or skipped."""
+        return self.status != 'fail'
+
+
+# What a probe needs to know: the resolved `firebase` binary and the project id
+Environment = Dict[str, Optional[str]]
+Probe = Callable[[Environment], Any]
+
+
+@dataclass(frozen=True)
+class Check:
+    """
+    One preflight check.
+
+    probe(env) returns (status, detail). Plain functions run in a child
+    Python process, so one that hangs can be killed at its timeout;
+    coroutine functions run on the event loop.
+    """
+    name: str
+    title: str
+    probe: Probe
+    timeout: float
+    # Seconds a passing result is reused (0: never cached)
+    ttl: float = 0
+    # Cache key; the cached result is reused only while the key is unchanged
+    key: Optional[Callable[[Environment], str]] = None
+
+
+# ---------------------------------------------------------------------------
+# Probes
+# ---------------------------------------------------------------------------
+
+def check_python(env: Environment) -> Tuple[str, str]:
+    """The running interpreter is recent enough."""
+    version = f"{platform.python_version()} ({sys.executable})"
+    if sys.version_info < MINIMUM_PYTHON:
+        return 'fail', f"{version}; {'.'.join(map(str, MINIMUM_PYTHON))}+ required"
+    return 'ok', version
+
+
+def check_packages(env: Environment) -> Tuple[str, str]:
+    """The optional packages of requirements.txt are importable."""
+    missing = []
+    for module, package in OPTIONAL_PACKAGES:
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except ImportError:
+            found = False
+        if not found:
+            missing.append(package)
+    if missing:
+        return 'warn', f"missing {', '.join(missing)} (pip install -r requirements.txt)"
+    return 'ok', ', '.join(package for _, package in OPTIONAL_PACKAGES)
+
+
+def check_setup_script(env: Environment) -> Tuple[str, str]:
+    """setup_firebase_env.py imports and has its entry points."""
+    spec = importlib.util.spec_from_file_location('setup_firebase_env', str(SCRIPTS_DIR / 'setup_firebase_env.py'))
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except Exception as e:
+        return 'fail', f"setup_firebase_env.py does not import: {e}"
+    missing = [name for name in SETUP_FUNCTIONS if not callable(getattr(module, name, None))]
+    if missing:
+        return 'fail', f"setup_firebase_env.py lacks {', '.join(missing)}"
+    return 'ok', ', '.join(SETUP_FUNCTIONS)
+
+
+async def _firebase(env: Environment, args: str) -> Tuple[int, str]:
+    result = await run_streaming(f"firebase {args}", target='firebase', echo=False, capture=True)
+    return result.returncode, '\n'.join(result.stdout + result.stderr)
+
+
+async def check_firebase_cli(env: Environment) -> Tuple[str, str]:
+    """The Firebase CLI is installed and runs."""
+    if not env['firebase']:
+        return 'fail', "not found (npm install -g firebase-tools)"
+    code, output = await _firebase(env, '--version')
+    if code != 0:
+        return 'fail', f"`firebase --version` exited with {code}"
+    return 'ok', f"{output.strip().splitlines()[-1]} ({env['firebase']})"
+
+
+async def check_firebase_auth(env: Environment) -> Tuple[str, str]:
+    """The Firebase CLI is logged in."""
+    if not env['firebase']:
+        return 'skip', "needs the Firebase CLI"
+    code, output = await _firebase(env, 'login:list')
+    accounts = [line.split('Logged in as', 1)[1].strip() for line in output.splitlines() if 'Logged in as' in line]
+    if code != 0 or not accounts:
+        return 'fail', "not logged in (firebase login)"
+    return 'ok', ', '.join(accounts)
+
+
+async def check_indexes(env: Environment) -> Tuple[str, str]:
+    """The project's Firestore indexes can be listed, and match firestore.indexes.json."""
+    if not env['project']:
+        return 'skip', "no project configured (run setup_firebase_env.py)"
+    if not env['firebase']:
+        return 'skip', "needs the Firebase CLI"
+    code, output = await _firebase(env, f"firestore:indexes --project {shlex.quote(env['project'])}")
+    if code != 0 or 'indexes' not in output.lower():
+        return 'fail', f"could not list the indexes of {env['project']}"
+
+    try:
+        listing, _ = json.JSONDecoder().raw_decode(output, output.index('{'))
+        deployed = len(listing.get('indexes', []))
+        with open(INDEXES_FILE, 'r', encoding='utf-8') as f:
+            local = len(json.load(f).get('indexes', []))
+    except (ValueError, OSError):
+        return 'ok', f"listed for {env['project']}"
+    if deployed != local:
+        return 'warn', f"{deployed} deployed to {env['project']}, {local} in firestore.indexes.json (deploy_indexes.py)"
+    return 'ok', f"{deployed} deployed to {env['project']}"
+
+
+def _stamp(path: Optional[str]) -> str:
+    """A path with its modification time, or 'missing'."""
+    try:
+        return f"{path}@{os.stat(path).st_mtime_ns}"
+    except (OSError, TypeError):
+        return 'missing'
+
+
+def _file_hash(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    except OSError:
+        return 'missing'
+
+
+CHECKS: Tuple[Check, ...] = (
+    Check('python', 'Python', check_python, timeout=5),
+    Check('packages', 'Python packages', check_packages, timeout=10),
+    Check('setup-script', 'Setup script', check_setup_script, timeout=15),
+    Check('firebase-cli', 'Firebase CLI', check_firebase_cli, timeout=30, ttl=DAY,
+          key=lambda env: _stamp(env['firebase'])),
+    Check('firebase-auth', 'Firebase login', check_firebase_auth, timeout=30, ttl=HOUR,
+          key=lambda env: f"{_stamp(env['firebase'])} {_stamp(str(FIREBASE_LOGIN_FILE))}"),
+    Check('indexes', 'Firestore indexes', check_indexes, timeout=60, ttl=10 * MINUTE,
+          key=lambda env: f"{_stamp(env['firebase'])} {_stamp(str(FIREBASE_LOGIN_FILE))} "
+                          f"{env['project']} {_file_hash(INDEXES_FILE)}"),
+)
+
+CHECK_NAMES = tuple(check.name for check in CHECKS)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def configured_project() -> Optional[str]:
+    """The project id in config/production.json, if any."""
+    try:
+        with open(CONFIG_DIR / "production.json", 'r', encoding='utf-8') as f:
+            return json.load(f).get('projectId') or None
+    except (OSError, ValueError):
+        return None
+
+
+def load_cache() -> Dict[str, Any]:
+    """Cached check results by check name."""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache: Dict[str, Any]):
+    """Write the cache atomically; a cache that cannot be written is skipped."""
+    temp = CACHE_FILE.with_suffix('.tmp')
+    try:
+        temp.write_text(json.dumps(cache, indent=2), encoding='utf-8')
+        os.replace(temp, CACHE_FILE)
+    except OSError:
+        pass
+
+
+async def _run_in_process(check: Check, env: Environment) -> Tuple[str, str]:
+    """
+    Run a plain probe in a child interpreter (see probe_main).
+
+    A thread cannot be stopped, and asyncio.run waits for executor threads
+    on exit, so a hung probe on a thread would hang the whole preflight.
+    Cancelling this coroutine kills the child instead.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, str(Path(__file__).resolve()), '--probe', check.name,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate(json.dumps(env).encode('utf-8'))
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+    # The report is the last line; a probe that imports a script may print before it
+    lines = stdout.decode('utf-8', 'replace').strip().splitlines()
+    if process.returncode != 0 or not lines:
+        errors = stderr.decode('utf-8', 'replace').strip().splitlines()
+        return 'fail', f"probe exited with {process.returncode}" + (f": {errors[-1]}" if errors else '')
+    status, detail = json.loads(lines[-1])
+    return status, detail
+
+
+def probe_main(name: str) -> int:
+    """Child side of _run_in_process: run one probe, print [status, detail] as JSON."""
+    env = json.load(sys.stdin)
+    probe = next(check.probe for check in CHECKS if check.name == name)
+    try:
+        status, detail = probe(env)
+    except Exception as e:
+        status, detail = 'fail', f"{type(e).__name__}: {e}"
+    print(json.dumps([status, detail]))
+    return 0
+
+
+async def _run_check(check: Check, env: Environment, timeout: float) -> CheckResult:
+    started = time.monotonic()
+    try:
+        if asyncio.iscoroutinefunction(check.probe):
+            status, detail = await asyncio.wait_for(check.probe(env), timeout)
+        else:
+            status, detail = await asyncio.wait_for(_run_in_process(check, env), timeout)
+    except asyncio.TimeoutError:
+        status, detail = 'fail', f"timed out after {timeout:g}s"
+    except Exception as e:
+        status, detail = 'fail', f"{type(e).__name__}: {e}"
+    return CheckResult(check.name, check.title, status, detail, time.monotonic() - started)
+
+
+async def run_checks(
+    names: Optional[Iterable[str]] = None,
+    project_id: Optional[str] = None,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+) -> List[CheckResult]:
+    """
+    Run checks concurrently.
+
+    Args:
+        names: Checks to run (default: all), see CHECK_NAMES
+        project_id: Project for the index check (default: config/production.json)
+        use_cache: Reuse cached passing results that have not expired
+        timeout: Seconds allowed for every check (default: each check's own)
+
+    Returns:
+        Results in the order of CHECKS
+    """
+    names = set(CHECK_NAMES if names is None else names)
+    unknown = names - set(CHECK_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown check(s): {', '.join(sorted(unknown))}")
+    checks = [check for check in CHECKS if check.name in names]
+    env: Environment = {'firebase': shutil.which('firebase'), 'project': project_id or configured_project()}
+
+    cache = load_cache()
+    now = time.time()
+    keys = {check.name: check.key(env) for check in checks if check.ttl and check.key}
+
+    results: Dict[str, CheckResult] = {}
+    pending = []
+    for check in checks:
+        entry = cache.get(check.name) if use_cache else None
+        if (entry and check.name in keys and entry.get('key') == keys[check.name]
+                and now - entry.get('at', 0) < check.ttl):
+            results[check.name] = CheckResult(check.name, check.title, entry['status'], entry['detail'], cached=True)
+        else:
+            pending.append(check)
+
+    for result in await asyncio.gather(*(_run_check(check, env, timeout or check.timeout) for check in pending)):
+        results[result.name] = result
+
+    # Only passing results are cached: a failure is re-checked next time, once fixed
+    fresh = {
+        name: {'key': keys[name], 'at': now, 'status': result.status, 'detail': result.detail}
+        for name, result in results.items()
+        if name in keys and result.status == 'ok' and not result.cached
+    }
+    if fresh:
+        save_cache({**cache, **fresh})
+
+    return [results[check.name] for check in checks]
+
+
+def run_preflight(names: Optional[Iterable[str]] = None, **kwargs) -> List[CheckResult]:
+    """Blocking wrapper around run_checks for the synchronous scripts."""
+    return asyncio.run(run_checks(names, **kwargs))
+
+
+def print_results(results: List[CheckResult]):
+    """Print one line per check."""
+    marks = {
+        'ok': f"{Colors.OKGREEN}✓", 'warn': f"{Colors.WARNING}⚠",
+        'skip': f"{Colors.OKBLUE}-", 'fail': f"{Colors.FAIL}✗",
+    }
+    for result in results:
+        timing = 'cached' if result.cached else f"{result.duration:.2f}s"
+        print(f"{marks[result.status]} {result.title:<18} {timing:>7}  {result.detail}{Colors.ENDC}")
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Check this machine can run the Firebase setup and deploy scripts')
+    parser.add_argument('--check', action='append', choices=CHECK_NAMES, help='Run only this check (repeatable)')
+    parser.add_argument('--project', help='Project for the index check (default: config/production.json)')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run every check')
+    parser.add_argument('--timeout', type=float, help="Seconds allowed for every check (default: each check's own)")
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    # Internal: run one probe for _run_in_process
+    parser.add_argument('--probe', choices=CHECK_NAMES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        sys.exit(probe_main(args.probe))
+
+    started = time.monotonic()
+    results = run_preflight(args.check, project_id=args.project, use_cache=not args.no_cache, timeout=args.timeout)
+    elapsed = time.monotonic() - started
+    passed = all(result.ok for result in results)
+
+    if args.json:
+        print(json.dumps({
+            'ok': passed,
+            'duration': round(elapsed, 3),
+            'checks': [{**asdict(result), 'duration': round(result.duration, 3)} for result in results],
+        }, indent=2))
+    else:
+        print_results(results)
+        failed = [result.title for result in results if not result.ok]
+        if failed:
+            print_error(f"Preflight failed: {', '.join(failed)} ({elapsed:.1f}s)")
+        else:
+            print_success(f"Preflight passed in {elapsed:.1f}s")
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
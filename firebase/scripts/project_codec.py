@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Project Codec
+Compact binary encoding for Project documents: MessagePack plus
+
+- field names from the Project types sent as small integers,
+- enum values (UnitType, CalculationType, FrequencyType) and the default
+  expense names from expenseTemplates.ts sent as one-byte codes,
+- any other string of 5+ characters sent once, then referenced by index,
+- the app's `prefix-<ms>-<base36>` ids and toISOString() timestamps
+  packed into fixed-size binary.
+
+Decoding is lossless: key order, int/float and bool are all preserved, so
+decode(encode(p)) serializes to exactly the same JSON as p.
+
+Usage:
+    python project_codec.py encode project.json -o project.ipc
+    python project_codec.py decode project.ipc -o project.json
+    python project_codec.py check exports/
+    python project_codec.py benchmark --count 2000
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import struct
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from expense_templates import DEFAULT_EXPENSES, generate_id
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+MAGIC = b'IPC'
+FORMAT_VERSION = 1
+
+# The tables below are part of the format: append only, never reorder or
+# remove entries, or previously encoded documents will decode wrongly.
+
+# Field names of Project, Property, Unit, revenue, Expense and ComparisonRates
+KEYS = (
+    'id', 'name', 'description', 'property', 'units', 'comparison', 'createdAt', 'updatedAt',
+    'isShared', 'sharedWith', 'userId',
+    'purchasePrice', 'downPaymentPercent', 'interestRate', 'loanTerm', 'monthlyMortgageOverride',
+    'propertyAddress', 'mlsNumber', 'referenceUrls', 'referenceNotes', 'closingCostsPercent',
+    'renovationBudget', 'furnishingBudget', 'otherUpfrontCosts', 'otherUpfrontCostsLabel',
+    'propertyTaxRate', 'baseInsurance', 'hoaFees', 'label', 'url', 'text',
+    'type', 'revenue', 'expenses',
+    'nightlyRate', 'occupancyPercent', 'avgStayLength', 'rateType', 'dailyRate', 'monthlyRate',
+    'avgBookingLength', 'monthlyRent', 'annualVacancyPercent', 'monthlyRevenue',
+    'calculationType', 'value', 'frequency', 'count', 'isDIY', 'diyHours', 'outsourcedCost', 'notes',
+    'hysaRate', 'indexFundTotalRate', 'indexDividendRate',
+)
+
+# Enum values first (their codes are their positions), then template strings
+STATIC_STRINGS = (
+    # UnitType
+    'STR', 'MTR', 'LTR', 'Generic',
+    # CalculationType
+    'fixed-monthly', 'percent-revenue', 'per-occurrence', 'percent-property', 'annual-fixed',
+    # FrequencyType (also MTRRevenue.rateType 'daily' / 'monthly')
+    'daily', 'weekly', 'monthly', 'per-booking', 'quarterly', 'annual',
+    # Default expense names and notes (expenseTemplates.ts)
+    'Platform Fees (Airbnb)', 'Cleaning', 'Utilities - Electric', 'Utilities - Water', 'Utilities - Gas',
+    'Supplies (toiletries, etc)', 'Laundry Service', 'Maintenance Reserve', 'STR Insurance Add-on',
+    'Internet/Cable', 'Smart Lock Maintenance', 'Pricing Software', 'Utilities (if owner-paid)',
+    'Cleaning (turnover)', 'Property Management', 'Leasing Fee', '0% if self-managed',
+    # Property defaults
+    'Other Costs',
+)
+
+# Prefixes of `${prefix}-${Date.now()}-${random base36}` ids (at most 16)
+ID_PREFIXES = ('project', 'unit', 'expense', 'url', 'note')
+
+# MessagePack extension types
+EXT_STATIC = 1
+EXT_INTERNED = 2
+EXT_APP_ID = 3
+EXT_TIMESTAMP = 4
+
+# Strings at least this long are interned on first use
+MIN_INTERN_LENGTH = 5
+
+_KEY_CODES = {key: code for code, key in enumerate(KEYS)}
+_STATIC_CODES = {text: code for code, text in enumerate(STATIC_STRINGS)}
+_PREFIX_CODES = {prefix: code for code, prefix in enumerate(ID_PREFIXES)}
+_APP_ID = re.compile(r'^([a-z]+)-(\d{13})-([0-9a-z]{1,9})$')
+_ISO_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z$')
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+assert len(STATIC_STRINGS) <= 256 and len(ID_PREFIXES) <= 16
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("msgpack is not installed. Run: pip install -r requirements.txt") from e
+    return msgpack
+
+
+# ---------------------------------------------------------------------------
+# Fixed-size string forms
+# ---------------------------------------------------------------------------
+
+def _pack_app_id(text: str) -> Optional[bytes]:
+    """13 bytes for a `prefix-<13 digit ms>-<base36>` id, or None."""
+    match = _APP_ID.match(text)
+    if not match or match.group(1) not in _PREFIX_CODES:
+        return None
+    prefix, stamp, suffix = match.groups()
+    header = (_PREFIX_CODES[prefix] << 4) | len(suffix)
+    return bytes([header]) + int(stamp).to_bytes(6, 'big') + int(suffix, 36).to_bytes(6, 'big')
+
+
+def _unpack_app_id(data: bytes) -> str:
+    prefix, length = ID_PREFIXES[data[0] >> 4], data[0] & 0x0F
+    stamp = int.from_bytes(data[1:7], 'big')
+    value = int.from_bytes(data[7:13], 'big')
+    digits = []
+    while value:
+        value, digit = divmod(value, 36)
+        digits.append('0123456789abcdefghijklmnopqrstuvwxyz'[digit])
+    suffix = ''.join(reversed(digits)).rjust(length, '0')
+    return f"{prefix}-{stamp:013d}-{suffix}"
+
+
+def _pack_timestamp(text: str) -> Optional[bytes]:
+    """8 bytes (ms since epoch) for a toISOString() timestamp, or None."""
+    if not _ISO_TIMESTAMP.match(text):
+        return None
+    try:
+        moment = datetime.strptime(text, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    millis = (moment - _EPOCH) // timedelta(milliseconds=1)
+    if _format_timestamp(millis) != text:
+        return None
+    return struct.pack('>q', millis)
+
+
+def _format_timestamp(millis: int) -> str:
+    moment = _EPOCH + timedelta(milliseconds=millis)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _index_bytes(index: int) -> bytes:
+    size = 1 if index < 0x100 else 2 if index < 0x10000 else 4
+    return index.to_bytes(size, 'big')
+
+
+# ---------------------------------------------------------------------------
+# Encode / decode
+# ---------------------------------------------------------------------------
+
+class _Interned:
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+class _Expanded(str):
+    """A string restored from an extension type (never interned)."""
+
+
+def encode(project: Any) -> bytes:
+    """
+    Encode a JSON-compatible value (normally a Project dict).
+
+    Raises:
+        TypeError: For values JSON cannot represent
+        ValueError: For integers outside the 64-bit range
+    """
+    msgpack = _msgpack()
+    ExtType = msgpack.ExtType
+    interned: Dict[str, int] = {}
+
+    def pack_string(text: str) -> Any:
+        code = _STATIC_CODES.get(text)
+        if code is not None:
+            return ExtType(EXT_STATIC, bytes([code]))
+        index = interned.get(text)
+        if index is not None:
+            return ExtType(EXT_INTERNED, _index_bytes(index))
+        packed = _pack_app_id(text)
+        if packed is not None:
+            return ExtType(EXT_APP_ID, packed)
+        packed = _pack_timestamp(text)
+        if packed is not None:
+            return ExtType(EXT_TIMESTAMP, packed)
+        if len(text) >= MIN_INTERN_LENGTH:
+            interned[text] = len(interned)
+        return text
+
+    def pack(value: Any) -> Any:
+        if isinstance(value, str):
+            return pack_string(value)
+        if isinstance(value, dict):
+            packed = {}
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Object keys must be strings, got {type(key).__name__}")
+                packed[_KEY_CODES.get(key, key)] = pack(item)
+            return packed
+        if isinstance(value, list):
+            return [pack(item) for item in value]
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+
+    try:
+        payload = msgpack.packb(pack(project), use_bin_type=True)
+    except OverflowError as e:
+        raise ValueError(f"Integer out of range: {e}") from e
+    return MAGIC + bytes([FORMAT_VERSION]) + payload
+
+
+def decode(data: bytes) -> Any:
+    """
+    Decode bytes produced by encode().
+
+    Raises:
+        ValueError: If the data is not in this format
+    """
+    if len(data) < 4 or data[:3] != MAGIC:
+        raise ValueError("Not an encoded project (bad magic)")
+    if data[3] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version {data[3]}")
+
+    msgpack = _msgpack()
+
+    def ext_hook(code: int, payload: bytes) -> Any:
+        if code == EXT_STATIC:
+            return _Expanded(STATIC_STRINGS[payload[0]])
+        if code == EXT_INTERNED:
+            return _Interned(int.from_bytes(payload, 'big'))
+        if code == EXT_APP_ID:
+            return _Expanded(_unpack_app_id(payload))
+        if code == EXT_TIMESTAMP:
+            return _Expanded(_format_timestamp(struct.unpack('>q', payload)[0]))
+        raise ValueError(f"Unknown extension type {code}")
+
+    try:
+        tree = msgpack.unpackb(data[4:], ext_hook=ext_hook, strict_map_key=False, raw=False)
+    except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, IndexError, struct.error) as e:
+        raise ValueError(f"Corrupt project data: {e}") from e
+
+    # Replay the encoder's interning order to resolve references
+    table: List[str] = []
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, str):
+            if type(value) is _Expanded:
+                return str(value)
+            if len(value) >= MIN_INTERN_LENGTH:
+                table.append(value)
+            return value
+        if isinstance(value, _Interned):
+            if value.index >= len(table):
+                raise ValueError(f"Corrupt project data: unknown string reference {value.index}")
+            return table[value.index]
+        if isinstance(value, dict):
+            return {(KEYS[key] if isinstance(key, int) else key): resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    return resolve(tree)
+
+
+def canonical_json(value: Any) -> str:
+    """JSON text as JSON.stringify would write it; equal text means a lossless round trip."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+
+
+def round_trips(project: Any) -> bool:
+    """True if decode(encode(project)) is indistinguishable from project."""
+    return canonical_json(decode(encode(project))) == canonical_json(project)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def synthetic_projects(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Projects shaped like the app creates them: units with default expenses
+    (plus some custom ones), app-style ids and ISO timestamps.
+    """
+    rng = random.Random(seed)
+    base_ms = 1_735_689_600_000  # 2025-01-01
+    projects = []
+
+    for index in range(count):
+        created = base_ms + rng.randrange(0, 300 * 86_400_000)
+        units = []
+        for unit_index in range(rng.randint(1, 6)):
+            unit_type = rng.choice(('STR', 'STR', 'MTR', 'LTR', 'Generic'))
+            if unit_type == 'STR':
+                revenue = {'nightlyRate': rng.randrange(80, 400), 'occupancyPercent': rng.randrange(40, 90),
+                           'avgStayLength': rng.choice((2, 2.5, 3, 4))}
+            elif unit_type == 'MTR':
+                revenue = {'rateType': 'daily', 'dailyRate': rng.randrange(50, 150),
+                           'occupancyPercent': rng.randrange(40, 90), 'avgBookingLength': 15}
+            elif unit_type == 'LTR':
+                revenue = {'monthlyRent': rng.randrange(900, 3500, 25), 'annualVacancyPercent': 5}
+            else:
+                revenue = {'monthlyRevenue': rng.randrange(100, 2000)}
+
+            stamp = created + unit_index * 1000
+            expenses = [
+                {**expense, 'id': generate_id('expense', rng, stamp + offset)}
+                for offset, expense in enumerate(DEFAULT_EXPENSES[unit_type])
+            ]
+            for custom in range(rng.randint(0, 2)):
+                expenses.append({
+                    'name': rng.choice(('Snow Removal', 'Lawn Care', 'Pest Control', 'Hot Tub Service')),
+                    'calculationType': 'fixed-monthly',
+                    'value': rng.randrange(10, 200),
+                    'id': generate_id('expense', rng, stamp + 100 + custom),
+                })
+            units.append({
+                'id': generate_id('unit', rng, stamp),
+                'label': f"Unit {unit_index + 1}",
+                'type': unit_type,
+                'revenue': revenue,
+                'expenses': expenses,
+            })
+
+        price = rng.randrange(150_000, 1_200_000, 1000)
+        projects.append({
+            'id': generate_id('project', rng, created),
+            'name': f"Deal {index + 1}",
+            'description': rng.choice(('', 'Near downtown', 'Needs roof work', 'Lake access')),
+            'property': {
+                'purchasePrice': price,
+                'downPaymentPercent': rng.choice((20, 25, 10)),
+                'interestRate': round(rng.uniform(5.5, 8.0), 3),
+                'loanTerm': 30,
+                'propertyAddress': f"{rng.randrange(1, 9999)} Main St, Springfield",
+                'closingCostsPercent': 3.5,
+                'renovationBudget': rng.randrange(0, 50_000, 500),
+                'furnishingBudget': rng.randrange(0, 30_000, 500),
+                'otherUpfrontCosts': 0,
+                'otherUpfrontCostsLabel': 'Other Costs',
+                'propertyTaxRate': round(rng.uniform(0.5, 2.5), 2),
+                'baseInsurance': rng.randrange(100, 400),
+                'hoaFees': rng.choice((0, 0, 150, 300)),
+            },
+            'units': units,
+            'comparison': {'hysaRate': 3.0, 'indexFundTotalRate': 10.0, 'indexDividendRate': 2.0},
+            'createdAt': _format_timestamp(created),
+            'updatedAt': _format_timestamp(created + rng.randrange(0, 30 * 86_400_000)),
+        })
+
+    return projects
+
+
+def benchmark(projects: List[Dict[str, Any]], repeats: int = 3) -> List[Dict[str, Any]]:
+    """
+    Compare sizes and encode/decode speed across formats.
+
+    Returns:
+        Rows of {format, bytes, bytesPerProject, ratio, encodeUs, decodeUs}
+        (times are per project, best of `repeats`)
+    """
+    msgpack = _msgpack()
+    formats: Dict[str, Any] = {
+        'json (JSON.stringify)': (lambda p: canonical_json(p).encode('utf-8'), lambda b: json.loads(b)),
+        'json (indent=2)': (lambda p: json.dumps(p, indent=2).encode('utf-8'), lambda b: json.loads(b)),
+        'msgpack': (lambda p: msgpack.packb(p), lambda b: msgpack.unpackb(b)),
+        'codec': (encode, decode),
+        'codec + base64 (localStorage)': (
+            lambda p: base64.b64encode(encode(p)),
+            lambda b: decode(base64.b64decode(b))
+        ),
+    }
+
+    def best_time(function: Callable[[], Any]) -> float:
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    rows = []
+    baseline = None
+    for name, (encoder, decoder) in formats.items():
+        blobs = [encoder(project) for project in projects]
+        size = sum(len(blob) for blob in blobs)
+        baseline = baseline or size
+        rows.append({
+            'format': name,
+            'bytes': size,
+            'bytesPerProject': size / len(projects),
+            'ratio': size / baseline,
+            'encodeUs': best_time(lambda: [encoder(project) for project in projects]) / len(projects) * 1e6,
+            'decodeUs': best_time(lambda: [decoder(blob) for blob in blobs]) / len(projects) * 1e6,
+        })
+    return rows
+
+
+def format_benchmark(rows: List[Dict[str, Any]]) -> str:
+    """Render benchmark rows as a fixed-width text table."""
+    lines = [f"{'Format':<30} {'Bytes/project':>14} {'vs JSON':>8} {'Encode µs':>10} {'Decode µs':>10}"]
+    lines.append('-' * len(lines[0]))
+    for row in rows:
+        lines.append(
+            f"{row['format']:<30} {row['bytesPerProject']:>14,.0f} {row['ratio']:>7.0%} "
+            f"{row['encodeUs']:>10,.1f} {row['decodeUs']:>10,.1f}"
+        )
+    return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Compact binary encoding for Project documents')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    encode_parser = commands.add_parser('encode', help='Encode a Project JSON file')
+    encode_parser.add_argument('input', help="Project JSON file, or '-' for stdin")
+    encode_parser.add_argument('-o', '--output', required=True, help='Output file')
+
+    decode_parser = commands.add_parser('decode', help='Decode to Project JSON')
+    decode_parser.add_argument('input', help='Encoded file')
+    decode_parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    check_parser = commands.add_parser('check', help='Verify lossless round trips for exported projects')
+    check_parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for JSONL on stdin")
+
+    bench_parser = commands.add_parser('benchmark', help='Compare sizes and speed on a synthetic corpus')
+    bench_parser.add_argument('--count', type=int, default=1000, help='Synthetic projects to generate')
+    bench_parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    bench_parser.add_argument('--from', dest='paths', nargs='+', help='Benchmark these exported projects instead')
+    bench_parser.add_argument('--format', choices=('table', 'json'), default='table', help='Output format')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'encode':
+            text = sys.stdin.read() if args.input == '-' else open(args.input, 'r', encoding='utf-8').read()
+            with open(args.output, 'wb') as f:
+                f.write(encode(json.loads(text)))
+            print_success(f"Wrote {args.output}")
+
+        elif args.command == 'decode':
+            with open(args.input, 'rb') as f:
+                text = canonical_json(decode(f.read()))
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            else:
+                print(text)
+
+        elif args.command == 'check':
+            checked = failed = 0
+            for project in iter_projects(args.paths):
+                checked += 1
+                if not round_trips(project):
+                    failed += 1
+                    print_error(f"Round trip differs: {project.get('id', checked)}")
+            if failed:
+                print_error(f"{failed:,} of {checked:,} project(s) did not round-trip")
+                sys.exit(1)
+            print_success(f"{checked:,} project(s) round-trip losslessly")
+
+        else:
+            projects = list(iter_projects(args.paths)) if args.paths else synthetic_projects(args.count, args.seed)
+            if not projects:
+                print_error("No projects to benchmark")
+                sys.exit(1)
+            bad = sum(not round_trips(project) for project in projects)
+            if bad:
+                print_error(f"{bad:,} project(s) did not round-trip")
+                sys.exit(1)
+            rows = benchmark(projects)
+            if args.format == 'json':
+                json.dump({'projects': len(projects), 'results': rows}, sys.stdout, indent=2)
+                print()
+            else:
+                print_info(f"{len(projects):,} project(s), all round-trip losslessly")
+                print(format_benchmark(rows))
+
+    except (ImportError, ValueError, TypeError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
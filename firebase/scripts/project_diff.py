@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Project Diff
+Structural diff of Project documents: the smallest set of changes that
+turns one version of a project into another.
+
+- Lists of objects that each carry a unique `id` (units, expenses,
+  reference URLs and notes) are matched by id, so editing one expense is
+  one change however the list was reordered, and adding a unit is one
+  change carrying that unit
+- Every subtree is hashed (a Merkle tree), so identical subtrees (whole
+  units, the property, the comparison rates) are skipped with a single
+  comparison instead of being walked
+- Timestamps (createdAt, updatedAt) are diffed apart from the content, so
+  a save that only bumped updatedAt shows up as a timestamp-only update
+- The hash tree of a project can be stored as a manifest; diffing a new
+  version against the manifest needs no copy of the old document
+
+Change sets are lists of operations on paths, where a path is a list of
+object keys and, inside id-matched lists, item ids:
+    {"op": "set", "path": ["units", "unit-1", "revenue", "nightlyRate"], "value": 220, "old": 200}
+    {"op": "unset", "path": ["property", "monthlyMortgageOverride"], "old": 2100}
+    {"op": "add", "path": ["units", "unit-3"], "value": {...}}
+    {"op": "remove", "path": ["units", "unit-2"], "old": {...}}
+    {"op": "order", "path": ["units"], "ids": ["unit-3", "unit-1"]}
+"old" is present only when the old document was available.
+
+Usage:
+    python project_diff.py diff old.json new.json
+    python project_diff.py diff ../../exports-yesterday ../../exports --summary
+    python project_diff.py diff cloud.jsonl local.jsonl --json > changes.jsonl
+    python project_diff.py manifest ../../exports -o synced.jsonl
+    python project_diff.py diff --manifest synced.jsonl ../../exports
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+Project = Dict[str, Any]
+Change = Dict[str, Any]
+
+# A hash tree: a token for a leaf, {'#', 'k'} for an object and
+# {'#', 'ids', 'k'} for an id-matched list. Plain JSON, so it can be stored.
+Tree = Union[str, Dict[str, Any]]
+
+# Top-level fields diffed apart from the content
+TIMESTAMP_FIELDS = ('createdAt', 'updatedAt')
+
+STATUSES = ('added', 'removed', 'changed', 'timestamps', 'identical')
+
+# Longest value shown in the text report
+MAX_VALUE_WIDTH = 60
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Hash trees
+# ---------------------------------------------------------------------------
+
+# Leaves whose JSON is this short are kept as-is instead of hashed
+MAX_LITERAL_LEAF = 32
+
+_encode = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _item_ids(items: List[Any]) -> Optional[List[str]]:
+    """The item ids if every item is an object with a unique string id, else None."""
+    ids = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('id'), str):
+            return None
+        ids.append(item['id'])
+    return ids if len(set(ids)) == len(ids) else None
+
+
+def _join(kind: str, pairs: Iterable) -> str:
+    # Length-prefixed, so no two different subtrees join to the same text
+    return kind + ''.join(f"{len(key)}:{key}{len(token)}:{token}" for key, token in pairs)
+
+
+def hash_tree(value: Any, ignore: Iterable[str] = ()) -> Tree:
+    """
+    The hash tree of a JSON value.
+
+    Leaves are their JSON text when short ('=' prefix) and a digest of it
+    otherwise; JSON text tells 1, 1.0 and True apart, which == does not.
+
+    Args:
+        value: A project, or any part of one
+        ignore: Top-level keys left out of the root digest (they still get
+            a subtree, so changes to them can be reported separately)
+
+    Returns:
+        A token string for a leaf, or a dict with the digest under '#'
+    """
+    if isinstance(value, dict):
+        ignore = set(ignore)
+        children = {key: hash_tree(child) for key, child in value.items()}
+        return {
+            '#': _digest(_join('d', (
+                (key, _root_digest(children[key])) for key in sorted(children) if key not in ignore
+            ))),
+            'k': children,
+        }
+
+    if isinstance(value, list):
+        # An empty list is matched by id too, so adding the first unit is an 'add'
+        ids = _item_ids(value)
+        if ids is not None:
+            children = {item_id: hash_tree(item) for item_id, item in zip(ids, value)}
+            return {
+                '#': _digest(_join('l', ((item_id, children[item_id]['#']) for item_id in ids))),
+                'ids': ids,
+                'k': children,
+            }
+
+    text = _encode(value)
+    return '=' + text if len(text) <= MAX_LITERAL_LEAF else _digest(text)
+
+
+def _root_digest(tree: Tree) -> str:
+    return tree if isinstance(tree, str) else tree['#']
+
+
+def _kind(tree: Tree) -> str:
+    if isinstance(tree, str):
+        return 'value'
+    return 'list' if 'ids' in tree else 'object'
+
+
+def project_hash(project: Project, ignore: Iterable[str] = TIMESTAMP_FIELDS) -> str:
+    """One digest of a project's content; equal digests mean equal content."""
+    return _root_digest(hash_tree(project, ignore))
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ProjectDiff:
+    """The changes between two versions of a project."""
+    changes: List[Change] = field(default_factory=list)
+    # Changes to the ignored (timestamp) fields
+    ignored: List[Change] = field(default_factory=list)
+
+    @property
+    def identical(self) -> bool:
+        """Nothing changed, timestamps included."""
+        return not self.changes and not self.ignored
+
+    @property
+    def timestamp_only(self) -> bool:
+        """Only the ignored fields changed: a no-op update."""
+        return not self.changes and bool(self.ignored)
+
+    @property
+    def status(self) -> str:
+        """'changed', 'timestamps' or 'identical'."""
+        if self.changes:
+            return 'changed'
+        return 'timestamps' if self.ignored else 'identical'
+
+
+def _change(op: str, path: List[str], value: Any = None, old: Any = None, has_old: bool = False) -> Change:
+    change: Change = {'op': op, 'path': path}
+    if op in ('set', 'add'):
+        change['value'] = value
+    if has_old:
+        change['old'] = old
+    return change
+
+
+def _diff(old_tree: Tree, new_tree: Tree, old: Any, new: Any, has_old: bool, path: List[str], out: List[Change]):
+    if _root_digest(old_tree) == _root_digest(new_tree):
+        return
+    kind = _kind(new_tree)
+    if kind != _kind(old_tree) or kind == 'value':
+        out.append(_change('set', path, new, old, has_old))
+        return
+
+    old_children, new_children = old_tree['k'], new_tree['k']
+
+    if kind == 'object':
+        for key in old_children:
+            if key not in new_children:
+                out.append(_change('unset', path + [key], old=old.get(key) if has_old else None, has_old=has_old))
+        for key, child in new_children.items():
+            if key not in old_children:
+                out.append(_change('set', path + [key], new[key], None, False))
+            else:
+                _diff(old_children[key], child, old.get(key) if has_old else None, new[key], has_old, path + [key], out)
+        return
+
+    old_items = {item['id']: item for item in old} if has_old else {}
+    new_items = {item['id']: item for item in new}
+    for item_id in old_tree['ids']:
+        if item_id not in new_children:
+            out.append(_change('remove', path + [item_id], old=old_items.get(item_id), has_old=has_old))
+    for item_id in new_tree['ids']:
+        if item_id in old_children:
+            _diff(old_children[item_id], new_children[item_id], old_items.get(item_id), new_items[item_id],
+                  has_old, path + [item_id], out)
+    added = [item_id for item_id in new_tree['ids'] if item_id not in old_children]
+    for item_id in added:
+        out.append(_change('add', path + [item_id], new_items[item_id]))
+
+    # Removing filters and adding appends; anything else needs the order
+    kept = [item_id for item_id in old_tree['ids'] if item_id in new_children]
+    if kept + added != new_tree['ids']:
+        out.append({'op': 'order', 'path': path, 'ids': list(new_tree['ids'])})
+
+
+def diff_projects(
+    old: Optional[Project],
+    new: Project,
+    ignore: Sequence[str] = TIMESTAMP_FIELDS,
+    old_tree: Optional[Tree] = None,
+    new_tree: Optional[Tree] = None,
+) -> ProjectDiff:
+    """
+    The changes that turn old into new.
+
+    Args:
+        old: The old version, or None when old_tree is given
+        new: The new version
+        ignore: Top-level fields reported apart from the content
+        old_tree: hash_tree(old, ignore), e.g. from a stored manifest; without
+            the old document the changes carry no 'old' values
+        new_tree: hash_tree(new, ignore), if already computed
+
+    Returns:
+        ProjectDiff with the content changes and the ignored-field changes
+    """
+    if old is None and old_tree is None:
+        raise ValueError("diff_projects needs the old project or its hash tree")
+    if old_tree is None and new_tree is None:
+        def content(project: Project) -> Project:
+            return {key: value for key, value in project.items() if key not in ignore}
+        # Most pairs are unchanged; one encode of each settles that without building trees
+        if _encode(content(old)) == _encode(content(new)):
+            old_tree = {'#': '', 'k': {key: hash_tree(old[key]) for key in ignore if key in old}}
+            new_tree = {'#': '', 'k': {key: hash_tree(new[key]) for key in ignore if key in new}}
+    if old_tree is None:
+        old_tree = hash_tree(old, ignore)
+    if new_tree is None:
+        new_tree = hash_tree(new, ignore)
+    if _kind(old_tree) != 'object' or _kind(new_tree) != 'object':
+        raise ValueError("Projects must be JSON objects")
+
+    has_old = old is not None
+    result = ProjectDiff()
+    old_children, new_children = old_tree['k'], new_tree['k']
+    same_content = old_tree['#'] == new_tree['#']
+    for key in set(old_children) | set(new_children):
+        if same_content and key not in ignore:
+            continue
+        out = result.ignored if key in ignore else result.changes
+        if key not in new_children:
+            out.append(_change('unset', [key], old=old.get(key) if has_old else None, has_old=has_old))
+        elif key not in old_children:
+            out.append(_change('set', [key], new[key]))
+        else:
+            _diff(old_children[key], new_children[key], old.get(key) if has_old else None, new[key],
+                  has_old, [key], out)
+
+    # Fields in document order, so reports read top to bottom
+    order = {key: i for i, key in enumerate([*new_children, *old_children])}
+    result.changes.sort(key=lambda change: order[change['path'][0]])
+    result.ignored.sort(key=lambda change: order[change['path'][0]])
+    return result
+
+
+def apply_changes(project: Project, changes: Iterable[Change]) -> Project:
+    """
+    Apply a change set; returns a new project and never modifies the one given.
+
+    Raises:
+        ValueError: If a change does not fit the project
+    """
+    result = copy.deepcopy(project)
+    for change in changes:
+        path = change['path']
+        op = change['op']
+        if op == 'order':
+            items = _resolve(result, path)
+            by_id = {item['id']: item for item in items}
+            if set(by_id) != set(change['ids']):
+                raise ValueError(f"Order of {format_path(path)} does not match its items")
+            items[:] = [by_id[item_id] for item_id in change['ids']]
+            continue
+
+        parent = _resolve(result, path[:-1])
+        key = path[-1]
+        if isinstance(parent, list):
+            index = next((i for i, item in enumerate(parent) if item.get('id') == key), None)
+            if op == 'add':
+                parent.append(copy.deepcopy(change['value']))
+            elif index is None:
+                raise ValueError(f"No item {key} in {format_path(path[:-1])}")
+            elif op == 'remove':
+                del parent[index]
+            elif op == 'set':
+                parent[index] = copy.deepcopy(change['value'])
+            else:
+                raise ValueError(f"Cannot {op} an item of {format_path(path[:-1])}")
+        elif op == 'set':
+            parent[key] = copy.deepcopy(change['value'])
+        elif op == 'unset':
+            parent.pop(key, None)
+        else:
+            raise ValueError(f"Cannot {op} {format_path(path)}")
+    return result
+
+
+def _resolve(value: Any, path: List[str]) -> Any:
+    for i, key in enumerate(path):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list):
+            value = next((item for item in value if isinstance(item, dict) and item.get('id') == key), None)
+            if value is None:
+                raise ValueError(f"No item {key} in {format_path(path[:i])}")
+        else:
+            raise ValueError(f"No {format_path(path[:i + 1])} in project")
+    return value
+
+
+def format_path(path: List[str]) -> str:
+    """A path as 'units/unit-1/revenue/nightlyRate'."""
+    return '/'.join(path) or '/'
+
+
+def _short(value: Any) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= MAX_VALUE_WIDTH else text[:MAX_VALUE_WIDTH - 1] + '…'
+
+
+def describe(change: Change) -> str:
+    """One-line summary of a change."""
+    op, path = change['op'], format_path(change['path'])
+    if op == 'set':
+        old = f"{_short(change['old'])} → " if 'old' in change else ''
+        return f"set    {path}: {old}{_short(change['value'])}"
+    if op == 'unset':
+        return f"unset  {path}"
+    if op == 'add':
+        label = change['value'].get('label') or change['value'].get('name')
+        return f"add    {path}" + (f" ({_short(label)})" if label else '')
+    if op == 'remove':
+        return f"remove {path}"
+    return f"order  {path}: {', '.join(change['ids'])}"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _by_id(items: Iterable[Dict[str, Any]], what: str) -> Dict[str, Dict[str, Any]]:
+    result: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        item_id = item.get('id')
+        if not isinstance(item_id, str):
+            print_warning(f"Skipping {what} without an id")
+            continue
+        result[item_id] = item
+    return result
+
+
+def _report(project_id: str, name: Any, status: str, diff: Optional[ProjectDiff], summary: bool):
+    label = f"{project_id} ({name})" if name else project_id
+    if status == 'added':
+        print(f"{Colors.OKGREEN}+ {label}: new{Colors.ENDC}")
+    elif status == 'removed':
+        print(f"{Colors.FAIL}- {label}: removed{Colors.ENDC}")
+    elif status == 'timestamps':
+        fields = ', '.join(format_path(change['path']) for change in diff.ignored)
+        print(f"{Colors.WARNING}= {label}: timestamps only ({fields}){Colors.ENDC}")
+    else:
+        print(f"{Colors.OKBLUE}~ {label}: {len(diff.changes)} change(s){Colors.ENDC}")
+        if not summary:
+            for change in diff.changes:
+                print(f"    {describe(change)}")
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Structural diff of Project documents, matched by project id')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = commands.add_parser('diff', help='Diff two sets of projects (or a manifest and a set)')
+    diff_parser.add_argument('paths', nargs='+', metavar='PATH',
+                             help="OLD NEW (or just NEW with --manifest): project JSON/JSONL files or folders, or '-'")
+    diff_parser.add_argument('--manifest', help='Diff against hash manifests written by the manifest command')
+    diff_parser.add_argument('--json', action='store_true', help='JSONL on stdout: one change set per project')
+    diff_parser.add_argument('--summary', action='store_true', help='One line per project, without the changes')
+    diff_parser.add_argument('--all', action='store_true', help='Also list identical projects')
+    diff_parser.add_argument('--ignore', action='append', metavar='FIELD',
+                             help=f"Top-level field reported apart from the content (default: {', '.join(TIMESTAMP_FIELDS)})")
+
+    manifest_parser = commands.add_parser('manifest', help='Write the hash tree of each project')
+    manifest_parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-'")
+    manifest_parser.add_argument('-o', '--output', required=True, help='Manifest file (JSONL)')
+    manifest_parser.add_argument('--ignore', action='append', metavar='FIELD',
+                                 help=f"Top-level field left out of the content hash (default: {', '.join(TIMESTAMP_FIELDS)})")
+
+    args = parser.parse_args()
+    ignore = tuple(args.ignore) if args.ignore else TIMESTAMP_FIELDS
+
+    try:
+        if args.command == 'manifest':
+            count = 0
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for project_id, project in _by_id(iter_projects(args.paths), 'project').items():
+                    entry = {'id': project_id, 'ignore': list(ignore), 'tree': hash_tree(project, ignore)}
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                    count += 1
+            print_success(f"Wrote manifests of {count:,} project(s) to {args.output}")
+            return
+
+        expected = 1 if args.manifest else 2
+        if len(args.paths) != expected:
+            parser.error('diff takes NEW with --manifest, or OLD NEW without it')
+
+        if args.manifest:
+            manifests = _by_id(iter_projects([args.manifest]), 'manifest entry')
+            for entry in manifests.values():
+                if tuple(entry.get('ignore', ())) != ignore:
+                    raise ValueError(f"{args.manifest} was written with --ignore {','.join(entry.get('ignore', []))}")
+            old_trees: Dict[str, Tree] = {project_id: entry['tree'] for project_id, entry in manifests.items()}
+            old_projects: Dict[str, Project] = {}
+        else:
+            old_projects = _by_id(iter_projects(args.paths[:1]), 'old project')
+            old_trees = {}
+        old_ids = old_trees.keys() | old_projects.keys()
+
+        counts = {status: 0 for status in STATUSES}
+        seen = set()
+        for project_id, new in _by_id(iter_projects(args.paths[-1:]), 'new project').items():
+            seen.add(project_id)
+            diff = None
+            if project_id not in old_ids:
+                status = 'added'
+            else:
+                diff = diff_projects(old_projects.get(project_id), new, ignore, old_tree=old_trees.get(project_id))
+                status = diff.status
+            counts[status] += 1
+
+            if args.json:
+                entry: Dict[str, Any] = {'id': project_id, 'status': status}
+                if diff is not None:
+                    entry['changes'] = diff.changes
+                    entry['ignored'] = diff.ignored
+                print(json.dumps(entry, ensure_ascii=False))
+            elif status != 'identical' or args.all:
+                if status == 'identical':
+                    print(f"  {project_id}: identical")
+                else:
+                    _report(project_id, new.get('name'), status, diff, args.summary)
+
+        for project_id in sorted(old_ids - seen):
+            counts['removed'] += 1
+            if args.json:
+                print(json.dumps({'id': project_id, 'status': 'removed'}))
+            else:
+                _report(project_id, old_projects.get(project_id, {}).get('name'), 'removed', None, args.summary)
+
+        print_success(
+            f"{counts['changed']:,} changed, {counts['timestamps']:,} timestamp-only, {counts['added']:,} added, "
+            f"{counts['removed']:,} removed, {counts['identical']:,} identical"
+        )
+
+    except (ValueError, KeyError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Project Files
+Reads exported Project documents from JSON/JSONL files and folders.
+
+Accepted inputs:
+- a .json file holding one Project or a list of Projects
+- a .jsonl file with one Project per line
+- a directory, searched recursively for the above
+- '-' for JSONL on stdin
+
+json_safe() prepares results for strict JSON output.
+"""
+
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+PROJECT_SUFFIXES = ('.json', '.jsonl')
+
+
+def expand_paths(paths: Iterable[str]) -> List[Path]:
+    """Expand files and directories into a sorted list of project files."""
+    files: List[Path] = []
+    for value in paths:
+        path = Path(value)
+        if path.is_dir():
+            files.extend(sorted(
+                p for p in path.rglob('*') if p.is_file() and p.suffix in PROJECT_SUFFIXES
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def _iter_lines(lines: Iterable[str], source: str) -> Iterator[Dict[str, Any]]:
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{source}:{line_number}: invalid JSON ({e})") from e
+
+
+def iter_file(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the Project dicts stored in a single file."""
+    if path.suffix == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_lines(f, str(path))
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def iter_projects(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream Project dicts from files, folders or stdin.
+
+    Args:
+        paths: File paths, directory paths, or '-' for stdin
+
+    Yields:
+        Project dicts in file order
+    """
+    for value in paths:
+        if value == '-':
+            yield from _iter_lines(sys.stdin, '<stdin>')
+            continue
+        for path in expand_paths([value]):
+            yield from iter_file(path)
+
+
+def load_projects(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Load every Project from the given paths into memory."""
+    return list(iter_projects(paths))
+
+
+def json_safe(value: Any) -> Any:
+    """Replace NaN/Infinity (not valid JSON) with null."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_safe(item) for item in value]
+    return value
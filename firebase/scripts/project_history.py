@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Project History
+Reference implementation of an event-sourced edit history for projects.
+
+Every edit is stored as one action of propertyReducer
+(src/contexts/PropertyContext.tsx) instead of a full Project rewrite, so the
+log grows with the size of each edit, not with the size of the document.
+A snapshot of the full project is written every SNAPSHOT_INTERVAL actions;
+the state at any sequence number or time is the nearest earlier snapshot
+plus at most SNAPSHOT_INTERVAL replayed actions.
+
+Layout of a store (one folder per project):
+    <store>/<project id>/index.jsonl         {"seq", "at"} per snapshot
+    <store>/<project id>/snapshots/<seq>.json  project after action <seq>
+    <store>/<project id>/events/<seq>.jsonl    actions <seq>+1 up to the next snapshot
+
+Usage:
+    python project_history.py record exports/ --store history
+    python project_history.py log project-123 --store history --limit 20
+    python project_history.py show project-123 --at 2025-06-01T12:00:00Z -o old.json
+    python project_history.py undo project-123 --steps 3
+    python project_history.py stats --store history
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from expense_templates import generate_id, get_default_expenses
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+Project = Dict[str, Any]
+Action = Dict[str, Any]
+
+# Actions replayed on top of a snapshot, at most
+SNAPSHOT_INTERVAL = 200
+
+DEFAULT_STORE = 'history'
+
+ACTION_TYPES = (
+    'UPDATE_PROPERTY', 'ADD_UNIT', 'REMOVE_UNIT', 'UPDATE_UNIT',
+    'UPDATE_COMPARISON', 'LOAD_PROJECT', 'UPDATE_PROJECT_INFO',
+)
+
+# Revenue of a new unit, as in the ADD_UNIT case of propertyReducer
+DEFAULT_REVENUE = {
+    'STR': {'nightlyRate': 0, 'occupancyPercent': 80, 'avgStayLength': 2.5},
+    'MTR': {'rateType': 'daily', 'dailyRate': 0, 'occupancyPercent': 50, 'avgBookingLength': 15},
+    'LTR': {'monthlyRent': 0, 'annualVacancyPercent': 5},
+    'Generic': {'monthlyRevenue': 0},
+}
+
+# Fields the reducer edits; everything else (timestamps, owner, sharing) is metadata
+CONTENT_FIELDS = ('id', 'name', 'description', 'property', 'units', 'comparison')
+
+_SAFE_ID = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+# ---------------------------------------------------------------------------
+# Reducer
+# ---------------------------------------------------------------------------
+
+def new_unit(unit_type: str, label: str, rng: Optional[random.Random] = None, now_ms: Optional[int] = None) -> Dict[str, Any]:
+    """A unit with default revenue and expenses, as ADD_UNIT creates it."""
+    if unit_type not in DEFAULT_REVENUE:
+        raise ValueError(f"Unknown unit type: {unit_type}")
+    return {
+        'id': generate_id('unit', rng, now_ms),
+        'label': label,
+        'type': unit_type,
+        'revenue': dict(DEFAULT_REVENUE[unit_type]),
+        'expenses': [
+            {**expense, 'id': generate_id('expense', rng, now_ms)}
+            for expense in get_default_expenses(unit_type)
+        ],
+    }
+
+
+def resolve_action(action: Action, rng: Optional[random.Random] = None, now_ms: Optional[int] = None) -> Action:
+    """
+    Make an action deterministic so that replaying it gives the same result.
+
+    ADD_UNIT generates ids when the app dispatches it; the logged form
+    carries the created unit as {'unit': {...}} instead of {'type', 'label'}.
+
+    Raises:
+        ValueError: For unknown action types
+    """
+    if action.get('type') not in ACTION_TYPES:
+        raise ValueError(f"Unknown action type: {action.get('type')}")
+    payload = action.get('payload')
+    if action['type'] == 'ADD_UNIT' and 'unit' not in payload:
+        return {'type': 'ADD_UNIT', 'payload': {'unit': new_unit(payload['type'], payload['label'], rng, now_ms)}}
+    return {'type': action['type'], 'payload': payload}
+
+
+def apply_action(project: Project, action: Action) -> Project:
+    """
+    propertyReducer over a Project dict: returns a new project and never
+    modifies the one given. ADD_UNIT must be resolved (see resolve_action).
+    """
+    kind = action['type']
+    payload = action.get('payload')
+
+    if kind == 'UPDATE_PROPERTY':
+        return {**project, 'property': {**project.get('property', {}), **payload}}
+
+    if kind == 'ADD_UNIT':
+        return {**project, 'units': [*project.get('units', []), payload['unit']]}
+
+    if kind == 'REMOVE_UNIT':
+        return {**project, 'units': [unit for unit in project.get('units', []) if unit.get('id') != payload]}
+
+    if kind == 'UPDATE_UNIT':
+        unit_id, updates = payload['id'], payload['updates']
+        return {
+            **project,
+            'units': [
+                {**unit, **updates} if unit.get('id') == unit_id else unit
+                for unit in project.get('units', [])
+            ],
+        }
+
+    if kind == 'UPDATE_COMPARISON':
+        return {**project, 'comparison': {**project.get('comparison', {}), **payload}}
+
+    if kind == 'LOAD_PROJECT':
+        return dict(payload)
+
+    if kind == 'UPDATE_PROJECT_INFO':
+        updated = dict(project)
+        for field in ('name', 'description'):
+            if payload.get(field) is not None:
+                updated[field] = payload[field]
+        return updated
+
+    raise ValueError(f"Unknown action type: {kind}")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # == alone treats True == 1 and 1 == 1.0
+    return a == b and json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def _partial_update(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Fields of new that differ from old, or None if a field was removed."""
+    if any(key not in new for key in old):
+        return None
+    return {key: value for key, value in new.items() if key not in old or not _same(old[key], value)}
+
+
+def content(project: Project) -> Project:
+    """The fields of a project that actions change."""
+    return {field: project[field] for field in CONTENT_FIELDS if field in project}
+
+
+def diff_actions(old: Project, new: Project) -> List[Action]:
+    """
+    The actions that turn old into new.
+
+    Produces the small edit actions the app would have dispatched when it
+    can, and a single LOAD_PROJECT when it cannot (a removed field, reordered
+    units, or a different project id). Metadata fields are ignored.
+    """
+    old, new = content(old), content(new)
+    if _same(old, new):
+        return []
+    load = [{'type': 'LOAD_PROJECT', 'payload': new}]
+    if old.get('id') != new.get('id'):
+        return load
+
+    actions: List[Action] = []
+
+    info = {}
+    for field in ('name', 'description'):
+        if not _same(old.get(field), new.get(field)):
+            if new.get(field) is None:
+                return load
+            info[field] = new[field]
+    if info:
+        actions.append({'type': 'UPDATE_PROJECT_INFO', 'payload': info})
+
+    for field, action_type in (('property', 'UPDATE_PROPERTY'), ('comparison', 'UPDATE_COMPARISON')):
+        changes = _partial_update(old.get(field) or {}, new.get(field) or {})
+        if changes is None:
+            return load
+        if changes:
+            actions.append({'type': action_type, 'payload': changes})
+
+    old_units = {unit.get('id'): unit for unit in old.get('units', [])}
+    new_units = {unit.get('id'): unit for unit in new.get('units', [])}
+    if len(old_units) != len(old.get('units', [])) or len(new_units) != len(new.get('units', [])):
+        return load
+
+    # REMOVE_UNIT filters and ADD_UNIT appends, so kept units must keep their order
+    kept = [unit_id for unit_id in old_units if unit_id in new_units]
+    if list(new_units)[:len(kept)] != kept:
+        return load
+
+    for unit_id in old_units:
+        if unit_id not in new_units:
+            actions.append({'type': 'REMOVE_UNIT', 'payload': unit_id})
+    for unit_id in kept:
+        updates = _partial_update(old_units[unit_id], new_units[unit_id])
+        if updates is None:
+            return load
+        if updates:
+            actions.append({'type': 'UPDATE_UNIT', 'payload': {'id': unit_id, 'updates': updates}})
+    for unit_id in list(new_units)[len(kept):]:
+        actions.append({'type': 'ADD_UNIT', 'payload': {'unit': new_units[unit_id]}})
+
+    result = old
+    for action in actions:
+        result = apply_action(result, action)
+    return actions if _same(content(result), new) else load
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _write_atomic(path: Path, text: str):
+    temp = path.with_suffix(path.suffix + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+class ProjectHistory:
+    """
+    The action log and snapshots of one project.
+
+    One writer per project at a time; readers may open the store freely.
+    """
+
+    def __init__(self, store: Path, project_id: str, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        if not _SAFE_ID.match(project_id):
+            raise ValueError(f"Unsafe project ID: {project_id!r}")
+        self.project_id = project_id
+        self.path = Path(store) / project_id
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_seqs: List[int] = []
+        self._snapshot_times: List[int] = []
+        self._head: Optional[Project] = None
+        self._head_seq = 0
+        self._head_at = 0
+
+        index_path = self.path / 'index.jsonl'
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._snapshot_seqs.append(entry['seq'])
+                        self._snapshot_times.append(entry['at'])
+            if self._snapshot_seqs:
+                self._load_head()
+
+    @property
+    def exists(self) -> bool:
+        """True once the history has its first snapshot."""
+        return self._head is not None
+
+    @property
+    def head_seq(self) -> int:
+        """Sequence number of the last recorded action."""
+        return self._head_seq
+
+    @property
+    def snapshot_count(self) -> int:
+        """Number of snapshots stored."""
+        return len(self._snapshot_seqs)
+
+    def head(self) -> Project:
+        """The current project."""
+        if self._head is None:
+            raise ValueError(f"No history for {self.project_id}")
+        return self._head
+
+    def _snapshot_path(self, seq: int) -> Path:
+        return self.path / 'snapshots' / f"{seq:010d}.json"
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.path / 'events' / f"{seq:010d}.jsonl"
+
+    def _read_snapshot(self, seq: int) -> Project:
+        with open(self._snapshot_path(seq), 'r', encoding='utf-8') as f:
+            return json.load(f)['project']
+
+    def _read_segment(self, seq: int) -> Iterator[Dict[str, Any]]:
+        path = self._segment_path(seq)
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from an interrupted append
+                    return
+
+    def _load_head(self):
+        base = self._snapshot_seqs[-1]
+        project = self._read_snapshot(base)
+        seq, at = base, self._snapshot_times[-1]
+
+        segment = self._segment_path(base)
+        if segment.exists():
+            valid_bytes = 0
+            with open(segment, 'rb') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    # A load's snapshot is written before its event, so a
+                    # payload-less load here never got one; drop it like a torn line
+                    if event['type'] == 'LOAD_PROJECT' and 'payload' not in event:
+                        break
+                    project = apply_action(project, event)
+                    seq, at = event['seq'], event['at']
+                    valid_bytes += len(line)
+            # Drop a torn final line left by an interrupted append
+            if segment.stat().st_size > valid_bytes:
+                with open(segment, 'r+b') as f:
+                    f.truncate(valid_bytes)
+
+        self._head, self._head_seq, self._head_at = project, seq, at
+
+    def _write_snapshot(self, project: Project, seq: int, at: int):
+        (self.path / 'snapshots').mkdir(parents=True, exist_ok=True)
+        (self.path / 'events').mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._snapshot_path(seq), _dumps({'seq': seq, 'at': at, 'project': project}))
+        with open(self.path / 'index.jsonl', 'a', encoding='utf-8') as f:
+            f.write(_dumps({'seq': seq, 'at': at}) + '\n')
+        self._snapshot_seqs.append(seq)
+        self._snapshot_times.append(at)
+
+    def record(self, action: Action, at: Optional[int] = None, by: Optional[str] = None) -> int:
+        """
+        Append one action.
+
+        Args:
+            action: A propertyReducer action ({'type', 'payload'})
+            at: Time in ms (default: now); never earlier than the last action
+            by: Who made the change, kept for auditing
+
+        Returns:
+            The action's sequence number
+        """
+        action = resolve_action(action, now_ms=at)
+        at = max(_now_ms() if at is None else at, self._head_at)
+
+        if self._head is None:
+            if action['type'] != 'LOAD_PROJECT':
+                raise ValueError(f"History for {self.project_id} must start with LOAD_PROJECT")
+            self._head = apply_action({}, action)
+            self._head_at = at
+            self._write_snapshot(self._head, 0, at)
+            return 0
+
+        project = apply_action(self._head, action)
+        seq = self._head_seq + 1
+        event: Dict[str, Any] = {'seq': seq, 'at': at, 'type': action['type']}
+        if by:
+            event['by'] = by
+        segment = self._segment_path(self._snapshot_seqs[-1])
+
+        if action['type'] == 'LOAD_PROJECT':
+            # A whole-document load is stored once, as the snapshot it starts.
+            # The snapshot goes first: a crash before the event is appended
+            # leaves the log one entry short, never a load without its data
+            self._write_snapshot(project, seq, at)
+        else:
+            event['payload'] = action['payload']
+
+        with open(segment, 'a', encoding='utf-8') as f:
+            f.write(_dumps(event) + '\n')
+        self._head, self._head_seq, self._head_at = project, seq, at
+
+        if action['type'] != 'LOAD_PROJECT' and seq - self._snapshot_seqs[-1] >= self.snapshot_interval:
+            self._write_snapshot(project, seq, at)
+        return seq
+
+    def record_project(self, project: Project, at: Optional[int] = None, by: Optional[str] = None) -> List[int]:
+        """
+        Record a saved project as the actions that changed it since the head.
+
+        Returns:
+            Sequence numbers of the recorded actions (empty if unchanged)
+        """
+        if self._head is None:
+            return [self.record({'type': 'LOAD_PROJECT', 'payload': content(project)}, at, by)]
+        return [self.record(action, at, by) for action in diff_actions(self._head, project)]
+
+    def events(self, start: int = 1, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Logged actions with start <= seq <= end, oldest first."""
+        end = self._head_seq if end is None else end
+        first = max(bisect.bisect_right(self._snapshot_seqs, start - 1) - 1, 0)
+        for base in self._snapshot_seqs[first:]:
+            if base >= end:
+                break
+            for event in self._read_segment(base):
+                if event['seq'] > end:
+                    return
+                if event['seq'] >= start:
+                    yield event
+
+    def seq_at(self, at: int) -> int:
+        """Sequence number of the last action recorded at or before time `at` (ms)."""
+        if not self._snapshot_times or at < self._snapshot_times[0]:
+            raise ValueError(f"{self.project_id} has no history before {format_time(at)}")
+        base = self._snapshot_seqs[bisect.bisect_right(self._snapshot_times, at) - 1]
+        seq = base
+        for event in self._read_segment(base):
+            if event['at'] > at:
+                break
+            seq = event['seq']
+        return seq
+
+    def state_at(self, seq: Optional[int] = None, at: Optional[int] = None) -> Project:
+        """
+        The project after action `seq`, or as it was at time `at` (ms).
+
+        Reads one snapshot and replays fewer than snapshot_interval actions.
+        """
+        if self._head is None:
+            raise ValueError(f"No history for {self.project_id}")
+        if at is not None:
+            seq = self.seq_at(at)
+        if seq is None or seq == self._head_seq:
+            return self._head
+        if not 0 <= seq <= self._head_seq:
+            raise ValueError(f"{self.project_id} has actions 0-{self._head_seq}, not {seq}")
+
+        base = self._snapshot_seqs[bisect.bisect_right(self._snapshot_seqs, seq) - 1]
+        project = self._read_snapshot(base)
+        for event in self._read_segment(base):
+            if event['seq'] > seq:
+                break
+            project = apply_action(project, event)
+        return project
+
+    def undo(self, steps: int = 1, at: Optional[int] = None, by: Optional[str] = None) -> int:
+        """
+        Restore the project as it was `steps` actions ago.
+
+        The undo is itself recorded (as LOAD_PROJECT), so it can be undone.
+
+        Returns:
+            The sequence number of the undo
+        """
+        if self._head is None:
+            raise ValueError(f"No history for {self.project_id}")
+        if steps < 1 or steps > self._head_seq:
+            raise ValueError(f"Can undo 1-{self._head_seq} action(s), not {steps}")
+        return self.record({'type': 'LOAD_PROJECT', 'payload': self.state_at(self._head_seq - steps)}, at, by)
+
+    def storage_bytes(self) -> Dict[str, int]:
+        """Bytes on disk used by events and by snapshots."""
+        def size(folder: str) -> int:
+            path = self.path / folder
+            return sum(p.stat().st_size for p in path.iterdir()) if path.exists() else 0
+        return {'events': size('events'), 'snapshots': size('snapshots')}
+
+
+def list_histories(store: Path) -> List[str]:
+    """Project IDs with a history in the store."""
+    store = Path(store)
+    if not store.exists():
+        return []
+    return sorted(p.name for p in store.iterdir() if (p / 'index.jsonl').exists())
+
+
+def parse_time(value: str) -> int:
+    """Milliseconds since the epoch from an ISO 8601 time or a number of ms."""
+    if value.isdigit():
+        return int(value)
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def format_time(at: int) -> str:
+    """ISO 8601 (UTC) for a time in ms."""
+    return datetime.fromtimestamp(at / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def describe(event: Dict[str, Any]) -> str:
+    """One-line summary of a logged action."""
+    payload = event.get('payload')
+    kind = event['type']
+    if kind in ('UPDATE_PROPERTY', 'UPDATE_COMPARISON', 'UPDATE_PROJECT_INFO'):
+        return ', '.join(f"{key}={json.dumps(value)}" for key, value in payload.items())
+    if kind == 'ADD_UNIT':
+        return f"{payload['unit'].get('type')} \"{payload['unit'].get('label')}\" ({payload['unit'].get('id')})"
+    if kind == 'REMOVE_UNIT':
+        return str(payload)
+    if kind == 'UPDATE_UNIT':
+        return f"{payload['id']}: {', '.join(payload['updates'])}"
+    return 'full project'
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Event-sourced edit history for projects')
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f'History folder (default: {DEFAULT_STORE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Record saved projects as actions since the last record')
+    record_parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for JSONL on stdin")
+    record_parser.add_argument('--at', help='Time of the changes (default: now)')
+    record_parser.add_argument('--by', help='Who made the changes')
+    record_parser.add_argument('--snapshot-interval', type=int, default=SNAPSHOT_INTERVAL,
+                               help='Actions between snapshots')
+
+    log_parser = commands.add_parser('log', help='List recorded actions')
+    log_parser.add_argument('project_id')
+    log_parser.add_argument('--since', help='Only actions after this time')
+    log_parser.add_argument('--limit', type=int, help='Only the last N actions')
+
+    show_parser = commands.add_parser('show', help='Print a project as of an action or a time')
+    show_parser.add_argument('project_id')
+    point = show_parser.add_mutually_exclusive_group()
+    point.add_argument('--seq', type=int, help='After this action')
+    point.add_argument('--at', help='As of this time (ISO 8601 or ms)')
+    show_parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    undo_parser = commands.add_parser('undo', help='Restore a project as it was N actions ago')
+    undo_parser.add_argument('project_id')
+    undo_parser.add_argument('--steps', type=int, default=1, help='Actions to undo (default: 1)')
+    undo_parser.add_argument('--by', help='Who is undoing')
+
+    commands.add_parser('stats', help='Actions, snapshots and storage per project')
+
+    args = parser.parse_args()
+    store = Path(args.store)
+
+    try:
+        if args.command == 'record':
+            if args.snapshot_interval < 1:
+                print_error("--snapshot-interval must be at least 1")
+                sys.exit(1)
+            at = parse_time(args.at) if args.at else None
+            recorded = unchanged = 0
+            for project in iter_projects(args.paths):
+                project_id = project.get('id')
+                if not isinstance(project_id, str):
+                    print_warning("Skipping project without an id")
+                    continue
+                history = ProjectHistory(store, project_id, args.snapshot_interval)
+                seqs = history.record_project(project, at, args.by)
+                if seqs:
+                    recorded += len(seqs)
+                    print_info(f"{project_id}: {len(seqs)} action(s), now at #{history.head_seq}")
+                else:
+                    unchanged += 1
+            print_success(f"Recorded {recorded:,} action(s); {unchanged:,} project(s) unchanged")
+
+        elif args.command == 'log':
+            history = ProjectHistory(store, args.project_id)
+            if not history.exists:
+                raise ValueError(f"No history for {args.project_id}")
+            start = history.seq_at(parse_time(args.since)) + 1 if args.since else 1
+            if args.limit:
+                start = max(start, history.head_seq - args.limit + 1)
+            for event in history.events(start):
+                by = f" [{event['by']}]" if event.get('by') else ''
+                print(f"#{event['seq']:<6} {format_time(event['at'])}  {event['type']:<20} {describe(event)}{by}")
+
+        elif args.command == 'show':
+            history = ProjectHistory(store, args.project_id)
+            project = history.state_at(args.seq, parse_time(args.at) if args.at else None)
+            text = json.dumps(project, indent=2, ensure_ascii=False)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(text + '\n')
+                print_success(f"Wrote {args.output}")
+            else:
+                print(text)
+
+        elif args.command == 'undo':
+            history = ProjectHistory(store, args.project_id)
+            seq = history.undo(args.steps, by=args.by)
+            print_success(f"Restored {args.project_id} to #{seq - 1 - args.steps} (recorded as #{seq})")
+
+        else:
+            project_ids = list_histories(store)
+            if not project_ids:
+                print_warning(f"No histories in {store}")
+                return
+            print(f"{'Project':<40} {'Actions':>8} {'Snapshots':>10} {'Event KB':>9} {'Snapshot KB':>12}")
+            for project_id in project_ids:
+                history = ProjectHistory(store, project_id)
+                sizes = history.storage_bytes()
+                print(
+                    f"{project_id:<40} {history.head_seq:>8,} {history.snapshot_count:>10,} "
+                    f"{sizes['events'] / 1024:>9,.1f} {sizes['snapshots'] / 1024:>12,.1f}"
+                )
+
+    except (ValueError, KeyError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Project Schema
+Validates Project, Unit, Expense and expense template JSON against the
+shapes in src/types, and coerces numeric strings ("1200", " 7.5 ") to
+numbers in place.
+
+Each shape is compiled once into a specialized Python function (generated
+source with the field checks inlined), so validating a record is a
+straight run of type checks with no schema walking. Error paths such as
+`$.units[1].expenses[0].value` are only built when a check fails.
+
+Usage:
+    python project_schema.py ../../exports
+    python project_schema.py batch.jsonl -o clean.jsonl
+    python project_schema.py STR-template.json --kind template
+    cat batch.jsonl | python project_schema.py - --format json > errors.jsonl
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from project_files import expand_paths, iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# One problem: (path, message)
+ValidationError = Tuple[str, str]
+
+# Compiled check: (value, errors, coerced paths) -> None; fixes coercible values in place
+Check = Callable[[Any, List[ValidationError], List[str]], None]
+
+NUMERIC_STRING = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*')
+
+# Errors printed per record in text output
+DEFAULT_MAX_ERRORS = 10
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+# Schema nodes
+
+@dataclass(frozen=True)
+class Str:
+    pass
+
+
+@dataclass(frozen=True)
+class Num:
+    pass
+
+
+@dataclass(frozen=True)
+class Bool:
+    pass
+
+
+@dataclass(frozen=True)
+class Enum:
+    values: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Arr:
+    item: Any
+    length: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Obj:
+    """Fields as (name, node, required); unknown fields are allowed."""
+    fields: Tuple[Tuple[str, Any, bool], ...]
+
+
+@dataclass(frozen=True)
+class Tagged:
+    """Object field whose shape depends on a sibling field (Unit.revenue on Unit.type)."""
+    tag: str
+    variants: Tuple[Tuple[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class MapOf:
+    """Object with a fixed set of optional keys sharing one value shape."""
+    keys: Tuple[str, ...]
+    value: Any
+
+
+@dataclass(frozen=True)
+class ListOrMap:
+    """Either a list or an object, each with its own shape."""
+    list: Any
+    map: Any
+
+
+UNIT_TYPES = ('STR', 'MTR', 'LTR', 'Generic')
+CALCULATION_TYPES = ('fixed-monthly', 'percent-revenue', 'per-occurrence', 'percent-property', 'annual-fixed')
+FREQUENCY_TYPES = ('daily', 'weekly', 'monthly', 'per-booking', 'quarterly', 'annual')
+MONTHS = 12
+
+
+def _expense(id_required: bool) -> Obj:
+    return Obj((
+        ('id', Str(), id_required),
+        ('name', Str(), True),
+        ('calculationType', Enum(CALCULATION_TYPES), True),
+        ('value', Num(), True),
+        ('frequency', Obj((('type', Enum(FREQUENCY_TYPES), True), ('count', Num(), True))), False),
+        ('isDIY', Bool(), False),
+        ('diyHours', Num(), False),
+        ('outsourcedCost', Num(), False),
+        ('notes', Str(), False),
+    ))
+
+
+EXPENSE = _expense(id_required=True)
+
+# Templates are expenses without ids: one unit type's list (the app's
+# export) or every type's lists keyed by unit type (its saved settings)
+TEMPLATE_EXPENSE = _expense(id_required=False)
+TEMPLATE = ListOrMap(Arr(TEMPLATE_EXPENSE), MapOf(UNIT_TYPES, Arr(TEMPLATE_EXPENSE)))
+
+REVENUE = Tagged('type', (
+    ('STR', Obj((
+        ('nightlyRate', Num(), True),
+        ('occupancyPercent', Num(), True),
+        ('avgStayLength', Num(), True),
+    ))),
+    ('MTR', Obj((
+        ('rateType', Enum(('daily', 'monthly')), True),
+        ('dailyRate', Num(), False),
+        ('monthlyRate', Num(), False),
+        ('occupancyPercent', Num(), True),
+        ('avgBookingLength', Num(), True),
+    ))),
+    ('LTR', Obj((
+        ('monthlyRent', Num(), True),
+        ('annualVacancyPercent', Num(), True),
+    ))),
+    ('Generic', Obj((
+        ('monthlyRevenue', Num(), True),
+    ))),
+))
+
+UNIT = Obj((
+    ('id', Str(), True),
+    ('label', Str(), True),
+    ('type', Enum(UNIT_TYPES), True),
+    ('revenue', REVENUE, True),
+    ('expenses', Arr(EXPENSE), True),
+    ('seasonality', Obj((
+        ('rateFactors', Arr(Num(), MONTHS), True),
+        ('occupancyPercent', Arr(Num(), MONTHS), True),
+    )), False),
+))
+
+PROPERTY = Obj((
+    ('purchasePrice', Num(), True),
+    ('downPaymentPercent', Num(), True),
+    ('interestRate', Num(), True),
+    ('loanTerm', Num(), True),
+    ('monthlyMortgageOverride', Num(), False),
+    ('propertyAddress', Str(), False),
+    ('mlsNumber', Str(), False),
+    ('referenceUrls', Arr(Obj((('id', Str(), True), ('label', Str(), True), ('url', Str(), True)))), False),
+    ('referenceNotes', Arr(Obj((('id', Str(), True), ('label', Str(), True), ('text', Str(), True)))), False),
+    ('closingCostsPercent', Num(), True),
+    ('renovationBudget', Num(), True),
+    ('furnishingBudget', Num(), True),
+    ('otherUpfrontCosts', Num(), True),
+    ('otherUpfrontCostsLabel', Str(), True),
+    ('propertyTaxRate', Num(), True),
+    ('baseInsurance', Num(), True),
+    ('hoaFees', Num(), True),
+))
+
+PROJECT = Obj((
+    ('id', Str(), True),
+    ('name', Str(), True),
+    ('description', Str(), False),
+    ('property', PROPERTY, True),
+    ('units', Arr(UNIT), True),
+    ('comparison', Obj((
+        ('hysaRate', Num(), True),
+        ('indexFundTotalRate', Num(), True),
+        ('indexDividendRate', Num(), True),
+    )), True),
+    ('createdAt', Str(), True),
+    ('updatedAt', Str(), True),
+    ('isShared', Bool(), False),
+    ('sharedWith', Arr(Str()), False),
+    ('userId', Str(), False),
+    ('schemaVersion', Num(), False),
+))
+
+SCHEMAS = {
+    'project': PROJECT,
+    'unit': UNIT,
+    'expense': EXPENSE,
+    'template': TEMPLATE,
+}
+
+
+# Helpers referenced by generated code
+
+_MISSING = object()
+
+
+def _number(text: str) -> Optional[float]:
+    """Parse a numeric string; integral text without a point or exponent becomes an int."""
+    if not NUMERIC_STRING.fullmatch(text):
+        return None
+    text = text.strip()
+    if text.lstrip('+-').isdigit():
+        return int(text)
+    number = float(text)
+    return number if math.isfinite(number) else None
+
+
+def _kind(value: Any) -> str:
+    if value is None:
+        return 'null'
+    return {dict: 'object', list: 'array', str: 'string', bool: 'boolean'}.get(type(value), 'number' if isinstance(value, (int, float)) else type(value).__name__)
+
+
+def _expected(kind: str, value: Any) -> str:
+    if isinstance(value, str):
+        return f"expected {kind}, got string {value[:40]!r}"
+    return f"expected {kind}, got {_kind(value)}"
+
+
+class _Compiler:
+    """Generates the source of one check function."""
+
+    def __init__(self, coerce: bool):
+        self.coerce = coerce
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name('_c')
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth: int, line: str):
+        self.lines.append('    ' * depth + line)
+
+    def error(self, depth: int, path: str, message: str):
+        """Append (path, message); path is an f-string template, message a Python expression."""
+        self.emit(depth, f"errors.append((f{path!r}, {message}))")
+
+    def node(self, node: Any, value: str, target: str, path: str, depth: int):
+        """Emit checks of `value`; `target` is the assignable expression coerced values go to."""
+        if isinstance(node, Str):
+            self.emit(depth, f"if type({value}) is not str:")
+            self.error(depth + 1, path, f"_expected('string', {value})")
+        elif isinstance(node, Bool):
+            self.emit(depth, f"if type({value}) is not bool:")
+            self.error(depth + 1, path, f"_expected('boolean', {value})")
+        elif isinstance(node, Num):
+            self.emit(depth, f"if type({value}) is int or type({value}) is float:")
+            # Zero for finite numbers, NaN for NaN and infinities
+            self.emit(depth + 1, f"if {value} - {value}:")
+            self.error(depth + 2, path, "'expected a finite number'")
+            if self.coerce:
+                number = self.name('n')
+                self.emit(depth, f"elif type({value}) is str and ({number} := _number({value})) is not None:")
+                self.emit(depth + 1, f"{target} = {number}")
+                self.emit(depth + 1, f"coerced.append(f{path!r})")
+            self.emit(depth, "else:")
+            self.error(depth + 1, path, f"_expected('number', {value})")
+        elif isinstance(node, Enum):
+            values = self.constant(frozenset(node.values))
+            self.emit(depth, f"if type({value}) is not str or {value} not in {values}:")
+            self.error(depth + 1, path, f"_expected({' | '.join(node.values)!r}, {value})")
+        elif isinstance(node, Arr):
+            self.emit(depth, f"if type({value}) is not list:")
+            self.error(depth + 1, path, f"_expected('array', {value})")
+            self.emit(depth, "else:")
+            if node.length is not None:
+                self.emit(depth + 1, f"if len({value}) != {node.length}:")
+                self.error(depth + 2, path, f"f'expected {node.length} entries, got {{len({value})}}'")
+            index, item = self.name('i'), self.name('v')
+            self.emit(depth + 1, f"for {index}, {item} in enumerate({value}):")
+            self.node(node.item, item, f"{value}[{index}]", f"{path}[{{{index}}}]", depth + 2)
+        elif isinstance(node, Obj):
+            self.emit(depth, f"if type({value}) is not dict:")
+            self.error(depth + 1, path, f"_expected('object', {value})")
+            self.emit(depth, "else:")
+            self.fields(node, value, path, depth + 1)
+        elif isinstance(node, MapOf):
+            keys = self.constant(frozenset(node.keys))
+            self.emit(depth, f"if type({value}) is not dict:")
+            self.error(depth + 1, path, f"_expected('object', {value})")
+            self.emit(depth, "else:")
+            key, item = self.name('k'), self.name('v')
+            self.emit(depth + 1, f"for {key}, {item} in {value}.items():")
+            self.emit(depth + 2, f"if {key} not in {keys}:")
+            self.error(depth + 3, f"{path}.{{{key}}}", f"'unknown key, expected one of {', '.join(node.keys)}'")
+            self.emit(depth + 2, "else:")
+            self.node(node.value, item, f"{value}[{key}]", f"{path}.{{{key}}}", depth + 3)
+        elif isinstance(node, ListOrMap):
+            self.emit(depth, f"if type({value}) is list:")
+            self.node(node.list, value, target, path, depth + 1)
+            self.emit(depth, "else:")
+            self.node(node.map, value, target, path, depth + 1)
+        else:
+            raise TypeError(f"Unknown schema node: {node!r}")
+
+    def fields(self, node: Obj, parent: str, path: str, depth: int):
+        for field, child, required in node.fields:
+            value = self.name('x')
+            field_path = f"{path}.{field}"
+            self.emit(depth, f"{value} = {parent}.get({field!r}, _MISSING)")
+            if required:
+                self.emit(depth, f"if {value} is _MISSING:")
+                self.error(depth + 1, field_path, "'required'")
+            else:
+                # Optional fields may also be null
+                self.emit(depth, f"if {value} is _MISSING or {value} is None:")
+                self.emit(depth + 1, "pass")
+            self.emit(depth, "else:")
+            target = f"{parent}[{field!r}]"
+            if isinstance(child, Tagged):
+                tag = self.name('t')
+                self.emit(depth + 1, f"{tag} = {parent}.get({child.tag!r})")
+                for i, (variant, shape) in enumerate(child.variants):
+                    self.emit(depth + 1, f"{'if' if i == 0 else 'elif'} {tag} == {variant!r}:")
+                    self.node(shape, value, target, field_path, depth + 2)
+                # An invalid tag is reported on the tag field itself
+                self.emit(depth + 1, f"elif type({value}) is not dict:")
+                self.error(depth + 2, field_path, f"_expected('object', {value})")
+            else:
+                self.node(child, value, target, field_path, depth + 1)
+
+
+def compile_check(schema: Any, coerce: bool = True, name: str = 'check') -> Check:
+    """
+    Compile a schema into a check function.
+
+    Args:
+        schema: Schema node (e.g. PROJECT)
+        coerce: Replace numeric strings with numbers in place
+        name: Function name in tracebacks
+
+    Returns:
+        check(value, errors, coerced): appends (path, message) to errors and
+        the paths of coerced values to coerced
+    """
+    compiler = _Compiler(coerce)
+    compiler.emit(0, f"def {name}(value, errors, coerced):")
+    # Templates are checked as a whole; every other shape must be an object
+    compiler.node(schema, 'value', 'value', '$', 1)
+    source = '\n'.join(compiler.lines)
+    namespace: Dict[str, Any] = {'_MISSING': _MISSING, '_number': _number, '_expected': _expected}
+    namespace.update(compiler.constants)
+    exec(compile(source, f"<schema {name}>", 'exec'), namespace)
+    check = namespace[name]
+    check.source = source
+    return check
+
+
+@lru_cache(maxsize=None)
+def compiled(kind: str, coerce: bool = True) -> Check:
+    """The check for a SCHEMAS kind, compiled on first use."""
+    if kind not in SCHEMAS:
+        raise ValueError(f"Unknown kind: {kind} (expected one of {', '.join(SCHEMAS)})")
+    return compile_check(SCHEMAS[kind], coerce, f"check_{kind}")
+
+
+def validate(record: Any, kind: str = 'project', coerce: bool = True) -> Tuple[List[ValidationError], List[str]]:
+    """
+    Validate one record, coercing numeric strings in place.
+
+    Returns:
+        (errors as (path, message), paths of coerced values)
+    """
+    errors: List[ValidationError] = []
+    coerced: List[str] = []
+    compiled(kind, coerce)(record, errors, coerced)
+    return errors, coerced
+
+
+def iter_valid(
+    records: Iterable[Any],
+    kind: str = 'project',
+    coerce: bool = True,
+    on_invalid: Optional[Callable[[int, Any, List[ValidationError]], None]] = None
+) -> Iterator[Any]:
+    """
+    Pass through valid records (coerced in place) and drop the rest.
+
+    Args:
+        records: Records to check
+        kind: SCHEMAS kind
+        coerce: Replace numeric strings with numbers
+        on_invalid: Called with (record number from 1, record, errors) for each dropped record
+    """
+    check = compiled(kind, coerce)
+    errors: List[ValidationError] = []
+    coerced: List[str] = []
+    for number, record in enumerate(records, 1):
+        check(record, errors, coerced)
+        if errors:
+            if on_invalid is not None:
+                on_invalid(number, record, errors)
+            errors = []
+        else:
+            yield record
+        coerced.clear()
+
+
+def _iter_templates(paths: Iterable[str]) -> Iterator[Any]:
+    """Templates are whole files (a list is one template, not many records)."""
+    for path in expand_paths(paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield json.load(f)
+
+
+def _label(number: int, record: Any) -> str:
+    record_id = record.get('id') if isinstance(record, dict) else None
+    return f"#{number}" + (f" ({record_id})" if isinstance(record_id, str) else '')
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Validate Project, Unit, Expense or template JSON')
+    parser.add_argument('paths', nargs='+', help="JSON/JSONL files or folders, or '-' for JSONL on stdin")
+    parser.add_argument('--kind', choices=list(SCHEMAS), default='project', help='Shape to check (default: project)')
+    parser.add_argument('--no-coerce', action='store_true', help='Report numeric strings instead of converting them')
+    parser.add_argument('-o', '--output', help='Write valid records (coerced) to this JSONL file')
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help='Error output format')
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=DEFAULT_MAX_ERRORS,
+        help=f'Errors printed per record in text output (default: {DEFAULT_MAX_ERRORS})'
+    )
+    args = parser.parse_args()
+
+    if args.kind == 'template' and '-' in args.paths:
+        print_error("Templates are read from files, not stdin")
+        sys.exit(1)
+
+    invalid = 0
+
+    def report(number: int, record: Any, errors: List[ValidationError]):
+        nonlocal invalid
+        invalid += 1
+        if args.format == 'json':
+            entry = {'record': number, 'id': record.get('id') if isinstance(record, dict) else None}
+            entry['errors'] = [{'path': path, 'message': message} for path, message in errors]
+            sys.stdout.write(json.dumps(entry) + '\n')
+            return
+        print_warning(f"Record {_label(number, record)}: {len(errors)} error(s)")
+        for path, message in errors[:args.max_errors]:
+            print(f"    {path}: {message}", file=sys.stderr)
+        if len(errors) > args.max_errors:
+            print(f"    ... {len(errors) - args.max_errors} more", file=sys.stderr)
+
+    records = _iter_templates(args.paths) if args.kind == 'template' else iter_projects(args.paths)
+    started = time.perf_counter()
+    valid = 0
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for record in iter_valid(records, args.kind, not args.no_coerce, report):
+            valid += 1
+            if output is not None:
+                output.write(json.dumps(record, separators=(',', ':')) + '\n')
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+    finally:
+        if output is not None:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    total = valid + invalid
+    print_info(f"Checked {total:,} record(s) in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
+    if output is not None:
+        print_info(f"Wrote {valid:,} valid record(s) to {Path(args.output)}")
+    if invalid:
+        print_error(f"{invalid:,} invalid record(s)")
+        sys.exit(1)
+    print_success(f"All {valid:,} record(s) valid")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
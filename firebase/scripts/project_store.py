@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Project Store
+Local columnar copy of projects for analytics: one row per project with its
+Property inputs and PropertySummary metrics as numpy columns, kept up to
+date by upserts and deletes instead of re-exporting everything.
+
+The store is a single .npz file written atomically; it also carries the
+`updatedAt` watermark of the newest change applied, so a tailer that
+restarts from it only has to process the gap.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from vector_calculations import PROPERTY_FIELDS, summarize_valid
+
+STORE_VERSION = 1
+
+# summary_metrics keys stored per project
+METRIC_COLUMNS = (
+    'totalMonthlyRevenue',
+    'totalUnitExpenses',
+    'propertyExpenses',
+    'totalMonthlyExpenses',
+    'monthlyMortgagePayment',
+    'monthlyCashFlow',
+    'annualCashFlow',
+    'totalInvestment',
+    'cashOnCashReturn',
+    'firstYearPrincipal',
+    'totalReturn',
+    'breakEvenOccupancy',
+)
+NUMERIC_COLUMNS = PROPERTY_FIELDS + ('unitCount',) + METRIC_COLUMNS
+TEXT_COLUMNS = ('id', 'userId', 'name', 'updatedAt')
+
+
+def timestamp_text(value: Any) -> Optional[str]:
+    """
+    Normalize an updatedAt value to comparable ISO text.
+
+    Firestore timestamps become UTC ISO strings with microseconds; strings
+    (exported projects) are kept as they are.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+    return str(value)
+
+
+class ProjectStore:
+    """Columnar project rows with upsert/delete and an atomic .npz file."""
+
+    def __init__(self, path: Path):
+        """
+        Open a store, loading it if the file exists.
+
+        Raises:
+            ValueError: If the file is from another store version
+        """
+        self.path = Path(path)
+        self.watermark: Optional[str] = None
+        self._text: Dict[str, List[str]] = {name: [] for name in TEXT_COLUMNS}
+        self._numeric = np.zeros((0, len(NUMERIC_COLUMNS)))
+        self._rows: Dict[str, int] = {}
+        if self.path.exists():
+            self._load()
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != STORE_VERSION:
+                raise ValueError(f"Project store {self.path} has version {meta.get('version')}, expected {STORE_VERSION}")
+            self.watermark = meta.get('watermark')
+            self._text = {name: data[name].tolist() for name in TEXT_COLUMNS}
+            self._numeric = np.stack([data[name] for name in NUMERIC_COLUMNS], axis=1) \
+                if len(self._text['id']) else np.zeros((0, len(NUMERIC_COLUMNS)))
+        self._rows = {project_id: row for row, project_id in enumerate(self._text['id'])}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, project_id: str) -> bool:
+        return project_id in self._rows
+
+    def updated_at(self, project_id: str) -> Optional[str]:
+        """Stored updatedAt of a project, or None if it is not in the store."""
+        row = self._rows.get(project_id)
+        return None if row is None else self._text['updatedAt'][row] or None
+
+    def ids(self) -> List[str]:
+        """Project ids in row order."""
+        return list(self._text['id'])
+
+    def upsert(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+        """
+        Insert or replace projects, computing their metrics in one batch.
+
+        Malformed projects are removed from the store (their old row would
+        be stale) and reported.
+
+        Args:
+            items: (project id, Project dict) pairs
+
+        Returns:
+            ({project id: metric values} for stored projects, ids of malformed projects)
+        """
+        if not items:
+            return {}, []
+        # The last change to a project in a batch wins
+        latest = list(dict(items).items())
+        valid, metrics, _ = summarize_valid([project for _, project in latest])
+        position = {id(project): i for i, project in enumerate(valid)}
+
+        stored: Dict[str, Dict[str, float]] = {}
+        invalid: List[str] = []
+        new_rows: List[List[float]] = []
+        for project_id, project in latest:
+            i = position.get(id(project))
+            if i is None:
+                invalid.append(project_id)
+                continue
+            property = project['property']
+            values = [float(property[field]) for field in PROPERTY_FIELDS] + [float(len(project['units']))]
+            values += [float(metrics[name][i]) for name in METRIC_COLUMNS]
+            text = {
+                'id': project_id,
+                'userId': project.get('userId') or '',
+                'name': project.get('name') or '',
+                'updatedAt': timestamp_text(project.get('updatedAt')) or '',
+            }
+
+            row = self._rows.get(project_id)
+            if row is None:
+                self._rows[project_id] = len(self._text['id'])
+                for name in TEXT_COLUMNS:
+                    self._text[name].append(text[name])
+                new_rows.append(values)
+            else:
+                self._numeric[row] = values
+                for name in TEXT_COLUMNS:
+                    self._text[name][row] = text[name]
+            stored[project_id] = dict(zip(METRIC_COLUMNS, values[-len(METRIC_COLUMNS):]))
+
+        if new_rows:
+            self._numeric = np.concatenate([self._numeric, np.array(new_rows)])
+        self.delete(invalid)
+        return stored, invalid
+
+    def delete(self, project_ids: Iterable[str]) -> int:
+        """Remove projects; returns how many were present."""
+        doomed = sorted((self._rows[project_id] for project_id in set(project_ids) if project_id in self._rows))
+        if not doomed:
+            return 0
+        keep = np.ones(len(self._text['id']), dtype=bool)
+        keep[doomed] = False
+        self._numeric = self._numeric[keep]
+        self._text = {name: [value for value, kept in zip(values, keep) if kept] for name, values in self._text.items()}
+        self._rows = {project_id: row for row, project_id in enumerate(self._text['id'])}
+        return len(doomed)
+
+    def advance_watermark(self, value: Optional[str]):
+        """Move the watermark forward (never back) to an applied updatedAt."""
+        if value and (self.watermark is None or value > self.watermark):
+            self.watermark = value
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Every column as an array, one entry per project."""
+        columns: Dict[str, np.ndarray] = {name: np.array(values, dtype=str) for name, values in self._text.items()}
+        columns.update({name: self._numeric[:, i].copy() for i, name in enumerate(NUMERIC_COLUMNS)})
+        return columns
+
+    def save(self):
+        """Write the store and its watermark atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({
+            'version': STORE_VERSION,
+            'watermark': self.watermark,
+            'savedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        })
+        arrays = {name: np.array(values, dtype=str) for name, values in self._text.items()}
+        arrays.update({name: self._numeric[:, i] for i, name in enumerate(NUMERIC_COLUMNS)})
+        temporary = self.path.with_name(f".{self.path.name}.tmp")
+        with open(temporary, 'wb') as f:
+            np.savez(f, meta=np.array(meta), **arrays)
+        os.replace(temporary, self.path)
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publish Shared Project Snapshots
+Renders every publicly shared project (isShared == true) into a static,
+precomputed JSON and/or HTML snapshot holding the summary, sensitivity and
+appreciation outputs, so shared links can be served without a Firestore
+read or a client-side recompute.
+
+Only projects whose updatedAt changed since the last run are re-rendered;
+snapshots of projects that are no longer shared are removed.
+
+Usage:
+    python publish_snapshots.py --env production --out ../../public/snapshots
+    python publish_snapshots.py --from exports/ --out snapshots --format json --format html
+    python publish_snapshots.py --emulator --out snapshots --force
+"""
+
+import argparse
+import html
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from calculations import (
+    APPRECIATION_YEARS,
+    calculate_appreciation_scenarios,
+    calculate_property_summary,
+    calculate_sensitivity_analysis,
+    calculate_unit_monthly_expenses,
+    calculate_unit_monthly_revenue,
+)
+from firestore_client import add_connection_arguments, connect_from_args
+from project_files import iter_projects
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+PROPERTIES_COLLECTION = 'properties'
+
+# Bump when the snapshot layout changes so every snapshot is re-rendered
+SNAPSHOT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+SNAPSHOT_FORMATS = ('json', 'html')
+
+# Projects rendered per worker task
+BATCH_SIZE = 100
+
+# Property inputs copied into snapshots; owner/collaborator fields never are
+PUBLIC_PROPERTY_FIELDS = (
+    'propertyAddress',
+    'purchasePrice',
+    'downPaymentPercent',
+    'interestRate',
+    'loanTerm',
+    'monthlyMortgageOverride',
+    'closingCostsPercent',
+    'renovationBudget',
+    'furnishingBudget',
+    'otherUpfrontCosts',
+    'otherUpfrontCostsLabel',
+    'propertyTaxRate',
+    'baseInsurance',
+    'hoaFees',
+)
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def _rounded(value: Any) -> Any:
+    """Round every float in a nested structure to cents to keep snapshots small."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rounded(item) for item in value]
+    return value
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    """ISO string for a Firestore timestamp or an already-serialized date."""
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def build_snapshot(project: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Precompute everything the shared project page shows.
+
+    Args:
+        project: Project dict with createdAt/updatedAt already serialized
+
+    Returns:
+        Snapshot dict (public fields only)
+    """
+    property = project['property']
+    units = []
+    for unit in project['units']:
+        revenue = calculate_unit_monthly_revenue(unit)
+        expenses = calculate_unit_monthly_expenses(unit, property['purchasePrice'])
+        units.append({
+            'label': unit.get('label', ''),
+            'type': unit['type'],
+            'monthlyRevenue': revenue,
+            'monthlyExpenses': expenses,
+            'monthlyNoi': revenue - expenses,
+        })
+
+    return _rounded({
+        'snapshotVersion': SNAPSHOT_VERSION,
+        'id': project['id'],
+        'name': project.get('name', ''),
+        'description': project.get('description') or '',
+        'updatedAt': project.get('updatedAt'),
+        'property': {field: property[field] for field in PUBLIC_PROPERTY_FIELDS if field in property},
+        'units': units,
+        'summary': calculate_property_summary(project),
+        'sensitivity': calculate_sensitivity_analysis(project),
+        'appreciation': calculate_appreciation_scenarios(project),
+    })
+
+
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$title</title>
+<style>
+body { font-family: system-ui, sans-serif; max-width: 960px; margin: 2rem auto; padding: 0 1rem; color: #111827; }
+h1 { margin-bottom: 0.25rem; }
+h2 { margin-top: 2rem; font-size: 1.1rem; }
+.muted { color: #6b7280; }
+table { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+th, td { padding: 0.4rem 0.5rem; border-bottom: 1px solid #e5e7eb; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.pos { color: #16a34a; } .neg { color: #dc2626; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p class="muted">$subtitle</p>
+$body
+<p class="muted">Snapshot of $updated_at. Figures are estimates, not financial advice.</p>
+</body>
+</html>
+""")
+
+
+def _money(value: float) -> str:
+    sign = '-' if value < 0 else ''
+    return f"{sign}${abs(value):,.0f}"
+
+
+def _signed_class(value: float) -> str:
+    return 'pos' if value > 0 else 'neg' if value < 0 else ''
+
+
+def _table(headers: Sequence[str], rows: Iterable[Sequence[str]]) -> str:
+    head = ''.join(f"<th>{html.escape(header)}</th>" for header in headers)
+    body = ''.join('<tr>' + ''.join(rows_cells) + '</tr>' for rows_cells in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def _cell(text: str, css: str = '') -> str:
+    return f'<td class="{css}">{html.escape(text)}</td>' if css else f"<td>{html.escape(text)}</td>"
+
+
+def render_html(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot as a self-contained HTML page."""
+    summary = snapshot['summary']
+    parts = []
+
+    parts.append('<h2>Summary</h2>' + _table(['Metric', 'Value'], [
+        [_cell('Monthly revenue'), _cell(_money(summary['totalMonthlyRevenue']))],
+        [_cell('Monthly expenses'), _cell(_money(summary['totalMonthlyExpenses']))],
+        [_cell('Mortgage payment'), _cell(_money(summary['monthlyMortgagePayment']))],
+        [_cell('Monthly cash flow'), _cell(_money(summary['monthlyCashFlow']), _signed_class(summary['monthlyCashFlow']))],
+        [_cell('Annual cash flow'), _cell(_money(summary['annualCashFlow']), _signed_class(summary['annualCashFlow']))],
+        [_cell('Total investment'), _cell(_money(summary['totalInvestment']))],
+        [_cell('Cash-on-cash return'), _cell(f"{summary['cashOnCashReturn']:.2f}%")],
+        [_cell('Total return (incl. principal)'), _cell(f"{summary['totalReturn']:.2f}%")],
+    ]))
+
+    parts.append('<h2>Units</h2>' + _table(['Unit', 'Type', 'Revenue', 'Expenses', 'NOI'], [
+        [
+            _cell(unit['label'] or '-'),
+            _cell(unit['type']),
+            _cell(_money(unit['monthlyRevenue'])),
+            _cell(_money(unit['monthlyExpenses'])),
+            _cell(_money(unit['monthlyNoi']), _signed_class(unit['monthlyNoi'])),
+        ]
+        for unit in snapshot['units']
+    ]))
+
+    sensitivity = snapshot['sensitivity']
+    for key, title, label in (
+        ('occupancy', 'Occupancy Rate Impact', lambda d: f"{d:+d}%"),
+        ('nightlyRate', 'Nightly Rate Impact (STR)', lambda d: f"{'-' if d < 0 else '+'}${abs(d)}"),
+    ):
+        if not sensitivity[key]:
+            continue
+        parts.append(f'<h2>{title}</h2>' + _table(['Scenario', 'Monthly Cash Flow', 'Change'], [
+            [
+                _cell('Base' if row['delta'] == 0 else label(row['delta'])),
+                _cell(_money(row['monthlyCashFlow']), _signed_class(row['monthlyCashFlow'])),
+                _cell(_money(row['change']), _signed_class(row['change'])),
+            ]
+            for row in sensitivity[key]
+        ]))
+
+    for years in APPRECIATION_YEARS:
+        scenarios = snapshot['appreciation'][str(years)]
+        headers = ['Metric'] + [f"{scenario['rate']}% Annual" for scenario in scenarios]
+        rows = [
+            ('Future value', 'futureValue'),
+            ('Appreciation gain', 'appreciation'),
+            (f'Total cash flow ({years} yrs)', 'totalCashFlow'),
+            ('Total return', 'totalReturn'),
+        ]
+        body = [[_cell(label)] + [_cell(_money(scenario[key])) for scenario in scenarios] for label, key in rows]
+        body.append([_cell('ROI')] + [_cell(f"{scenario['roi']:.1f}%") for scenario in scenarios])
+        parts.append(f'<h2>Appreciation over {years} years</h2>' + _table(headers, body))
+
+    address = snapshot['property'].get('propertyAddress') or ''
+    return HTML_TEMPLATE.substitute(
+        title=html.escape(snapshot['name'] or 'Shared property'),
+        subtitle=html.escape(' · '.join(filter(None, [address, snapshot['description']]))),
+        body='\n'.join(parts),
+        updated_at=html.escape(snapshot['updatedAt'] or 'unknown date'),
+    )
+
+
+def _write_atomic(path: Path, content: str):
+    """Write a file so readers never see a partial snapshot."""
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(content, encoding='utf-8')
+    os.replace(temporary, path)
+
+
+def snapshot_paths(out_dir: Path, project_id: str, formats: Sequence[str]) -> List[Path]:
+    """Files written for a project, one per format."""
+    return [out_dir / f"{project_id}.{extension}" for extension in formats]
+
+
+def render_batch(
+    projects: List[Dict[str, Any]],
+    out_dir: str,
+    formats: Sequence[str]
+) -> Tuple[List[Tuple[str, Optional[str]]], List[Tuple[str, str]]]:
+    """
+    Render and write the snapshots for one batch (runs in a worker process).
+
+    Returns:
+        ([(project id, updatedAt) written], [(project id, error) failed])
+    """
+    written, failed = [], []
+    for project in projects:
+        try:
+            snapshot = build_snapshot(project)
+            for path in snapshot_paths(Path(out_dir), project['id'], formats):
+                content = render_html(snapshot) if path.suffix == '.html' else json.dumps(snapshot, separators=(',', ':'))
+                _write_atomic(path, content)
+            # Drop formats that are no longer published
+            for path in snapshot_paths(Path(out_dir), project['id'], SNAPSHOT_FORMATS):
+                if path.suffix[1:] not in formats and path.exists():
+                    path.unlink()
+            written.append((project['id'], project.get('updatedAt')))
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            failed.append((project.get('id', '?'), f"{type(e).__name__}: {e}"))
+    return written, failed
+
+
+def load_manifest(out_dir: Path, formats: Sequence[str]) -> Tuple[Dict[str, Optional[str]], bool]:
+    """
+    Previously published {project id: updatedAt}.
+
+    Returns:
+        (published projects, whether they were rendered with the current
+        SNAPSHOT_VERSION and formats and can be reused)
+    """
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}, False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}, False
+    reusable = manifest.get('snapshotVersion') == SNAPSHOT_VERSION and manifest.get('formats') == list(formats)
+    return manifest.get('projects', {}), reusable
+
+
+def save_manifest(out_dir: Path, formats: Sequence[str], published: Dict[str, Optional[str]]):
+    """Record what has been published."""
+    _write_atomic(out_dir / MANIFEST_NAME, json.dumps({
+        'snapshotVersion': SNAPSHOT_VERSION,
+        'formats': list(formats),
+        'projects': dict(sorted(published.items())),
+    }, indent=2))
+
+
+def _is_safe_id(project_id: Any) -> bool:
+    return isinstance(project_id, str) and bool(project_id) and not any(c in project_id for c in '/\\') \
+        and not project_id.startswith('.')
+
+
+def _serialize(project_id: str, project: Dict[str, Any]) -> Dict[str, Any]:
+    """Project dict with a string id and ISO timestamps, ready to pickle."""
+    return {
+        **project,
+        'id': project_id,
+        'createdAt': _timestamp(project.get('createdAt')),
+        'updatedAt': _timestamp(project.get('updatedAt')),
+    }
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def shared_projects_from_files(paths: Sequence[str]) -> Tuple[Dict[str, Optional[str]], Any]:
+    """
+    Shared projects from exported files.
+
+    Returns:
+        ({project id: updatedAt} for every shared project, fetch(ids) -> iterator of projects)
+    """
+    shared = {}
+    for project in iter_projects(paths):
+        if project.get('isShared') is True and project.get('id'):
+            shared[project['id']] = _serialize(project['id'], project)
+
+    def fetch(ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        return (shared[project_id] for project_id in ids)
+
+    return {project_id: project['updatedAt'] for project_id, project in shared.items()}, fetch
+
+
+def shared_projects_from_firestore(client: Any) -> Tuple[Dict[str, Optional[str]], Any]:
+    """
+    Shared projects from Firestore.
+
+    Lists ids and updatedAt only; full documents are fetched just for the
+    projects that need rendering.
+
+    Returns:
+        ({project id: updatedAt} for every shared project, fetch(ids) -> iterator of projects)
+    """
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    collection = client.collection(PROPERTIES_COLLECTION)
+    query = collection.where(filter=FieldFilter('isShared', '==', True)).select(['updatedAt'])
+    shared = {snapshot.id: _timestamp(snapshot.get('updatedAt')) for snapshot in query.stream()}
+
+    def fetch(ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for chunk in _chunks(ids, BATCH_SIZE):
+            for snapshot in client.get_all([collection.document(project_id) for project_id in chunk]):
+                data = snapshot.to_dict() if snapshot.exists else None
+                # Unshared between the listing and the fetch
+                if data and data.get('isShared') is True:
+                    yield _serialize(snapshot.id, data)
+
+    return shared, fetch
+
+
+def publish(
+    shared: Dict[str, Optional[str]],
+    fetch: Any,
+    out_dir: Path,
+    formats: Sequence[str] = ('json',),
+    force: bool = False,
+    workers: Optional[int] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Bring the snapshot directory in line with the currently shared projects.
+
+    Args:
+        shared: {project id: updatedAt} for every shared project
+        fetch: Callable returning full projects for a list of ids
+        out_dir: Snapshot directory (holds the manifest)
+        formats: SNAPSHOT_FORMATS to write
+        force: Re-render every snapshot
+        workers: Worker processes (default: CPU count)
+        dry_run: Report what would change without writing
+
+    Returns:
+        {'rendered': n, 'unchanged': n, 'removed': n, 'failed': [(id, error)]}
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    published, reusable = load_manifest(out_dir, formats)
+    if force or not reusable:
+        published = {project_id: None for project_id in published}
+
+    unsafe = [project_id for project_id in shared if not _is_safe_id(project_id)]
+    changed = [
+        project_id for project_id, updated_at in shared.items()
+        if _is_safe_id(project_id) and (published.get(project_id) is None or published[project_id] != updated_at)
+    ]
+    removed = [project_id for project_id in published if project_id not in shared]
+    report = {
+        'rendered': 0,
+        'unchanged': len(shared) - len(changed) - len(unsafe),
+        'removed': len(removed),
+        'failed': [(project_id, 'unsafe document id') for project_id in unsafe],
+    }
+
+    if dry_run:
+        report['rendered'] = len(changed)
+        return report
+
+    # Unshared projects lose their public snapshot first
+    for project_id in removed:
+        for path in snapshot_paths(out_dir, project_id, SNAPSHOT_FORMATS):
+            if path.exists():
+                path.unlink()
+        del published[project_id]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            futures = [
+                executor.submit(render_batch, batch, str(out_dir), tuple(formats))
+                for batch in _chunks(fetch(changed), BATCH_SIZE)
+            ]
+            for future in futures:
+                written, failed = future.result()
+                published.update(written)
+                report['rendered'] += len(written)
+                report['failed'].extend(failed)
+    finally:
+        save_manifest(out_dir, formats, published)
+
+    return report
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Publish static snapshots of publicly shared projects')
+    add_connection_arguments(parser)
+    parser.add_argument(
+        '--from',
+        dest='paths',
+        nargs='+',
+        help='Read projects from exported JSON/JSONL files or folders instead of Firestore'
+    )
+    parser.add_argument('--out', default='snapshots', help='Snapshot directory (default: ./snapshots)')
+    parser.add_argument(
+        '--format',
+        action='append',
+        choices=SNAPSHOT_FORMATS,
+        help='Snapshot format to write (repeatable; default: json)'
+    )
+    parser.add_argument('--force', action='store_true', help='Re-render every snapshot')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    formats = [fmt for fmt in SNAPSHOT_FORMATS if fmt in (args.format or ['json'])]
+    started = time.perf_counter()
+
+    try:
+        if args.paths:
+            shared, fetch = shared_projects_from_files(args.paths)
+        else:
+            client = connect_from_args(args)
+            print_info(f"Project: {client.project}")
+            shared, fetch = shared_projects_from_firestore(client)
+    except (ImportError, ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"{len(shared):,} shared project(s)")
+
+    report = publish(
+        shared,
+        fetch,
+        Path(args.out),
+        formats=formats,
+        force=args.force,
+        workers=args.workers,
+        dry_run=args.dry_run
+    )
+
+    for project_id, error in report['failed']:
+        print_warning(f"Skipped {project_id}: {error}")
+
+    verb = 'Would render' if args.dry_run else 'Rendered'
+    print_info(f"{report['unchanged']:,} snapshot(s) unchanged, {report['removed']:,} removed")
+    print_success(f"{verb} {report['rendered']:,} snapshot(s) in {time.perf_counter() - started:.1f}s")
+
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Result Cache
+Disk-backed cache for expensive analyses (what-if grids, long alternative
+projections), so opening the same deal again returns stored results
+instead of recomputing them.
+
+Entries are content-addressed: the key hashes the analysis name, the
+project's model inputs, the analysis parameters and the engine version (a
+hash of the calculation modules' source), so editing a deal's name or
+address keeps its entries while changing an input, a parameter or the
+calculation code misses. Nothing is ever invalidated by hand.
+
+Storage is one SQLite database in WAL mode: any number of processes can
+read while one writes, and writes from several processes are serialized by
+SQLite's own locking. The total size is bounded; least recently used
+entries are evicted first.
+
+Usage:
+    python result_cache.py stats
+    python result_cache.py prune --max-mb 100
+    python result_cache.py clear
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+DEFAULT_CACHE = Path(__file__).parent.parent / "config" / ".analysis_cache.sqlite"
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Eviction frees space down to this fraction of the limit, so it does not
+# run again on the very next write
+EVICT_TO = 0.9
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# A hit refreshes an entry's last-used time at most this often (seconds),
+# so reads rarely need the write lock
+TOUCH_INTERVAL = 60.0
+
+# Milliseconds a hit waits for the write lock to refresh that time; the
+# refresh is skipped rather than stall a read behind a long write
+TOUCH_TIMEOUT_MS = 50
+
+# Modules whose source defines the results of every analysis
+ENGINE_MODULES = ('calculations', 'vector_calculations', 'expense_compiler', 'annuity_table', 'loan_engine')
+
+# Project fields that do not change any number an analysis computes
+DISPLAY_FIELDS = frozenset({
+    'id', 'name', 'description', 'createdAt', 'updatedAt', 'isShared', 'sharedWith', 'userId', 'schemaVersion',
+    'label', 'notes', 'propertyAddress', 'mlsNumber', 'referenceUrls', 'referenceNotes', 'otherUpfrontCostsLabel',
+})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    analysis TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('bytes', 0);
+"""
+
+# Value encodings, stored as the first byte of a value
+_JSON = b'J'
+_ARRAYS = b'A'
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def engine_version(*modules: str) -> str:
+    """
+    Hash of the source of ENGINE_MODULES plus `modules`.
+
+    Any edit to the calculation code changes it, so entries computed by an
+    older engine are simply never hit again (and age out).
+    """
+    digest = hashlib.sha256()
+    for module in sorted(set(ENGINE_MODULES) | set(modules)):
+        digest.update(module.encode('utf-8') + b'\0')
+        digest.update((Path(__file__).parent / f"{module}.py").read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _canonical(value: Any, strip_display: bool) -> Any:
+    """JSON-ready value with numpy types unwrapped and integral floats as ints."""
+    if isinstance(value, dict):
+        return {
+            str(key): _canonical(item, strip_display)
+            for key, item in value.items()
+            if not (strip_display and key in DISPLAY_FIELDS)
+        }
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, strip_display) for item in value]
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist(), strip_display)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def project_inputs(project: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a project that analyses depend on (display fields removed)."""
+    return _canonical(project, strip_display=True)
+
+
+def cache_key(analysis: str, project: Optional[Dict[str, Any]], params: Any, engine: str) -> str:
+    """
+    Content hash identifying one analysis result.
+
+    Args:
+        analysis: Analysis name, e.g. 'what_if'
+        project: Project the analysis ran on (None for project-independent results)
+        params: JSON-like analysis parameters (numpy arrays allowed)
+        engine: engine_version(...) of the code computing the result
+    """
+    document = {
+        'analysis': analysis,
+        'engine': engine,
+        'inputs': project_inputs(project) if project is not None else None,
+        'params': _canonical(params, strip_display=False),
+    }
+    text = json.dumps(document, sort_keys=True, separators=(',', ':'), allow_nan=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Values
+# ---------------------------------------------------------------------------
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a dict of numpy arrays (as .npz) or a JSON value; never pickles."""
+    if isinstance(value, dict) and value and all(isinstance(item, np.ndarray) for item in value.values()):
+        buffer = io.BytesIO()
+        np.savez(buffer, **value)
+        return _ARRAYS + buffer.getvalue()
+    return _JSON + json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def decode_value(blob: bytes) -> Any:
+    """Inverse of encode_value."""
+    kind, body = blob[:1], blob[1:]
+    if kind == _ARRAYS:
+        with np.load(io.BytesIO(body), allow_pickle=False) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+    if kind == _JSON:
+        return json.loads(body)
+    raise ValueError(f"Unknown cache value encoding {kind!r}")
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class ResultCache:
+    """Size-bounded LRU cache in a SQLite file, shared by threads and processes."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not cross a fork
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                str(self.path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(f"BEGIN IMMEDIATE; {SCHEMA} COMMIT;")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """The stored value for key, or None."""
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute('SELECT value, accessed FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] >= TOUCH_INTERVAL:
+                self._touch(connection, key, now)
+        try:
+            value = decode_value(row[0])
+        except (ValueError, EOFError, zipfile.BadZipFile):
+            # A corrupt entry is a miss; the next put replaces it
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _touch(self, connection: sqlite3.Connection, key: str, now: float):
+        """Best-effort refresh of an entry's last-used time."""
+        connection.execute(f'PRAGMA busy_timeout = {TOUCH_TIMEOUT_MS}')
+        try:
+            connection.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            # Another process holds the write lock; a later hit refreshes it
+        finally:
+            connection.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT_SECONDS * 1000)}')
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values for the keys that are stored."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, key: str, analysis: str, value: Any):
+        """Store a value, evicting least recently used entries past max_bytes."""
+        self.put_many([(key, analysis, value)])
+
+    def put_many(self, items: Iterable[Any]):
+        """Store (key, analysis, value) items in one transaction."""
+        encoded = [(key, analysis, encode_value(value)) for key, analysis, value in items]
+        if not encoded:
+            return
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                for key, analysis, blob in encoded:
+                    previous = connection.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                    connection.execute(
+                        'INSERT OR REPLACE INTO entries (key, analysis, value, size, created, accessed) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, analysis, blob, len(blob), now, now)
+                    )
+                    delta = len(blob) - (previous[0] if previous else 0)
+                    connection.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (delta,))
+                self._evict(connection, self.max_bytes)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def _evict(self, connection: sqlite3.Connection, max_bytes: int) -> int:
+        """Delete least recently used entries until the total is under the limit (inside a transaction)."""
+        total = connection.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        target = int(max_bytes * EVICT_TO)
+        evicted = 0
+        freed = 0
+        while total - freed > target:
+            oldest = connection.execute('SELECT key, size FROM entries ORDER BY accessed LIMIT 256').fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                if total - freed <= target:
+                    break
+                connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                freed += size
+                evicted += 1
+        connection.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (freed,))
+        return evicted
+
+    def get_or_compute(self, key: str, analysis: str, compute: Callable[[], Any]) -> Any:
+        """Stored value for key, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, analysis, value)
+        return value
+
+    def prune(self, max_bytes: int) -> int:
+        """Evict down to max_bytes now; returns the number of entries removed."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                evicted = self._evict(connection, max_bytes)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return evicted
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM entries')
+            connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+            connection.execute('COMMIT')
+            connection.execute('VACUUM')
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and sizes, per analysis."""
+        with self._lock:
+            connection = self._connect()
+            rows = connection.execute(
+                'SELECT analysis, COUNT(*), SUM(size), MIN(accessed) FROM entries GROUP BY analysis'
+            ).fetchall()
+        analyses = {
+            analysis: {'entries': count, 'bytes': size, 'oldestAccess': oldest}
+            for analysis, count, size, oldest in rows
+        }
+        return {
+            'path': str(self.path),
+            'entries': sum(item['entries'] for item in analyses.values()),
+            'bytes': sum(item['bytes'] for item in analyses.values()),
+            'maxBytes': self.max_bytes,
+            'analyses': analyses,
+        }
+
+
+def cached_per_project(
+    cache: Optional[ResultCache],
+    analysis: str,
+    projects: List[Dict[str, Any]],
+    params: Any,
+    engine: str,
+    compute: Callable[[List[int]], List[Any]]
+) -> List[Any]:
+    """
+    One result per project, computing only the projects not in the cache.
+
+    Args:
+        cache: Cache to use (None computes everything)
+        analysis: Analysis name for keys and stats
+        projects: Projects to analyse
+        params: Parameters shared by every project
+        engine: engine_version(...) of the analysis
+        compute: Called once with the indices of the missing projects;
+                 returns their results in the same order
+
+    Returns:
+        Results in project order
+    """
+    if cache is None:
+        return compute(list(range(len(projects))))
+
+    keys = [cache_key(analysis, project, params, engine) for project in projects]
+    results: List[Any] = [cache.get(key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        computed = compute(missing)
+        for index, result in zip(missing, computed):
+            results[index] = result
+        cache.put_many((keys[index], analysis, results[index]) for index in missing)
+    return results
+
+
+def add_cache_argument(parser: argparse.ArgumentParser):
+    """Add the --cache [PATH] option shared by cached analyses."""
+    parser.add_argument(
+        '--cache',
+        nargs='?',
+        const=str(DEFAULT_CACHE),
+        default=None,
+        metavar='PATH',
+        help='Reuse results of earlier runs with the same inputs (see result_cache.py)'
+    )
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Inspect or trim the analysis result cache')
+    parser.add_argument('command', choices=('stats', 'prune', 'clear'), help='What to do')
+    parser.add_argument('--path', default=str(DEFAULT_CACHE), help='Cache database')
+    parser.add_argument('--max-mb', type=float, help='Size to prune to (prune)')
+    args = parser.parse_args()
+
+    if not Path(args.path).exists():
+        print_info(f"No cache at {args.path}")
+        return
+
+    with ResultCache(Path(args.path)) as cache:
+        if args.command == 'stats':
+            stats = cache.stats()
+            print_info(f"{stats['path']}: {stats['entries']:,} entries, {stats['bytes'] / 1e6:,.1f} MB")
+            for analysis, item in sorted(stats['analyses'].items()):
+                idle_days = (time.time() - item['oldestAccess']) / 86400
+                print(f"  {analysis:<16} {item['entries']:>8,} entries  {item['bytes'] / 1e6:>9,.1f} MB  "
+                      f"oldest used {idle_days:,.1f} days ago")
+        elif args.command == 'prune':
+            if args.max_mb is None or args.max_mb < 0:
+                print_error("prune needs --max-mb")
+                sys.exit(1)
+            evicted = cache.prune(int(args.max_mb * 1e6))
+            print_success(f"Evicted {evicted:,} entries")
+        else:
+            cache.clear()
+            print_success("Cache cleared")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -0,0 +1,698 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Firestore Rules Check
+Runs a table of allow/deny cases against firestore.rules in the Firestore
+emulator, in parallel, and reports the latency of every case. A passing
+result is cached by the hash of the rules and cases files, so unchanged
+rules are not re-checked.
+
+deploy_rules.py runs this before every deploy.
+
+Usage:
+    python rules_check.py                          # emulator already running on localhost:8080
+    python rules_check.py --start-emulator         # wraps itself in `firebase emulators:exec`
+    python rules_check.py --profile 10,100,1000,10000
+"""
+
+import argparse
+import base64
+import hashlib
+import http.client
+import json
+import os
+import shlex
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+DEFAULT_RULES = CONFIG_DIR / "firestore.rules"
+DEFAULT_CASES = CONFIG_DIR / "firestore.rules.cases.json"
+CACHE_FILE = CONFIG_DIR / ".rules_check_cache.json"
+
+DEFAULT_EMULATOR_HOST = 'localhost:8080'
+
+# demo- projects never touch production and need no credentials
+CHECK_PROJECT = 'demo-rules-check'
+
+# Bump when case semantics change so cached passes are discarded
+CHECK_VERSION = 1
+
+DEFAULT_WORKERS = 16
+
+# Requests per profiled list size and role
+PROFILE_REPEATS = 20
+
+READ_OPERATIONS = ('get', 'list')
+WRITE_OPERATIONS = ('create', 'update', 'set', 'delete')
+
+QUERY_OPERATORS = {
+    '==': 'EQUAL',
+    '!=': 'NOT_EQUAL',
+    '<': 'LESS_THAN',
+    '<=': 'LESS_THAN_OR_EQUAL',
+    '>': 'GREATER_THAN',
+    '>=': 'GREATER_THAN_OR_EQUAL',
+    'array-contains': 'ARRAY_CONTAINS',
+    'array-contains-any': 'ARRAY_CONTAINS_ANY',
+    'in': 'IN',
+    'not-in': 'NOT_IN',
+}
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+class RulesCheckError(Exception):
+    """The emulator could not be reached or rejected the rules."""
+
+
+# ---------------------------------------------------------------------------
+# Firestore REST encoding
+# ---------------------------------------------------------------------------
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """
+    Encode a JSON value as a Firestore REST Value.
+
+    {"__timestamp__": "2025-01-01T00:00:00Z"} encodes a timestamp.
+    """
+    if value is None:
+        return {'nullValue': None}
+    if isinstance(value, bool):
+        return {'booleanValue': value}
+    if isinstance(value, int):
+        return {'integerValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, str):
+        return {'stringValue': value}
+    if isinstance(value, list):
+        return {'arrayValue': {'values': [encode_value(item) for item in value]}}
+    if isinstance(value, dict):
+        if set(value) == {'__timestamp__'}:
+            return {'timestampValue': value['__timestamp__']}
+        return {'mapValue': {'fields': encode_fields(value)}}
+    raise TypeError(f"Cannot encode {type(value).__name__} for Firestore")
+
+
+def encode_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode a document's fields."""
+    return {key: encode_value(value) for key, value in data.items()}
+
+
+def _base64url(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def make_token(uid: str, email: Optional[str] = None, claims: Optional[Dict[str, Any]] = None) -> str:
+    """Unsigned ID token; the emulator accepts these for request.auth."""
+    now = int(time.time())
+    payload = {
+        'iss': f"https://securetoken.google.com/{CHECK_PROJECT}",
+        'aud': CHECK_PROJECT,
+        'iat': now,
+        'exp': now + 3600,
+        'auth_time': now,
+        'sub': uid,
+        'user_id': uid,
+        'firebase': {'sign_in_provider': 'custom', 'identities': {}},
+    }
+    if email:
+        payload.update({'email': email, 'email_verified': True})
+    payload.update(claims or {})
+    return f"{_base64url({'alg': 'none', 'typ': 'JWT'})}.{_base64url(payload)}."
+
+
+# ---------------------------------------------------------------------------
+# Emulator client
+# ---------------------------------------------------------------------------
+
+class EmulatorClient:
+    """Minimal Firestore emulator REST client with one connection per thread."""
+
+    def __init__(self, host: str = DEFAULT_EMULATOR_HOST, project: str = CHECK_PROJECT):
+        self.host = host
+        self.project = project
+        self.documents = f"/v1/projects/{project}/databases/(default)/documents"
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if not hasattr(self._local, 'connection'):
+            self._local.connection = http.client.HTTPConnection(self.host, timeout=30)
+        return self._local.connection
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        token: Optional[str] = None,
+        params: Sequence[Tuple[str, str]] = ()
+    ) -> Tuple[int, Any, float]:
+        """
+        Send one request.
+
+        Returns:
+            (HTTP status, decoded JSON body or None, seconds taken)
+        """
+        url = path + (f"?{urlencode(list(params))}" if params else '')
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+
+        for attempt in range(2):
+            connection = self._connection()
+            started = time.perf_counter()
+            try:
+                connection.request(method, url, body=payload, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+                elapsed = time.perf_counter() - started
+                break
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                # Stale keep-alive connection: reconnect once
+                connection.close()
+                del self._local.connection
+                if attempt:
+                    raise RulesCheckError(f"Firestore emulator not reachable at {self.host}: {e}") from e
+
+        try:
+            decoded = json.loads(raw) if raw else None
+        except ValueError:
+            decoded = raw.decode('utf-8', 'replace')
+        return response.status, decoded, elapsed
+
+    def document_path(self, path: str) -> str:
+        return f"{self.documents}/{quote(path)}"
+
+    def load_rules(self, rules: str):
+        """Replace the emulator's rules for this project."""
+        status, body, _ = self.request(
+            'PUT',
+            f"/emulator/v1/projects/{self.project}:securityRules",
+            {'rules': {'files': [{'name': 'firestore.rules', 'content': rules}]}}
+        )
+        if status != 200:
+            message = body.get('error', {}).get('message', body) if isinstance(body, dict) else body
+            raise RulesCheckError(f"Rules were rejected by the emulator: {message}")
+
+    def clear(self):
+        """Delete every document in this project."""
+        self.request('DELETE', f"/emulator/v1/projects/{self.project}/databases/(default)/documents")
+
+    def seed(self, path: str, data: Optional[Dict[str, Any]]):
+        """Write (or, with None, delete) a document bypassing the rules."""
+        if data is None:
+            status, body, _ = self.request('DELETE', self.document_path(path), token='owner')
+        else:
+            status, body, _ = self.request(
+                'PATCH', self.document_path(path), {'fields': encode_fields(data)}, token='owner'
+            )
+        if status not in (200, 404):
+            raise RulesCheckError(f"Could not seed {path}: HTTP {status} {body}")
+
+    def perform(self, case: Dict[str, Any], token: Optional[str]) -> Tuple[int, Any, float]:
+        """Run a case's operation as the given user."""
+        operation = case['op']
+        path = case['path']
+        data = case.get('data', {})
+
+        if operation == 'get':
+            return self.request('GET', self.document_path(path), token=token)
+        if operation == 'create':
+            return self.request(
+                'PATCH', self.document_path(path), {'fields': encode_fields(data)}, token,
+                [('currentDocument.exists', 'false')]
+            )
+        if operation == 'update':
+            # Like updateDoc: only the given fields change
+            params = [('currentDocument.exists', 'true')] + [('updateMask.fieldPaths', key) for key in data]
+            return self.request('PATCH', self.document_path(path), {'fields': encode_fields(data)}, token, params)
+        if operation == 'set':
+            return self.request('PATCH', self.document_path(path), {'fields': encode_fields(data)}, token)
+        if operation == 'delete':
+            return self.request('DELETE', self.document_path(path), token=token)
+        if operation == 'list':
+            return self.request('POST', f"{self.documents}:runQuery", {'structuredQuery': build_query(case)}, token)
+        raise ValueError(f"Unknown operation: {operation}")
+
+
+def build_query(case: Dict[str, Any]) -> Dict[str, Any]:
+    """structuredQuery for a list case ({"path", "where", "orderBy", "limit"})."""
+    query: Dict[str, Any] = {'from': [{'collectionId': case['path']}]}
+    filters = [
+        {'fieldFilter': {'field': {'fieldPath': field}, 'op': QUERY_OPERATORS[op], 'value': encode_value(value)}}
+        for field, op, value in case.get('where', [])
+    ]
+    if len(filters) == 1:
+        query['where'] = filters[0]
+    elif filters:
+        query['where'] = {'compositeFilter': {'op': 'AND', 'filters': filters}}
+    if case.get('orderBy'):
+        query['orderBy'] = [
+            {'field': {'fieldPath': field}, 'direction': 'DESCENDING' if direction == 'desc' else 'ASCENDING'}
+            for field, direction in case['orderBy']
+        ]
+    query['limit'] = case.get('limit', 50)
+    return query
+
+
+def emulator_reachable(host: str) -> bool:
+    """True if something answers HTTP at host."""
+    try:
+        connection = http.client.HTTPConnection(host, timeout=2)
+        connection.request('GET', '/')
+        connection.getresponse().read()
+        connection.close()
+        return True
+    except (OSError, http.client.HTTPException):
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+@dataclass
+class CaseResult:
+    """Outcome of one case."""
+    name: str
+    op: str
+    path: str
+    expect: str
+    outcome: str
+    status: int
+    latency_ms: float
+    detail: str = ''
+
+    @property
+    def passed(self) -> bool:
+        return self.outcome == self.expect
+
+
+def load_cases(path: Path) -> Dict[str, Any]:
+    """
+    Load and validate a cases file.
+
+    Format:
+        {"users": {"alice": {"email": "alice@example.com"}},
+         "seed": {"properties/p1": {...}},
+         "cases": [{"name", "auth": "alice" | null, "op", "path", "data"?,
+                    "where"?, "orderBy"?, "expect": "allow" | "deny"}]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    users = spec.setdefault('users', {})
+    spec.setdefault('seed', {})
+    for case in spec.get('cases', []):
+        if case.get('op') not in READ_OPERATIONS + WRITE_OPERATIONS:
+            raise ValueError(f"Case '{case.get('name')}': unknown op {case.get('op')!r}")
+        if case.get('expect') not in ('allow', 'deny'):
+            raise ValueError(f"Case '{case.get('name')}': expect must be 'allow' or 'deny'")
+        if case.get('auth') is not None and case['auth'] not in users:
+            raise ValueError(f"Case '{case.get('name')}': unknown user {case['auth']!r}")
+        for field, op, _ in case.get('where', []):
+            if op not in QUERY_OPERATORS:
+                raise ValueError(f"Case '{case.get('name')}': unknown query operator {op!r}")
+    return spec
+
+
+def run_case(client: EmulatorClient, case: Dict[str, Any], tokens: Dict[str, str]) -> CaseResult:
+    """Run one case and classify the response as allow, deny or error."""
+    token = tokens.get(case['auth']) if case.get('auth') else None
+    status, body, elapsed = client.perform(case, token)
+
+    if status == 403:
+        outcome, detail = 'deny', ''
+    elif status in (200, 404):
+        # 404: the rules allowed the read, the document just doesn't exist
+        outcome, detail = 'allow', ''
+    else:
+        outcome = 'error'
+        detail = body.get('error', {}).get('message', '') if isinstance(body, dict) else str(body)
+
+    return CaseResult(
+        name=case.get('name', f"{case['op']} {case['path']}"),
+        op=case['op'],
+        path=case['path'],
+        expect=case['expect'],
+        outcome=outcome,
+        status=status,
+        latency_ms=elapsed * 1000,
+        detail=detail,
+    )
+
+
+def run_cases(client: EmulatorClient, spec: Dict[str, Any], workers: int = DEFAULT_WORKERS) -> List[CaseResult]:
+    """
+    Run every case in spec.
+
+    Reads run first, all in parallel, against the seeded data. Writes are
+    grouped by document: groups run in parallel, and within a group each
+    write starts from a freshly re-seeded document.
+    """
+    seed = spec['seed']
+    tokens = {uid: make_token(uid, user.get('email'), user.get('claims')) for uid, user in spec['users'].items()}
+    cases = spec.get('cases', [])
+
+    client.clear()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda item: client.seed(*item), seed.items()))
+
+        reads = [case for case in cases if case['op'] in READ_OPERATIONS]
+        results = dict(zip(map(id, reads), executor.map(lambda case: run_case(client, case, tokens), reads)))
+
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for case in cases:
+            if case['op'] in WRITE_OPERATIONS:
+                groups.setdefault(case['path'], []).append(case)
+
+        def run_group(group: List[Dict[str, Any]]) -> List[CaseResult]:
+            outcomes = []
+            for case in group:
+                client.seed(case['path'], seed.get(case['path']))
+                outcomes.append(run_case(client, case, tokens))
+            return outcomes
+
+        for group, outcomes in zip(groups.values(), executor.map(run_group, groups.values())):
+            results.update(zip(map(id, group), outcomes))
+
+    # Report in file order
+    return [results[id(case)] for case in cases]
+
+
+# ---------------------------------------------------------------------------
+# sharedWith cost profile
+# ---------------------------------------------------------------------------
+
+def profile_shared_with(
+    client: EmulatorClient,
+    sizes: Sequence[int],
+    repeats: int = PROFILE_REPEATS
+) -> List[Dict[str, Any]]:
+    """
+    Time reads of projects with large sharedWith lists.
+
+    For each size the collaborator's email is last in the list, so
+    isCollaborator() scans all of it. The owner (short-circuits on
+    isOwner()) and a stranger (scans, then is denied) are timed too.
+    Requests run one at a time so latencies are not skewed by contention.
+
+    Returns:
+        Rows of {size, role, outcome, p50Ms, p95Ms, maxMs}
+    """
+    owner, collaborator, stranger = 'profile-owner', 'profile-collaborator', 'profile-stranger'
+    tokens = {
+        'owner': make_token(owner, f"{owner}@example.com"),
+        'collaborator': make_token(collaborator, f"{collaborator}@example.com"),
+        'stranger': make_token(stranger, f"{stranger}@example.com"),
+    }
+
+    rows = []
+    for size in sizes:
+        path = f"properties/profile-{size}"
+        shared_with = [f"member{i}@example.com" for i in range(max(size - 1, 0))]
+        shared_with.append(f"{collaborator}@example.com")
+        client.seed(path, {'userId': owner, 'name': f'Profile {size}', 'isShared': False, 'sharedWith': shared_with})
+
+        for role, token in tokens.items():
+            latencies, statuses = [], set()
+            for _ in range(repeats):
+                status, _, elapsed = client.request('GET', client.document_path(path), token=token)
+                latencies.append(elapsed * 1000)
+                statuses.add(status)
+            latencies.sort()
+            rows.append({
+                'size': size,
+                'role': role,
+                'outcome': 'deny' if statuses == {403} else 'allow' if statuses <= {200} else 'mixed',
+                'p50Ms': statistics.median(latencies),
+                'p95Ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                'maxMs': latencies[-1],
+            })
+        client.seed(path, None)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def rules_hash(rules_path: Path, cases_path: Path) -> str:
+    """Hash of everything a check result depends on."""
+    digest = hashlib.sha256(f"rules-check-v{CHECK_VERSION}\0".encode('utf-8'))
+    for path in (rules_path, cases_path):
+        digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def cached_pass(key: str) -> Optional[Dict[str, Any]]:
+    """The cached passing result for key, if any."""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            entry = json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+    return entry if entry and entry.get('passed') else None
+
+
+def save_pass(key: str, case_count: int):
+    """Remember that the rules/cases with this hash passed (only the latest few are kept)."""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache[key] = {'passed': True, 'cases': case_count, 'checkedAt': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    cache = dict(list(cache.items())[-20:])
+    CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding='utf-8')
+
+
+def check_rules(
+    rules_path: Path = DEFAULT_RULES,
+    cases_path: Path = DEFAULT_CASES,
+    host: str = DEFAULT_EMULATOR_HOST,
+    workers: int = DEFAULT_WORKERS,
+    use_cache: bool = True
+) -> Tuple[bool, Optional[List[CaseResult]]]:
+    """
+    Check rules against the cases, using the cache when possible.
+
+    Returns:
+        (passed, case results - None when the cached result was used)
+
+    Raises:
+        RulesCheckError: Emulator unreachable or rules rejected
+    """
+    key = rules_hash(rules_path, cases_path)
+    if use_cache and cached_pass(key):
+        return True, None
+
+    spec = load_cases(cases_path)
+    client = EmulatorClient(host)
+    client.load_rules(rules_path.read_text(encoding='utf-8'))
+    results = run_cases(client, spec, workers)
+
+    passed = all(result.passed for result in results)
+    if passed:
+        save_pass(key, len(results))
+    return passed, results
+
+
+def gate_deploy(rules_path: Path = DEFAULT_RULES) -> bool:
+    """
+    Pre-deploy check used by deploy_rules.py.
+
+    Uses the cached result if the rules are unchanged. Otherwise it checks
+    against a running emulator (FIRESTORE_EMULATOR_HOST or localhost:8080),
+    or starts one with `firebase emulators:exec`.
+
+    Returns:
+        True if the rules pass every case
+    """
+    if cached_pass(rules_hash(rules_path, DEFAULT_CASES)):
+        print_success("Rules check passed (cached)")
+        return True
+
+    host = os.environ.get('FIRESTORE_EMULATOR_HOST', DEFAULT_EMULATOR_HOST)
+    if emulator_reachable(host):
+        try:
+            passed, results = check_rules(rules_path, host=host)
+        except (RulesCheckError, ValueError) as e:
+            print_error(str(e))
+            return False
+        print_results(results or [])
+        return passed
+
+    from async_runner import run_sync
+
+    print_info("Starting the Firestore emulator for the rules check...")
+    inner = ' '.join(shlex.quote(arg) for arg in [
+        sys.executable, str(Path(__file__).resolve()), '--rules', str(rules_path.resolve())
+    ])
+    command = f'firebase emulators:exec --only firestore --project {CHECK_PROJECT} {shlex.quote(inner)}'
+    result = run_sync(command, target="rules", timeout=300, cwd=str(CONFIG_DIR.parent))
+    return result.ok
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def print_results(results: List[CaseResult]):
+    """Print one line per case plus latency percentiles."""
+    for result in results:
+        mark = f"{Colors.OKGREEN}✓" if result.passed else f"{Colors.FAIL}✗"
+        line = f"{mark} {result.name:<55} {result.op:<7} expect {result.expect:<5} got {result.outcome:<5}"
+        line += f" {result.latency_ms:7.1f} ms{Colors.ENDC}"
+        if result.detail:
+            line += f"  ({result.detail})"
+        print(line)
+
+    if results:
+        latencies = sorted(result.latency_ms for result in results)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print_info(f"Latency p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+def print_profile(rows: List[Dict[str, Any]]):
+    """Print the sharedWith cost profile as a table."""
+    print(f"\n{Colors.BOLD}sharedWith list size vs. rule latency{Colors.ENDC}")
+    print(f"{'size':>8}  {'role':<13} {'outcome':<7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for row in rows:
+        print(
+            f"{row['size']:>8}  {row['role']:<13} {row['outcome']:<7} "
+            f"{row['p50Ms']:>8.1f} {row['p95Ms']:>8.1f} {row['maxMs']:>8.1f}"
+        )
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Check firestore.rules against allow/deny cases in the emulator')
+    parser.add_argument('--rules', type=Path, default=DEFAULT_RULES, help='Rules file')
+    parser.add_argument('--cases', type=Path, default=DEFAULT_CASES, help='Cases file')
+    parser.add_argument(
+        '--emulator',
+        default=os.environ.get('FIRESTORE_EMULATOR_HOST', DEFAULT_EMULATOR_HOST),
+        metavar='HOST:PORT',
+        help='Firestore emulator host (default: $FIRESTORE_EMULATOR_HOST or localhost:8080)'
+    )
+    parser.add_argument('--start-emulator', action='store_true', help='Run inside `firebase emulators:exec`')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Cases run at once')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run even if these rules already passed')
+    parser.add_argument(
+        '--profile',
+        metavar='SIZES',
+        help='Also time reads of projects with sharedWith lists of these sizes, e.g. 10,100,1000'
+    )
+    parser.add_argument('--repeats', type=int, default=PROFILE_REPEATS, help='Requests per profiled size and role')
+    parser.add_argument('--format', choices=('table', 'json'), default='table', help='Output format')
+    args = parser.parse_args()
+
+    if args.start_emulator:
+        from async_runner import run_sync
+        forwarded = [arg for arg in sys.argv[1:] if arg != '--start-emulator']
+        inner = ' '.join(shlex.quote(arg) for arg in [sys.executable, str(Path(__file__).resolve())] + forwarded)
+        command = f'firebase emulators:exec --only firestore --project {CHECK_PROJECT} {shlex.quote(inner)}'
+        result = run_sync(command, target="rules", timeout=600, cwd=str(CONFIG_DIR.parent))
+        sys.exit(0 if result.ok else 1)
+
+    try:
+        sizes = [int(size) for size in args.profile.split(',')] if args.profile else []
+    except ValueError:
+        print_error(f"Invalid --profile sizes: {args.profile}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        passed, results = check_rules(
+            args.rules,
+            args.cases,
+            host=args.emulator,
+            workers=args.workers,
+            use_cache=not args.no_cache and not sizes
+        )
+        profile = profile_shared_with(EmulatorClient(args.emulator), sizes, args.repeats) if sizes else []
+    except (RulesCheckError, ValueError, OSError) as e:
+        print_error(str(e))
+        if not emulator_reachable(args.emulator):
+            print_info("Start it with `firebase emulators:start --only firestore`, or pass --start-emulator")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+
+    if args.format == 'json':
+        json.dump({
+            'passed': passed,
+            'cached': results is None,
+            'cases': [dict(asdict(result), passed=result.passed) for result in results or []],
+            'profile': profile,
+        }, sys.stdout, indent=2)
+        print()
+    else:
+        if results is None:
+            print_success(f"Rules unchanged since the last passing check ({args.rules.name})")
+        else:
+            print_results(results)
+            failed = sum(not result.passed for result in results)
+            if failed:
+                print_error(f"{failed} of {len(results)} case(s) failed in {elapsed:.1f}s")
+            else:
+                print_success(f"All {len(results)} case(s) passed in {elapsed:.1f}s")
+        if profile:
+            print_profile(profile)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
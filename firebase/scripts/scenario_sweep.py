@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scenario Sweep
+Evaluates every project over a full grid of occupancy, STR nightly rate,
+interest rate and holding period, and writes the result tensor
+(properties x occupancy x rateDelta x interestRate x year) to a chunked
+tensor store (tensor_store.py), which may be far larger than memory.
+
+Each cell holds, for that scenario and year:
+    cashFlow   cumulative cash flow (mortgage payments stop once paid off)
+    wealth     cash invested + cumulative cash flow + principal paid down
+
+Occupancy applies uniformly to every STR/MTR/LTR unit (for LTR units it is
+100% minus vacancy); the nightly rate change applies to STR units, as in
+SensitivityAnalysis. The mortgage is recomputed at each interest rate, so
+monthlyMortgageOverride is ignored.
+
+Worker processes compute and write disjoint chunks directly; nothing but
+per-project coefficients is held in memory. An interrupted sweep continues
+with --resume, skipping the chunks already written.
+
+Usage:
+    python scenario_sweep.py ../../exports --out sweep.tensor
+    python scenario_sweep.py leads.jsonl --out sweep.tensor --occupancy 40:95:5 \\
+        --rate-delta=-50:50:10 --interest 4:9:0.125 --years 30 --metric wealth --workers 8
+    python tensor_store.py slice sweep.tensor --sel property=<id> --sel year=10 --sel rateDelta=0
+"""
+
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from calculations import calculate_property_monthly_expenses, calculate_total_investment
+from expense_compiler import compile_portfolio, project_unit_expenses
+from project_files import iter_projects
+from tensor_store import TensorStore, auto_chunks
+from vector_calculations import monthly_payments, remaining_balance
+from what_if import parse_grid_values
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+AXES = ('property', 'occupancy', 'rateDelta', 'interestRate', 'year')
+METRICS = ('cashFlow', 'wealth')
+
+DEFAULT_OCCUPANCY = '40:100:5'
+DEFAULT_RATE_DELTA = '-50:50:10'
+DEFAULT_INTEREST = '4:9:0.25'
+DEFAULT_YEARS = 30
+
+# Projects compiled to coefficients at a time
+COMPILE_BATCH = 5000
+
+# Chunks written per worker task
+CHUNKS_PER_TASK = 8
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def sweep_coefficients(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Reduce each project to what the sweep needs.
+
+    Monthly operating income (before the mortgage) at uniform occupancy x
+    (a fraction) with every STR nightly rate moved by d dollars is
+
+        occupancySlope * x + rateSlope * d * x + fixed
+
+    Returns:
+        Arrays (projects,): occupancySlope, rateSlope, fixed, loanAmount,
+        loanTerm, totalInvestment
+
+    Raises:
+        KeyError, TypeError, ValueError: For malformed projects
+    """
+    compiled = project_unit_expenses(projects)
+    units = compile_portfolio(projects)
+    price = np.array([float(project['property']['purchasePrice']) for project in projects])
+    down = np.array([float(project['property']['downPaymentPercent']) for project in projects])
+    property_expenses = np.array([calculate_property_monthly_expenses(project['property']) for project in projects])
+
+    # A nightly rate change earns 30 nights a month, less percent-of-revenue expenses
+    is_str = np.array([unit['type'] == 'STR' for project in projects for unit in project['units']], dtype=bool)
+    rate_slope = np.bincount(
+        units['projectIndex'],
+        weights=np.where(is_str, 30 * (1 - units['coefficients'][:, 1]), 0.0),
+        minlength=len(projects)
+    )
+
+    return {
+        'occupancySlope': compiled['occupancySlope'],
+        'rateSlope': rate_slope,
+        'fixed': compiled['occupancyIndependent'] - compiled['perPropertyValue'] * price - property_expenses,
+        'loanAmount': price - price * (down / 100),
+        'loanTerm': np.array([float(project['property']['loanTerm']) for project in projects]),
+        'totalInvestment': np.array([calculate_total_investment(project['property']) for project in projects]),
+    }
+
+
+def evaluate_block(
+    coefficients: Dict[str, np.ndarray],
+    occupancy: np.ndarray,
+    rate_delta: np.ndarray,
+    interest: np.ndarray,
+    years: np.ndarray,
+    metric: str
+) -> np.ndarray:
+    """
+    The metric over (projects, occupancy, rateDelta, interestRate, year).
+
+    Args:
+        coefficients: sweep_coefficients for the projects
+        occupancy: Occupancy percents
+        rate_delta: STR nightly rate changes ($)
+        interest: Annual interest rates (%)
+        years: Holding periods (years)
+        metric: One of METRICS
+    """
+    c = {name: values[:, None, None, None, None] for name, values in coefficients.items()}
+    x = (occupancy / 100)[None, :, None, None, None]
+    d = rate_delta[None, None, :, None, None]
+    rate = interest[None, None, None, :, None]
+    months = (12 * years)[None, None, None, None, :]
+
+    operating = c['occupancySlope'] * x + c['rateSlope'] * d * x + c['fixed']
+
+    payment = monthly_payments(c['loanAmount'], rate, c['loanTerm'])
+    paid = np.minimum(months, c['loanTerm'] * 12)
+
+    result = operating * months - payment * paid
+    if metric == 'wealth':
+        balance = remaining_balance(c['loanAmount'], payment, rate, paid)
+        result = result + c['totalInvestment'] + c['loanAmount'] - np.maximum(balance, 0.0)
+    return result
+
+
+# Worker state, set once per process so tasks only carry chunk positions
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(path: str, coefficients: Dict[str, np.ndarray], axes: Dict[str, np.ndarray], metric: str):
+    _WORKER.update(
+        store=TensorStore.open(Path(path), 'r+'), coefficients=coefficients, axes=axes, metric=metric
+    )
+
+
+def _write_chunks(indices: List[Tuple[int, ...]]) -> int:
+    store: TensorStore = _WORKER['store']
+    axes = _WORKER['axes']
+    for index in indices:
+        region = store.chunk_slices(index)
+        block = evaluate_block(
+            {name: values[region[0]] for name, values in _WORKER['coefficients'].items()},
+            axes['occupancy'][region[1]],
+            axes['rateDelta'][region[2]],
+            axes['interestRate'][region[3]],
+            axes['year'][region[4]],
+            _WORKER['metric'],
+        )
+        store.write_chunk(index, block)
+    return len(indices)
+
+
+def load_coefficients(projects: Iterable[Dict[str, Any]]) -> Tuple[List[str], Dict[str, np.ndarray], int]:
+    """
+    sweep_coefficients for a stream of projects, in batches.
+
+    Returns:
+        (project ids, coefficients, number of projects skipped)
+    """
+    ids: List[str] = []
+    parts: List[Dict[str, np.ndarray]] = []
+    skipped = 0
+    iterator = iter(projects)
+    while True:
+        batch = list(itertools.islice(iterator, COMPILE_BATCH))
+        if not batch:
+            break
+        try:
+            good = batch
+            parts.append(sweep_coefficients(batch))
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            good = []
+            for project in batch:
+                try:
+                    sweep_coefficients([project])
+                    good.append(project)
+                except (KeyError, TypeError, ValueError, ZeroDivisionError):
+                    skipped += 1
+            if good:
+                parts.append(sweep_coefficients(good))
+        ids.extend(str(project.get('id', '')) for project in good)
+    if not parts:
+        return [], {}, skipped
+    return ids, {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}, skipped
+
+
+def run_sweep(
+    path: Path,
+    ids: List[str],
+    coefficients: Dict[str, np.ndarray],
+    axes: Dict[str, np.ndarray],
+    metric: str = 'wealth',
+    dtype: str = 'float32',
+    chunks: Optional[Sequence[int]] = None,
+    workers: Optional[int] = None,
+    resume: bool = False,
+    progress: Optional[Any] = None
+) -> Tuple[TensorStore, int]:
+    """
+    Write the sweep tensor to a store.
+
+    Args:
+        path: Store folder
+        ids: Project ids (coordinates of the property axis)
+        coefficients: sweep_coefficients for those projects
+        axes: occupancy, rateDelta, interestRate and year values
+        metric: One of METRICS
+        dtype: Stored dtype
+        chunks: Chunk shape (default: tensor_store.auto_chunks)
+        workers: Worker processes (default: CPU count)
+        resume: Continue an existing store, skipping chunks already written
+        progress: Called with (chunks written, chunks to write)
+
+    Returns:
+        (the store, chunks written by this run)
+
+    Raises:
+        ValueError: If resume finds a store for a different sweep, metric,
+            dtype or chunk shape
+    """
+    shape = (len(ids),) + tuple(axes[axis].size for axis in AXES[1:])
+    coords = {'property': ids, **{axis: axes[axis].tolist() for axis in AXES[1:]}}
+    if resume and (path / 'meta.json').exists():
+        store = TensorStore.open(path, 'r+')
+        if store.shape != shape or store.coords != coords:
+            raise ValueError(f"{path} holds a different sweep; drop --resume to start over")
+        # Chunks written so far must match what the rest of the run would write
+        requested = {
+            'metric': metric,
+            'dtype': np.dtype(dtype).name,
+            'chunks': tuple(int(c) for c in chunks) if chunks else auto_chunks(shape, np.dtype(dtype).itemsize),
+        }
+        stored = {'metric': store.attrs.get('metric'), 'dtype': store.dtype.name, 'chunks': store.chunks}
+        mismatched = [
+            f"{name} {stored[name]} (asked for {requested[name]})"
+            for name in requested if stored[name] != requested[name]
+        ]
+        if mismatched:
+            raise ValueError(f"{path} was written with {', '.join(mismatched)}; drop --resume to start over")
+    else:
+        store = TensorStore.create(
+            path, shape, dtype, chunks=chunks, axes=AXES, coords=coords, overwrite=True,
+            attrs={'metric': metric, 'units': 'USD', 'occupancy': '%', 'rateDelta': 'USD/night', 'interestRate': '%'}
+        )
+
+    written = {chunk.name for chunk in store.stored_chunks()}
+    todo = (
+        index for index in store.chunk_indices()
+        if '.'.join(str(i) for i in index) not in written
+    )
+    total = math.prod(store.grid) - len(written)
+    workers = workers or os.cpu_count() or 1
+
+    done_count = 0
+    init_args = (str(path), coefficients, axes, metric)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending: Set[Future] = set()
+        while True:
+            batch = list(itertools.islice(todo, CHUNKS_PER_TASK))
+            if batch:
+                pending.add(pool.submit(_write_chunks, batch))
+            if pending and (len(pending) >= workers * 2 or not batch):
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done_count += future.result()
+                if progress is not None:
+                    progress(done_count, total)
+            if not batch and not pending:
+                break
+    return store, done_count
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Write a full scenario sweep to a chunked tensor store')
+    parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for JSONL on stdin")
+    parser.add_argument('--out', required=True, help='Store folder')
+    parser.add_argument('--occupancy', default=DEFAULT_OCCUPANCY, help=f'Occupancy %% values (default: {DEFAULT_OCCUPANCY})')
+    parser.add_argument(
+        '--rate-delta',
+        default=DEFAULT_RATE_DELTA,
+        help=f'STR nightly rate changes in $ (default: {DEFAULT_RATE_DELTA}; write --rate-delta=-50:50:10)'
+    )
+    parser.add_argument(
+        '--interest',
+        default=DEFAULT_INTEREST,
+        help=f'Interest rates %% (default: {DEFAULT_INTEREST}); the mortgage is recomputed at each, '
+             'so monthlyMortgageOverride is ignored'
+    )
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help=f'Years 1..N (default: {DEFAULT_YEARS})')
+    parser.add_argument('--metric', choices=METRICS, default='wealth', help='Value stored per cell')
+    parser.add_argument('--dtype', choices=('float32', 'float64'), default='float32', help='Stored precision')
+    parser.add_argument('--chunks', help='Chunk shape, e.g. 8,13,11,21,30 (default: about 4 MB per chunk)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted sweep (same --metric, --dtype and --chunks as before)'
+    )
+    args = parser.parse_args()
+
+    try:
+        axes = {
+            'occupancy': parse_grid_values(args.occupancy),
+            'rateDelta': parse_grid_values(args.rate_delta),
+            'interestRate': parse_grid_values(args.interest),
+            'year': np.arange(1, args.years + 1, dtype=float),
+        }
+        if any(values.size == 0 for values in axes.values()):
+            raise ValueError("Every axis needs at least one value")
+        if (axes['occupancy'] < 0).any() or (axes['occupancy'] > 100).any():
+            raise ValueError("Occupancy must be between 0 and 100")
+        if (axes['interestRate'] < 0).any():
+            raise ValueError("Interest rates cannot be negative")
+        chunks = [int(value) for value in args.chunks.split(',')] if args.chunks else None
+        if args.workers is not None and args.workers < 1:
+            raise ValueError("--workers must be at least 1")
+    except ValueError as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    started = time.monotonic()
+    try:
+        ids, coefficients, skipped = load_coefficients(iter_projects(args.paths))
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+    if skipped:
+        print_warning(f"Skipped {skipped:,} malformed project(s)")
+    if not ids:
+        print_error("No projects found")
+        sys.exit(1)
+
+    cells = len(ids) * math.prod(values.size for values in axes.values())
+    itemsize = np.dtype(args.dtype).itemsize
+    print_info(
+        f"Sweeping {len(ids):,} project(s) x {' x '.join(str(axes[a].size) for a in AXES[1:])} "
+        f"= {cells:,} cells ({cells * itemsize / 1e9:,.2f} GB raw)"
+    )
+
+    last_progress = [time.monotonic()]
+
+    def progress(done: int, total: int):
+        if time.monotonic() - last_progress[0] >= PROGRESS_INTERVAL:
+            last_progress[0] = time.monotonic()
+            print_info(f"{done:,} of {total:,} chunk(s) written")
+
+    try:
+        store, written = run_sweep(
+            Path(args.out), ids, coefficients, axes, args.metric, args.dtype, chunks, args.workers, args.resume,
+            progress
+        )
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    on_disk = sum(path.stat().st_size for path in store.stored_chunks())
+    elapsed = time.monotonic() - started
+    print_success(
+        f"Wrote {written:,} chunk(s) of {' x '.join(map(str, store.chunks))} to {args.out} in {elapsed:.1f}s "
+        f"({on_disk / 1e6:,.1f} MB on disk, {cells * itemsize / max(on_disk, 1):.1f}x compression)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
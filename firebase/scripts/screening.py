@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deal Screening
+Streams Project records once and keeps the best N deals per metric, so a
+lead list of any size is screened in bounded memory.
+
+Usage:
+    python screening.py leads.jsonl --top 50
+    cat leads.jsonl | python screening.py - --location austin --unit-type STR --max-price 600000
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from project_files import iter_projects, json_safe
+from project_schema import iter_valid
+from vector_calculations import summarize_valid
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Screening metrics and whether larger values rank higher
+SCREEN_METRICS = {
+    'cashOnCashReturn': True,
+    'totalReturn': True,
+    'breakEvenOccupancy': False,
+}
+
+# Records summarized per vectorized batch
+BATCH_SIZE = 5000
+
+# Validation failures printed individually with --validate
+MAX_REPORTED_REJECTS = 20
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_warning(message: str):
+    """Print a warning message."""
+    print(f"{Colors.WARNING}⚠ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def build_filter(
+    locations: Sequence[str] = (),
+    unit_types: Sequence[str] = (),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> Predicate:
+    """
+    Combine screening filters into one predicate over Project dicts.
+
+    Args:
+        locations: Case-insensitive substrings; the property address must contain one
+        unit_types: The project must have at least one unit of one of these types
+        min_price: Minimum purchase price
+        max_price: Maximum purchase price
+    """
+    needles = [location.lower() for location in locations]
+    wanted_types = set(unit_types)
+
+    def matches(project: Dict[str, Any]) -> bool:
+        property = project['property']
+        price = property['purchasePrice']
+        if min_price is not None and price < min_price:
+            return False
+        if max_price is not None and price > max_price:
+            return False
+        if needles:
+            address = (property.get('propertyAddress') or '').lower()
+            if not any(needle in address for needle in needles):
+                return False
+        if wanted_types and not any(unit['type'] in wanted_types for unit in project['units']):
+            return False
+        return True
+
+    return matches
+
+
+class TopK:
+    """Running top-K of rows for one metric, backed by a size-K heap."""
+
+    def __init__(self, metric: str, k: int, higher_is_better: bool = True):
+        self.metric = metric
+        self.k = k
+        self.sign = 1.0 if higher_is_better else -1.0
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+
+    def offer(self, value: float, row: Dict[str, Any]):
+        """Consider a row; it is kept only while it ranks in the top K."""
+        if np.isnan(value):
+            return
+        key = self.sign * value
+        entry = (key, next(self._counter), row)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def threshold(self) -> float:
+        """Key a new row must beat to enter, or -inf while not full."""
+        return self._heap[0][0] if len(self._heap) >= self.k else -np.inf
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Kept rows, best first."""
+        return [row for _, _, row in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+
+def _batches(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def screen(
+    records: Iterable[Dict[str, Any]],
+    metrics: Sequence[str] = tuple(SCREEN_METRICS),
+    top: int = 25,
+    predicate: Optional[Predicate] = None,
+    batch_size: int = BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Screen a stream of Project records in one pass.
+
+    Args:
+        records: Iterable of Project dicts (consumed once)
+        metrics: SCREEN_METRICS to rank by
+        top: Deals kept per metric
+        predicate: Optional filter applied before any metric is computed
+        batch_size: Records summarized per vectorized batch
+
+    Returns:
+        {'top': {metric: rows}, 'seen': n, 'matched': n, 'invalid': n}
+    """
+    boards = {metric: TopK(metric, top, SCREEN_METRICS[metric]) for metric in metrics}
+    seen = matched = invalid = 0
+
+    def filtered() -> Iterator[Dict[str, Any]]:
+        nonlocal seen, matched, invalid
+        for project in records:
+            seen += 1
+            try:
+                keep = predicate is None or predicate(project)
+            except (KeyError, TypeError, AttributeError):
+                invalid += 1
+                continue
+            if keep:
+                matched += 1
+                yield project
+
+    for batch in _batches(filtered(), batch_size):
+        projects, results, bad = summarize_valid(batch)
+        invalid += bad
+        if not projects:
+            continue
+
+        for metric, board in boards.items():
+            keys = board.sign * results[metric]
+            # Only build rows for records that can enter this board
+            for i in np.flatnonzero(keys > board.threshold()):
+                board.offer(float(results[metric][i]), summary_row(projects[i], results, i))
+
+    return {
+        'top': {metric: board.results() for metric, board in boards.items()},
+        'seen': seen,
+        'matched': matched,
+        'invalid': invalid,
+    }
+
+
+def summary_row(project: Dict[str, Any], results: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    """Compact row kept on the boards instead of the full project."""
+    property = project['property']
+    return {
+        'projectId': project.get('id', ''),
+        'projectName': project.get('name', ''),
+        'propertyAddress': property.get('propertyAddress', ''),
+        'purchasePrice': property['purchasePrice'],
+        'unitTypes': sorted({unit['type'] for unit in project['units']}),
+        'monthlyCashFlow': float(results['monthlyCashFlow'][i]),
+        'cashOnCashReturn': float(results['cashOnCashReturn'][i]),
+        'totalReturn': float(results['totalReturn'][i]),
+        'breakEvenOccupancy': float(results['breakEvenOccupancy'][i]),
+    }
+
+
+def format_board(metric: str, rows: List[Dict[str, Any]]) -> str:
+    """Render one metric's top rows as a fixed-width text table."""
+    headers = ['#', 'Project', 'Address', 'Price', 'Cash Flow/mo', 'CoC %', 'Total Ret %', 'Break-even %']
+    body = [
+        [
+            str(rank),
+            row['projectName'] or row['projectId'],
+            row['propertyAddress'] or '-',
+            f"{row['purchasePrice']:,.0f}",
+            f"{row['monthlyCashFlow']:,.0f}",
+            f"{row['cashOnCashReturn']:.1f}",
+            f"{row['totalReturn']:.1f}",
+            f"{row['breakEvenOccupancy']:.1f}",
+        ]
+        for rank, row in enumerate(rows, 1)
+    ]
+    widths = [max(len(cell) for cell in column) for column in zip(headers, *body)]
+    lines = [
+        '  '.join(cell.ljust(width) if i < 3 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in [headers] + body
+    ]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return f"{Colors.BOLD}Top {len(rows)} by {metric}{Colors.ENDC}\n" + '\n'.join(lines)
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Screen a stream of projects for the best deals')
+    parser.add_argument('paths', nargs='+', help="Project JSON/JSONL files or folders, or '-' for JSONL on stdin")
+    parser.add_argument('--top', type=int, default=25, help='Deals to keep per metric')
+    parser.add_argument(
+        '--metric',
+        action='append',
+        choices=list(SCREEN_METRICS),
+        help='Metric to rank by (repeatable; default: all)'
+    )
+    parser.add_argument('--location', action='append', default=[], help='Address must contain this text (repeatable)')
+    parser.add_argument(
+        '--unit-type',
+        action='append',
+        default=[],
+        choices=['STR', 'MTR', 'LTR', 'Generic'],
+        help='Project must include this unit type (repeatable)'
+    )
+    parser.add_argument('--min-price', type=float, default=None, help='Minimum purchase price')
+    parser.add_argument('--max-price', type=float, default=None, help='Maximum purchase price')
+    parser.add_argument('--format', choices=('table', 'json'), default='table', help='Output format')
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='Check records against the Project schema first (numeric strings are coerced)'
+    )
+    args = parser.parse_args()
+
+    if args.top < 1:
+        print_error("--top must be at least 1")
+        sys.exit(1)
+
+    predicate = build_filter(args.location, args.unit_type, args.min_price, args.max_price)
+    records = iter_projects(args.paths)
+    rejected = 0
+
+    def reject(number: int, record: Any, errors: List[Tuple[str, str]]):
+        nonlocal rejected
+        rejected += 1
+        if rejected <= MAX_REPORTED_REJECTS:
+            path, message = errors[0]
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ''
+            print_warning(f"Record #{number}: {path}: {message}{more}")
+
+    if args.validate:
+        records = iter_valid(records, on_invalid=reject)
+
+    try:
+        report = screen(
+            records,
+            metrics=args.metric or list(SCREEN_METRICS),
+            top=args.top,
+            predicate=predicate
+        )
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    print_info(f"Screened {report['seen']:,} record(s), {report['matched']:,} matched the filters")
+    if rejected:
+        print_warning(f"Rejected {rejected:,} record(s) that failed validation")
+    if report['invalid']:
+        print_warning(f"Skipped {report['invalid']:,} malformed record(s)")
+
+    if args.format == 'json':
+        # breakEvenOccupancy is Infinity for deals that never break even
+        json.dump(json_safe(report), sys.stdout, indent=2, allow_nan=False)
+        print()
+    else:
+        print('\n\n'.join(format_board(metric, rows) for metric, rows in report['top'].items()))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
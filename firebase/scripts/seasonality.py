@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seasonality
+Month-by-month revenue, expenses and cash flow for projects whose STR/MTR
+units carry a seasonality profile (Unit.seasonality: 12 rate factors and 12
+occupancy percents, January first).
+
+The app's model treats every month as 30 days at the average rate and
+occupancy. Units with a profile are evaluated per calendar month instead:
+
+    revenue   = rate * rateFactor[m] * days[m] * occupancy[m]   (daily/nightly rates)
+              = monthlyRate * rateFactor[m] * occupancy[m]       (MTR monthly rate)
+    turnovers = days[m] * occupancy[m] / avgStayLength           (STR)
+
+Units without a profile, and LTR/Generic units, keep the app's flat monthly
+figures, so a project without profiles matches calculations.py every month.
+Per-booking expenses (cleaning, laundry) follow the monthly turnovers and
+percent-revenue expenses follow the monthly revenue (see expense_compiler).
+
+Everything is evaluated as (projects x 12) arrays in one pass.
+
+Usage:
+    python seasonality.py deal.json
+    python seasonality.py ../../exports --profile beach.json --format csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from expense_compiler import compile_portfolio
+from project_files import load_projects
+from vector_calculations import monthly_payments, property_fields
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=float)
+
+# Unit types whose revenue follows a seasonality profile
+SEASONAL_TYPES = ('STR', 'MTR')
+
+# Month-by-month outputs of seasonal_metrics, each (projects, 12)
+MONTHLY_METRICS = ('revenue', 'turnovers', 'unitExpenses', 'cashFlow')
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}")
+
+
+def validate_profile(profile: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Check a SeasonalityProfile.
+
+    Returns:
+        (rate factors, occupancy as fractions clipped to 0-1), each (12,)
+
+    Raises:
+        ValueError: If either list does not have 12 numbers, or a rate
+            factor is negative
+    """
+    arrays = []
+    for field in ('rateFactors', 'occupancyPercent'):
+        values = profile.get(field)
+        if not isinstance(values, list) or len(values) != 12:
+            raise ValueError(f"Seasonality profile needs 12 values in '{field}'")
+        try:
+            arrays.append(np.array(values, dtype=float))
+        except (TypeError, ValueError):
+            raise ValueError(f"Seasonality profile '{field}' must be numbers")
+
+    rate_factors, occupancy = arrays
+    if (rate_factors < 0).any():
+        raise ValueError("Seasonality rate factors cannot be negative")
+    return rate_factors, np.clip(occupancy / 100, 0.0, 1.0)
+
+
+def _uses_calendar_days(unit: Dict[str, Any]) -> bool:
+    """Whether a seasonal unit's revenue scales with the days in the month."""
+    revenue = unit['revenue']
+    return not (unit['type'] == 'MTR' and revenue.get('rateType') == 'monthly' and revenue.get('monthlyRate'))
+
+
+def compile_seasonal_units(
+    projects: List[Dict[str, Any]],
+    default_profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Per-unit inputs of the seasonal model as dense arrays.
+
+    Args:
+        projects: Project dicts
+        default_profile: SeasonalityProfile for STR/MTR units without one
+
+    Returns:
+        expense_compiler.compile_portfolio plus:
+        - rateFactors / monthlyOccupancy / dayScale: (units, 12); dayScale is the
+          month length over 30 for calendar-day units, 1 otherwise
+        - seasonal: (units,) whether a profile applies
+
+    Raises:
+        ValueError: If a profile is malformed
+    """
+    default = validate_profile(default_profile) if default_profile is not None else None
+    compiled = compile_portfolio(projects)
+
+    units = [unit for project in projects for unit in project['units']]
+    count = len(units)
+    rate_factors = np.ones((count, 12))
+    occupancy = np.ones((count, 12))
+    day_scale = np.ones((count, 12))
+    seasonal = np.zeros(count, dtype=bool)
+
+    for row, unit in enumerate(units):
+        if unit['type'] not in SEASONAL_TYPES:
+            continue
+        profile = unit.get('seasonality')
+        profile = validate_profile(profile) if profile else default
+        if profile is None:
+            continue
+        seasonal[row] = True
+        rate_factors[row], occupancy[row] = profile
+        if _uses_calendar_days(unit):
+            day_scale[row] = DAYS_IN_MONTH / 30
+
+    compiled.update(rateFactors=rate_factors, monthlyOccupancy=occupancy, dayScale=day_scale, seasonal=seasonal)
+    return compiled
+
+
+def _per_project(owner: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+    """Sum (units, 12) values into (projects, 12) rows by owning project."""
+    cells = (owner[:, None] * 12 + np.arange(12)).ravel()
+    return np.bincount(cells, weights=values.ravel(), minlength=count * 12).reshape(count, 12)
+
+
+def seasonal_metrics(
+    projects: List[Dict[str, Any]],
+    default_profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Month-by-month PropertySummary figures for many projects at once.
+
+    Args:
+        projects: Project dicts
+        default_profile: SeasonalityProfile for STR/MTR units without one
+
+    Returns:
+        MONTHLY_METRICS as (projects, 12) arrays, plus (projects,) arrays:
+        propertyExpenses and monthlyMortgagePayment (the same every month),
+        annualRevenue, annualCashFlow, cashOnCashReturn (on the seasonal
+        annual cash flow) and flatAnnualCashFlow (the app's monthly cash
+        flow x 12, for comparison)
+
+    Raises:
+        ValueError: If a profile is malformed
+    """
+    units = compile_seasonal_units(projects, default_profile)
+    columns = property_fields(projects)
+    count = len(projects)
+    owner = units['projectIndex']
+    coefficients, features = units['coefficients'], units['features']
+    price = columns['purchasePrice']
+
+    # Units without a profile keep the app's flat revenue and turnovers
+    seasonal = units['seasonal'][:, None]
+    full_revenue, full_turnovers = units['occupancy'][:, 1:2], units['occupancy'][:, 2:3]
+    occupied = units['monthlyOccupancy'] * units['dayScale']
+    revenue = np.where(seasonal, full_revenue * units['rateFactors'] * occupied, features[:, 1:2])
+    turnovers = np.where(seasonal, full_turnovers * occupied, features[:, 3:4])
+    unit_expenses = (
+        coefficients[:, [0]] +
+        coefficients[:, [1]] * revenue +
+        coefficients[:, [2]] * features[:, 2:3] +
+        coefficients[:, [3]] * turnovers
+    )
+
+    property_expenses = price * (columns['propertyTaxRate'] / 100) / 12 + columns['baseInsurance'] + columns['hoaFees']
+    loan_amount = price - price * (columns['downPaymentPercent'] / 100)
+    payment = monthly_payments(loan_amount, columns['interestRate'], columns['loanTerm'])
+    mortgage = np.where(np.isnan(columns['mortgageOverride']), payment, columns['mortgageOverride'])
+    fixed_costs = property_expenses + mortgage
+
+    monthly_revenue = _per_project(owner, revenue, count)
+    monthly_unit_expenses = _per_project(owner, unit_expenses, count)
+    cash_flow = monthly_revenue - monthly_unit_expenses - fixed_costs[:, None]
+    annual_cash_flow = cash_flow.sum(axis=1)
+
+    total_investment = columns['totalInvestment']
+    invested = total_investment > 0
+    flat_net = features[:, 1] - np.einsum('ij,ij->i', coefficients, features)
+    flat_cash_flow = np.bincount(owner, weights=flat_net, minlength=count) - fixed_costs
+
+    return {
+        'revenue': monthly_revenue,
+        'turnovers': _per_project(owner, turnovers, count),
+        'unitExpenses': monthly_unit_expenses,
+        'cashFlow': cash_flow,
+        'propertyExpenses': property_expenses,
+        'monthlyMortgagePayment': mortgage,
+        'annualRevenue': monthly_revenue.sum(axis=1),
+        'annualCashFlow': annual_cash_flow,
+        'cashOnCashReturn': np.where(invested, annual_cash_flow / np.where(invested, total_investment, 1.0) * 100, 0.0),
+        'flatAnnualCashFlow': flat_cash_flow * 12,
+    }
+
+
+def monthly_rows(projects: List[Dict[str, Any]], metrics: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """One row per project and month."""
+    return [
+        {
+            'projectId': project.get('id'),
+            'projectName': project.get('name'),
+            'month': MONTHS[month],
+            **{name: float(metrics[name][index, month]) for name in MONTHLY_METRICS},
+        }
+        for index, project in enumerate(projects)
+        for month in range(12)
+    ]
+
+
+def format_table(project: Dict[str, Any], metrics: Dict[str, np.ndarray], index: int) -> str:
+    """Render one project's months, the year and the app's flat year as a text table."""
+    headers = ['Month', 'Revenue', 'Turnovers', 'Unit Exp', 'Cash Flow']
+    body = [
+        [MONTHS[month]] + [
+            f"{metrics[name][index, month]:,.{1 if name == 'turnovers' else 0}f}" for name in MONTHLY_METRICS
+        ]
+        for month in range(12)
+    ]
+    body.append(['Year'] + [
+        f"{metrics[name][index].sum():,.{1 if name == 'turnovers' else 0}f}" for name in MONTHLY_METRICS
+    ])
+    body.append(['Flat model', '', '', '', f"{metrics['flatAnnualCashFlow'][index]:,.0f}"])
+    widths = [max(len(cell) for cell in column) for column in zip(headers, *body)]
+
+    lines = [
+        '  '.join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in [headers] + body
+    ]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    lines.insert(14, lines[1])
+    return '\n'.join(lines)
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Month-by-month cash flow with STR/MTR seasonality')
+    parser.add_argument('paths', nargs='+', help='Project JSON/JSONL files or folders')
+    parser.add_argument(
+        '--profile',
+        help='JSON SeasonalityProfile ({"rateFactors": [12], "occupancyPercent": [12]}) '
+             'for STR/MTR units without their own'
+    )
+    parser.add_argument('--format', choices=('table', 'csv', 'json'), default='table', help='Output format')
+    args = parser.parse_args()
+
+    try:
+        projects = load_projects(args.paths)
+        default_profile = None
+        if args.profile:
+            with open(args.profile, 'r', encoding='utf-8') as f:
+                default_profile = json.load(f)
+        metrics = seasonal_metrics(projects, default_profile)
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    if not projects:
+        print_error("No projects found")
+        sys.exit(1)
+
+    if args.format == 'json':
+        json.dump(monthly_rows(projects, metrics), sys.stdout, indent=2)
+        print()
+    elif args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=['projectId', 'projectName', 'month'] + list(MONTHLY_METRICS))
+        writer.writeheader()
+        writer.writerows(monthly_rows(projects, metrics))
+    else:
+        for index, project in enumerate(projects):
+            print_info(
+                f"{project.get('name') or project.get('id')}: {metrics['annualCashFlow'][index]:,.0f}/yr "
+                f"seasonal vs {metrics['flatAnnualCashFlow'][index]:,.0f}/yr flat"
+            )
+            print(format_table(project, metrics, index))
+            print()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
@@ -12,11 +12,12 @@ import sys
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from preflight import run_preflight
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
 
 # Color codes for terminal output
 class Colors:
@@ -113,19 +114,20 @@ def check_prerequisites():
     """Check if required tools are installed and accessible."""
     print_header("Checking Prerequisites")
 
-    prerequisites = {
-        "Firebase CLI": "firebase --version",
-        "Python 3.8+": "python --version"
+    # The probes run concurrently; passing CLI results are cached (see preflight.py)
+    results = {
+        result.name: result
+        for result in run_preflight(['firebase-cli', 'python', 'firebase-auth'])
     }
 
     all_installed = True
 
-    for tool, command in prerequisites.items():
-        output = run_command(command, check=False, capture=True)
-        if output:
-            print_success(f"{tool} installed: {output.split()[0] if output else 'Found'}")
+    for name in ('firebase-cli', 'python'):
+        result = results[name]
+        if result.status == 'ok':
+            print_success(f"{result.title} installed: {result.detail}")
         else:
-            print_error(f"{tool} not found")
+            print_error(f"{result.title}: {result.detail}")
             all_installed = False
 
     if not all_installed:
@@ -134,14 +136,12 @@ def check_prerequisites():
         sys.exit(1)
 
     # Check Firebase login
-    print_info("\nChecking Firebase authentication...")
-    result = run_command("firebase projects:list", check=False, capture=True)
-    if not result or "Error" in result:
+    if results['firebase-auth'].status != 'ok':
         print_warning("Not logged into Firebase CLI")
         print_info("Running: firebase login")
         run_command("firebase login")
     else:
-        print_success("Firebase CLI authenticated")
+        print_success(f"Firebase CLI authenticated: {results['firebase-auth'].detail}")
 
     return True
 
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tensor Store
+Chunked, compressed on-disk arrays for scenario results too large for
+memory (properties x occupancy x rate x interest x years and the like).
+
+Layout of a store (a folder):
+    <store>/meta.json          shape, chunk shape, dtype, axis names and
+                               coordinates, codec, attributes
+    <store>/chunks/<i>.<j>...  one compressed chunk per file, named by its
+                               position in the chunk grid
+
+- Each chunk is byte-shuffled (the bytes of every value grouped by
+  significance, which makes floats compress far better) and compressed
+  with zlib or lzma
+- Reads touch only the chunks that intersect the requested slice, so a
+  slice along the chunked axes (one property, say) of a huge result is
+  cheap; pick the chunk shape to match how the result will be read
+- Chunks are written atomically (temporary file + rename), so readers never
+  see a partial chunk and any number of processes can write at once as
+  long as each chunk has one writer (see scenario_sweep.py)
+- Chunks never written read as the fill value (NaN for floats)
+
+Usage:
+    python tensor_store.py info sweep.tensor
+    python tensor_store.py slice sweep.tensor --sel property=3 --sel year=10
+    python tensor_store.py slice sweep.tensor --sel interestRate=6.5 --isel property=0:100 -o part.npy
+"""
+
+import argparse
+import itertools
+import json
+import lzma
+import math
+import os
+import sys
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+CHUNK_DIR = 'chunks'
+
+CODECS = ('zlib', 'lzma', 'none')
+DEFAULT_CODEC = 'zlib'
+DEFAULT_LEVEL = 1
+
+# Uncompressed bytes per chunk that auto_chunks aims for
+TARGET_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Decompressed chunks kept per open store, for repeated nearby slices
+CACHED_CHUNKS = 16
+
+# What a store can be indexed with: ints, slices (positive steps) and Ellipsis
+Index = Union[int, slice, type(Ellipsis), Tuple[Any, ...]]
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_success(message: str):
+    """Print a success message."""
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def auto_chunks(shape: Sequence[int], itemsize: int, target_bytes: int = TARGET_CHUNK_BYTES) -> Tuple[int, ...]:
+    """
+    Chunk shape of about target_bytes that keeps trailing axes whole.
+
+    Leading axes are split first (the first axis is usually the one slices
+    pick single entries of, e.g. one property), then the largest others.
+    """
+    chunks = list(shape)
+    while math.prod(chunks) * itemsize > target_bytes:
+        axis = 0 if chunks[0] > 1 else max(range(len(chunks)), key=lambda i: chunks[i])
+        if chunks[axis] == 1:
+            break
+        excess = math.prod(chunks) * itemsize / target_bytes
+        chunks[axis] = max(1, min(chunks[axis] // 2, math.ceil(chunks[axis] / excess)))
+    return tuple(max(1, c) for c in chunks)
+
+
+def _shuffle(data: np.ndarray) -> bytes:
+    itemsize = data.dtype.itemsize
+    if itemsize == 1:
+        return data.tobytes()
+    return np.ascontiguousarray(data).view(np.uint8).reshape(-1, itemsize).T.tobytes()
+
+
+def _unshuffle(raw: bytes, dtype: np.dtype, shape: Tuple[int, ...]) -> np.ndarray:
+    itemsize = dtype.itemsize
+    flat = np.frombuffer(raw, dtype=np.uint8)
+    if itemsize > 1:
+        flat = flat.reshape(itemsize, -1).T.copy()
+    return flat.view(dtype).reshape(shape)
+
+
+class TensorStore:
+    """A chunked, compressed N-dimensional array in a folder."""
+
+    def __init__(self, path: Path, meta: Dict[str, Any], writable: bool):
+        self.path = Path(path)
+        self.meta = meta
+        self.writable = writable
+        self.shape: Tuple[int, ...] = tuple(meta['shape'])
+        self.chunks: Tuple[int, ...] = tuple(meta['chunks'])
+        self.dtype = np.dtype(meta['dtype'])
+        self.axes: List[str] = list(meta['axes'])
+        self.codec: str = meta['codec']
+        self.level: int = meta['level']
+        self.fill_value = np.nan if meta['fillValue'] is None else meta['fillValue']
+        self.grid: Tuple[int, ...] = tuple(-(-size // chunk) for size, chunk in zip(self.shape, self.chunks))
+        self._cache: 'OrderedDict[Tuple[int, ...], Optional[np.ndarray]]' = OrderedDict()
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        shape: Sequence[int],
+        dtype: Any = 'float64',
+        chunks: Optional[Sequence[int]] = None,
+        axes: Optional[Sequence[str]] = None,
+        coords: Optional[Dict[str, Sequence[Any]]] = None,
+        codec: str = DEFAULT_CODEC,
+        level: int = DEFAULT_LEVEL,
+        attrs: Optional[Dict[str, Any]] = None,
+        overwrite: bool = False
+    ) -> 'TensorStore':
+        """
+        Create an empty store.
+
+        Args:
+            path: Store folder (must not exist unless overwrite)
+            shape: Array shape
+            dtype: numpy dtype
+            chunks: Chunk shape (default: auto_chunks)
+            axes: Axis names (default: dim0, dim1, ...)
+            coords: Axis name -> coordinate values (one per index)
+            codec: One of CODECS
+            level: Compression level
+            attrs: Free-form JSON metadata
+
+        Raises:
+            ValueError: For an invalid shape, chunk shape, axes or codec
+            FileExistsError: If the store exists and overwrite is False
+        """
+        path = Path(path)
+        dtype = np.dtype(dtype)
+        shape = tuple(int(size) for size in shape)
+        if not shape or any(size < 1 for size in shape):
+            raise ValueError(f"Invalid shape {shape}")
+        chunks = tuple(int(c) for c in chunks) if chunks else auto_chunks(shape, dtype.itemsize)
+        if len(chunks) != len(shape) or any(c < 1 for c in chunks):
+            raise ValueError(f"Chunk shape {chunks} does not fit shape {shape}")
+        axes = list(axes) if axes else [f"dim{i}" for i in range(len(shape))]
+        if len(axes) != len(shape) or len(set(axes)) != len(axes):
+            raise ValueError(f"Need {len(shape)} distinct axis names, got {axes}")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec} (expected one of {', '.join(CODECS)})")
+        coords = {name: list(values) for name, values in (coords or {}).items()}
+        for name, values in coords.items():
+            if name not in axes or len(values) != shape[axes.index(name)]:
+                raise ValueError(f"Coordinates for {name} do not match an axis")
+
+        if path.exists():
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists")
+            for chunk in (path / CHUNK_DIR).glob('*'):
+                chunk.unlink()
+        (path / CHUNK_DIR).mkdir(parents=True, exist_ok=True)
+
+        meta = {
+            'format': FORMAT_VERSION,
+            'shape': list(shape),
+            'chunks': list(chunks),
+            'dtype': dtype.str,
+            'axes': axes,
+            'coords': coords,
+            'codec': codec,
+            'level': level,
+            'shuffle': True,
+            'fillValue': None if dtype.kind == 'f' else 0,
+            'attrs': attrs or {},
+        }
+        temporary = path / f".{META_FILE}.tmp"
+        temporary.write_text(json.dumps(meta, indent=2))
+        os.replace(temporary, path / META_FILE)
+        return cls(path, meta, writable=True)
+
+    @classmethod
+    def open(cls, path: Path, mode: str = 'r') -> 'TensorStore':
+        """
+        Open an existing store ('r' read-only, 'r+' read-write).
+
+        Raises:
+            FileNotFoundError: If there is no store at path
+            ValueError: If the store is from another format version
+        """
+        meta_path = Path(path) / META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No tensor store at {path}")
+        meta = json.loads(meta_path.read_text())
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Tensor store {path} has format {meta.get('format')}, expected {FORMAT_VERSION}")
+        return cls(Path(path), meta, writable=mode == 'r+')
+
+    # -- Chunks -------------------------------------------------------------
+
+    @property
+    def coords(self) -> Dict[str, List[Any]]:
+        return self.meta['coords']
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return self.meta['attrs']
+
+    def chunk_slices(self, index: Sequence[int]) -> Tuple[slice, ...]:
+        """The region of the array a chunk covers."""
+        return tuple(
+            slice(i * chunk, min((i + 1) * chunk, size))
+            for i, chunk, size in zip(index, self.chunks, self.shape)
+        )
+
+    def chunk_indices(self) -> Iterator[Tuple[int, ...]]:
+        """Every position in the chunk grid, in C order."""
+        return itertools.product(*(range(count) for count in self.grid))
+
+    def _chunk_path(self, index: Sequence[int]) -> Path:
+        return self.path / CHUNK_DIR / '.'.join(str(i) for i in index)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zlib':
+            return zlib.compress(data, self.level)
+        if self.codec == 'lzma':
+            return lzma.compress(data, preset=self.level)
+        return data
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.codec == 'zlib':
+            return zlib.decompress(data)
+        if self.codec == 'lzma':
+            return lzma.decompress(data)
+        return data
+
+    def read_chunk(self, index: Sequence[int]) -> Optional[np.ndarray]:
+        """A chunk's values (read-only), or None if it was never written."""
+        index = tuple(index)
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        try:
+            data = self._chunk_path(index).read_bytes()
+        except FileNotFoundError:
+            chunk = None
+        else:
+            shape = tuple(s.stop - s.start for s in self.chunk_slices(index))
+            chunk = _unshuffle(self._decompress(data), self.dtype, shape)
+            chunk.flags.writeable = False
+        self._cache[index] = chunk
+        while len(self._cache) > CACHED_CHUNKS:
+            self._cache.popitem(last=False)
+        return chunk
+
+    def write_chunk(self, index: Sequence[int], values: np.ndarray):
+        """
+        Replace a whole chunk, atomically.
+
+        Raises:
+            PermissionError: If the store is read-only
+            ValueError: If values do not have the chunk's shape
+        """
+        if not self.writable:
+            raise PermissionError(f"{self.path} is open read-only")
+        index = tuple(index)
+        shape = tuple(s.stop - s.start for s in self.chunk_slices(index))
+        values = np.asarray(values, dtype=self.dtype)
+        if values.shape != shape:
+            raise ValueError(f"Chunk {index} has shape {shape}, got {values.shape}")
+        path = self._chunk_path(index)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporary.write_bytes(self._compress(_shuffle(values)))
+        os.replace(temporary, path)
+        self._cache.pop(index, None)
+
+    def stored_chunks(self) -> List[Path]:
+        """Chunk files written so far."""
+        return [path for path in (self.path / CHUNK_DIR).iterdir() if not path.name.startswith('.')]
+
+    # -- Slicing ------------------------------------------------------------
+
+    def _normalize(self, key: Index) -> List[Union[int, Tuple[int, int, int]]]:
+        """One int or (start, stop, step) per axis."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(item is Ellipsis for item in key):
+            position = next(i for i, item in enumerate(key) if item is Ellipsis)
+            fill = (slice(None),) * (len(self.shape) - len(key) + 1)
+            key = key[:position] + fill + key[position + 1:]
+        if len(key) > len(self.shape):
+            raise IndexError(f"Too many indices for a {len(self.shape)}-D store")
+        key = key + (slice(None),) * (len(self.shape) - len(key))
+
+        normalized: List[Union[int, Tuple[int, int, int]]] = []
+        for item, size in zip(key, self.shape):
+            if isinstance(item, (int, np.integer)):
+                position = int(item) + size if item < 0 else int(item)
+                if not 0 <= position < size:
+                    raise IndexError(f"Index {item} out of range for an axis of {size}")
+                normalized.append(position)
+            elif isinstance(item, slice):
+                start, stop, step = item.indices(size)
+                if step < 1:
+                    raise IndexError("Negative slice steps are not supported")
+                normalized.append((start, max(start, stop), step))
+            else:
+                raise IndexError(f"Unsupported index {item!r} (use ints and slices)")
+        return normalized
+
+    def __getitem__(self, key: Index) -> np.ndarray:
+        """Read a sub-array, touching only the chunks it intersects."""
+        axes = self._normalize(key)
+        ranges = [(item, item + 1, 1) if isinstance(item, int) else item for item in axes]
+        out_shape = tuple(len(range(*r)) for r in ranges)
+        out = np.full(out_shape, self.fill_value, dtype=self.dtype)
+        if 0 in out_shape:
+            return out.reshape(tuple(n for n, item in zip(out_shape, axes) if not isinstance(item, int)))
+
+        # Chunks intersecting the selection, per axis
+        per_axis = []
+        for (start, stop, step), chunk in zip(ranges, self.chunks):
+            last = start + (len(range(start, stop, step)) - 1) * step
+            per_axis.append(range(start // chunk, last // chunk + 1))
+
+        for index in itertools.product(*per_axis):
+            region = self.chunk_slices(index)
+            source, target = [], []
+            for (start, stop, step), span in zip(ranges, region):
+                first = max(0, -(-(span.start - start) // step))
+                end = -(-(min(stop, span.stop) - start) // step)
+                if end <= first:
+                    break
+                local = start + first * step - span.start
+                source.append(slice(local, local + (end - first - 1) * step + 1, step))
+                target.append(slice(first, end))
+            else:
+                chunk = self.read_chunk(index)
+                if chunk is not None:
+                    out[tuple(target)] = chunk[tuple(source)]
+
+        return out.reshape(tuple(n for n, item in zip(out_shape, axes) if not isinstance(item, int)))
+
+    def __setitem__(self, key: Index, values: Any):
+        """
+        Write a sub-array. Whole chunks are replaced; partly covered chunks
+        are read, updated and rewritten, so they need a single writer.
+        """
+        axes = self._normalize(key)
+        ranges = [(item, item + 1, 1) if isinstance(item, int) else item for item in axes]
+        if any(step != 1 for _, _, step in ranges):
+            raise IndexError("Writes need contiguous slices")
+        shape = tuple(stop - start for start, stop, _ in ranges)
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), shape)
+
+        per_axis = [
+            range(start // chunk, (stop - 1) // chunk + 1) if stop > start else range(0)
+            for (start, stop, _), chunk in zip(ranges, self.chunks)
+        ]
+        for index in itertools.product(*per_axis):
+            region = self.chunk_slices(index)
+            overlap = [
+                (max(start, span.start), min(stop, span.stop))
+                for (start, stop, _), span in zip(ranges, region)
+            ]
+            part = values[tuple(slice(lo - start, hi - start) for (lo, hi), (start, _, _) in zip(overlap, ranges))]
+            if all(lo == span.start and hi == span.stop for (lo, hi), span in zip(overlap, region)):
+                self.write_chunk(index, part)
+                continue
+            existing = self.read_chunk(index)
+            chunk = (
+                np.array(existing) if existing is not None
+                else np.full(tuple(s.stop - s.start for s in region), self.fill_value, dtype=self.dtype)
+            )
+            chunk[tuple(slice(lo - span.start, hi - span.start) for (lo, hi), span in zip(overlap, region))] = part
+            self.write_chunk(index, chunk)
+
+    # -- Coordinates --------------------------------------------------------
+
+    def axis_index(self, axis: str, value: Any) -> int:
+        """
+        Position of a coordinate value on an axis (nearest for numbers).
+
+        Raises:
+            KeyError: If the axis is unknown or has no such coordinate
+        """
+        if axis not in self.axes:
+            raise KeyError(f"Unknown axis {axis} (axes: {', '.join(self.axes)})")
+        values = self.coords.get(axis)
+        if values is None:
+            return int(value)
+        if all(isinstance(v, (int, float)) for v in values):
+            return int(np.argmin(np.abs(np.asarray(values, dtype=float) - float(value))))
+        if value in values:
+            return values.index(value)
+        raise KeyError(f"{axis} has no coordinate {value!r}")
+
+    def select(self, **selection: Any) -> np.ndarray:
+        """Slice by axis name: store.select(property=3, year=slice(0, 10))."""
+        key: List[Any] = [slice(None)] * len(self.shape)
+        for axis, item in selection.items():
+            if axis not in self.axes:
+                raise KeyError(f"Unknown axis {axis} (axes: {', '.join(self.axes)})")
+            key[self.axes.index(axis)] = item
+        return self[tuple(key)]
+
+
+def _parse_selection(store: TensorStore, sel: Sequence[str], isel: Sequence[str]) -> Dict[str, Any]:
+    selection: Dict[str, Any] = {}
+    for spec in sel:
+        axis, _, value = spec.partition('=')
+        coords = store.coords.get(axis) or []
+        numeric = bool(coords) and all(isinstance(v, (int, float)) for v in coords)
+        selection[axis] = store.axis_index(axis, float(value) if numeric else value)
+    for spec in isel:
+        axis, _, value = spec.partition('=')
+        if ':' in value:
+            start, _, stop = value.partition(':')
+            selection[axis] = slice(int(start) if start else None, int(stop) if stop else None)
+        else:
+            selection[axis] = int(value)
+    return selection
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Inspect and slice chunked tensor stores')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    info_parser = subparsers.add_parser('info', help='Show shape, axes, chunks and size')
+    info_parser.add_argument('store', help='Store folder')
+
+    slice_parser = subparsers.add_parser('slice', help='Read a sub-array')
+    slice_parser.add_argument('store', help='Store folder')
+    slice_parser.add_argument('--sel', action='append', default=[], metavar='AXIS=VALUE',
+                              help='Pick the coordinate nearest VALUE on AXIS')
+    slice_parser.add_argument('--isel', action='append', default=[], metavar='AXIS=INDEX|START:STOP',
+                              help='Pick by position on AXIS')
+    slice_parser.add_argument('-o', '--output', help='Write the slice to a .npy file (default: CSV on stdout for 1-2 axes)')
+    args = parser.parse_args()
+
+    try:
+        store = TensorStore.open(Path(args.store))
+    except (OSError, ValueError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    if args.command == 'info':
+        stored = store.stored_chunks()
+        compressed = sum(path.stat().st_size for path in stored)
+        raw = math.prod(store.shape) * store.dtype.itemsize
+        total = math.prod(store.grid)
+        print(f"Store:  {store.path}")
+        print(f"Shape:  {' x '.join(f'{axis}={size}' for axis, size in zip(store.axes, store.shape))}")
+        print(f"Chunks: {' x '.join(str(c) for c in store.chunks)} ({len(stored):,} of {total:,} written)")
+        print(f"Dtype:  {store.dtype.name}, {store.codec} level {store.level}")
+        print(f"Size:   {raw / 1e6:,.1f} MB raw, {compressed / 1e6:,.1f} MB on disk")
+        for key, value in store.attrs.items():
+            print(f"{key}: {value}")
+        return
+
+    try:
+        selection = _parse_selection(store, args.sel, args.isel)
+        values = store.select(**selection)
+    except (KeyError, IndexError, ValueError) as e:
+        print_error(str(e).strip('"'))
+        sys.exit(1)
+
+    kept = [axis for axis in store.axes if not isinstance(selection.get(axis), int)]
+    if args.output:
+        np.save(args.output, values)
+        print_success(f"Wrote {' x '.join(map(str, values.shape)) or 'scalar'} ({', '.join(kept)}) to {args.output}")
+    elif values.ndim <= 2:
+        print(f"# {', '.join(kept) or 'value'}")
+        np.savetxt(sys.stdout, np.atleast_2d(values) if values.ndim else values.reshape(1, 1), delimiter=',', fmt='%.6g')
+    else:
+        print_error(f"Slice has {values.ndim} axes ({', '.join(kept)}); select more or use -o")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
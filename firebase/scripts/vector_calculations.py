@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Vector Calculations
+numpy versions of the mortgage math in calculations.py, for evaluating many
+projects or scenarios at once. Every function broadcasts over its array
+arguments and matches the scalar port element for element.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from calculations import calculate_property_summary, calculate_total_investment
+from expense_compiler import project_unit_expenses
+
+# Property fields extracted by property_columns
+PROPERTY_FIELDS = (
+    'purchasePrice',
+    'downPaymentPercent',
+    'interestRate',
+    'loanTerm',
+    'closingCostsPercent',
+    'renovationBudget',
+    'furnishingBudget',
+    'otherUpfrontCosts',
+    'propertyTaxRate',
+    'baseInsurance',
+    'hoaFees',
+)
+
+
+def monthly_payments(loan_amount, interest_rate, loan_term_years) -> np.ndarray:
+    """Vectorized calculateMonthlyPayment (returns monthlyPayment only)."""
+    loan_amount = np.asarray(loan_amount, dtype=float)
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    num_payments = np.asarray(loan_term_years, dtype=float) * 12
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    growth = (1 + safe_rate) ** num_payments
+    amortizing = loan_amount * safe_rate * growth / (growth - 1)
+    return np.where(zero_rate, loan_amount / num_payments, amortizing)
+
+
+def remaining_balance(loan_amount, payment, interest_rate, months) -> np.ndarray:
+    """
+    Closed-form loan balance after a number of level payments.
+
+    Matches the running balance in generateAmortizationSchedule before its
+    max(0, balance) display clamp.
+    """
+    loan_amount = np.asarray(loan_amount, dtype=float)
+    payment = np.asarray(payment, dtype=float)
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    months = np.asarray(months, dtype=float)
+    zero_rate = monthly_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_rate)
+    growth = (1 + safe_rate) ** months
+    amortizing = loan_amount * growth - payment * (growth - 1) / safe_rate
+    return np.where(zero_rate, loan_amount - payment * months, amortizing)
+
+
+def first_year_principal(loan_amount, payment, interest_rate, loan_term_years) -> np.ndarray:
+    """Vectorized calculateFirstYearPrincipal."""
+    months = np.minimum(12, np.asarray(loan_term_years, dtype=float) * 12)
+    return np.asarray(loan_amount, dtype=float) - remaining_balance(loan_amount, payment, interest_rate, months)
+
+
+def property_fields(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Extract the per-project Property inputs of the summary model as columns.
+
+    Returns:
+        One array per PROPERTY_FIELDS entry plus:
+        - mortgageOverride: monthlyMortgageOverride, or NaN when not set
+        - totalInvestment: calculateTotalInvestment
+    """
+    columns = {
+        field: np.array([float(project['property'][field]) for project in projects])
+        for field in PROPERTY_FIELDS
+    }
+    overrides = [project['property'].get('monthlyMortgageOverride') for project in projects]
+    columns['mortgageOverride'] = np.array([
+        float(value) if value is not None and value > 0 else np.nan for value in overrides
+    ])
+    columns['totalInvestment'] = np.array([
+        calculate_total_investment(project['property']) for project in projects
+    ])
+    return columns
+
+
+def property_columns(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Extract the per-project inputs of the summary model as columns.
+
+    Returns:
+        property_fields plus:
+        - monthlyRevenue: total unit revenue
+        - unitExpenses: total unit expenses at the purchase price
+        - unitExpensesBase / unitExpensesPerValue: unit expenses as
+          base + perValue * property value (see expense_compiler)
+        - occupancySlope / occupancyIndependent: unit net income as a
+          linear function of a uniform occupancy (see expense_compiler)
+    """
+    columns = property_fields(projects)
+    unit_expenses = project_unit_expenses(projects)
+    columns['monthlyRevenue'] = unit_expenses['monthlyRevenue']
+    columns['occupancySlope'] = unit_expenses['occupancySlope']
+    columns['occupancyIndependent'] = unit_expenses['occupancyIndependent']
+    columns['unitExpensesBase'] = unit_expenses['base']
+    columns['unitExpensesPerValue'] = unit_expenses['perPropertyValue']
+    columns['unitExpenses'] = unit_expenses['base'] + unit_expenses['perPropertyValue'] * columns['purchasePrice']
+    return columns
+
+
+def summary_metrics(projects: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    PropertySummary metrics for many projects at once.
+
+    Returns:
+        One array per calculate_property_summary key, plus breakEvenOccupancy:
+        the occupancy percent, applied to every STR/MTR/LTR unit, at which
+        monthly cash flow is zero (0 if positive even when empty, inf if no
+        occupancy breaks even).
+    """
+    columns = property_columns(projects)
+    price = columns['purchasePrice']
+
+    loan_amount = price - price * (columns['downPaymentPercent'] / 100)
+    payment = monthly_payments(loan_amount, columns['interestRate'], columns['loanTerm'])
+    mortgage = np.where(np.isnan(columns['mortgageOverride']), payment, columns['mortgageOverride'])
+
+    property_expenses = price * (columns['propertyTaxRate'] / 100) / 12 + columns['baseInsurance'] + columns['hoaFees']
+    total_monthly_expenses = columns['unitExpenses'] + property_expenses
+    monthly_cash_flow = columns['monthlyRevenue'] - total_monthly_expenses - mortgage
+    annual_cash_flow = monthly_cash_flow * 12
+
+    total_investment = columns['totalInvestment']
+    principal = first_year_principal(loan_amount, payment, columns['interestRate'], columns['loanTerm'])
+    invested = total_investment > 0
+    safe_investment = np.where(invested, total_investment, 1.0)
+
+    # Cash flow at uniform occupancy x is slope * x + fixed_net
+    slope = columns['occupancySlope']
+    fixed_net = (
+        columns['occupancyIndependent'] - columns['unitExpensesPerValue'] * price -
+        property_expenses - mortgage
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        break_even = np.where(
+            slope > 0,
+            np.maximum(-fixed_net / np.where(slope > 0, slope, 1.0), 0.0) * 100,
+            np.where(fixed_net >= 0, 0.0, np.inf)
+        )
+
+    return {
+        'totalMonthlyRevenue': columns['monthlyRevenue'],
+        'totalUnitExpenses': columns['unitExpenses'],
+        'propertyExpenses': property_expenses,
+        'totalMonthlyExpenses': total_monthly_expenses,
+        'monthlyMortgagePayment': mortgage,
+        'monthlyCashFlow': monthly_cash_flow,
+        'annualCashFlow': annual_cash_flow,
+        'totalInvestment': total_investment,
+        'cashOnCashReturn': np.where(invested, annual_cash_flow / safe_investment * 100, 0.0),
+        'firstYearPrincipal': principal,
+        'totalReturn': np.where(invested, (annual_cash_flow + principal) / safe_investment * 100, 0.0),
+        'breakEvenOccupancy': break_even,
+    }
+
+
+def summarize_valid(projects: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray], int]:
+    """
+    summary_metrics for a batch that may contain malformed records.
+
+    The whole batch is tried first; if that fails, each record is checked with
+    the scalar model and only the good ones are summarized.
+
+    Returns:
+        (valid projects, their summary_metrics, number of records dropped)
+    """
+    try:
+        return projects, summary_metrics(projects), 0
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        pass
+
+    good = []
+    for project in projects:
+        try:
+            calculate_property_summary(project)
+            good.append(project)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            continue
+    return good, summary_metrics(good) if good else {}, len(projects) - len(good)
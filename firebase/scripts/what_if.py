@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+What-If Analysis
+Evaluates exported projects across a grid of Property financing assumptions
+and prints a ranked table of the results.
+
+Usage:
+    python what_if.py exports/ --grid interestRate=6.25,7.5 --grid downPaymentPercent=15,20,25
+    python what_if.py deal.json --grid interestRate=5:8:0.25 --rank-by cashOnCashReturn --top 10
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from annuity_table import DEFAULT_TABLE, AnnuityTable, annuity_factors
+from calculations import calculate_total_investment
+from expense_compiler import project_unit_expenses
+from project_files import load_projects
+from result_cache import ResultCache, add_cache_argument, cached_per_project, engine_version
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Property fields that can be swept
+GRID_FIELDS = ('interestRate', 'downPaymentPercent', 'loanTerm', 'purchasePrice', 'propertyTaxRate')
+
+# Metrics computed for every grid point (PropertySummary definitions)
+METRICS = (
+    'monthlyCashFlow',
+    'annualCashFlow',
+    'cashOnCashReturn',
+    'totalReturn',
+    'monthlyMortgagePayment',
+    'totalInvestment',
+)
+
+# Grid points evaluated per task, and the size above which a process pool is used
+CHUNK_SIZE = 250_000
+POOL_THRESHOLD = 500_000
+
+
+# Color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+
+def print_error(message: str):
+    """Print an error message."""
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def print_info(message: str):
+    """Print an info message."""
+    print(f"{Colors.OKBLUE}ℹ {message}{Colors.ENDC}", file=sys.stderr)
+
+
+def parse_grid_values(spec: str) -> np.ndarray:
+    """
+    Parse a grid axis specification.
+
+    Args:
+        spec: Comma-separated values ("6.25,7.5") or an inclusive
+              START:STOP:STEP range ("5:8:0.25")
+
+    Returns:
+        1-D array of axis values
+    """
+    if ':' in spec:
+        start, stop, step = (float(part) for part in spec.split(':'))
+        if step <= 0:
+            raise ValueError(f"Range step must be positive: {spec}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return np.round(start + step * np.arange(count), 10)
+    return np.array([float(value) for value in spec.split(',') if value.strip()])
+
+
+def parse_grid(specs: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Parse repeated FIELD=VALUES arguments into an ordered grid."""
+    grid: Dict[str, np.ndarray] = {}
+    for spec in specs:
+        field, sep, values = spec.partition('=')
+        if not sep or field not in GRID_FIELDS:
+            raise ValueError(f"Grid axis must be one of {', '.join(GRID_FIELDS)}: {spec}")
+        grid[field] = parse_grid_values(values)
+        if grid[field].size == 0:
+            raise ValueError(f"Grid axis has no values: {spec}")
+    return grid
+
+
+def grid_columns(
+    property: Dict[str, Any],
+    grid: Dict[str, np.ndarray],
+    start: int,
+    stop: int
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Materialize Property fields for a flat slice of the grid's cross product.
+
+    Returns:
+        (field columns, position on each swept axis)
+    """
+    columns: Dict[str, np.ndarray] = {}
+    positions: Dict[str, np.ndarray] = {}
+    if grid:
+        shape = tuple(values.size for values in grid.values())
+        positions = dict(zip(grid, np.unravel_index(np.arange(start, stop), shape)))
+        columns = {field: values[positions[field]] for field, values in grid.items()}
+
+    for field in GRID_FIELDS:
+        if field not in columns:
+            columns[field] = np.full(stop - start, float(property[field]))
+    return columns, positions
+
+
+def financing_factors(
+    property: Dict[str, Any],
+    grid: Dict[str, np.ndarray],
+    positions: Dict[str, np.ndarray],
+    table: Optional[AnnuityTable] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-dollar mortgage payment and first-year principal for a grid slice.
+
+    Both depend only on (interestRate, loanTerm), so they are computed once
+    per pair of axis values and gathered, instead of once per grid point.
+    """
+    rates = grid.get('interestRate', np.array([float(property['interestRate'])]))
+    terms = grid.get('loanTerm', np.array([float(property['loanTerm'])])) * 12
+    payment, balance = annuity_factors(rates[:, None], terms[None, :], np.minimum(12, terms)[None, :], table)
+    pair = positions.get('interestRate', 0) * terms.size + positions.get('loanTerm', 0)
+    return payment.reshape(-1)[pair], 1 - balance.reshape(-1)[pair]
+
+
+def evaluate_grid(
+    project: Dict[str, Any],
+    grid: Dict[str, np.ndarray],
+    start: int = 0,
+    stop: Optional[int] = None,
+    honor_override: bool = True,
+    table: Optional[AnnuityTable] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate PropertySummary metrics over a slice of the grid for one project.
+
+    Args:
+        project: Project dict
+        grid: Ordered mapping of Property field -> axis values
+        start: First flat grid index to evaluate
+        stop: One past the last flat grid index (default: whole grid)
+        honor_override: Use monthlyMortgageOverride when set, as the app does
+        table: Annuity-factor table for the mortgage math (default: exact formula)
+
+    Returns:
+        Dict of swept field columns plus one array per metric
+    """
+    property = project['property']
+    units = project['units']
+    if stop is None:
+        stop = int(np.prod([values.size for values in grid.values()]))
+
+    columns, positions = grid_columns(property, grid, start, stop)
+    price = columns['purchasePrice']
+
+    # Revenue does not depend on any swept field, and compiled unit expenses
+    # are linear in price (percent-property lines), so one pass covers the grid.
+    compiled = project_unit_expenses([project])
+    revenue = compiled['monthlyRevenue'][0]
+    unit_expenses = compiled['base'][0] + compiled['perPropertyValue'][0] * price
+
+    property_expenses = (
+        price * (columns['propertyTaxRate'] / 100) / 12 +
+        property['baseInsurance'] + property['hoaFees']
+    )
+
+    loan_amount = price - price * (columns['downPaymentPercent'] / 100)
+    payment_per_dollar, principal_per_dollar = financing_factors(property, grid, positions, table)
+    payment = loan_amount * payment_per_dollar
+    override = property.get('monthlyMortgageOverride')
+    mortgage = (
+        np.full_like(payment, override)
+        if honor_override and override is not None and override > 0 else payment
+    )
+
+    monthly_cash_flow = revenue - unit_expenses - property_expenses - mortgage
+    annual_cash_flow = monthly_cash_flow * 12
+
+    fixed_upfront = calculate_total_investment({**property, 'purchasePrice': 0})
+    total_investment = (
+        price * (columns['downPaymentPercent'] / 100) +
+        price * (property['closingCostsPercent'] / 100) +
+        fixed_upfront
+    )
+    principal = loan_amount * principal_per_dollar
+
+    invested = total_investment > 0
+    safe_investment = np.where(invested, total_investment, 1.0)
+    results = {field: columns[field] for field in grid}
+    results.update({
+        'monthlyCashFlow': monthly_cash_flow,
+        'annualCashFlow': annual_cash_flow,
+        'cashOnCashReturn': np.where(invested, annual_cash_flow / safe_investment * 100, 0.0),
+        'totalReturn': np.where(invested, (annual_cash_flow + principal) / safe_investment * 100, 0.0),
+        'monthlyMortgagePayment': mortgage,
+        'totalInvestment': total_investment,
+    })
+    return results
+
+
+def top_rows(
+    results: Dict[str, np.ndarray],
+    rank_by: str,
+    top: int,
+    ascending: bool
+) -> Dict[str, np.ndarray]:
+    """Keep only the best `top` rows of a result slice (all rows if top <= 0)."""
+    key = results[rank_by] if ascending else -results[rank_by]
+    if 0 < top < key.size:
+        keep = np.argpartition(key, top - 1)[:top]
+        return {name: column[keep] for name, column in results.items()}
+    return results
+
+
+# Worker state, set once per process so tasks only carry grid offsets
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(projects, grid, honor_override, rank_by, top, ascending, table_path=None):
+    # Each process memory-maps the same table file, so its pages are shared
+    table = AnnuityTable.load(table_path, build=False) if table_path else None
+    _WORKER.update(
+        projects=projects, grid=grid, honor_override=honor_override,
+        rank_by=rank_by, top=top, ascending=ascending, table=table
+    )
+
+
+def _run_task(task: Tuple[int, int, int]) -> Tuple[int, Dict[str, np.ndarray]]:
+    project_index, start, stop = task
+    results = evaluate_grid(
+        _WORKER['projects'][project_index], _WORKER['grid'], start, stop, _WORKER['honor_override'],
+        _WORKER['table']
+    )
+    return project_index, top_rows(results, _WORKER['rank_by'], _WORKER['top'], _WORKER['ascending'])
+
+
+def run_what_if(
+    projects: List[Dict[str, Any]],
+    grid: Dict[str, np.ndarray],
+    rank_by: str = 'monthlyCashFlow',
+    top: int = 25,
+    ascending: bool = False,
+    honor_override: bool = True,
+    workers: Optional[int] = None,
+    table_path: Optional[str] = None,
+    cache: Optional[ResultCache] = None
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every project over the full grid and rank the results.
+
+    Args:
+        projects: Project dicts
+        grid: Ordered mapping of Property field -> axis values
+        rank_by: Metric to sort by
+        top: Number of rows to return (0 = all)
+        ascending: Sort smallest first instead of largest first
+        honor_override: Use monthlyMortgageOverride when set
+        workers: Process count; defaults to the CPU count for large grids
+        table_path: Built annuity_table.py table to use for the mortgage math
+        cache: Reuse each project's ranked slice from earlier runs with the
+               same inputs and options
+
+    Returns:
+        Ranked rows with project id/name, swept fields and metrics
+    """
+    grid_size = int(np.prod([values.size for values in grid.values()]))
+
+    def evaluate(indices: List[int]) -> List[Dict[str, np.ndarray]]:
+        tasks = [
+            (index, start, min(start + CHUNK_SIZE, grid_size))
+            for index in indices
+            for start in range(0, grid_size, CHUNK_SIZE)
+        ]
+        init_args = (projects, grid, honor_override, rank_by, top, ascending, table_path)
+
+        processes = workers
+        if processes is None:
+            processes = (os.cpu_count() or 1) if grid_size * len(indices) >= POOL_THRESHOLD else 1
+
+        if processes > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=init_args) as pool:
+                partials = list(pool.map(_run_task, tasks))
+        else:
+            _init_worker(*init_args)
+            partials = [_run_task(task) for task in tasks]
+
+        # One ranked slice per project, whatever the number of chunks
+        chunks: Dict[int, List[Dict[str, np.ndarray]]] = {index: [] for index in indices}
+        for project_index, results in partials:
+            chunks[project_index].append(results)
+        merged = []
+        for index in indices:
+            parts = chunks[index]
+            results = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+            merged.append(top_rows(results, rank_by, top, ascending) if len(parts) > 1 else results)
+        return merged
+
+    params = {
+        'grid': [[field, values] for field, values in grid.items()],
+        'rankBy': rank_by,
+        'top': top,
+        'ascending': ascending,
+        'honorOverride': honor_override,
+        'annuityTable': table_path is not None,
+    }
+    per_project = cached_per_project(cache, 'what_if', projects, params, engine_version('what_if'), evaluate)
+
+    rows: List[Dict[str, Any]] = []
+    for project, results in zip(projects, per_project):
+        names = list(results)
+        for values in zip(*(results[name].tolist() for name in names)):
+            row = {'projectId': project.get('id', ''), 'projectName': project.get('name', '')}
+            row.update(zip(names, values))
+            rows.append(row)
+
+    rows.sort(key=lambda row: row[rank_by], reverse=not ascending)
+    return rows[:top] if top > 0 else rows
+
+
+def format_table(rows: List[Dict[str, Any]], grid_fields: Sequence[str]) -> str:
+    """Render ranked rows as a fixed-width text table."""
+    headers = ['#', 'Project'] + list(grid_fields) + ['Cash Flow/mo', 'CoC %', 'Total Ret %', 'Mortgage/mo']
+    body = [
+        [str(rank), row['projectName'] or row['projectId']] +
+        [f"{row[field]:g}" for field in grid_fields] +
+        [
+            f"{row['monthlyCashFlow']:,.0f}",
+            f"{row['cashOnCashReturn']:.1f}",
+            f"{row['totalReturn']:.1f}",
+            f"{row['monthlyMortgagePayment']:,.0f}",
+        ]
+        for rank, row in enumerate(rows, 1)
+    ]
+    widths = [max(len(cell) for cell in column) for column in zip(headers, *body)]
+
+    lines = [
+        '  '.join(cell.ljust(width) if i < 2 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in [headers] + body
+    ]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main script execution."""
+    parser = argparse.ArgumentParser(description='Rank exported projects across a grid of financing assumptions')
+    parser.add_argument('paths', nargs='+', help='Project JSON/JSONL files or folders')
+    parser.add_argument(
+        '--grid',
+        action='append',
+        default=[],
+        metavar='FIELD=VALUES',
+        help=f"Grid axis, e.g. interestRate=6.25,7.5 or interestRate=5:8:0.25 ({', '.join(GRID_FIELDS)})"
+    )
+    parser.add_argument('--rank-by', choices=METRICS, default='monthlyCashFlow', help='Metric to rank by')
+    parser.add_argument('--ascending', action='store_true', help='Rank smallest first')
+    parser.add_argument('--top', type=int, default=25, help='Rows to show (0 = all)')
+    parser.add_argument('--format', choices=('table', 'csv', 'json'), default='table', help='Output format')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count for large grids)')
+    parser.add_argument(
+        '--annuity-table',
+        nargs='?',
+        const=str(DEFAULT_TABLE),
+        default=None,
+        metavar='PATH',
+        help='Look mortgage factors up in a memory-mapped table (built if missing; see annuity_table.py)'
+    )
+    parser.add_argument(
+        '--ignore-override',
+        action='store_true',
+        help='Recompute the mortgage even when monthlyMortgageOverride is set'
+    )
+    add_cache_argument(parser)
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+        projects = load_projects(args.paths)
+        if args.annuity_table:
+            AnnuityTable.load(args.annuity_table)
+    except (ValueError, OSError) as e:
+        print_error(str(e))
+        sys.exit(1)
+
+    if not projects:
+        print_error("No projects found")
+        sys.exit(1)
+
+    grid_size = int(np.prod([values.size for values in grid.values()]))
+    print_info(f"Evaluating {len(projects)} project(s) x {grid_size} scenario(s)")
+
+    cache = ResultCache(Path(args.cache)) if args.cache else None
+    rows = run_what_if(
+        projects,
+        grid,
+        rank_by=args.rank_by,
+        top=args.top,
+        ascending=args.ascending,
+        honor_override=not args.ignore_override,
+        workers=args.workers,
+        table_path=args.annuity_table,
+        cache=cache
+    )
+    if cache:
+        print_info(f"Cache: {cache.hits} project(s) reused, {cache.misses} computed")
+        cache.close()
+
+    if args.format == 'json':
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    elif args.format == 'csv':
+        fieldnames = ['projectId', 'projectName'] + list(grid) + list(METRICS)
+        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        print(format_table(rows, list(grid)))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print_error("\n\nCancelled by user")
+        sys.exit(1)
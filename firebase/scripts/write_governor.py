@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Write Governor
+Paces bulk Firestore writes so long jobs run at the fastest rate Firestore
+sustains instead of failing midway or being throttled by hand.
+
+Each collection gets its own budget:
+- a token bucket whose rate follows Firestore's 500/50/5 ramp-up rule
+  (start at 500 writes/s, grow by 50% every 5 minutes)
+- an additive-increase / multiplicative-decrease limit on batches in
+  flight, and on the rate: contention (RESOURCE_EXHAUSTED, ABORTED) halves
+  both, each success adds back a little
+- retries with jittered exponential backoff for retryable errors
+
+Writes to the same document are also spaced at least a second apart,
+Firestore's sustained per-document limit.
+
+commit_batches() in firestore_client.py sends every batch through a
+governor; share one WriteGovernor between calls to share the budgets.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Firestore's ramp-up rule: 500 writes/s, +50% every 5 minutes
+RAMP_START_RATE = 500.0
+RAMP_GROWTH = 1.5
+RAMP_INTERVAL_SECONDS = 300.0
+
+# Sustained writes per second to a single document
+DOCUMENT_MIN_INTERVAL = 1.0
+
+# Errors (by google.api_core exception class name) worth retrying, and the
+# subset that means "slow down"
+RETRYABLE_ERRORS = frozenset({
+    'ResourceExhausted', 'TooManyRequests', 'Aborted', 'DeadlineExceeded', 'ServiceUnavailable', 'InternalServerError',
+})
+CONTENTION_ERRORS = frozenset({'ResourceExhausted', 'TooManyRequests', 'Aborted'})
+
+DEFAULT_MAX_RETRIES = 8
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 30.0
+
+# Recent documents remembered for per-document pacing
+TRACKED_DOCUMENTS = 200_000
+
+# Commit latencies kept per collection for percentiles
+LATENCY_SAMPLES = 1000
+
+
+def _error_name(error: BaseException) -> str:
+    return type(error).__name__
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a commit error is transient."""
+    return _error_name(error) in RETRYABLE_ERRORS
+
+
+def is_contention(error: BaseException) -> bool:
+    """Whether a commit error means Firestore wants less traffic."""
+    return _error_name(error) in CONTENTION_ERRORS
+
+
+class CollectionBudget:
+    """Token bucket plus AIMD concurrency limit for one collection."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        start_rate: float = RAMP_START_RATE,
+        ramp: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.start_rate = start_rate
+        self.ramp = ramp
+        self._clock = clock
+        self._started = clock()
+        self._condition = threading.Condition()
+
+        self.rate = start_rate
+        self.limit = float(max_concurrency)
+        self._tokens = start_rate
+        self._refilled = self._started
+        self._in_flight = 0
+
+        self.writes = 0
+        self.batches = 0
+        self.retries = 0
+        self.contention = 0
+        self.failures = 0
+        self.waited_seconds = 0.0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def ceiling(self) -> float:
+        """Highest rate the ramp allows right now."""
+        if not self.ramp:
+            return float('inf')
+        steps = int((self._clock() - self._started) // RAMP_INTERVAL_SECONDS)
+        return self.start_rate * RAMP_GROWTH ** steps
+
+    def _refill(self, now: float):
+        self.rate = min(self.rate, self.ceiling()) if self.ramp else self.rate
+        capacity = max(self.rate, 1.0)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self, count: int):
+        """Wait for a concurrency slot and `count` write tokens."""
+        started = self._clock()
+        with self._condition:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                # A batch larger than the bucket may go into debt once it is full
+                needed = min(count, max(self.rate, 1.0))
+                if self._in_flight < max(1, int(self.limit)) and self._tokens >= needed:
+                    self._tokens -= count
+                    self._in_flight += 1
+                    break
+                if self._in_flight >= max(1, int(self.limit)):
+                    self._condition.wait(0.05)
+                else:
+                    self._condition.wait(min(1.0, (needed - self._tokens) / self.rate))
+            self.waited_seconds += self._clock() - started
+
+    def release(self, count: int, latency: float, error: Optional[BaseException] = None, retrying: bool = False):
+        """
+        Return a slot and adapt the limits to how the commit went.
+
+        Args:
+            count: Writes in the commit
+            latency: Seconds the commit took
+            error: The commit's error, if it failed
+            retrying: The failed commit will be retried, so it counts as a
+                retry rather than a failure
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if error is None:
+                self.writes += count
+                self.batches += 1
+                self._latencies.append(latency)
+                # Additive increase: one more slot per `limit` successes, a
+                # tenth of the start rate per batch, both within their caps
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / max(self.limit, 1.0))
+                self.rate = min(self.ceiling(), self.rate + self.start_rate / 10)
+            else:
+                if is_contention(error):
+                    self.contention += 1
+                    self.limit = max(1.0, self.limit / 2)
+                    self.rate = max(1.0, self.rate / 2)
+                if retrying:
+                    self.retries += 1
+                else:
+                    self.failures += 1
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters and current limits."""
+        elapsed = max(self._clock() - self._started, 1e-9)
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+
+        return {
+            'writes': self.writes,
+            'batches': self.batches,
+            'retries': self.retries,
+            'contention': self.contention,
+            'failures': self.failures,
+            'writesPerSecond': self.writes / elapsed,
+            'rate': self.rate,
+            'ceiling': self.ceiling(),
+            'concurrency': int(self.limit),
+            'waitedSeconds': self.waited_seconds,
+            'latencyP50': percentile(0.5),
+            'latencyP95': percentile(0.95),
+        }
+
+
+class WriteGovernor:
+    """Shared pacing for bulk writes, with one budget per collection."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        start_rate: float = RAMP_START_RATE,
+        ramp: bool = True,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        document_interval: float = DOCUMENT_MIN_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            max_concurrency: Most batches in flight per collection
+            start_rate: Writes/s each collection starts at
+            ramp: Follow the 500/50/5 ramp (off for the emulator or a
+                collection known to be warm)
+            max_retries: Retries per batch for retryable errors
+            document_interval: Minimum seconds between writes to one document
+        """
+        self.max_concurrency = max_concurrency
+        self.start_rate = start_rate
+        self.ramp = ramp
+        self.max_retries = max_retries
+        self.document_interval = document_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._budgets: Dict[str, CollectionBudget] = {}
+        self._lock = threading.Lock()
+        self._last_write: 'OrderedDict[str, float]' = OrderedDict()
+
+    def budget(self, collection: str) -> CollectionBudget:
+        """The budget for a collection, created on first use."""
+        with self._lock:
+            if collection not in self._budgets:
+                self._budgets[collection] = CollectionBudget(
+                    collection, self.max_concurrency, self.start_rate, self.ramp, self._clock
+                )
+            return self._budgets[collection]
+
+    def _pace_documents(self, paths: Sequence[str]):
+        """Wait until none of the documents was written within document_interval."""
+        if not self.document_interval:
+            return
+        # Check and reserve the slot together, so concurrent commits touching
+        # the same document queue up behind each other instead of all
+        # seeing the same free slot
+        with self._lock:
+            latest = max((self._last_write.get(path, float('-inf')) for path in paths), default=float('-inf'))
+            now = self._clock()
+            slot = max(now, latest + self.document_interval)
+            for path in paths:
+                self._last_write[path] = slot
+                self._last_write.move_to_end(path)
+            while len(self._last_write) > TRACKED_DOCUMENTS:
+                self._last_write.popitem(last=False)
+        if slot > now:
+            self._sleep(slot - now)
+
+    def call(self, targets: Sequence[Tuple[str, str]], commit: Callable[[], T]) -> T:
+        """
+        Run a commit under the budgets of the collections it writes to.
+
+        Args:
+            targets: (collection id, document path) for each write in the commit
+            commit: Performs the commit; called again on retryable errors,
+                so it must build its batch afresh
+
+        Returns:
+            What commit returned
+
+        Raises:
+            The commit's error if it is not retryable or retries run out
+        """
+        counts: Dict[str, int] = {}
+        for collection, _ in targets:
+            counts[collection] = counts.get(collection, 0) + 1
+        # Fixed order so concurrent multi-collection commits cannot deadlock
+        budgets = [(self.budget(collection), counts[collection]) for collection in sorted(counts)]
+        paths = [path for _, path in targets]
+
+        attempt = 0
+        while True:
+            # Wait for the document slots before taking a concurrency slot and
+            # tokens, so a commit queued on a hot document holds neither
+            self._pace_documents(paths)
+            for budget, count in budgets:
+                budget.acquire(count)
+            started = self._clock()
+            try:
+                result = commit()
+            except Exception as error:
+                latency = self._clock() - started
+                retrying = is_retryable(error) and attempt < self.max_retries
+                for budget, count in budgets:
+                    budget.release(count, latency, error, retrying)
+                if not retrying:
+                    raise
+                attempt += 1
+                backoff = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                self._sleep(backoff * random.uniform(0.5, 1.0))
+                continue
+
+            latency = self._clock() - started
+            for budget, count in budgets:
+                budget.release(count, latency)
+            return result
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """CollectionBudget.metrics() for every collection written so far."""
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return {budget.name: budget.metrics() for budget in budgets}
+
+    def summary_lines(self) -> List[str]:
+        """One human-readable line per collection."""
+        lines = []
+        for collection, stats in self.metrics().items():
+            p95 = f", p95 commit {stats['latencyP95'] * 1000:.0f} ms" if stats['latencyP95'] is not None else ''
+            lines.append(
+                f"{collection}: {stats['writes']:,} writes at {stats['writesPerSecond']:,.0f}/s "
+                f"(limit {stats['rate']:,.0f}/s, {stats['concurrency']} in flight{p95}); "
+                f"{stats['retries']} retries, {stats['contention']} contention, "
+                f"workers waited {stats['waitedSeconds']:.1f}s in total"
+            )
+        return lines
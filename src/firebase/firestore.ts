@@ -4,25 +4,47 @@ import {
   getDoc,
   setDoc,
   getDocs,
-  deleteDoc,
   query,
   where,
   orderBy,
   Timestamp,
   serverTimestamp,
+  writeBatch,
+  arrayUnion,
+  arrayRemove,
 } from 'firebase/firestore';
 import { db } from './config';
-import { Project, ProjectListItem } from '../types';
+import { Project, ProjectListItem, ProjectSummaryMetrics } from '../types';
+import {
+  calculateUnitMonthlyRevenue,
+  calculateUnitMonthlyExpenses,
+  calculatePropertyMonthlyExpenses,
+  calculateTotalInvestment,
+  calculateFirstYearPrincipal,
+  getPropertyMortgagePayment,
+} from '../utils';
 
 // Collection references
 const USERS_COLLECTION = 'users';
 const PROPERTIES_COLLECTION = 'properties';
+const PROPERTY_SUMMARIES_COLLECTION = 'propertySummaries';
+
+// Bump when the summary fields change so the backfill job rebuilds them
+const SUMMARY_VERSION = 1;
+
+// Set on users/{uid} once every project of the user has a summary
+// (by the listing fallback below or by firebase/scripts/backfill_summaries.py)
+const SUMMARIES_COMPLETE_FIELD = 'summariesComplete';
+
+// Summaries written per batch by the listing fallback (below the 500-write limit)
+const SUMMARY_BACKFILL_BATCH_SIZE = 400;
 
 // User profile
 export interface UserProfile {
   uid: string;
   email: string;
   displayName?: string;
+  summariesComplete?: boolean; // Every project has a propertySummaries record
   createdAt: Timestamp;
   updatedAt: Timestamp;
 }
@@ -34,6 +56,66 @@ export interface FirestoreProject extends Omit<Project, 'createdAt' | 'updatedAt
   updatedAt: Timestamp;
   isShared?: boolean;
   sharedWith?: string[];
+  schemaVersion?: number; // Set by firebase/scripts/migrate.py
+}
+
+// Lightweight per-project record used for listings
+export interface FirestoreProjectSummary extends ProjectSummaryMetrics {
+  id: string;
+  userId: string;
+  name: string;
+  description: string;
+  summaryVersion: number;
+  isShared?: boolean; // Mirrors the project's sharing fields
+  sharedWith?: string[];
+  createdAt: Timestamp;
+  updatedAt: Timestamp;
+}
+
+// Compute the headline metrics shown by PropertySummary
+export function calculateProjectSummaryMetrics(project: Project): ProjectSummaryMetrics {
+  const { property, units } = project;
+
+  const monthlyRevenue = units.reduce((sum, unit) => sum + calculateUnitMonthlyRevenue(unit), 0);
+  const unitExpenses = units.reduce(
+    (sum, unit) => sum + calculateUnitMonthlyExpenses(unit, property.purchasePrice),
+    0
+  );
+  const mortgage = getPropertyMortgagePayment(property);
+
+  const monthlyCashFlow =
+    monthlyRevenue - unitExpenses - calculatePropertyMonthlyExpenses(property) - mortgage.monthlyPayment;
+  const annualCashFlow = monthlyCashFlow * 12;
+  const totalInvestment = calculateTotalInvestment(property);
+  const firstYearPrincipal = calculateFirstYearPrincipal(
+    property.purchasePrice,
+    property.downPaymentPercent,
+    property.interestRate,
+    property.loanTerm
+  );
+
+  return {
+    unitCount: units.length,
+    monthlyRevenue,
+    monthlyCashFlow,
+    annualCashFlow,
+    totalInvestment,
+    cashOnCashReturn: totalInvestment > 0 ? (annualCashFlow / totalInvestment) * 100 : 0,
+    totalReturn: totalInvestment > 0 ? ((annualCashFlow + firstYearPrincipal) / totalInvestment) * 100 : 0,
+  };
+}
+
+function buildProjectSummary(userId: string, project: Project): any {
+  return {
+    ...calculateProjectSummaryMetrics(project),
+    id: project.id,
+    userId,
+    name: project.name,
+    description: project.description || '',
+    summaryVersion: SUMMARY_VERSION,
+    createdAt: Timestamp.fromDate(new Date(project.createdAt)),
+    updatedAt: serverTimestamp(),
+  };
 }
 
 // Create or update user profile
@@ -60,9 +142,10 @@ export async function getUserProfile(uid: string): Promise<UserProfile | null> {
   return null;
 }
 
-// Save project to Firestore
+// Save project (and its listing summary) to Firestore
 export async function saveProjectToFirestore(userId: string, project: Project): Promise<void> {
   const projectRef = doc(db, PROPERTIES_COLLECTION, project.id);
+  const summaryRef = doc(db, PROPERTY_SUMMARIES_COLLECTION, project.id);
 
   const firestoreProject: any = {
     ...project,
@@ -71,7 +154,10 @@ export async function saveProjectToFirestore(userId: string, project: Project):
     updatedAt: serverTimestamp(),
   };
 
-  await setDoc(projectRef, firestoreProject, { merge: true });
+  const batch = writeBatch(db);
+  batch.set(projectRef, firestoreProject, { merge: true });
+  batch.set(summaryRef, buildProjectSummary(userId, project), { merge: true });
+  await batch.commit();
 }
 
 // Get project from Firestore
@@ -91,8 +177,40 @@ export async function getProjectFromFirestore(projectId: string): Promise<Projec
   return null;
 }
 
-// Get all projects for a user
+// Get all projects for a user from the lightweight summary records
 export async function getUserProjects(userId: string): Promise<ProjectListItem[]> {
+  const summariesQuery = query(
+    collection(db, PROPERTY_SUMMARIES_COLLECTION),
+    where('userId', '==', userId),
+    orderBy('updatedAt', 'desc')
+  );
+
+  const [userSnap, summariesSnapshot] = await Promise.all([
+    getDoc(doc(db, USERS_COLLECTION, userId)),
+    getDocs(summariesQuery),
+  ]);
+
+  // Until every project is known to have a summary, list the full documents so
+  // none go missing (a first save after deploy writes one summary, not all)
+  if (userSnap.data()?.[SUMMARIES_COMPLETE_FIELD] !== true) {
+    return getUserProjectsFromProperties(userId, new Set(summariesSnapshot.docs.map((doc) => doc.id)));
+  }
+
+  return summariesSnapshot.docs.map((doc) => {
+    const data = doc.data() as FirestoreProjectSummary;
+    return {
+      id: data.id,
+      name: data.name,
+      description: data.description,
+      createdAt: data.createdAt.toDate().toISOString(),
+      updatedAt: data.updatedAt.toDate().toISOString(),
+    };
+  });
+}
+
+// Get all projects for a user by reading every full project document, writing
+// the summaries that are missing and then marking the user's summaries complete
+async function getUserProjectsFromProperties(userId: string, summarized: Set<string>): Promise<ProjectListItem[]> {
   const projectsQuery = query(
     collection(db, PROPERTIES_COLLECTION),
     where('userId', '==', userId),
@@ -101,6 +219,7 @@ export async function getUserProjects(userId: string): Promise<ProjectListItem[]
 
   const querySnapshot = await getDocs(projectsQuery);
   const projects: ProjectListItem[] = [];
+  const missing: FirestoreProject[] = [];
 
   querySnapshot.forEach((doc) => {
     const data = doc.data() as FirestoreProject;
@@ -111,15 +230,49 @@ export async function getUserProjects(userId: string): Promise<ProjectListItem[]
       createdAt: data.createdAt.toDate().toISOString(),
       updatedAt: data.updatedAt.toDate().toISOString(),
     });
+    if (!summarized.has(doc.id)) {
+      missing.push(data);
+    }
   });
 
+  try {
+    await backfillSummaries(userId, missing);
+  } catch (error) {
+    // The listing above is complete either way; the next load retries
+    console.warn('Could not backfill project summaries:', error);
+  }
+
   return projects;
 }
 
-// Delete project from Firestore
+async function backfillSummaries(userId: string, projects: FirestoreProject[]): Promise<void> {
+  for (let start = 0; start < projects.length; start += SUMMARY_BACKFILL_BATCH_SIZE) {
+    const batch = writeBatch(db);
+    for (const data of projects.slice(start, start + SUMMARY_BACKFILL_BATCH_SIZE)) {
+      const project: Project = {
+        ...data,
+        createdAt: data.createdAt.toDate().toISOString(),
+        updatedAt: data.updatedAt.toDate().toISOString(),
+      };
+      // Keep the project's updatedAt so sync sees the listing as unchanged
+      batch.set(
+        doc(db, PROPERTY_SUMMARIES_COLLECTION, data.id),
+        { ...buildProjectSummary(userId, project), updatedAt: data.updatedAt },
+        { merge: true }
+      );
+    }
+    await batch.commit();
+  }
+
+  await setDoc(doc(db, USERS_COLLECTION, userId), { [SUMMARIES_COMPLETE_FIELD]: true }, { merge: true });
+}
+
+// Delete project (and its listing summary) from Firestore
 export async function deleteProjectFromFirestore(projectId: string): Promise<void> {
-  const projectRef = doc(db, PROPERTIES_COLLECTION, projectId);
-  await deleteDoc(projectRef);
+  const batch = writeBatch(db);
+  batch.delete(doc(db, PROPERTIES_COLLECTION, projectId));
+  batch.delete(doc(db, PROPERTY_SUMMARIES_COLLECTION, projectId));
+  await batch.commit();
 }
 
 // Share a project publicly
@@ -135,7 +288,14 @@ export async function shareProject(userId: string, project: Project): Promise<st
     updatedAt: serverTimestamp(),
   };
 
-  await setDoc(projectRef, updatedProject);
+  const batch = writeBatch(db);
+  batch.set(projectRef, updatedProject);
+  batch.set(
+    doc(db, PROPERTY_SUMMARIES_COLLECTION, project.id),
+    { ...buildProjectSummary(userId, project), isShared: true },
+    { merge: true }
+  );
+  await batch.commit();
 
   // Return the shareable ID
   return project.id;
@@ -162,10 +322,35 @@ export async function getSharedProject(projectId: string): Promise<Project | nul
   return null;
 }
 
+// Apply a sharing change to a project and its listing summary in one batch,
+// so the summary's updatedAt (and mirrored sharing fields) never drift
+async function updateSharing(projectId: string, changes: Record<string, unknown>): Promise<void> {
+  const projectRef = doc(db, PROPERTIES_COLLECTION, projectId);
+  const projectSnap = await getDoc(projectRef);
+  if (!projectSnap.exists()) {
+    throw new Error(`Project ${projectId} not found`);
+  }
+
+  const data = projectSnap.data() as FirestoreProject;
+  const project: Project = {
+    ...data,
+    createdAt: data.createdAt.toDate().toISOString(),
+    updatedAt: data.updatedAt.toDate().toISOString(),
+  };
+
+  const batch = writeBatch(db);
+  batch.update(projectRef, { ...changes, updatedAt: serverTimestamp() });
+  batch.set(
+    doc(db, PROPERTY_SUMMARIES_COLLECTION, projectId),
+    { ...buildProjectSummary(data.userId, project), ...changes },
+    { merge: true }
+  );
+  await batch.commit();
+}
+
 // Unshare a project
 export async function unshareProject(projectId: string): Promise<void> {
-  const projectRef = doc(db, PROPERTIES_COLLECTION, projectId);
-  await setDoc(projectRef, { isShared: false, updatedAt: serverTimestamp() }, { merge: true });
+  await updateSharing(projectId, { isShared: false });
 }
 
 // Check if project is shared
@@ -182,52 +367,15 @@ export async function isProjectShared(projectId: string): Promise<boolean> {
 }
 
 // Add a collaborator to a project
+// arrayUnion/arrayRemove edit the list server-side, so concurrent edits by
+// other collaborators are not overwritten
 export async function addCollaborator(projectId: string, email: string): Promise<void> {
-  const projectRef = doc(db, PROPERTIES_COLLECTION, projectId);
-  const projectSnap = await getDoc(projectRef);
-
-  if (!projectSnap.exists()) {
-    throw new Error('Project not found');
-  }
-
-  const data = projectSnap.data() as FirestoreProject;
-  const currentCollaborators = data.sharedWith || [];
-
-  // Don't add if already a collaborator
-  if (currentCollaborators.includes(email)) {
-    return;
-  }
-
-  await setDoc(
-    projectRef,
-    {
-      sharedWith: [...currentCollaborators, email],
-      updatedAt: serverTimestamp(),
-    },
-    { merge: true }
-  );
+  await updateSharing(projectId, { sharedWith: arrayUnion(email) });
 }
 
 // Remove a collaborator from a project
 export async function removeCollaborator(projectId: string, email: string): Promise<void> {
-  const projectRef = doc(db, PROPERTIES_COLLECTION, projectId);
-  const projectSnap = await getDoc(projectRef);
-
-  if (!projectSnap.exists()) {
-    throw new Error('Project not found');
-  }
-
-  const data = projectSnap.data() as FirestoreProject;
-  const currentCollaborators = data.sharedWith || [];
-
-  await setDoc(
-    projectRef,
-    {
-      sharedWith: currentCollaborators.filter((e) => e !== email),
-      updatedAt: serverTimestamp(),
-    },
-    { merge: true }
-  );
+  await updateSharing(projectId, { sharedWith: arrayRemove(email) });
 }
 
 // Get list of collaborators for a project
@@ -242,3 +390,28 @@ export async function getCollaborators(projectId: string): Promise<string[]> {
 
   return [];
 }
+
+// Get projects other users have shared with this email (as a collaborator)
+export async function getProjectsSharedWithUser(email: string): Promise<ProjectListItem[]> {
+  const projectsQuery = query(
+    collection(db, PROPERTIES_COLLECTION),
+    where('sharedWith', 'array-contains', email.toLowerCase()),
+    orderBy('updatedAt', 'desc')
+  );
+
+  const querySnapshot = await getDocs(projectsQuery);
+  const projects: ProjectListItem[] = [];
+
+  querySnapshot.forEach((doc) => {
+    const data = doc.data() as FirestoreProject;
+    projects.push({
+      id: data.id,
+      name: data.name,
+      description: data.description,
+      createdAt: data.createdAt.toDate().toISOString(),
+      updatedAt: data.updatedAt.toDate().toISOString(),
+    });
+  });
+
+  return projects;
+}
@@ -22,3 +22,14 @@ export interface ProjectListItem {
   createdAt: string;
   updatedAt: string;
 }
+
+// Headline metrics stored alongside each cloud project so listings don't need full documents
+export interface ProjectSummaryMetrics {
+  unitCount: number;
+  monthlyRevenue: number;
+  monthlyCashFlow: number;
+  annualCashFlow: number;
+  totalInvestment: number;
+  cashOnCashReturn: number;
+  totalReturn: number;
+}
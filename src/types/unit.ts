@@ -27,12 +27,19 @@ export interface GenericRevenue {
 
 export type UnitRevenue = STRRevenue | MTRRevenue | LTRRevenue | GenericRevenue;
 
+// Month-by-month profile for STR/MTR units, January first (12 entries each)
+export interface SeasonalityProfile {
+  rateFactors: number[]; // Multiplier on the unit's nightly/daily/monthly rate
+  occupancyPercent: number[];
+}
+
 export interface Unit {
   id: string;
   label: string;
   type: UnitType;
   revenue: UnitRevenue;
   expenses: Expense[];
+  seasonality?: SeasonalityProfile;
 }
 
 export interface UnitDefaults {